@@ -25,20 +25,26 @@ TEXT:
 {content}
 """
 
+DOCUMENT_CATEGORIES = {
+    "term_test", "teacher_guide", "student_notes",
+    "past_paper", "answer_scheme", "textbook"
+}
+
 def classify_document(text: str) -> str:
     if not text or not text.strip():
         return "unknown"
     
     try:
-        output = gemini_generate(CLASSIFY_PROMPT.format(content=text[:8000])).strip().lower()
+        output = gemini_generate(
+            CLASSIFY_PROMPT.format(content=text[:8000]),
+            service_name="document_classification",
+            use_cache=True,
+            cache_validator=lambda label: label.strip().lower() in DOCUMENT_CATEGORIES,
+        ).strip().lower()
         
-        allowed = {
-            "term_test", "teacher_guide", "student_notes",
-            "past_paper", "answer_scheme", "textbook"
-        }
         # Print for debugging
         print(f"Document classified as: {output}")
-        return output if output in allowed else "unknown"
+        return output if output in DOCUMENT_CATEGORIES else "unknown"
 
     except Exception as e:
         print(f"Error classifying document: {e}")
@@ -72,6 +78,12 @@ def _safe_json_loads(text: str):
         return {}
 
 
+def _is_json_object(text: str) -> bool:
+    """Cache validator for extraction responses: a non-empty JSON object."""
+    result = _safe_json_loads(text)
+    return bool(result) and isinstance(result, dict)
+
+
 def _recover_largest_valid_json(text: str):
     """
     Recover the largest complete JSON object/list inside a malformed response.
@@ -610,6 +622,7 @@ def fix_sinhala_ocr(text: str) -> str:
             prompt,
             budget=EvaluationGeminiClient.OCR_CORRECTION,
             reason="fix_sinhala_ocr",
+            use_cache=True,
         ).strip()
         return corrected if corrected else text
 
@@ -728,6 +741,9 @@ def extract_complete_exam_data(text: str):
             COMBINED_EXAM_PROMPT.format(content=prepared_text),
             json_mode=True,
             model_name=settings.EVAL_GEMINI_QUESTION_PARSING_MODEL,
+            service_name="exam_extraction",
+            use_cache=True,
+            cache_validator=_is_json_object,
         )
 
         result = _safe_json_loads(response_text)
@@ -2506,7 +2522,7 @@ def generate_session_title(message_content: str) -> str:
     
     try:
         # Use lightweight model for title generation to avoid rate limits
-        title = gemini_generate_lightweight(message_content[:500])  # Shorter input
+        title = gemini_generate_lightweight(message_content[:500], use_cache=True)  # Shorter input
         
         # Fallback if generation fails or returns empty
         if not title or len(title) > 80:  # Stricter length limit
@@ -2,7 +2,9 @@
 
 from typing import List, Dict, Optional, Callable, Any
 
-from app.shared.ai.embeddings import generate_embedding, EMBED_MODEL
+import numpy as np
+
+from app.shared.ai.embeddings import generate_embedding, generate_embeddings_batch, EMBED_MODEL
 from app.components.document_processing.utils.text_cleaner import basic_clean
 from app.components.document_processing.utils.chunker import chunk_text
 
@@ -20,27 +22,61 @@ def generate_text_embedding(text: str) -> List[float]:
     )
 
 
-def embed_document_text(
-    text: str,
-    progress_callback: Optional[Callable[[str, float, Optional[Dict[str, Any]]], None]] = None,
-) -> List[float]:
-    if not text or not text.strip():
-        return []
-    cleaned = basic_clean(text)
-    if not cleaned:
-        return []
-    if progress_callback:
-        progress_callback("Generating Document Embedding", 55.0, {"status": "in_progress"})
-    embedding = generate_embedding(
-        cleaned,
-        service_name="document_embedding",
+def generate_text_embeddings(texts: List[str], service_name: str = "text_embedding") -> List[List[float]]:
+    """Batched `generate_text_embedding`: cache first, one Gemini call for the misses."""
+    return generate_embeddings_batch(
+        [basic_clean(text) for text in texts],
+        service_name=service_name,
         metadata_json={
-            "source": "embed_document_text",
+            "source": "generate_text_embeddings",
         },
     )
-    if progress_callback:
-        progress_callback("Document Embedding Complete", 60.0, {"dimensions": len(embedding)})
-    return embedding
+
+
+def _normalized(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+def pool_chunk_embeddings(chunks: List[Dict]) -> List[float]:
+    """
+    Document embedding from already embedded chunks: the mean of the
+    L2-normalised chunk embeddings weighted by chunk text length, then
+    normalised again. Unlike embedding the full text, this covers the whole
+    document and needs no API call.
+    """
+    embedded = [ch for ch in chunks if ch.get("embedding") is not None and len(ch["embedding"])]
+    if not embedded:
+        return []
+    vectors = _normalized(np.asarray([ch["embedding"] for ch in embedded], dtype=np.float32))
+    weights = np.asarray([max(len(ch.get("text") or ""), 1) for ch in embedded], dtype=np.float32)
+    pooled = _normalized(weights @ vectors)
+    return pooled.tolist()
+
+
+def section_centroids(chunks: List[Dict], section_chunks: int) -> List[Dict]:
+    """
+    Pooled embeddings of consecutive runs of `section_chunks` chunks, for
+    section-level document filtering. Chunks are taken in chunk_id order;
+    start_chunk / end_chunk (exclusive) are chunk_ids.
+    """
+    embedded = sorted(
+        (ch for ch in chunks if ch.get("embedding") is not None and len(ch["embedding"])),
+        key=lambda ch: ch.get("chunk_id") or 0,
+    )
+    sections = []
+    for index, start in enumerate(range(0, len(embedded), max(section_chunks, 1))):
+        group = embedded[start:start + max(section_chunks, 1)]
+        sections.append({
+            "section_index": index,
+            "start_chunk": group[0].get("chunk_id"),
+            "end_chunk": (group[-1].get("chunk_id") or 0) + 1,
+            "start_char": group[0].get("start_char"),
+            "end_char": group[-1].get("end_char"),
+            "chunk_count": len(group),
+            "embedding": pool_chunk_embeddings(group),
+        })
+    return sections
 
 
 def embed_chunks(
@@ -60,40 +96,42 @@ def embed_chunks(
         overlap_tokens=overlap_tokens
     )
 
-    results = []
     total_chunks = len(chunk_list)
 
-    for ch in chunk_list:
-        c_text = ch["text"]
-        c_id = ch["chunk_id"]
-        c_numbering = ch.get("numbering")
-        c_start = ch.get("start_char", 0)
-        c_end = ch.get("end_char", len(c_text))
-
-        if progress_callback and total_chunks > 0:
+    def _on_batch_complete(done: int, total: int):
+        if progress_callback and total > 0:
             # Map chunk progress across the 75→95 range
-            chunk_progress = 75.0 + ((c_id / total_chunks) * 20.0)
+            chunk_progress = 75.0 + ((done / total) * 20.0)
             progress_callback(
                 "Embedding Chunk",
                 round(chunk_progress, 1),
                 {
-                    "current_chunk": c_id + 1,
-                    "total_chunks": total_chunks,
-                    "current_action": f"Embedding chunk {c_id + 1} of {total_chunks}",
+                    "current_chunk": done,
+                    "total_chunks": total,
+                    "current_action": f"Embedded {done} of {total} chunks",
                 },
             )
 
-        vec = generate_embedding(
-            c_text,
-            resource_id=doc_id,
-            service_name="chunk_embedding",
-            metadata_json={
-                "source": "embed_chunks",
-                "doc_id": str(doc_id) if doc_id else None,
-                "chunk_id": c_id,
-                "global_id": f"{doc_id}_{c_id}" if doc_id else str(c_id),
-            },
-        )
+    vectors = generate_embeddings_batch(
+        [ch["text"] for ch in chunk_list],
+        resource_id=doc_id,
+        service_name="chunk_embedding",
+        metadata_json={
+            "source": "embed_chunks",
+            "doc_id": str(doc_id) if doc_id else None,
+            "total_chunks": total_chunks,
+        },
+        on_batch_complete=_on_batch_complete,
+    )
+
+    results = []
+
+    for ch, vec in zip(chunk_list, vectors):
+        c_text = ch["text"]
+        c_id = ch["chunk_id"]
+        c_numbering = ch.get("numbering")
+        c_start = ch.get("start_char", 0)
+        c_end = ch.get("end_char", len(c_text))
 
         global_id = f"{doc_id}_{c_id}" if doc_id else str(c_id)
 
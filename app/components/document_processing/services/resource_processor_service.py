@@ -7,8 +7,12 @@ from pathlib import Path
 from sqlalchemy.orm import Session
 import cv2
 
+from app.core.config import settings
 from app.shared.models.resource_file import ResourceFile
 from app.shared.models.resource_chunks import ResourceChunk
+from app.services.lexical_index_service import LexicalIndexService
+from app.services.resource_service import ResourceService
+from app.services.vector_working_set import vector_working_set
 
 logger = logging.getLogger(__name__)
 
@@ -365,9 +369,10 @@ class ResourceProcessorService:
         return "\n".join(questions[:5])
 
     def _save_chunks_to_db(self, chunks: List[Dict[str, Any]], resource_id: str):
-        """Persist chunks with embeddings to database."""
+        """Persist chunks with embeddings and build the resource's lexical index."""
         EXPECTED_DIM = 768  # gemini-embedding-001 dimension
         valid_chunks = 0
+        saved_chunks = []
 
         for chunk_data in chunks:
             content = chunk_data.get("text")
@@ -402,27 +407,51 @@ class ResourceProcessorService:
             )
 
             self.db.add(chunk)
+            saved_chunks.append(chunk)
             valid_chunks += 1
         
         logger.info("Prepared %d valid chunks for resource %s", valid_chunks, resource_id)
 
+        # Build the BM25 inverted index now so queries never re-tokenize chunks
+        # (not needed where the full-text column serves lexical search).
+        # A failure here is not fatal: the index is backfilled on first query.
+        lexical_index = LexicalIndexService(self.db)
+        if lexical_index.uses_postings():
+            self.db.flush()
+            try:
+                with self.db.begin_nested():
+                    lexical_index.index_chunks(resource_id, saved_chunks)
+            except Exception as e:
+                logger.warning("Lexical index build failed for resource %s: %s", resource_id, e)
+
     def _create_document_embedding(
         self,
-        text: str,
+        chunks: List[Dict[str, Any]],
         resource_id: str,
-        progress_callback: Optional[Callable[[str, float, Optional[Dict[str, Any]]], None]] = None,
     ) -> Optional[List[float]]:
-        """Generate a document-level embedding for fast filtering."""
-        from app.components.document_processing.services.embedding_service import embed_document_text
-        
+        """Document-level embedding for fast filtering, pooled from the chunk embeddings."""
+        from app.components.document_processing.services.embedding_service import pool_chunk_embeddings
+
         try:
-            embedding = embed_document_text(text, progress_callback=progress_callback)
+            embedding = pool_chunk_embeddings(chunks)
             if embedding:
-                logger.info("Generated document embedding for resource %s", resource_id)
-            return embedding
+                logger.info("Pooled document embedding for resource %s from %d chunks", resource_id, len(chunks))
+            return embedding or None
         except Exception as e:
             logger.error(f"Failed to create document embedding for resource {resource_id}: {e}")
             return None
+
+    def _save_sections_to_db(self, chunks: List[Dict[str, Any]], resource_id: str):
+        """Store section centroids for section-level document filtering (non-fatal)."""
+        from app.components.document_processing.services.embedding_service import section_centroids
+
+        try:
+            sections = section_centroids(chunks, settings.DOCUMENT_SECTION_CHUNKS)
+            with self.db.begin_nested():
+                ResourceService(self.db).replace_sections(resource_id, sections)
+            logger.info("Stored %d section centroids for resource %s", len(sections), resource_id)
+        except Exception as e:
+            logger.warning("Section centroids failed for resource %s: %s", resource_id, e)
     
     def process_resource(
         self,
@@ -527,42 +556,31 @@ class ResourceProcessorService:
             resource.extracted_text = extracted_text
             resource.language = detected_language
 
-            # Stage: embedding
+            # Stage: chunking
             if progress_callback:
                 progress_callback(
-                    "Generating Document Embedding",
-                    55.0,
+                    "Creating Text Chunks",
+                    75.0,
                     None
                 )
 
-            if resource.document_embedding is None:
-
-                logger.info(
-                    "Generating document embedding for resource %s",
-                    resource.id
-                )
-
-                from app.shared.ai.embeddings import EMBED_MODEL
-
-                document_embedding = self._create_document_embedding(
-                    extracted_text,
-                    str(resource.id),
-                    progress_callback=progress_callback,
-                )
-
-                if document_embedding:
-                    resource.document_embedding = document_embedding
-                    resource.embedding_model = EMBED_MODEL
+            chunks = self._create_chunks(extracted_text, str(resource.id), progress_callback=progress_callback)
 
-            # Stage: chunking
+            # Stage: document embedding, pooled from the chunk embeddings so it
+            # covers the whole document without another (truncated) API call
             if progress_callback:
                 progress_callback(
-                    "Creating Text Chunks",
-                    75.0,
+                    "Generating Document Embedding",
+                    95.0,
                     None
                 )
 
-            chunks = self._create_chunks(extracted_text, str(resource.id), progress_callback=progress_callback)
+            from app.shared.ai.embeddings import EMBED_MODEL
+
+            document_embedding = self._create_document_embedding(chunks, str(resource.id))
+            if document_embedding:
+                resource.document_embedding = document_embedding
+                resource.embedding_model = EMBED_MODEL
 
             # Stage: saving
             if progress_callback:
@@ -573,8 +591,12 @@ class ResourceProcessorService:
                 )
 
             self._save_chunks_to_db(chunks, resource.id)
+            if settings.DOCUMENT_SECTION_CENTROIDS:
+                self._save_sections_to_db(chunks, resource.id)
 
             self.db.commit()
+            # Sessions holding this resource's old chunks in memory reload them
+            vector_working_set.invalidate_resource(resource.id)
 
             # Stage: completed
             if progress_callback:
@@ -2,25 +2,18 @@ import torch
 from typing import List
 import numpy as np
 from app.core.config import settings
+from app.core.model_registry import ModelRegistry, XLMR_MODEL_NAME
 
 
 class EmbeddingService:
-    _model = None
-    
     @classmethod
     def get_model(cls):
-        if cls._model is None:
-            from sentence_transformers import SentenceTransformer
+        # Same XLM-R instance (and XLMR_BACKEND) as grading, not a second torch copy
+        if settings.MODEL_EMBEDDING_NAME == XLMR_MODEL_NAME:
+            from app.shared.ai.embeddings import get_xlmr_model
 
-            model_name = settings.MODEL_EMBEDDING_NAME
-            print(f"[DEBUG] Loading embedding model: {model_name}")
-            try:
-                cls._model = SentenceTransformer(model_name)
-                print(f"[DEBUG] Embedding model loaded successfully: {model_name}")
-            except Exception as e:
-                print(f"[ERROR] Failed to load embedding model {model_name}: {e}")
-                raise
-        return cls._model
+            return get_xlmr_model()
+        return ModelRegistry.get(settings.MODEL_EMBEDDING_NAME)
     
     @staticmethod
     def get_embeddings(texts: List[str]) -> List[List[float]]:
@@ -8,9 +8,15 @@ from rank_bm25 import BM25Okapi
 
 from app.shared.models.text_chunk import TextChunk
 from app.components.text_qa_summary.services.embedding_service import EmbeddingService
-from app.components.text_qa_summary.utils.sinhala_processor import (
-    tokenize_sinhala,
-    calculate_bm25_score
+from app.components.text_qa_summary.utils.sinhala_processor import tokenize_sinhala
+from app.services.retrieval_pipeline import (
+    Candidate,
+    ContextPackingStage,
+    DenseStage,
+    FusionStage,
+    LexicalStage,
+    RetrievalPipeline,
+    ScopeStage,
 )
 
 
@@ -69,120 +75,140 @@ class RetrievalService:
         return intent
     
     @staticmethod
-    def retrieve_relevant_chunks(
+    def _load_chunks(db: Session, chat_id: uuid.UUID, ctx) -> List[TextChunk]:
+        """All chunks of the chat, loaded once per pipeline run."""
+        if "chunks" not in ctx.extras:
+            ctx.extras["chunks"] = db.query(TextChunk).filter(
+                TextChunk.chat_id == chat_id
+            ).all()
+        return ctx.extras["chunks"]
+
+    @staticmethod
+    def pipeline(
         db: Session,
         chat_id: uuid.UUID,
-        query: str,
         top_k: int = 10,
         bm25_weight: float = 0.6,
         semantic_weight: float = 0.4
-    ) -> List[Tuple[TextChunk, float, Dict[str, float]]]:
+    ) -> RetrievalPipeline:
         """
-        Retrieve relevant chunks using hybrid retrieval
+        Every chunk of the chat is scored by BM25 and XLM-R similarity,
+        combined as bm25_weight * bm25 + semantic_weight * semantic, boosted
+        x1.5 for a lesson-number match and x1.3 for keyphrase overlap > 0.5.
         """
-        # Parse query intent
-        intent = RetrievalService._parse_query_intent(query)
-        
-        # Get all chunks for this chat
-        all_chunks = db.query(TextChunk).filter(
-            TextChunk.chat_id == chat_id
-        ).all()
-        
-        if not all_chunks:
-            return []
-        
-        # Prepare query
-        query_tokens = tokenize_sinhala(query)
-        
-        # Create BM25 index for all chunks
-        corpus_tokens = []
-        for chunk in all_chunks:
-            if chunk.tokens:
+        def scope(ctx):
+            ctx.extras["intent"] = RetrievalService._parse_query_intent(ctx.query)
+            return [chunk.id for chunk in RetrievalService._load_chunks(db, chat_id, ctx)]
+
+        def lexical(ctx, k):
+            chunks = RetrievalService._load_chunks(db, chat_id, ctx)
+            if not chunks:
+                return []
+
+            corpus_tokens = []
+            for chunk in chunks:
+                if not chunk.tokens:
+                    # If tokens are None, tokenize now
+                    chunk.tokens = tokenize_sinhala(chunk.content)
                 corpus_tokens.append(chunk.tokens)
-            else:
-                # If tokens are None, tokenize now
-                chunk_tokens = tokenize_sinhala(chunk.content)
-                chunk.tokens = chunk_tokens
-                corpus_tokens.append(chunk_tokens)
-        
-        bm25_index = BM25Okapi(corpus_tokens)
-        
-        # Get query embedding
-        query_embedding = EmbeddingService.get_embeddings([query])[0]
-        
-        # Score each chunk
-        scored_chunks = []
-        
-        for idx, chunk in enumerate(all_chunks):
-            scores = {
-                "bm25": 0.0,
-                "semantic": 0.0,
-                "lesson_match": 0.0,
-                "keyphrase_match": 0.0,
-                "final": 0.0
-            }
-            
-            # 1. BM25 Score (Lexical)
-            if query_tokens and corpus_tokens[idx]:
-                scores["bm25"] = calculate_bm25_score(
-                    query_tokens=query_tokens,
-                    document_tokens=corpus_tokens[idx],
-                    bm25_index=bm25_index,
-                    doc_index=idx
+
+            query_tokens = tokenize_sinhala(ctx.query)
+            # One get_scores call scores the whole corpus
+            bm25_scores = BM25Okapi(corpus_tokens).get_scores(query_tokens) if query_tokens else None
+
+            return [
+                Candidate(
+                    chunk_id=chunk.id,
+                    text=chunk.content,
+                    scores={"lexical": float(bm25_scores[idx]) if bm25_scores is not None and tokens else 0.0},
+                    data=chunk,
                 )
-            
-            # 2. Semantic Score (XLM-R)
-            if chunk.embedding and query_embedding:
-                try:
-                    scores["semantic"] = EmbeddingService.cosine_similarity(
-                        chunk.embedding,
-                        query_embedding
-                    )
-                except:
-                    scores["semantic"] = 0.0
-            
-            # 3. Lesson Number Match
-            if chunk.lesson_numbers and intent["lesson_numbers"]:
-                for lesson in intent["lesson_numbers"]:
+                for idx, (chunk, tokens) in enumerate(zip(chunks, corpus_tokens))
+            ]
+
+        def dense(ctx, k):
+            chunks = RetrievalService._load_chunks(db, chat_id, ctx)
+            if not chunks:
+                return []
+            query_embedding = EmbeddingService.get_embeddings([ctx.query])[0]
+
+            candidates = []
+            for chunk in chunks:
+                semantic = 0.0
+                if chunk.embedding and query_embedding:
+                    try:
+                        semantic = EmbeddingService.cosine_similarity(chunk.embedding, query_embedding)
+                    except Exception:
+                        semantic = 0.0
+                candidates.append(Candidate(chunk_id=chunk.id, text=chunk.content, scores={"dense": semantic}, data=chunk))
+            return candidates
+
+        def lesson_boost(ctx, candidate):
+            chunk = candidate.data
+            lessons = ctx.extras["intent"]["lesson_numbers"]
+            if chunk.lesson_numbers and lessons:
+                for lesson in lessons:
                     if any(lesson in str(chunk_lesson) for chunk_lesson in chunk.lesson_numbers):
-                        scores["lesson_match"] = 1.0
-                        break
-            
-            # 4. Keyphrase Match
-            if chunk.key_phrases and intent["key_terms"]:
+                        candidate.scores["lesson_match"] = 1.0
+                        return 1.5  # Boost for exact lesson match
+            return 1.0
+
+        def keyphrase_boost(ctx, candidate):
+            chunk = candidate.data
+            key_terms = ctx.extras["intent"]["key_terms"]
+            if chunk.key_phrases and key_terms:
                 chunk_phrase_set = set()
                 for phrase in chunk.key_phrases:
                     if phrase:
                         chunk_phrase_set.update(phrase.split())
-                
-                query_term_set = set(intent["key_terms"])
+
+                query_term_set = set(key_terms)
                 overlap = len(chunk_phrase_set.intersection(query_term_set))
-                if overlap > 0 and len(query_term_set) > 0:
-                    scores["keyphrase_match"] = min(overlap / len(query_term_set), 1.0)
-            
-            # 5. Combine scores
-            # Base combination: BM25 + Semantic
-            combined_score = (
-                bm25_weight * scores["bm25"] +
-                semantic_weight * scores["semantic"]
-            )
-            
-            # Boost for specific matches
-            if scores["lesson_match"] > 0:
-                combined_score *= 1.5  # Boost for exact lesson match
-            
-            if scores["keyphrase_match"] > 0.5:
-                combined_score *= 1.3  # Boost for keyphrase overlap
-            
-            scores["final"] = combined_score
-            
-            scored_chunks.append((chunk, combined_score, scores))
-        
-        # Sort by final score
-        scored_chunks.sort(key=lambda x: x[1], reverse=True)
-        
-        # Return top-k chunks
-        return scored_chunks[:top_k]
+                if overlap > 0:
+                    candidate.scores["keyphrase_match"] = min(overlap / len(query_term_set), 1.0)
+                    if candidate.scores["keyphrase_match"] > 0.5:
+                        return 1.3  # Boost for keyphrase overlap
+            return 1.0
+
+        return RetrievalPipeline("text_qa", [
+            ScopeStage(scope),
+            LexicalStage(lexical),
+            DenseStage(dense),
+            FusionStage(
+                "weighted",
+                weights={"lexical": bm25_weight, "dense": semantic_weight},
+                boosts=(lesson_boost, keyphrase_boost),
+            ),
+            ContextPackingStage(max_chunks=top_k),
+        ])
+
+    @staticmethod
+    def retrieve_relevant_chunks(
+        db: Session,
+        chat_id: uuid.UUID,
+        query: str,
+        top_k: int = 10,
+        bm25_weight: float = 0.6,
+        semantic_weight: float = 0.4
+    ) -> List[Tuple[TextChunk, float, Dict[str, float]]]:
+        """
+        Retrieve relevant chunks using hybrid retrieval
+        """
+        ctx = RetrievalService.pipeline(
+            db, chat_id, top_k=top_k, bm25_weight=bm25_weight, semantic_weight=semantic_weight
+        ).run(query, [chat_id])
+
+        scored_chunks = []
+        for c in ctx.candidates:
+            scores = {
+                "bm25": c.scores.get("lexical", 0.0),
+                "semantic": c.scores.get("dense", 0.0),
+                "lesson_match": c.scores.get("lesson_match", 0.0),
+                "keyphrase_match": c.scores.get("keyphrase_match", 0.0),
+                "final": c.scores["fusion"],
+            }
+            scored_chunks.append((c.data, c.scores["fusion"], scores))
+        return scored_chunks
     
     @staticmethod
     def generate_context_from_chunks(
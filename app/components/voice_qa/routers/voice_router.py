@@ -71,13 +71,13 @@ async def transcribe(
         try:
             ids = [UUID(rid.strip()) for rid in resource_ids.split(",") if rid.strip()]
             # Retrieve top 3-5 chunks that look like the raw text
-            top_chunks = retrieve_top_k(query=raw_text, resource_ids=ids, k=3)
-            context_hints = "\n".join([c.content for c in top_chunks])
+            top_chunks = retrieve_top_k(query=raw_text, resource_ids=ids, top_k=3)
+            context_hints = "\n".join([c["text"] for c in top_chunks])
         except Exception as e:
             logger.error(f"Context retrieval failed: {e}")
 
     # 3. Pass hints to the standardization service
-    normalized, standard = VoiceService.standardize_southern_sinhala(raw_text, context_hints)
+    normalized, standard = await VoiceService.astandardize_southern_sinhala(raw_text, context_hints)
 
     return {
         "raw": raw_text,
@@ -154,10 +154,10 @@ async def qa_from_voice(
     
     context_hints = ""
     if ids:
-        top_chunks = retrieve_top_k(query=raw_text, resource_ids=ids, k=3)
-        context_hints = "\n".join([c.content for c in top_chunks])
+        top_chunks = retrieve_top_k(query=raw_text, resource_ids=ids, top_k=3)
+        context_hints = "\n".join([c["text"] for c in top_chunks])
 
-    _, standard = VoiceService.standardize_southern_sinhala(raw_text, context_hints=context_hints)
+    _, standard = await VoiceService.astandardize_southern_sinhala(raw_text, context_hints=context_hints)
     question_text = standard
 
     # ----------------------------------------------------
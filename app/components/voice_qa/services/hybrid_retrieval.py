@@ -12,14 +12,21 @@ This prevents hallucinations from unrelated documents.
 from typing import List, Dict, Optional
 import numpy as np
 from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
 
+from app.core.config import settings
 from app.core.database import engine
 from app.components.document_processing.services.embedding_service import generate_text_embedding
-
-try:
-    from sentence_transformers.cross_encoder import CrossEncoder
-except Exception:
-    CrossEncoder = None
+from app.services.lexical_index_service import LexicalIndexService
+from app.services.retrieval_pipeline import (
+    Candidate,
+    DenseStage,
+    FusionStage,
+    LexicalStage,
+    RerankStage,
+    RetrievalPipeline,
+)
+from app.shared.ai.reranker_service import reranker_pool
 
 
 # ---------------------------------------------------------
@@ -46,10 +53,28 @@ def lexical_retrieval(
     top_k: int = 50,
     config: str = "simple",
 ) -> List[Dict]:
+    """
+    Ranked full-text matches from the GIN-indexed `search_tsv` column
+    (see search_resource_chunks() in the migrations). Without that
+    migration, or if the indexed query fails, ranks with an inline
+    `to_tsvector` over the chunk contents instead.
+    """
     if not query or not resource_ids:
         return []
 
-    sql = text(
+    if not LexicalIndexService.fulltext_missing():
+        try:
+            return _lexical_rows(
+                """
+                SELECT chunk_id AS id, content, rank
+                FROM search_resource_chunks(CAST(:resource_ids AS uuid[]), :q, :k)
+                """,
+                {"q": query, "k": top_k, "resource_ids": [str(rid) for rid in resource_ids]},
+            )
+        except SQLAlchemyError as e:
+            LexicalIndexService.record_fulltext_error(e, "inline to_tsvector")
+
+    return _lexical_rows(
         """
         SELECT
             id,
@@ -63,21 +88,16 @@ def lexical_retrieval(
           AND to_tsvector(:cfg, content) @@ plainto_tsquery(:cfg, :q)
         ORDER BY rank DESC
         LIMIT :k
-        """
+        """,
+        {"cfg": config, "q": query, "k": top_k, "resource_ids": resource_ids},
     )
 
+
+def _lexical_rows(sql: str, params: Dict) -> List[Dict]:
     results = []
 
     with engine.connect() as conn:
-        rows = conn.execute(
-            sql,
-            {
-                "cfg": config,
-                "q": query,
-                "k": top_k,
-                "resource_ids": resource_ids,
-            },
-        ).fetchall()
+        rows = conn.execute(text(sql), params).fetchall()
 
         for r in rows:
             results.append({
@@ -142,71 +162,50 @@ def dense_retrieval(
 
 
 # ---------------------------------------------------------
-# Candidate merge
-# ---------------------------------------------------------
-
-def merge_candidates(
-    lexical: List[Dict],
-    dense: List[Dict],
-    pool_size: int = 100,
-) -> List[Dict]:
-    merged: List[Dict] = []
-    seen = set()
-
-    for src in (lexical, dense):
-        for item in src:
-            cid = item.get("chunk_id")
-            if cid in seen:
-                continue
-            merged.append(item)
-            seen.add(cid)
-            if len(merged) >= pool_size:
-                return merged
-
-    return merged
-
-
-# ---------------------------------------------------------
-# Cross-encoder reranker
+# Public API (SCOPED)
 # ---------------------------------------------------------
 
-class CrossEncoderReranker:
-    def __init__(self, model_name: str):
-        if CrossEncoder is None:
-            raise RuntimeError("CrossEncoder not available")
-        self.model = CrossEncoder(model_name)
-
-    def rerank(
-        self,
-        query: str,
-        candidates: List[Dict],
-        top_k: int,
-    ) -> List[Dict]:
-        if not candidates:
+def voice_pipeline(
+    *,
+    top_k: int = 5,
+    lexical_k: int = 50,
+    dense_k: int = 50,
+    candidate_pool: int = 100,
+    reranker_model: Optional[str] = None,
+) -> RetrievalPipeline:
+    """
+    Lexical + dense candidates, merged lexical-first into a pool of
+    `candidate_pool`, then cross-encoder reranked to `top_k`.
+    """
+    model = reranker_model or settings.RERANKER_MODEL
+
+    def lexical(ctx, k):
+        return [
+            Candidate(chunk_id=r["chunk_id"], text=r["text"], scores={"lexical": r["rank"]}, data=r)
+            for r in lexical_retrieval(query=ctx.query, resource_ids=ctx.resource_ids, top_k=k)
+        ]
+
+    def dense(ctx, k):
+        if ctx.query_embedding is None:
+            ctx.query_embedding = generate_text_embedding(ctx.query)
+        if not ctx.query_embedding:
             return []
+        return [
+            Candidate(chunk_id=r["chunk_id"], text=r["text"], scores={"dense": -r["distance"]}, data=r)
+            for r in dense_retrieval(query_embedding=ctx.query_embedding, resource_ids=ctx.resource_ids, top_k=k)
+        ]
 
-        pairs = [(query, c["text"]) for c in candidates]
-
-        try:
-            scores = self.model.predict(pairs)
-        except Exception as e:
-            print(f"[voice_qa.hybrid_retrieval] rerank failed: {e}")
-            return candidates[:top_k]
-
-        scored = []
-        for c, s in zip(candidates, scores):
-            c2 = c.copy()
-            c2["score"] = float(s)
-            scored.append(c2)
+    def rerank(query, candidates):
+        return reranker_pool.score(query, [(c.chunk_id, c.text) for c in candidates], model_name=model)
 
-        scored.sort(key=lambda x: x["score"], reverse=True)
-        return scored[:top_k]
+    return RetrievalPipeline("voice", [
+        LexicalStage(lexical, top_k=lexical_k),
+        DenseStage(dense, top_k=dense_k),
+        FusionStage("concat", pool_size=candidate_pool),
+        RerankStage(rerank, top_k=top_k),
+    ])
 
 
-# ---------------------------------------------------------
-# Public API (SCOPED)
-# ---------------------------------------------------------
-
 def retrieve_top_k(
     *,
     query: str,
@@ -224,29 +223,18 @@ def retrieve_top_k(
     if not resource_ids:
         return []
 
-    lexical = lexical_retrieval(
-        query=query,
-        resource_ids=resource_ids,
-        top_k=lexical_k,
-    )
-
-    q_emb = generate_text_embedding(query)
-    dense = dense_retrieval(
-        query_embedding=q_emb,
-        resource_ids=resource_ids,
-        top_k=dense_k,
-    ) if q_emb else []
-
-    candidates = merge_candidates(lexical, dense, pool_size=candidate_pool)
+    ctx = voice_pipeline(
+        top_k=top_k,
+        lexical_k=lexical_k,
+        dense_k=dense_k,
+        candidate_pool=candidate_pool,
+        reranker_model=reranker_model,
+    ).run(query, resource_ids)
 
-    if not candidates:
-        return []
-
-    model = reranker_model or "sentence-transformers/paraphrase-xlm-r-multilingual-v1"
-
-    try:
-        reranker = CrossEncoderReranker(model)
-        return reranker.rerank(query, candidates, top_k)
-    except Exception as e:
-        print(f"[voice_qa.hybrid_retrieval] reranker unavailable: {e}")
-        return candidates[:top_k]
+    results = []
+    for c in ctx.candidates:
+        item = dict(c.data)
+        if "rerank" in c.scores:
+            item["score"] = c.scores["rerank"]
+        results.append(item)
+    return results
@@ -6,6 +6,7 @@ import os
 import tempfile
 
 from app.core.whisper_loader import WhisperLoader
+from app.core.model_registry import ModelRegistry, MINILM_MODEL_NAME
 from app.core.utils import normalize_sinhala
 from app.core.gemini_client import GeminiClient
 
@@ -29,9 +30,10 @@ from app.components.voice_qa.services.hybrid_retrieval import (
 )
 
 class VoiceService:
-    
-    _embedding_tokenizer = None
-    _embedding_model = None
+
+    # evaluate_audio similarity scores were calibrated on a 512-token mean
+    # pool; the SentenceTransformer's own encode() truncates at 128
+    EMBEDDING_MAX_TOKENS = 512
 
     @staticmethod
     def transcribe_audio(file_path: str):
@@ -94,10 +96,8 @@ class VoiceService:
 
 
     @staticmethod
-    def standardize_southern_sinhala(text: str, context_hints: str = ""):
-        normalized = normalize_sinhala(text)
-
-        prompt = f"""
+    def _standardization_prompt(normalized: str, context_hints: str = "") -> str:
+        return f"""
     ### INSTRUCTION
     You are a specialized Sinhala linguistic utility. Your ONLY task is to take a noisy, phonetically incorrect transcription and output the clean, standard literary Sinhala version (ලිඛිත සිංහල).
 
@@ -123,48 +123,57 @@ class VoiceService:
     ### FINAL CORRECTED OUTPUT:
     """
 
-        gemini = GeminiClient()
-        response = gemini.generate_content(prompt)
-        
+    @staticmethod
+    def _clean_standardized(text: str) -> str:
         # Use split or strip to ensure no trailing garbage text
-        result = (response.get("text") or "").strip()
-        
+        result = (text or "").strip()
+
         # Safety: if the model still outputs a paragraph, take the last line or clean it
         if "\n" in result:
             # Sometimes models repeat the prompt; we just want the final line
             result = result.split("\n")[-1].replace("Output:", "").strip()
+        return result
+
+    @staticmethod
+    def standardize_southern_sinhala(text: str, context_hints: str = ""):
+        normalized = normalize_sinhala(text)
+        prompt = VoiceService._standardization_prompt(normalized, context_hints)
+
+        gemini = GeminiClient()
+        response = gemini.generate_content(prompt)
 
-        return normalized, result
+        return normalized, VoiceService._clean_standardized(response.get("text"))
+
+    @staticmethod
+    async def astandardize_southern_sinhala(text: str, context_hints: str = ""):
+        """Async variant used by the voice routers (does not block the event loop on Gemini)."""
+        normalized = normalize_sinhala(text)
+        prompt = VoiceService._standardization_prompt(normalized, context_hints)
+
+        response = await GeminiClient.agenerate_content(prompt)
+
+        return normalized, VoiceService._clean_standardized(response.get("text"))
 
     @staticmethod
     def _load_embedding_model():
-        if VoiceService._embedding_model is None:
-            from transformers import AutoTokenizer, AutoModel
-
-            VoiceService._embedding_tokenizer = AutoTokenizer.from_pretrained(
-                "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
-            )
-            VoiceService._embedding_model = AutoModel.from_pretrained(
-                "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
-            )
+        return ModelRegistry.get(MINILM_MODEL_NAME, device="cpu")
             
     @staticmethod
     def _get_embedding(text: str):
-        VoiceService._load_embedding_model()
+        model = VoiceService._load_embedding_model()
 
-        inputs = VoiceService._embedding_tokenizer(
+        # Mean pool over up to EMBEDDING_MAX_TOKENS tokens with the shared
+        # model's tokenizer and transformer, shape (1, dim)
+        inputs = model.tokenizer(
             text,
             return_tensors="pt",
             truncation=True,
-            padding=True
+            max_length=VoiceService.EMBEDDING_MAX_TOKENS,
         )
-
         with torch.no_grad():
-            outputs = VoiceService._embedding_model(**inputs)
+            outputs = model[0].auto_model(**inputs)
 
-        # Mean pooling
-        embeddings = outputs.last_hidden_state.mean(dim=1)
-        return embeddings.numpy()
+        return outputs.last_hidden_state.mean(dim=1).numpy()
     
     
     @staticmethod
@@ -0,0 +1,192 @@
+# app/core/adaptive_limiter.py
+
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+
+
+class _Waiter:
+    __slots__ = ("event", "loop", "future", "granted")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop | None = None):
+        self.loop = loop
+        self.future = loop.create_future() if loop else None
+        self.event = None if loop else threading.Event()
+        self.granted = False
+
+    def grant(self) -> None:
+        self.granted = True
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self) -> None:
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD concurrency limiter shared by threads and coroutines.
+
+    The limit grows by roughly `increase_step` for every `limit` successful
+    calls (additive increase) and is multiplied by `decrease_factor` when the
+    upstream reports overload (429/503). Decreases are rate-limited by
+    `decrease_cooldown_s` so a burst of concurrent 429s from one overload
+    episode only halves the limit once.
+
+    Sync callers use `slot()`; async callers use `aslot()`. Both queue in
+    the same FIFO so neither side can starve the other.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 2,
+        min_limit: int = 1,
+        max_limit: int = 16,
+        increase_step: float = 1.0,
+        decrease_factor: float = 0.5,
+        decrease_cooldown_s: float = 2.0,
+        name: str = "limiter",
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.decrease_cooldown_s = decrease_cooldown_s
+        self.name = name
+
+        self._limit = float(min(max(initial_limit, min_limit), max_limit))
+        self._in_flight = 0
+        self._waiters: deque[_Waiter] = deque()
+        self._lock = threading.Lock()
+        self._last_decrease = 0.0
+
+        self._successes = 0
+        self._overloads = 0
+        self._peak_in_flight = 0
+
+    @property
+    def limit(self) -> int:
+        return max(self.min_limit, int(self._limit))
+
+    # ----------------------------------------------------------------
+    # Acquire / release
+    # ----------------------------------------------------------------
+
+    def _try_acquire_locked(self) -> bool:
+        if not self._waiters and self._in_flight < self.limit:
+            self._in_flight += 1
+            self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+            return True
+        return False
+
+    def _wake_waiters_locked(self) -> None:
+        while self._waiters and self._in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            self._in_flight += 1
+            self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+            waiter.grant()
+
+    def _abandon_locked(self, waiter: _Waiter) -> None:
+        if waiter.granted:
+            # Slot was handed over just as the waiter gave up
+            self._in_flight -= 1
+            self._wake_waiters_locked()
+        else:
+            self._waiters.remove(waiter)
+
+    def acquire(self, timeout: float | None = None) -> None:
+        """Wait for a slot; raises TimeoutError after `timeout` seconds."""
+        with self._lock:
+            if self._try_acquire_locked():
+                return
+            waiter = _Waiter()
+            self._waiters.append(waiter)
+        if waiter.event.wait(None if timeout is None else max(0.0, timeout)):
+            return
+        with self._lock:
+            if waiter.granted:
+                return
+            self._abandon_locked(waiter)
+        raise TimeoutError(f"Timed out waiting for a {self.name} concurrency slot")
+
+    async def aacquire(self, timeout: float | None = None) -> None:
+        with self._lock:
+            if self._try_acquire_locked():
+                return
+            waiter = _Waiter(asyncio.get_running_loop())
+            self._waiters.append(waiter)
+        try:
+            if timeout is None:
+                await waiter.future
+            else:
+                await asyncio.wait_for(asyncio.shield(waiter.future), max(0.0, timeout))
+        except asyncio.TimeoutError:
+            with self._lock:
+                if waiter.granted:
+                    return
+                self._abandon_locked(waiter)
+            raise TimeoutError(f"Timed out waiting for a {self.name} concurrency slot")
+        except asyncio.CancelledError:
+            with self._lock:
+                self._abandon_locked(waiter)
+            raise
+
+    def release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self._wake_waiters_locked()
+
+    @contextmanager
+    def slot(self, timeout: float | None = None):
+        self.acquire(timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def aslot(self, timeout: float | None = None):
+        await self.aacquire(timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+    # ----------------------------------------------------------------
+    # Feedback
+    # ----------------------------------------------------------------
+
+    def on_success(self) -> None:
+        with self._lock:
+            self._successes += 1
+            self._limit = min(self.max_limit, self._limit + self.increase_step / max(self._limit, 1.0))
+            self._wake_waiters_locked()
+
+    def on_overload(self) -> None:
+        with self._lock:
+            self._overloads += 1
+            now = time.monotonic()
+            if now - self._last_decrease < self.decrease_cooldown_s:
+                return
+            self._last_decrease = now
+            self._limit = max(float(self.min_limit), self._limit * self.decrease_factor)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "name": self.name,
+                "limit": self.limit,
+                "limit_exact": round(self._limit, 3),
+                "min_limit": self.min_limit,
+                "max_limit": self.max_limit,
+                "in_flight": self._in_flight,
+                "peak_in_flight": self._peak_in_flight,
+                "waiting": len(self._waiters),
+                "successes": self._successes,
+                "overloads": self._overloads,
+            }
@@ -0,0 +1,216 @@
+# app/core/circuit_breaker.py
+
+import threading
+import time
+from collections import deque
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """No breaker for the upstream admitted the call."""
+
+
+class CircuitBreaker:
+    """
+    Failure-rate circuit breaker for one upstream (e.g. one Gemini model on
+    one API key).
+
+    Outcomes are kept for `window_s`. Once at least `min_calls` are in the
+    window and the failure share reaches `failure_rate_threshold`, the
+    breaker opens and `allow` rejects calls for `open_duration_s`. It then
+    goes half-open and lets `half_open_max_calls` probes through: a
+    successful probe closes it, a failed one re-opens it.
+
+    Only failures the caller counts (overload, rate limit, timeout) should
+    be passed to `record_failure`; other errors go to `record_ignored` so a
+    half-open probe slot is still released.
+    """
+
+    def __init__(
+        self,
+        failure_rate_threshold: float = 0.5,
+        min_calls: int = 5,
+        window_s: float = 60.0,
+        open_duration_s: float = 30.0,
+        half_open_max_calls: int = 1,
+    ):
+        self.failure_rate_threshold = failure_rate_threshold
+        self.min_calls = min_calls
+        self.window_s = window_s
+        self.open_duration_s = open_duration_s
+        self.half_open_max_calls = half_open_max_calls
+
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._outcomes: deque[tuple[float, bool]] = deque()
+        self._probes_in_flight = 0
+        self._lock = threading.Lock()
+
+    def _prune(self, now: float) -> None:
+        while self._outcomes and now - self._outcomes[0][0] > self.window_s:
+            self._outcomes.popleft()
+
+    def _refresh(self, now: float) -> str | None:
+        """Move open -> half-open once the open period is over. Returns the transition."""
+        if self.state == OPEN and now - self.opened_at >= self.open_duration_s:
+            self.state = HALF_OPEN
+            self._probes_in_flight = 0
+            return HALF_OPEN
+        return None
+
+    def _open(self, now: float) -> str:
+        self.state = OPEN
+        self.opened_at = now
+        self.times_opened += 1
+        self._outcomes.clear()
+        self._probes_in_flight = 0
+        return OPEN
+
+    def available(self, now: float | None = None) -> bool:
+        """True if a call would currently be allowed (does not reserve a probe)."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._refresh(now)
+            if self.state == OPEN:
+                return False
+            if self.state == HALF_OPEN:
+                return self._probes_in_flight < self.half_open_max_calls
+            return True
+
+    def allow(self, now: float | None = None) -> tuple[bool, str | None]:
+        """Admit one call (reserving a probe when half-open). Returns (allowed, transition)."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            transition = self._refresh(now)
+            if self.state == OPEN:
+                return False, transition
+            if self.state == HALF_OPEN:
+                if self._probes_in_flight >= self.half_open_max_calls:
+                    return False, transition
+                self._probes_in_flight += 1
+            return True, transition
+
+    def record_success(self, now: float | None = None) -> str | None:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.state = CLOSED
+                self._outcomes.clear()
+                self._probes_in_flight = 0
+                return CLOSED
+            if self.state == CLOSED:
+                self._outcomes.append((now, False))
+                self._prune(now)
+            return None
+
+    def record_failure(self, now: float | None = None) -> str | None:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self.state == HALF_OPEN:
+                return self._open(now)
+            if self.state != CLOSED:
+                return None
+
+            self._outcomes.append((now, True))
+            self._prune(now)
+            calls = len(self._outcomes)
+            failures = sum(1 for _, failed in self._outcomes if failed)
+            if calls >= self.min_calls and failures / calls >= self.failure_rate_threshold:
+                return self._open(now)
+            return None
+
+    def record_ignored(self) -> None:
+        with self._lock:
+            if self.state == HALF_OPEN and self._probes_in_flight:
+                self._probes_in_flight -= 1
+
+    def stats(self, now: float | None = None) -> dict:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._refresh(now)
+            self._prune(now)
+            calls = len(self._outcomes)
+            failures = sum(1 for _, failed in self._outcomes if failed)
+            return {
+                "state": self.state,
+                "window_calls": calls,
+                "window_failures": failures,
+                "failure_rate": round(failures / calls, 4) if calls else 0.0,
+                "times_opened": self.times_opened,
+                "open_remaining_s": (
+                    round(max(0.0, self.opened_at + self.open_duration_s - now), 2)
+                    if self.state == OPEN else 0.0
+                ),
+            }
+
+
+class CircuitBreakerRegistry:
+    """
+    Lazily created breakers keyed by (name, slot), plus a bounded log of
+    state transitions for the admin API.
+    """
+
+    def __init__(self, max_transitions: int = 200, **breaker_kwargs):
+        self.breaker_kwargs = breaker_kwargs
+        self._breakers: dict[tuple[str, int | None], CircuitBreaker] = {}
+        self._transitions: deque[dict] = deque(maxlen=max_transitions)
+        self._lock = threading.Lock()
+
+    def get(self, name: str, slot: int | None) -> CircuitBreaker:
+        key = (name, slot)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(key, CircuitBreaker(**self.breaker_kwargs))
+        return breaker
+
+    def _log(self, name: str, slot: int | None, transition: str | None) -> None:
+        if transition is None:
+            return
+        with self._lock:
+            self._transitions.append({
+                "model": name,
+                "key_slot": slot,
+                "state": transition,
+                "at": time.time(),
+            })
+
+    def available(self, name: str, slot: int | None) -> bool:
+        return self.get(name, slot).available()
+
+    def allow(self, name: str, slot: int | None) -> bool:
+        allowed, transition = self.get(name, slot).allow()
+        self._log(name, slot, transition)
+        return allowed
+
+    def record_success(self, name: str, slot: int | None) -> None:
+        self._log(name, slot, self.get(name, slot).record_success())
+
+    def record_failure(self, name: str, slot: int | None) -> None:
+        self._log(name, slot, self.get(name, slot).record_failure())
+
+    def record_ignored(self, name: str, slot: int | None) -> None:
+        self.get(name, slot).record_ignored()
+
+    def reset(self, name: str | None = None) -> int:
+        with self._lock:
+            keys = [key for key in self._breakers if name is None or key[0] == name]
+            for key in keys:
+                del self._breakers[key]
+            return len(keys)
+
+    def stats(self) -> list[dict]:
+        with self._lock:
+            items = list(self._breakers.items())
+        return [
+            {"model": name, "key_slot": slot, **breaker.stats()}
+            for (name, slot), breaker in sorted(items, key=lambda item: (item[0][0], item[0][1] or -1))
+        ]
+
+    def transitions(self) -> list[dict]:
+        with self._lock:
+            return list(self._transitions)
@@ -20,9 +20,51 @@ class Settings(BaseSettings):
     EVAL_GEMINI_ANSWER_MAPPING_MODEL: str = "gemini-2.5-flash"
     EVAL_GEMINI_REFERENCE_SCHEMA_MODEL: str = "gemini-2.5-flash"
 
+    # Gemini adaptive (AIMD) concurrency limit shared by sync and async calls
+    GEMINI_CONCURRENCY_INITIAL: int = 2
+    GEMINI_CONCURRENCY_MIN: int = 1
+    GEMINI_CONCURRENCY_MAX: int = 16
+
+    # Local per-key Gemini rate limits (token buckets, see app/core/key_pool.py)
+    GEMINI_KEY_RPM_LIMIT: int = 1000
+    GEMINI_KEY_TPM_LIMIT: int = 1_000_000
+    GEMINI_KEY_THROTTLE_COOLDOWN_S: float = 10.0
+
+    # Per-(model, key) circuit breaker over 429/503/timeout failures
+    GEMINI_BREAKER_FAILURE_RATE: float = 0.5
+    GEMINI_BREAKER_MIN_CALLS: int = 5
+    GEMINI_BREAKER_WINDOW_S: float = 60.0
+    GEMINI_BREAKER_OPEN_S: float = 30.0
+    GEMINI_BREAKER_HALF_OPEN_PROBES: int = 1
+
+    # Request deadlines (seconds). Retries/fallbacks only start while at least
+    # GEMINI_MIN_ATTEMPT_S of the budget is left (see app/core/deadline.py)
+    GEMINI_MIN_ATTEMPT_S: float = 2.0
+    CHAT_REQUEST_DEADLINE_S: float = 45.0
+
+    # Hedged Gemini requests (opt-in per service): after the primary has run
+    # longer than the service's GEMINI_HEDGE_PERCENTILE latency, a duplicate
+    # goes to another key or fallback model and the first success wins
+    GEMINI_HEDGING_ENABLED: bool = False
+    GEMINI_HEDGE_SERVICES: list[str] = ["message_generation"]
+    GEMINI_HEDGE_PERCENTILE: float = 0.95
+    GEMINI_HEDGE_MIN_SAMPLES: int = 20
+    GEMINI_HEDGE_WINDOW: int = 200
+    GEMINI_HEDGE_DEFAULT_DELAY_S: float = 8.0
+    GEMINI_HEDGE_MIN_DELAY_S: float = 1.0
+    GEMINI_HEDGE_MAX_RATE: float = 0.1
+    GEMINI_HEDGE_MAX_WORKERS: int = 32
+
     # Database (optional)
     DATABASE_URL: Optional[str] = None
 
+    # API usage logging (background bulk writer, see api_usage_log_service.py)
+    USAGE_LOG_ASYNC: bool = True
+    USAGE_LOG_QUEUE_SIZE: int = 10_000
+    USAGE_LOG_BATCH_SIZE: int = 200
+    USAGE_LOG_FLUSH_INTERVAL_S: float = 1.0
+    USAGE_LOG_SYNC_FALLBACK: bool = True  # write inline when the queue is full instead of dropping
+
     # Auth
     JWT_SECRET_KEY: str = "change-me"  # override in .env
     JWT_ALGORITHM: str = "HS256"
@@ -31,6 +73,97 @@ class Settings(BaseSettings):
     PASSWORD_RESET_TOKEN_EXPIRE_MINUTES: int = 15
     ADMIN_BOOTSTRAP_TOKEN: Optional[str] = None
 
+    # Gemini embedding batching (chunk ingestion)
+    EMBED_BATCH_SIZE: int = 100  # Gemini accepts up to 100 texts per embed_content call
+    EMBED_MAX_CONCURRENCY: int = 4  # Parallel embed_content batches in flight
+    # Failed batches are retried, then embedded text by text
+    EMBED_BATCH_MAX_RETRIES: int = 2
+    EMBED_BATCH_RETRY_BASE_S: float = 1.0
+
+    # Persistent embedding cache (embedding_cache table)
+    EMBED_CACHE_ENABLED: bool = True
+    EMBED_CACHE_TTL_DAYS: int = 90
+    EMBED_CACHE_MAX_ENTRIES: int = 500_000
+    EMBED_CACHE_EVICT_EVERY_WRITES: int = 1000
+
+    # pgvector ANN indexes (app/core/vector_index.py). Used by the
+    # scripts/vector_index.py rebuild (the migration creates hnsw with
+    # m = 16, ef_construction = 64): hnsw | ivfflat
+    VECTOR_INDEX_METHOD: str = "hnsw"
+    VECTOR_HNSW_M: int = 16
+    VECTOR_HNSW_EF_CONSTRUCTION: int = 64
+    # Per-query recall (0 keeps the server default). ef_search is raised to
+    # top_k when smaller, since HNSW never returns more than ef_search rows.
+    VECTOR_HNSW_EF_SEARCH: int = 100
+    VECTOR_IVFFLAT_PROBES: int = 10
+    # First-stage representation for chunk search: full | halfvec | binary.
+    # Compact ones search an expression index (pgvector >= 0.7, built by the
+    # migration or scripts/vector_index.py backfill) and rescore
+    # top_k * VECTOR_RESCORE_FACTOR candidates against the full vector.
+    VECTOR_SEARCH_REPRESENTATION: str = "full"
+    VECTOR_RESCORE_FACTOR: dict[str, int] = {"halfvec": 2, "binary": 10}
+
+    # Document embeddings are pooled from chunk embeddings at ingestion.
+    # Section centroids (every DOCUMENT_SECTION_CHUNKS chunks) let the chat
+    # document filter rank a document by its best matching section.
+    DOCUMENT_SECTION_CENTROIDS: bool = True
+    DOCUMENT_SECTION_CHUNKS: int = 16
+
+    # Intent semantic gate, used when no keyword rule matches: "gemini"
+    # (query embedding vs. anchor embeddings) or "local" (nearest labelled
+    # example under the MiniLM encoder, no network)
+    INTENT_CLASSIFIER: str = "gemini"
+    INTENT_GEMINI_THRESHOLD: float = 0.65
+    INTENT_LOCAL_THRESHOLD: float = 0.6
+
+    # Chat hybrid retrieval: "multi_step" (separate document, lexical and
+    # dense queries) or "fused" (one SQL statement with reciprocal rank fusion)
+    RETRIEVAL_MODE: str = "multi_step"
+    RETRIEVAL_FUSED_CANDIDATES: int = 50  # dense and lexical pool size before fusion
+    RETRIEVAL_RRF_K: int = 60
+
+    # Per-session in-memory dense search for chat (app/services/vector_working_set.py).
+    # The TTL bounds staleness when another worker reprocesses a resource.
+    VECTOR_WORKING_SET_ENABLED: bool = True
+    VECTOR_WORKING_SET_MAX_MB: int = 256
+    VECTOR_WORKING_SET_TTL_SECONDS: float = 900
+
+    # Chat answers return once the message and concept checks are saved;
+    # evidence, the severity summary and the XAI explanation are computed
+    # on a background pool (app/services/post_generation_service.py) and
+    # pushed over the websocket. False computes them inline as before.
+    POST_GENERATION_BACKGROUND: bool = True
+    POST_GENERATION_WORKERS: int = 2
+    POST_GENERATION_CHECK_WORKERS: int = 4
+
+    # Opt-in Gemini response cache (llm_response_cache table). TTLs are per
+    # service_name in hours; 0 disables caching for that service.
+    GEMINI_RESPONSE_CACHE_ENABLED: bool = True
+    GEMINI_RESPONSE_CACHE_DEFAULT_TTL_HOURS: float = 24
+    GEMINI_RESPONSE_CACHE_TTL_HOURS: dict[str, float] = {
+        "document_classification": 24 * 30,
+        "exam_extraction": 24 * 30,
+        "ocr_correction": 24 * 30,
+        "reference_extraction": 24 * 7,
+        "session_title": 24 * 30,
+    }
+    GEMINI_RESPONSE_CACHE_MAX_ENTRIES: int = 100_000
+    GEMINI_RESPONSE_CACHE_EVICT_EVERY_WRITES: int = 500
+
+    # XLM-R inference backend (grading and text QA embeddings share the one
+    # instance): torch | onnx | onnx-int8
+    XLMR_BACKEND: str = "torch"
+    ONNX_MODEL_DIR: str = "app/models/onnx"
+    ONNX_QUANTIZATION_CONFIG: str = "avx2"  # avx2 | avx512 | avx512_vnni | arm64
+
+    # XLM-R micro-batching encoder (app/shared/ai/encoder_service.py)
+    XLMR_ENCODER_MAX_BATCH: int = 64
+    XLMR_ENCODER_MAX_WAIT_MS: float = 5.0
+
+    # Local XLM-R sentence embedding cache (grading)
+    XLMR_CACHE_MAX_MB: int = 512
+    XLMR_CACHE_FP16: bool = False
+
     # Embedding model for RAG
     MODEL_EMBEDDING_NAME: str = "sentence-transformers/paraphrase-xlm-r-multilingual-v1"
 
@@ -38,6 +171,21 @@ class Settings(BaseSettings):
     HF_TOKEN: Optional[str] = None
     LOAD_WHISPER_ON_STARTUP: bool = False
 
+    # Local encoder registry (app/core/model_registry.py)
+    LOAD_ENCODERS_ON_STARTUP: bool = False
+    STARTUP_ENCODERS: str = (
+        "sentence-transformers/paraphrase-xlm-r-multilingual-v1,"
+        "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+    )
+    ENCODER_WARMUP_ON_LOAD: bool = True
+
+    # Cross-encoder reranker pool (app/shared/ai/reranker_service.py)
+    RERANKER_MODEL: str = "sentence-transformers/paraphrase-xlm-r-multilingual-v1"
+    RERANKER_BACKEND: str = "torch"  # torch | onnx | onnx-int8
+    RERANKER_MAX_LENGTH: int = 256  # tokens per (query, passage) pair
+    RERANKER_BATCH_SIZE: int = 32
+    RERANKER_CACHE_SIZE: int = 20_000  # (model, query, chunk_id) scores kept
+
     # Email (SMTP)
     MAIL_MAILER: str = "smtp"
     MAIL_HOST: str = "smtp.gmail.com"
@@ -0,0 +1,82 @@
+# app/core/deadline.py
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_deadline: ContextVar[float | None] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request-scoped time budget ran out before `stage` could finish."""
+
+    def __init__(self, stage: str, budget_s: float | None = None):
+        self.stage = stage
+        self.budget_s = budget_s
+        super().__init__(f"Request deadline exceeded during {stage}")
+
+
+def remaining() -> float | None:
+    """Seconds left in the current request budget, or None if unbounded."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def allows(seconds: float) -> bool:
+    """True if `seconds` more work still fits in the current budget."""
+    left = remaining()
+    return left is None or left >= seconds
+
+
+def check(stage: str, reserve_s: float = 0.0) -> None:
+    """Raise DeadlineExceeded unless more than `reserve_s` of the budget is left."""
+    left = remaining()
+    if left is not None and left <= reserve_s:
+        raise DeadlineExceeded(stage)
+
+
+def timeout_ms(cap_s: float | None = None) -> int | None:
+    """Per-call network timeout derived from the remaining budget (and `cap_s`)."""
+    left = remaining()
+    if left is None:
+        return int(cap_s * 1000) if cap_s else None
+    if cap_s:
+        left = min(left, cap_s)
+    return max(1, int(left * 1000))
+
+
+@contextmanager
+def deadline_scope(seconds: float | None):
+    """
+    Bound everything inside the block to `seconds`. Nested scopes keep the
+    tighter deadline, so a service cannot extend its caller's budget.
+    """
+    if seconds is None:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None:
+        deadline = min(deadline, current)
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def request_deadline(seconds: float):
+    """
+    FastAPI dependency factory applying a per-request deadline, e.g.
+    `dependencies=[Depends(request_deadline(30))]` on a router or endpoint.
+
+    The dependency is async so the deadline is set in the request's own
+    context, which sync endpoints inherit when run in the threadpool.
+    """
+    async def _apply_deadline():
+        with deadline_scope(seconds):
+            yield
+
+    return _apply_deadline
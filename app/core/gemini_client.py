@@ -1,11 +1,23 @@
 # app/core/gemini_client.py
+import asyncio
 import logging
 import time
 import random
+import contextvars
 import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import asynccontextmanager, contextmanager
+from typing import Callable
 from uuid import UUID
 from google import genai
+from app.core import deadline
+from app.core.adaptive_limiter import AdaptiveConcurrencyLimiter
+from app.core.circuit_breaker import CircuitBreakerRegistry, CircuitOpenError
+from app.core.key_pool import KeyPool
 from app.core.config import settings
+from app.core.deadline import DeadlineExceeded
+from app.core.hedging import HedgeRace, HedgeStats, LatencyTracker
 
 logger = logging.getLogger(__name__)
 
@@ -44,17 +56,204 @@ MODEL_FALLBACKS = [
 _active_model_index = 0
 _model_index_lock = threading.Lock()
 
-# Increased from 5 → 10 to support parallel per-question Gemini feedback calls
-# SAFER: Set to 5 to support faster parallel feedback generation while remaining within typical API limits
-_ai_semaphore = threading.Semaphore(2)
+# Shared by sync and async callers. Starts at the old fixed Semaphore(2),
+# grows while Gemini keeps answering and halves on 429/503.
+_ai_limiter = AdaptiveConcurrencyLimiter(
+    initial_limit=settings.GEMINI_CONCURRENCY_INITIAL,
+    min_limit=settings.GEMINI_CONCURRENCY_MIN,
+    max_limit=settings.GEMINI_CONCURRENCY_MAX,
+    name="gemini",
+)
+
+# Local RPM/TPM budget per API key; generate_content sends each attempt to
+# the key with the most headroom instead of waiting for a 429 to rotate.
+_key_pool = KeyPool(
+    [f"...{key[-4:]}" for key in _api_keys],
+    rpm_limit=settings.GEMINI_KEY_RPM_LIMIT,
+    tpm_limit=settings.GEMINI_KEY_TPM_LIMIT,
+    throttle_cooldown_s=settings.GEMINI_KEY_THROTTLE_COOLDOWN_S,
+)
+
+# One breaker per (model, key slot). While every key's breaker for a model
+# is open, requests skip straight to the next healthy MODEL_FALLBACKS entry
+# instead of each paying the retry/backoff penalty on the overloaded model.
+_breakers = CircuitBreakerRegistry(
+    failure_rate_threshold=settings.GEMINI_BREAKER_FAILURE_RATE,
+    min_calls=settings.GEMINI_BREAKER_MIN_CALLS,
+    window_s=settings.GEMINI_BREAKER_WINDOW_S,
+    open_duration_s=settings.GEMINI_BREAKER_OPEN_S,
+    half_open_max_calls=settings.GEMINI_BREAKER_HALF_OPEN_PROBES,
+)
+BREAKER_FAILURE_REASONS = {"rate_limited", "overloaded"}
+
+# Request hedging for latency-critical services: per-service latency
+# samples drive the hedge delay; hedge legs run on a small dedicated pool.
+_latency = LatencyTracker(window=settings.GEMINI_HEDGE_WINDOW)
+_hedge_stats = HedgeStats()
+_hedge_executor = ThreadPoolExecutor(
+    max_workers=settings.GEMINI_HEDGE_MAX_WORKERS, thread_name_prefix="gemini-hedge"
+)
+
+# Rough chars-per-token for Sinhala/English prompts and the completion size
+# reserved up front; the bucket is corrected with real usage afterwards.
+CHARS_PER_TOKEN = 4
+ESTIMATED_COMPLETION_TOKENS = 512
+MAX_KEY_WAIT_SECONDS = 30
+# A client timeout with less than this left of the request budget was caused
+# by the budget-derived HTTP timeout, not by a slow upstream
+DEADLINE_TIMEOUT_SLACK_S = 0.25
 
 class GeminiClient:
     @classmethod
-    def get_client(cls):
-        """Return shared Gemini client"""
+    def get_client(cls, slot: int | None = None):
+        """Return shared Gemini client (the one for `slot` if given)"""
         if not _clients:
             raise ValueError("No Gemini API key configured. Set GOOGLE_API_KEY (or GOOGLE_API_KEY_V2).")
-        return _clients[_active_client_index]
+        return _clients[_active_client_index if slot is None else slot]
+
+    @classmethod
+    def concurrency_stats(cls) -> dict:
+        return _ai_limiter.stats()
+
+    @classmethod
+    def key_stats(cls) -> list[dict]:
+        return _key_pool.stats()
+
+    @classmethod
+    def breaker_stats(cls) -> dict:
+        return {"breakers": _breakers.stats(), "transitions": _breakers.transitions()}
+
+    @classmethod
+    def reset_breakers(cls, model_name: str | None = None) -> int:
+        return _breakers.reset(model_name)
+
+    @classmethod
+    def hedge_stats(cls) -> dict:
+        return {
+            "enabled": settings.GEMINI_HEDGING_ENABLED,
+            "services": list(settings.GEMINI_HEDGE_SERVICES),
+            "percentile": settings.GEMINI_HEDGE_PERCENTILE,
+            "max_hedge_rate": settings.GEMINI_HEDGE_MAX_RATE,
+            "delays_s": {
+                service: round(cls._hedge_delay(service), 3)
+                for service in settings.GEMINI_HEDGE_SERVICES
+            },
+            "counters": _hedge_stats.stats(),
+        }
+
+    @staticmethod
+    def _key_slots() -> list[int | None]:
+        return list(range(len(_key_pool))) or [None]
+
+    @classmethod
+    def _circuit_open(cls, model_name: str) -> bool:
+        """True while the breaker for `model_name` is open on every key."""
+        return not any(_breakers.available(model_name, slot) for slot in cls._key_slots())
+
+    @staticmethod
+    def _check_deadline(service_name: str, last_error: Exception | None = None, wait_s: float = 0.0) -> None:
+        """Raise DeadlineExceeded unless `wait_s` plus one more attempt fits in the request budget."""
+        if not deadline.allows(wait_s + settings.GEMINI_MIN_ATTEMPT_S):
+            raise DeadlineExceeded(f"gemini:{service_name}") from last_error
+
+    @staticmethod
+    def _raise_if_deadline_timeout(error: Exception, service_name: str) -> None:
+        """
+        Raise DeadlineExceeded for a client timeout that only fired because
+        the request budget ran out, so it is not counted against the model:
+        no breaker failure, limiter cut, retry or fallback.
+        """
+        left = deadline.remaining()
+        if left is None or left > DEADLINE_TIMEOUT_SLACK_S:
+            return
+        error_msg = str(error).lower()
+        is_timeout = (
+            isinstance(error, TimeoutError)
+            or "timeout" in type(error).__name__.lower()
+            or "deadline exceeded" in error_msg
+            or "timed out" in error_msg
+            or "timeout" in error_msg
+        )
+        if is_timeout:
+            raise DeadlineExceeded(f"gemini:{service_name}") from error
+
+    @staticmethod
+    def _attempt_config(config):
+        """Bound the HTTP call by the remaining request budget, if one is set."""
+        timeout_ms = deadline.timeout_ms()
+        if timeout_ms is None:
+            return config
+        from google.genai import types
+
+        return config.model_copy(update={"http_options": types.HttpOptions(timeout=timeout_ms)})
+
+    @staticmethod
+    @contextmanager
+    def _limited(service_name: str):
+        try:
+            _ai_limiter.acquire(deadline.remaining())
+        except TimeoutError:
+            raise DeadlineExceeded(f"gemini:{service_name}") from None
+        try:
+            yield
+        finally:
+            _ai_limiter.release()
+
+    @staticmethod
+    @asynccontextmanager
+    async def _alimited(service_name: str):
+        try:
+            await _ai_limiter.aacquire(deadline.remaining())
+        except TimeoutError:
+            raise DeadlineExceeded(f"gemini:{service_name}") from None
+        try:
+            yield
+        finally:
+            _ai_limiter.release()
+
+    @staticmethod
+    def _estimate_tokens(prompt: str) -> int:
+        return len(prompt or "") // CHARS_PER_TOKEN + ESTIMATED_COMPLETION_TOKENS
+
+    @classmethod
+    def _reserve_key(
+        cls,
+        estimated_tokens: int,
+        model_name: str | None = None,
+        exclude_slots=(),
+        enforce_breaker: bool = True,
+    ) -> tuple[int | None, float]:
+        """
+        Pick the key with the most headroom, skipping `exclude_slots` and keys
+        whose breaker for `model_name` is open. Returns (slot, seconds to wait).
+
+        A key whose breaker then refuses the call (e.g. its half-open probe
+        is already in flight) is released and the next one tried; when none
+        admits it CircuitOpenError is raised so the caller moves on to the
+        next model. With `enforce_breaker` False (the last fallback) the call
+        goes ahead on the best key regardless.
+        """
+        if not len(_key_pool):
+            if model_name and not _breakers.allow(model_name, None) and enforce_breaker:
+                raise CircuitOpenError(model_name)
+            return None, 0.0
+
+        exclude = set(exclude_slots)
+        if model_name:
+            exclude |= {s for s in cls._key_slots() if not _breakers.available(model_name, s)}
+        while True:
+            slot, wait = _key_pool.acquire(estimated_tokens, exclude)
+            if not model_name or _breakers.allow(model_name, slot) or not enforce_breaker:
+                break
+            _key_pool.release(slot, estimated_tokens)
+            if slot in exclude:
+                # acquire only returns an excluded slot once every key is excluded
+                raise CircuitOpenError(model_name)
+            exclude.add(slot)
+
+        if wait > 0:
+            logger.info("All Gemini keys at local rate limit; waiting %.2fs for key slot %s.", wait, slot)
+        return slot, min(wait, MAX_KEY_WAIT_SECONDS)
 
     @classmethod
     def _switch_to_next_client(cls) -> bool:
@@ -118,7 +317,13 @@ class GeminiClient:
         if is_rate_limit:
             return "rate_limited"
 
-        is_overloaded = "503" in error_msg or "overloaded" in error_msg or "deadline exceeded" in error_msg
+        is_overloaded = (
+            "503" in error_msg
+            or "overloaded" in error_msg
+            or "deadline exceeded" in error_msg
+            or "timed out" in error_msg
+            or "timeout" in error_msg
+        )
         if is_overloaded:
             return "overloaded"
 
@@ -162,6 +367,283 @@ class GeminiClient:
         base_wait = 3 if reason == "rate_limited" else 2
         return min(30, (base_wait * (attempt + 1)) + random.uniform(1, 5))
 
+    @staticmethod
+    def _build_config(safety_settings: list | None, json_mode: bool):
+        from google.genai import types
+
+        return types.GenerateContentConfig(
+            safety_settings=safety_settings,
+            response_mime_type="application/json" if json_mode else "text/plain",
+            max_output_tokens=8192,
+        )
+
+    @staticmethod
+    def _new_request_id() -> str:
+        return f"gemini-{int(time.time() * 1000)}-{random.randint(1000, 9999)}"
+
+    @staticmethod
+    def _build_result(text: str, usage) -> dict:
+        return {
+            "text": text or "",
+            "prompt_tokens": (usage.prompt_token_count or 0) if usage else 0,
+            "completion_tokens": (usage.candidates_token_count or 0) if usage else 0,
+            "total_tokens": (usage.total_token_count or 0) if usage else 0,
+        }
+
+    @classmethod
+    def _parse_response(cls, response) -> dict:
+        return cls._build_result(response.text, response.usage_metadata)
+
+    @staticmethod
+    def _success_log(result: dict, prompt: str, model: str, attempt: int, duration_ms: float, **common) -> dict:
+        return dict(
+            common,
+            model_name=model,
+            prompt_chars=len(prompt or ""),
+            response_chars=len(result["text"]),
+            prompt_tokens=result["prompt_tokens"],
+            completion_tokens=result["completion_tokens"],
+            total_tokens=result["total_tokens"],
+            attempt_number=attempt + 1,
+            is_retry=attempt > 0,
+            status="success",
+            duration_ms=duration_ms,
+        )
+
+    @staticmethod
+    def _failure_log(
+        error: Exception,
+        retry_reason: str | None,
+        will_retry: bool,
+        prompt: str,
+        model: str,
+        attempt: int,
+        duration_ms: float,
+        **common,
+    ) -> dict:
+        return dict(
+            common,
+            model_name=model,
+            prompt_chars=len(prompt or ""),
+            response_chars=0,
+            attempt_number=attempt + 1,
+            is_retry=attempt > 0,
+            status="retry" if will_retry else "failed",
+            error_type=retry_reason or "unknown_error",
+            error_message=str(error)[:1000],
+            duration_ms=duration_ms,
+        )
+
+    @staticmethod
+    def _plan_retry(
+        retry_reason: str | None,
+        attempt: int,
+        attempts_for_model: int,
+        model_index: int,
+        model_count: int,
+    ) -> tuple[bool, bool]:
+        """Return (retry same model, fail over to next model)."""
+        should_retry_same_model = bool(retry_reason and attempt < attempts_for_model)
+        should_try_next_model = (
+            retry_reason in {
+                "rate_limited",
+                "overloaded",
+                "model_access_denied",
+                "model_not_found",
+            }
+            and model_index < model_count - 1
+        )
+        return should_retry_same_model, should_try_next_model
+
+    @staticmethod
+    def _record_outcome(
+        retry_reason: str | None,
+        key_slot: int | None,
+        estimated_tokens: int,
+        model_name: str | None = None,
+    ) -> None:
+        if retry_reason in {"rate_limited", "overloaded"}:
+            _ai_limiter.on_overload()
+        if model_name:
+            if retry_reason in BREAKER_FAILURE_REASONS:
+                _breakers.record_failure(model_name, key_slot)
+            else:
+                _breakers.record_ignored(model_name, key_slot)
+        if key_slot is None:
+            return
+        _key_pool.record_usage(key_slot, estimated_tokens, 0)
+        if retry_reason == "rate_limited":
+            _key_pool.mark_throttled(key_slot)
+
+    @classmethod
+    def cached_response(
+        cls,
+        prompt: str,
+        model_name: str,
+        json_mode: bool = False,
+        safety_settings: list | None = None,
+        service_name: str = "message_generation",
+        bypass_cache: bool = False,
+        request_id: str | None = None,
+        user_id: UUID | None = None,
+        session_id: UUID | None = None,
+        message_id: UUID | None = None,
+    ) -> tuple[str | None, dict | None]:
+        """
+        Look up a cached response. Returns (cache_key, result); cache_key is
+        None when caching is disabled for `service_name`, result is None on
+        a miss. Hits are logged to ApiUsageLog with status "cache_hit".
+        """
+        from app.services.api_usage_log_service import ApiUsageLogService
+        from app.services.llm_response_cache_service import LlmResponseCacheService
+
+        if not LlmResponseCacheService.enabled_for(service_name):
+            return None, None
+
+        cache_key = LlmResponseCacheService.make_key(prompt, model_name, json_mode, safety_settings)
+        if bypass_cache:
+            return cache_key, None
+
+        start = time.time()
+        cached = LlmResponseCacheService.get(cache_key)
+        if cached is None:
+            return cache_key, None
+
+        ApiUsageLogService.create_log(
+            request_id=request_id or cls._new_request_id(),
+            provider="gemini",
+            service_name=service_name,
+            model_name=cached["model_name"],
+            user_id=user_id,
+            session_id=session_id,
+            message_id=message_id,
+            prompt_chars=len(prompt or ""),
+            response_chars=len(cached["text"]),
+            prompt_tokens=0,
+            completion_tokens=0,
+            total_tokens=0,
+            status="cache_hit",
+            duration_ms=round((time.time() - start) * 1000, 2),
+            metadata_json={
+                "json_mode": json_mode,
+                "cache_hit": True,
+                "cache_key": cache_key,
+                "saved_total_tokens": cached["total_tokens"],
+            },
+        )
+        return cache_key, {
+            "text": cached["text"],
+            "prompt_tokens": cached["prompt_tokens"],
+            "completion_tokens": cached["completion_tokens"],
+            "total_tokens": cached["total_tokens"],
+            "cache_hit": True,
+        }
+
+    @classmethod
+    def store_response(
+        cls,
+        cache_key: str,
+        prompt: str,
+        model_name: str,
+        json_mode: bool,
+        service_name: str,
+        result: dict,
+    ) -> None:
+        from app.services.llm_response_cache_service import LlmResponseCacheService
+
+        LlmResponseCacheService.put(cache_key, service_name, model_name, json_mode, prompt, result)
+
+    @staticmethod
+    def _cacheable(
+        result: dict,
+        answered_by: str,
+        cache_model: str | None,
+        cache_validator: Callable[[str], bool] | None,
+    ) -> bool:
+        """
+        Only the model the cache key was built for is stored under it, and
+        only text the caller's validator accepts (a fallback model's answer
+        or an unparseable one is returned but not cached).
+        """
+        if answered_by != cache_model:
+            return False
+        if cache_validator is None:
+            return True
+        try:
+            return bool(cache_validator(result.get("text") or ""))
+        except Exception:
+            return False
+
+    @staticmethod
+    def _hedging_enabled(service_name: str) -> bool:
+        return settings.GEMINI_HEDGING_ENABLED and service_name in settings.GEMINI_HEDGE_SERVICES
+
+    @staticmethod
+    def _hedge_delay(service_name: str) -> float:
+        """Seconds to wait on the primary before hedging: its recent latency percentile."""
+        observed = _latency.percentile(
+            service_name, settings.GEMINI_HEDGE_PERCENTILE, min_samples=settings.GEMINI_HEDGE_MIN_SAMPLES
+        )
+        delay = settings.GEMINI_HEDGE_DEFAULT_DELAY_S if observed is None else observed
+        return max(settings.GEMINI_HEDGE_MIN_DELAY_S, delay)
+
+    @classmethod
+    def _hedge_target(cls, model_name: str | None, race: HedgeRace) -> tuple[str | None, set]:
+        """Same model on another key when there is one, else the next fallback model."""
+        primary_slot = race.key_slots.get("primary")
+        if len(_key_pool) > 1 and primary_slot is not None:
+            return model_name, {primary_slot}
+        candidates = cls._get_model_candidates(model_name)
+        return (candidates[1] if len(candidates) > 1 else candidates[0]), set()
+
+    @classmethod
+    def _hedged_generate(cls, **call) -> dict:
+        service_name = call["service_name"]
+        _hedge_stats.record_request(service_name)
+        race = HedgeRace()
+
+        def submit(**overrides):
+            leg = dict(call, race=race, **overrides)
+            return _hedge_executor.submit(contextvars.copy_context().run, cls._generate_uncached, **leg)
+
+        primary = submit(hedge_role="primary")
+        delay = cls._hedge_delay(service_name)
+        try:
+            return primary.result(timeout=delay)
+        except FutureTimeoutError:
+            pass
+
+        if not deadline.allows(settings.GEMINI_MIN_ATTEMPT_S) or not _hedge_stats.allow(
+            service_name, settings.GEMINI_HEDGE_MAX_RATE
+        ):
+            return primary.result()
+
+        hedge_model, exclude_slots = cls._hedge_target(call["model_name"], race)
+        logger.info(
+            "Hedging %s request %s after %.2fs (model=%s, excluded key slots=%s)",
+            service_name, call["request_id"], delay, hedge_model, exclude_slots,
+        )
+        hedge = submit(hedge_role="hedge", model_name=hedge_model, exclude_slots=exclude_slots)
+
+        pending = {primary, hedge}
+        errors = {}
+        while pending and not race.settled:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    future.result()
+                except Exception as e:
+                    errors[future] = e
+
+        _hedge_stats.record_outcome(service_name, race.winner)
+        if race.settled:
+            return race.result
+        raise errors.get(primary) or errors[hedge]
+
+    @classmethod
+    def _attempts_for_model(cls, max_retries: int, model_count: int) -> int:
+        return min(max_retries, 1) if model_count > 1 else max_retries
+
     @classmethod
     def generate_content(
         cls,
@@ -174,177 +656,684 @@ class GeminiClient:
         session_id: UUID | None = None,
         message_id: UUID | None = None,
         service_name: str = "message_generation",
+        use_cache: bool = False,
+        bypass_cache: bool = False,
+        cache_validator: Callable[[str], bool] | None = None,
     ) -> dict:
         """
         Generate content from Gemini and return text + token usage.
         Includes rate limiting, retry logic, model fallback, API key rotation,
         and API usage logging.
+
+        With `use_cache`, identical (model, json_mode, safety settings,
+        prompt) calls are answered from the persistent response cache for
+        the TTL configured for `service_name`. `bypass_cache` skips the
+        lookup but still stores the fresh response. Only a response from the
+        requested model is stored, and with `cache_validator` only when it
+        returns True for the response text.
+
+        Inside a request deadline (app.core.deadline) each HTTP call is
+        bounded by the remaining budget, and a retry, fallback or key wait
+        is only started while GEMINI_MIN_ATTEMPT_S would still be left;
+        otherwise DeadlineExceeded is raised.
+
+        For services in GEMINI_HEDGE_SERVICES (when GEMINI_HEDGING_ENABLED),
+        a duplicate request is sent to another key or fallback model if the
+        primary is slower than the service's recent latency percentile; the
+        first success wins.
         """
-        from google.genai import types
-        from app.services.api_usage_log_service import ApiUsageLogService
+        logical_request_id = cls._new_request_id()
 
-        request_start_time = time.time()
-        logical_request_id = f"gemini-{int(request_start_time * 1000)}-{random.randint(1000, 9999)}"
+        cache_key = None
+        cache_model = cls._get_model_name(model_name)
+        if use_cache:
+            cache_key, cached = cls.cached_response(
+                prompt,
+                cache_model,
+                json_mode=json_mode,
+                safety_settings=safety_settings,
+                service_name=service_name,
+                bypass_cache=bypass_cache,
+                request_id=logical_request_id,
+                user_id=user_id,
+                session_id=session_id,
+                message_id=message_id,
+            )
+            if cached is not None:
+                return cached
 
-        config = types.GenerateContentConfig(
+        call = dict(
+            prompt=prompt,
+            max_retries=max_retries,
             safety_settings=safety_settings,
-            response_mime_type="application/json" if json_mode else "text/plain",
-            max_output_tokens=8192,
+            json_mode=json_mode,
+            model_name=model_name,
+            user_id=user_id,
+            session_id=session_id,
+            message_id=message_id,
+            service_name=service_name,
+            request_id=logical_request_id,
+            cache_key=cache_key,
+            cache_model=cache_model,
+            cache_validator=cache_validator,
         )
+        if cls._hedging_enabled(service_name):
+            return cls._hedged_generate(**call)
+        return cls._generate_uncached(**call)
+
+    @classmethod
+    def _generate_uncached(
+        cls,
+        prompt: str,
+        max_retries: int,
+        safety_settings: list | None,
+        json_mode: bool,
+        model_name: str | None,
+        user_id: UUID | None,
+        session_id: UUID | None,
+        message_id: UUID | None,
+        service_name: str,
+        request_id: str,
+        cache_key: str | None = None,
+        cache_model: str | None = None,
+        cache_validator: Callable[[str], bool] | None = None,
+        hedge_role: str | None = None,
+        race: HedgeRace | None = None,
+        exclude_slots=(),
+    ) -> dict | None:
+        """
+        Retry/fallback loop behind `generate_content`. As one leg of a hedged
+        request (`hedge_role` + shared `race`) it stops once the other leg
+        has won and returns None.
+        """
+        from app.services.api_usage_log_service import ApiUsageLogService
+
+        logical_request_id = request_id
+        config = cls._build_config(safety_settings, json_mode)
+        estimated_tokens = cls._estimate_tokens(prompt)
 
         model_candidates = cls._get_model_candidates(model_name)
         last_error = None
 
         for model_index, candidate_model in enumerate(model_candidates):
-            attempts_for_model = min(max_retries, 1) if len(model_candidates) > 1 else max_retries
+            attempts_for_model = cls._attempts_for_model(max_retries, len(model_candidates))
 
             for attempt in range(attempts_for_model + 1):
+                if model_index < len(model_candidates) - 1 and cls._circuit_open(candidate_model):
+                    logger.warning("Circuit open for Gemini model %s; skipping to next fallback.", candidate_model)
+                    break
+                if race is not None and race.settled:
+                    return None
+                cls._check_deadline(service_name, last_error)
+
                 attempt_start_time = time.time()
-                current_key_slot = _active_client_index
+                key_slot = None
+                common = dict(
+                    request_id=logical_request_id,
+                    provider="gemini",
+                    service_name=service_name,
+                    user_id=user_id,
+                    session_id=session_id,
+                    message_id=message_id,
+                    max_retries=max_retries,
+                    metadata_json={
+                        "json_mode": json_mode,
+                        "key_slot": None,
+                        "model_index": model_index,
+                    },
+                )
+                if hedge_role:
+                    common["metadata_json"]["hedge_role"] = hedge_role
 
                 try:
-                    client = cls.get_client()
+                    key_slot, key_wait = cls._reserve_key(
+                        estimated_tokens,
+                        candidate_model,
+                        exclude_slots,
+                        enforce_breaker=model_index < len(model_candidates) - 1,
+                    )
+                    common["metadata_json"]["key_slot"] = key_slot
+                    if race is not None:
+                        race.key_slots[hedge_role] = key_slot
+                    if key_wait > 0:
+                        cls._check_deadline(service_name, last_error, key_wait)
+                        time.sleep(key_wait)
+                    client = cls.get_client(key_slot)
 
-                    with _ai_semaphore:
+                    with cls._limited(service_name):
                         response = client.models.generate_content(
                             model=candidate_model,
                             contents=prompt,
-                            config=config,
+                            config=cls._attempt_config(config),
                         )
+                    _ai_limiter.on_success()
+                    _breakers.record_success(candidate_model, key_slot)
 
-                    text = response.text or ""
-
-                    # Get actual token counts from API response
-                    usage = response.usage_metadata
-                    prompt_tokens = usage.prompt_token_count if usage else 0
-                    completion_tokens = usage.candidates_token_count if usage else 0
-                    total_tokens = usage.total_token_count if usage else 0
-
+                    result = cls._parse_response(response)
+                    if key_slot is not None:
+                        _key_pool.record_usage(key_slot, estimated_tokens, result["total_tokens"])
                     duration_ms = round((time.time() - attempt_start_time) * 1000, 2)
+                    _latency.record(service_name, duration_ms / 1000)
+
+                    won = race.claim(hedge_role, result) if race is not None else True
+                    if race is not None:
+                        common["metadata_json"]["hedge_won"] = won
+                        if not won:
+                            _hedge_stats.record_wasted(service_name, result["total_tokens"])
 
                     ApiUsageLogService.create_log(
-                        request_id=logical_request_id,
-                        provider="gemini",
-                        service_name=service_name,
-                        model_name=candidate_model,
-                        user_id=user_id,
-                        session_id=session_id,
-                        message_id=message_id,
-                        prompt_chars=len(prompt or ""),
-                        response_chars=len(text or ""),
-                        prompt_tokens=prompt_tokens,
-                        completion_tokens=completion_tokens,
-                        total_tokens=total_tokens,
-                        attempt_number=attempt + 1,
-                        max_retries=max_retries,
-                        is_retry=attempt > 0,
-                        status="success",
-                        duration_ms=duration_ms,
-                        metadata_json={
-                            "json_mode": json_mode,
-                            "key_slot": current_key_slot,
-                            "model_index": model_index,
-                        },
+                        **cls._success_log(result, prompt, candidate_model, attempt, duration_ms, **common)
                     )
+                    if cache_key and won and cls._cacheable(result, candidate_model, cache_model, cache_validator):
+                        cls.store_response(cache_key, prompt, candidate_model, json_mode, service_name, result)
+                    return result
 
-                    return {
-                        "text": text,
-                        "prompt_tokens": prompt_tokens,
-                        "completion_tokens": completion_tokens,
-                        "total_tokens": total_tokens,
-                    }
-
+                except CircuitOpenError:
+                    logger.warning("No Gemini key admitted by the %s breakers; skipping to next fallback.", candidate_model)
+                    break
+                except DeadlineExceeded:
+                    cls._record_outcome(None, key_slot, estimated_tokens, candidate_model)
+                    raise
                 except Exception as e:
+                    try:
+                        cls._raise_if_deadline_timeout(e, service_name)
+                    except DeadlineExceeded:
+                        cls._record_outcome(None, key_slot, estimated_tokens, candidate_model)
+                        raise
                     last_error = e
                     duration_ms = round((time.time() - attempt_start_time) * 1000, 2)
-                    error_msg = str(e).lower()
-                    retry_reason = cls._classify_retry(error_msg)
-
-                    should_retry_same_model = bool(retry_reason and attempt < attempts_for_model)
-                    should_try_next_model = (
-                        retry_reason in {
-                            "rate_limited",
-                            "overloaded",
-                            "model_access_denied",
-                            "model_not_found",
-                        }
-                        and model_index < len(model_candidates) - 1
-                    )
+                    retry_reason = cls._classify_retry(str(e).lower())
+                    cls._record_outcome(retry_reason, key_slot, estimated_tokens, candidate_model)
 
-                    ApiUsageLogService.create_log(
-                        request_id=logical_request_id,
-                        provider="gemini",
-                        service_name=service_name,
-                        model_name=candidate_model,
-                        user_id=user_id,
-                        session_id=session_id,
-                        message_id=message_id,
-                        prompt_chars=len(prompt or ""),
-                        response_chars=0,
-                        attempt_number=attempt + 1,
-                        max_retries=max_retries,
-                        is_retry=attempt > 0,
-                        status="retry" if should_retry_same_model or should_try_next_model else "failed",
-                        error_type=retry_reason or "unknown_error",
-                        error_message=str(e)[:1000],
-                        duration_ms=duration_ms,
-                        metadata_json={
-                            "json_mode": json_mode,
-                            "key_slot": current_key_slot,
-                            "model_index": model_index,
-                        },
+                    should_retry_same_model, should_try_next_model = cls._plan_retry(
+                        retry_reason, attempt, attempts_for_model, model_index, len(model_candidates)
                     )
 
-                    if retry_reason in {"model_not_found", "model_access_denied"}:
-                        logger.warning(
-                            "Gemini model %s unavailable/access denied. Trying fallback model if available. Error: %s",
-                            candidate_model,
+                    ApiUsageLogService.create_log(
+                        **cls._failure_log(
                             e,
+                            retry_reason,
+                            should_retry_same_model or should_try_next_model,
+                            prompt,
+                            candidate_model,
+                            attempt,
+                            duration_ms,
+                            **common,
                         )
+                    )
+
+                    wait_time = cls._next_step(
+                        e,
+                        retry_reason,
+                        candidate_model,
+                        model_candidates,
+                        model_index,
+                        attempt,
+                        attempts_for_model,
+                        should_retry_same_model,
+                        should_try_next_model,
+                    )
+                    if wait_time is None:
                         break
+                    if wait_time > 0:
+                        cls._check_deadline(service_name, e, wait_time)
+                        time.sleep(wait_time)
+
+        if last_error:
+            raise last_error
+
+        return {"text": "", "error": "Maximum retries exceeded"}
+
+    @classmethod
+    async def agenerate_content(
+        cls,
+        prompt: str,
+        max_retries: int = 15,
+        safety_settings: list = None,
+        json_mode: bool = False,
+        model_name: str | None = None,
+        user_id: UUID | None = None,
+        session_id: UUID | None = None,
+        message_id: UUID | None = None,
+        service_name: str = "message_generation",
+        use_cache: bool = False,
+        bypass_cache: bool = False,
+        cache_validator: Callable[[str], bool] | None = None,
+    ) -> dict:
+        """
+        Async counterpart of `generate_content` built on the genai aio client.
+
+        Same retry, model fallback, key rotation and usage logging semantics,
+        but backoff uses `asyncio.sleep` and concurrency is bounded by the
+        shared adaptive limiter instead of parking a worker thread.
+        """
+        from app.services.api_usage_log_service import ApiUsageLogService
+
+        logical_request_id = cls._new_request_id()
+
+        cache_key = None
+        cache_model = cls._get_model_name(model_name)
+        if use_cache:
+            cache_key, cached = await asyncio.to_thread(
+                cls.cached_response,
+                prompt,
+                cache_model,
+                json_mode=json_mode,
+                safety_settings=safety_settings,
+                service_name=service_name,
+                bypass_cache=bypass_cache,
+                request_id=logical_request_id,
+                user_id=user_id,
+                session_id=session_id,
+                message_id=message_id,
+            )
+            if cached is not None:
+                return cached
+
+        config = cls._build_config(safety_settings, json_mode)
+        estimated_tokens = cls._estimate_tokens(prompt)
+
+        model_candidates = cls._get_model_candidates(model_name)
+        last_error = None
+
+        for model_index, candidate_model in enumerate(model_candidates):
+            attempts_for_model = cls._attempts_for_model(max_retries, len(model_candidates))
 
-                    if should_retry_same_model:
-                        # If multiple keys are configured, rotate keys before backing off.
-                        cls._switch_to_next_client()
+            for attempt in range(attempts_for_model + 1):
+                if model_index < len(model_candidates) - 1 and cls._circuit_open(candidate_model):
+                    logger.warning("Circuit open for Gemini model %s; skipping to next fallback.", candidate_model)
+                    break
+                cls._check_deadline(service_name, last_error)
+
+                attempt_start_time = time.time()
+                key_slot = None
+                common = dict(
+                    request_id=logical_request_id,
+                    provider="gemini",
+                    service_name=service_name,
+                    user_id=user_id,
+                    session_id=session_id,
+                    message_id=message_id,
+                    max_retries=max_retries,
+                    metadata_json={
+                        "json_mode": json_mode,
+                        "key_slot": None,
+                        "model_index": model_index,
+                        "async": True,
+                    },
+                )
+
+                try:
+                    key_slot, key_wait = cls._reserve_key(
+                        estimated_tokens, candidate_model, enforce_breaker=model_index < len(model_candidates) - 1
+                    )
+                    common["metadata_json"]["key_slot"] = key_slot
+                    if key_wait > 0:
+                        cls._check_deadline(service_name, last_error, key_wait)
+                        await asyncio.sleep(key_wait)
+                    client = cls.get_client(key_slot)
+
+                    async with cls._alimited(service_name):
+                        response = await client.aio.models.generate_content(
+                            model=candidate_model,
+                            contents=prompt,
+                            config=cls._attempt_config(config),
+                        )
+                    _ai_limiter.on_success()
+                    _breakers.record_success(candidate_model, key_slot)
 
-                        wait_time = cls._get_wait_time(retry_reason, attempt)
+                    result = cls._parse_response(response)
+                    if key_slot is not None:
+                        _key_pool.record_usage(key_slot, estimated_tokens, result["total_tokens"])
+                    duration_ms = round((time.time() - attempt_start_time) * 1000, 2)
+
+                    # create_log only enqueues for the background writer
+                    ApiUsageLogService.create_log(
+                        **cls._success_log(result, prompt, candidate_model, attempt, duration_ms, **common)
+                    )
+                    if cache_key and cls._cacheable(result, candidate_model, cache_model, cache_validator):
+                        await asyncio.to_thread(
+                            cls.store_response, cache_key, prompt, candidate_model, json_mode, service_name, result
+                        )
+                    return result
+
+                except CircuitOpenError:
+                    logger.warning("No Gemini key admitted by the %s breakers; skipping to next fallback.", candidate_model)
+                    break
+                except DeadlineExceeded:
+                    cls._record_outcome(None, key_slot, estimated_tokens, candidate_model)
+                    raise
+                except Exception as e:
+                    try:
+                        cls._raise_if_deadline_timeout(e, service_name)
+                    except DeadlineExceeded:
+                        cls._record_outcome(None, key_slot, estimated_tokens, candidate_model)
+                        raise
+                    last_error = e
+                    duration_ms = round((time.time() - attempt_start_time) * 1000, 2)
+                    retry_reason = cls._classify_retry(str(e).lower())
+                    cls._record_outcome(retry_reason, key_slot, estimated_tokens, candidate_model)
 
-                        logger.warning(
-                            "Gemini API %s on model %s (Attempt %s/%s). "
-                            "Retrying in %.2fs (Capped at 30s)... Error: %s",
+                    should_retry_same_model, should_try_next_model = cls._plan_retry(
+                        retry_reason, attempt, attempts_for_model, model_index, len(model_candidates)
+                    )
+
+                    ApiUsageLogService.create_log(
+                        **cls._failure_log(
+                            e,
                             retry_reason,
+                            should_retry_same_model or should_try_next_model,
+                            prompt,
                             candidate_model,
-                            attempt + 1,
-                            attempts_for_model + 1,
-                            wait_time,
-                            e,
+                            attempt,
+                            duration_ms,
+                            **common,
                         )
+                    )
+
+                    wait_time = cls._next_step(
+                        e,
+                        retry_reason,
+                        candidate_model,
+                        model_candidates,
+                        model_index,
+                        attempt,
+                        attempts_for_model,
+                        should_retry_same_model,
+                        should_try_next_model,
+                    )
+                    if wait_time is None:
+                        break
+                    if wait_time > 0:
+                        cls._check_deadline(service_name, e, wait_time)
+                        await asyncio.sleep(wait_time)
 
-                        if wait_time > 0:
-                            time.sleep(wait_time)
+        if last_error:
+            raise last_error
 
-                        continue
+        return {"text": "", "error": "Maximum retries exceeded"}
 
-                    if should_try_next_model:
-                        next_model = model_candidates[model_index + 1]
-                        logger.warning(
-                            "Gemini model %s stayed %s after %s attempt(s). Failing over to %s.",
-                            candidate_model,
+    @classmethod
+    def _next_step(
+        cls,
+        error: Exception,
+        retry_reason: str | None,
+        candidate_model: str,
+        model_candidates: list[str],
+        model_index: int,
+        attempt: int,
+        attempts_for_model: int,
+        should_retry_same_model: bool,
+        should_try_next_model: bool,
+    ) -> float | None:
+        """
+        Decide what happens after a failed attempt.
+
+        Returns seconds to wait before retrying the same model, None to move
+        on to the next model candidate, or re-raises on final failure.
+        """
+        if retry_reason in {"model_not_found", "model_access_denied"}:
+            logger.warning(
+                "Gemini model %s unavailable/access denied. Trying fallback model if available. Error: %s",
+                candidate_model,
+                error,
+            )
+            return None
+
+        if should_retry_same_model:
+            # If multiple keys are configured, rotate keys before backing off.
+            cls._switch_to_next_client()
+
+            wait_time = cls._get_wait_time(retry_reason, attempt)
+
+            logger.warning(
+                "Gemini API %s on model %s (Attempt %s/%s). "
+                "Retrying in %.2fs (Capped at 30s)... Error: %s",
+                retry_reason,
+                candidate_model,
+                attempt + 1,
+                attempts_for_model + 1,
+                wait_time,
+                error,
+            )
+            return wait_time
+
+        if should_try_next_model:
+            next_model = model_candidates[model_index + 1]
+            logger.warning(
+                "Gemini model %s stayed %s after %s attempt(s). Failing over to %s.",
+                candidate_model,
+                retry_reason,
+                attempt + 1,
+                next_model,
+            )
+            return None
+
+        logger.error(
+            "Gemini API final failure on model %s after %s attempts: %s",
+            candidate_model,
+            attempt + 1,
+            error,
+        )
+        raise error
+
+    @classmethod
+    def stream_content(
+        cls,
+        prompt: str,
+        max_retries: int = 3,
+        safety_settings: list = None,
+        json_mode: bool = False,
+        model_name: str | None = None,
+        user_id: UUID | None = None,
+        session_id: UUID | None = None,
+        message_id: UUID | None = None,
+        service_name: str = "message_generation",
+    ) -> "GeminiStream":
+        """
+        Stream a response as text deltas. Iterate the returned GeminiStream;
+        its `result` (text + token usage) and `ttft_ms` are set once the
+        stream is exhausted.
+        """
+        return GeminiStream(
+            prompt,
+            max_retries=max_retries,
+            safety_settings=safety_settings,
+            json_mode=json_mode,
+            model_name=model_name,
+            user_id=user_id,
+            session_id=session_id,
+            message_id=message_id,
+            service_name=service_name,
+        )
+
+
+class GeminiStream:
+    """
+    Iterable over the text deltas of one streamed Gemini response.
+
+    Retries, model fallback and key rotation behave like
+    `GeminiClient.generate_content`, but only until the first delta has been
+    yielded; after that a failure is logged and re-raised. The concurrency
+    slot is held until the stream ends or the consumer stops iterating.
+    """
+
+    def __init__(
+        self,
+        prompt: str,
+        *,
+        max_retries: int,
+        safety_settings: list | None,
+        json_mode: bool,
+        model_name: str | None,
+        user_id: UUID | None,
+        session_id: UUID | None,
+        message_id: UUID | None,
+        service_name: str,
+    ):
+        self.prompt = prompt
+        self.max_retries = max_retries
+        self.safety_settings = safety_settings
+        self.json_mode = json_mode
+        self.model_name = model_name
+        self.user_id = user_id
+        self.session_id = session_id
+        self.message_id = message_id
+        self.service_name = service_name
+
+        self.result: dict | None = None
+        self.ttft_ms: float | None = None
+
+    def __iter__(self):
+        return self._run()
+
+    def _run(self):
+        from app.services.api_usage_log_service import ApiUsageLogService
+
+        prompt = self.prompt
+        logical_request_id = GeminiClient._new_request_id()
+        config = GeminiClient._build_config(self.safety_settings, self.json_mode)
+        estimated_tokens = GeminiClient._estimate_tokens(prompt)
+        request_start_time = time.time()
+
+        model_candidates = GeminiClient._get_model_candidates(self.model_name)
+        last_error = None
+
+        for model_index, candidate_model in enumerate(model_candidates):
+            attempts_for_model = GeminiClient._attempts_for_model(self.max_retries, len(model_candidates))
+
+            for attempt in range(attempts_for_model + 1):
+                if model_index < len(model_candidates) - 1 and GeminiClient._circuit_open(candidate_model):
+                    logger.warning("Circuit open for Gemini model %s; skipping to next fallback.", candidate_model)
+                    break
+                GeminiClient._check_deadline(self.service_name, last_error)
+
+                attempt_start_time = time.time()
+                key_slot = None
+                emitted = False
+                common = dict(
+                    request_id=logical_request_id,
+                    provider="gemini",
+                    service_name=self.service_name,
+                    user_id=self.user_id,
+                    session_id=self.session_id,
+                    message_id=self.message_id,
+                    max_retries=self.max_retries,
+                    metadata_json={
+                        "json_mode": self.json_mode,
+                        "key_slot": None,
+                        "model_index": model_index,
+                        "stream": True,
+                    },
+                )
+
+                try:
+                    key_slot, key_wait = GeminiClient._reserve_key(
+                        estimated_tokens, candidate_model, enforce_breaker=model_index < len(model_candidates) - 1
+                    )
+                    common["metadata_json"]["key_slot"] = key_slot
+                    if key_wait > 0:
+                        GeminiClient._check_deadline(self.service_name, last_error, key_wait)
+                        time.sleep(key_wait)
+                    client = GeminiClient.get_client(key_slot)
+
+                    parts = []
+                    usage = None
+                    with GeminiClient._limited(self.service_name):
+                        for chunk in client.models.generate_content_stream(
+                            model=candidate_model,
+                            contents=prompt,
+                            config=GeminiClient._attempt_config(config),
+                        ):
+                            if chunk.usage_metadata:
+                                usage = chunk.usage_metadata
+                            piece = chunk.text or ""
+                            if not piece:
+                                continue
+                            if self.ttft_ms is None:
+                                self.ttft_ms = round((time.time() - request_start_time) * 1000, 2)
+                            emitted = True
+                            parts.append(piece)
+                            yield piece
+                    _ai_limiter.on_success()
+                    _breakers.record_success(candidate_model, key_slot)
+
+                    result = GeminiClient._build_result("".join(parts), usage)
+                    if key_slot is not None:
+                        _key_pool.record_usage(key_slot, estimated_tokens, result["total_tokens"])
+                    duration_ms = round((time.time() - attempt_start_time) * 1000, 2)
+                    common["metadata_json"]["ttft_ms"] = self.ttft_ms
+
+                    ApiUsageLogService.create_log(
+                        **GeminiClient._success_log(result, prompt, candidate_model, attempt, duration_ms, **common)
+                    )
+                    self.result = result
+                    return
+
+                except CircuitOpenError:
+                    logger.warning("No Gemini key admitted by the %s breakers; skipping to next fallback.", candidate_model)
+                    break
+                except GeneratorExit:
+                    # The consumer closed the stream mid-answer: neither a success nor a failure
+                    _breakers.record_ignored(candidate_model, key_slot)
+                    raise
+                except DeadlineExceeded:
+                    GeminiClient._record_outcome(None, key_slot, estimated_tokens, candidate_model)
+                    raise
+                except Exception as e:
+                    try:
+                        GeminiClient._raise_if_deadline_timeout(e, self.service_name)
+                    except DeadlineExceeded:
+                        GeminiClient._record_outcome(None, key_slot, estimated_tokens, candidate_model)
+                        raise
+                    last_error = e
+                    duration_ms = round((time.time() - attempt_start_time) * 1000, 2)
+                    retry_reason = GeminiClient._classify_retry(str(e).lower())
+                    GeminiClient._record_outcome(retry_reason, key_slot, estimated_tokens, candidate_model)
+
+                    if emitted:
+                        # Part of the answer already reached the caller; it cannot be replayed.
+                        should_retry_same_model, should_try_next_model = False, False
+                    else:
+                        should_retry_same_model, should_try_next_model = GeminiClient._plan_retry(
+                            retry_reason, attempt, attempts_for_model, model_index, len(model_candidates)
+                        )
+
+                    ApiUsageLogService.create_log(
+                        **GeminiClient._failure_log(
+                            e,
                             retry_reason,
-                            attempt + 1,
-                            next_model,
+                            should_retry_same_model or should_try_next_model,
+                            prompt,
+                            candidate_model,
+                            attempt,
+                            duration_ms,
+                            **common,
                         )
-                        break
+                    )
 
-                    logger.error(
-                        "Gemini API final failure on model %s after %s attempts: %s",
-                        candidate_model,
-                        attempt + 1,
+                    if emitted:
+                        logger.error("Gemini stream on model %s failed mid-response: %s", candidate_model, e)
+                        raise
+
+                    wait_time = GeminiClient._next_step(
                         e,
+                        retry_reason,
+                        candidate_model,
+                        model_candidates,
+                        model_index,
+                        attempt,
+                        attempts_for_model,
+                        should_retry_same_model,
+                        should_try_next_model,
                     )
-                    raise e
+                    if wait_time is None:
+                        break
+                    if wait_time > 0:
+                        GeminiClient._check_deadline(self.service_name, e, wait_time)
+                        time.sleep(wait_time)
 
         if last_error:
             raise last_error
 
-        return {"text": "", "error": "Maximum retries exceeded"}
\ No newline at end of file
+        self.result = GeminiClient._build_result("", None)
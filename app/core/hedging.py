@@ -0,0 +1,114 @@
+# app/core/hedging.py
+
+import threading
+from collections import defaultdict, deque
+
+
+class LatencyTracker:
+    """Recent successful call latencies per key (e.g. service name)."""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: dict[str, deque[float]] = defaultdict(lambda: deque(maxlen=self.window))
+        self._lock = threading.Lock()
+
+    def record(self, key: str, seconds: float) -> None:
+        with self._lock:
+            self._samples[key].append(seconds)
+
+    def count(self, key: str) -> int:
+        with self._lock:
+            return len(self._samples.get(key, ()))
+
+    def percentile(self, key: str, q: float, min_samples: int = 1) -> float | None:
+        """q-th quantile (0..1) of the recorded latencies, None below `min_samples`."""
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if len(samples) < max(1, min_samples):
+            return None
+        index = min(len(samples) - 1, int(q * len(samples)))
+        return samples[index]
+
+
+class HedgeRace:
+    """
+    Shared state between the primary call and its hedge. The first leg to
+    succeed claims the race; the other leg stops retrying once it is settled.
+    """
+
+    def __init__(self):
+        self.winner: str | None = None
+        self.result: dict | None = None
+        self.key_slots: dict[str, int | None] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def settled(self) -> bool:
+        return self.winner is not None
+
+    def claim(self, role: str, result: dict) -> bool:
+        with self._lock:
+            if self.winner is not None:
+                return False
+            self.winner = role
+            self.result = result
+            return True
+
+
+class HedgeStats:
+    """
+    Per-service hedging counters. `allow` caps hedges at `max_rate` of all
+    eligible requests so a slow upstream cannot double the traffic.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._services: dict[str, dict] = defaultdict(lambda: {
+            "requests": 0,
+            "hedged": 0,
+            "hedge_wins": 0,
+            "primary_wins": 0,
+            "both_failed": 0,
+            "wasted_tokens": 0,
+            "skipped_by_rate_cap": 0,
+        })
+
+    def record_request(self, service_name: str) -> None:
+        with self._lock:
+            self._services[service_name]["requests"] += 1
+
+    def allow(self, service_name: str, max_rate: float) -> bool:
+        with self._lock:
+            counters = self._services[service_name]
+            if counters["hedged"] + 1 > max_rate * max(counters["requests"], 1):
+                counters["skipped_by_rate_cap"] += 1
+                return False
+            counters["hedged"] += 1
+            return True
+
+    def record_outcome(self, service_name: str, winner: str | None) -> None:
+        with self._lock:
+            counters = self._services[service_name]
+            if winner == "hedge":
+                counters["hedge_wins"] += 1
+            elif winner == "primary":
+                counters["primary_wins"] += 1
+            else:
+                counters["both_failed"] += 1
+
+    def record_wasted(self, service_name: str, tokens: int) -> None:
+        with self._lock:
+            self._services[service_name]["wasted_tokens"] += tokens
+
+    def stats(self) -> dict:
+        with self._lock:
+            result = {}
+            for service_name, counters in self._services.items():
+                requests = counters["requests"]
+                hedged = counters["hedged"]
+                result[service_name] = {
+                    **counters,
+                    "hedge_rate": round(hedged / requests, 4) if requests else 0.0,
+                    "hedge_win_rate": round(counters["hedge_wins"] / hedged, 4) if hedged else 0.0,
+                }
+            return result
@@ -0,0 +1,164 @@
+# app/core/key_pool.py
+
+import threading
+import time
+
+
+class TokenBucket:
+    """Continuously refilling token bucket (capacity refills over `period_s`)."""
+
+    def __init__(self, capacity: float, period_s: float = 60.0):
+        self.capacity = float(capacity)
+        self.refill_per_s = self.capacity / period_s
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_s)
+            self.updated_at = now
+
+    def available(self, now: float) -> float:
+        self._refill(now)
+        return self.tokens
+
+    def consume(self, amount: float, now: float) -> None:
+        """Take `amount` tokens. May go negative (actual usage above estimate)."""
+        self._refill(now)
+        self.tokens -= amount
+
+    def refund(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def seconds_until(self, amount: float, now: float) -> float:
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.tokens
+        return max(0.0, missing / self.refill_per_s) if self.refill_per_s else float("inf")
+
+
+class _KeyState:
+    def __init__(self, slot: int, label: str, rpm: int, tpm: int):
+        self.slot = slot
+        self.label = label
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.throttled_until = 0.0
+        self.total_requests = 0
+        self.total_tokens = 0
+        self.throttle_events = 0
+
+
+class KeyPool:
+    """
+    Local RPM/TPM token buckets for each configured API key.
+
+    `acquire` dispatches to the key with the most headroom (the smaller of
+    its request and token bucket fill ratios), so traffic spreads across
+    keys before the provider starts throttling any one of them. A key that
+    does hit a 429 is parked for `throttle_cooldown_s`.
+    """
+
+    def __init__(
+        self,
+        labels: list[str],
+        rpm_limit: int,
+        tpm_limit: int,
+        throttle_cooldown_s: float = 10.0,
+    ):
+        self.throttle_cooldown_s = throttle_cooldown_s
+        self._keys = [_KeyState(i, label, rpm_limit, tpm_limit) for i, label in enumerate(labels)]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @staticmethod
+    def _headroom(key: _KeyState, now: float) -> float:
+        return min(
+            key.requests.available(now) / key.requests.capacity,
+            key.tokens.available(now) / key.tokens.capacity,
+        )
+
+    def _wait_for(self, key: _KeyState, estimated_tokens: int, now: float) -> float:
+        return max(
+            key.throttled_until - now,
+            key.requests.seconds_until(1, now),
+            key.tokens.seconds_until(estimated_tokens, now),
+        )
+
+    def acquire(self, estimated_tokens: int, exclude=()) -> tuple[int, float]:
+        """
+        Reserve one request and `estimated_tokens` on the best key.
+
+        Returns (slot, wait_seconds). wait_seconds is 0 when the key has
+        capacity now; otherwise it is the time until the least-loaded key
+        refills, and the caller should wait that long before sending.
+        Slots in `exclude` are skipped unless every key is excluded.
+        """
+        if not self._keys:
+            raise ValueError("No API keys configured")
+
+        with self._lock:
+            now = time.monotonic()
+            candidates = [k for k in self._keys if k.slot not in exclude] or self._keys
+            best = min(
+                candidates,
+                key=lambda k: (self._wait_for(k, estimated_tokens, now), -self._headroom(k, now)),
+            )
+            wait = self._wait_for(best, estimated_tokens, now)
+
+            best.requests.consume(1, now)
+            best.tokens.consume(estimated_tokens, now)
+            best.total_requests += 1
+            return best.slot, wait
+
+    def release(self, slot: int, estimated_tokens: int) -> None:
+        """Give back a reservation from `acquire` that was never sent."""
+        with self._lock:
+            now = time.monotonic()
+            key = self._keys[slot]
+            key.requests.refund(1, now)
+            key.tokens.refund(estimated_tokens, now)
+            key.total_requests -= 1
+
+    def record_usage(self, slot: int, estimated_tokens: int, actual_tokens: int) -> None:
+        """Correct the token bucket once the real token count is known."""
+        with self._lock:
+            now = time.monotonic()
+            key = self._keys[slot]
+            delta = actual_tokens - estimated_tokens
+            if delta > 0:
+                key.tokens.consume(delta, now)
+            elif delta < 0:
+                key.tokens.refund(-delta, now)
+            key.total_tokens += actual_tokens
+
+    def mark_throttled(self, slot: int) -> None:
+        with self._lock:
+            key = self._keys[slot]
+            key.throttled_until = time.monotonic() + self.throttle_cooldown_s
+            key.throttle_events += 1
+
+    def stats(self) -> list[dict]:
+        with self._lock:
+            now = time.monotonic()
+            result = []
+            for key in self._keys:
+                rpm_used = key.requests.capacity - key.requests.available(now)
+                tpm_used = key.tokens.capacity - key.tokens.available(now)
+                result.append({
+                    "slot": key.slot,
+                    "key": key.label,
+                    "rpm_limit": int(key.requests.capacity),
+                    "rpm_used": round(rpm_used, 1),
+                    "tpm_limit": int(key.tokens.capacity),
+                    "tpm_used": round(tpm_used),
+                    "utilization": round(1 - self._headroom(key, now), 4),
+                    "throttled": key.throttled_until > now,
+                    "throttle_events": key.throttle_events,
+                    "total_requests": key.total_requests,
+                    "total_tokens": key.total_tokens,
+                })
+            return result
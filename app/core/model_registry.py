@@ -0,0 +1,281 @@
+# app/core/model_registry.py
+
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+XLMR_MODEL_NAME = "sentence-transformers/paraphrase-xlm-r-multilingual-v1"
+MINILM_MODEL_NAME = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
+# Short mixed Sinhala/English batch used to trigger lazy kernel/graph
+# initialisation before the first real request.
+WARMUP_TEXTS = [
+    "ශ්‍රී ලංකාවේ ඉතිහාසය",
+    "ප්‍රශ්නයට පිළිතුරු දෙන්න.",
+    "What is photosynthesis?",
+    "ජලය වාෂ්ප වීම සිදු වන්නේ කෙසේද?",
+]
+
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+def _quantized_onnx_dir(model_name: str, kind: str = "sentence_transformer") -> Path:
+    name = model_name.replace("/", "__")
+    if kind != "sentence_transformer":
+        name = f"{name}__{kind}"
+    return Path(settings.ONNX_MODEL_DIR) / name
+
+
+def _load_quantized_onnx(model_name: str, device: str | None, model_cls=None, kind: str = "sentence_transformer", **kwargs):
+    """
+    Load a dynamic-int8 ONNX export of `model_name`, exporting and
+    quantizing it into ONNX_MODEL_DIR the first time.
+    """
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    model_cls = model_cls or SentenceTransformer
+    config = settings.ONNX_QUANTIZATION_CONFIG
+    local_dir = _quantized_onnx_dir(model_name, kind)
+    file_name = f"onnx/model_qint8_{config}.onnx"
+
+    if not (local_dir / file_name).exists():
+        logger.info("Exporting %s to int8 ONNX (%s) in %s", model_name, config, local_dir)
+        fp32_model = model_cls(model_name, device=device, backend="onnx", **kwargs)
+        fp32_model.save_pretrained(str(local_dir))
+        export_dynamic_quantized_onnx_model(fp32_model, config, str(local_dir))
+
+    return model_cls(
+        str(local_dir),
+        device=device,
+        backend="onnx",
+        model_kwargs={"file_name": file_name},
+        **kwargs,
+    )
+
+
+def _load_sentence_transformer(model_name: str, device: str | None, backend: str = "torch"):
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "onnx-int8":
+        return _load_quantized_onnx(model_name, device)
+    if backend == "onnx":
+        return SentenceTransformer(model_name, device=device, backend="onnx")
+    return SentenceTransformer(model_name, device=device)
+
+
+def _load_cross_encoder(model_name: str, device: str | None, backend: str = "torch"):
+    """Cross-encoder truncating (query, passage) pairs to RERANKER_MAX_LENGTH tokens."""
+    from sentence_transformers.cross_encoder import CrossEncoder
+
+    max_length = settings.RERANKER_MAX_LENGTH
+    if backend == "onnx-int8":
+        return _load_quantized_onnx(model_name, device, CrossEncoder, kind="cross_encoder", max_length=max_length)
+    if backend == "onnx":
+        return CrossEncoder(model_name, device=device, backend="onnx", max_length=max_length)
+    return CrossEncoder(model_name, device=device, max_length=max_length)
+
+
+def _warm_up_sentence_transformer(model, texts: list[str]) -> None:
+    model.encode(texts, batch_size=len(texts), show_progress_bar=False)
+
+
+def _warm_up_cross_encoder(model, texts: list[str]) -> None:
+    model.predict([(text, text) for text in texts], batch_size=len(texts), show_progress_bar=False)
+
+
+_LOADERS = {
+    "sentence_transformer": _load_sentence_transformer,
+    "cross_encoder": _load_cross_encoder,
+}
+
+_WARMUPS = {
+    "sentence_transformer": _warm_up_sentence_transformer,
+    "cross_encoder": _warm_up_cross_encoder,
+}
+
+
+def _model_bytes(model, backend: str = "torch") -> int | None:
+    """
+    Parameter + buffer bytes of a torch module. ONNX sessions hold no torch
+    parameters, so for those it is the size of the loaded .onnx file(s)
+    (weights dominate); None if that cannot be found.
+    """
+    if backend != "torch":
+        return _onnx_file_bytes(model)
+    try:
+        params = sum(p.numel() * p.element_size() for p in model.parameters())
+        buffers = sum(b.numel() * b.element_size() for b in model.buffers())
+        return params + buffers
+    except AttributeError:
+        return 0
+
+
+def _onnx_file_bytes(model) -> int | None:
+    """Size of the ONNX graph file plus external weight data of an optimum ORTModel."""
+    candidates = [getattr(model, "model", None)]  # CrossEncoder
+    try:
+        candidates.append(model[0].auto_model)  # SentenceTransformer's Transformer module
+    except (TypeError, IndexError, KeyError, AttributeError):
+        pass
+
+    for ort_model in candidates:
+        path = getattr(ort_model, "model_path", None)
+        if path is None:
+            continue
+        path = Path(path)
+        if path.is_file():
+            # model.onnx plus model.onnx_data / model.onnx.data when weights are external
+            return sum(f.stat().st_size for f in path.parent.glob(f"{path.name}*") if f.is_file())
+    return None
+
+
+def backend_for(model_name: str) -> str:
+    """Inference backend for a sentence-transformer: XLMR_BACKEND for XLM-R, torch otherwise."""
+    return settings.XLMR_BACKEND if model_name == XLMR_MODEL_NAME else "torch"
+
+
+class ModelRegistry:
+    """
+    Process-wide registry for local transformer encoders.
+
+    Each (kind, model_name, backend) is loaded at most once per worker,
+    however many services ask for it. Kinds are "sentence_transformer"
+    and "cross_encoder" (rerankers). Both can run on
+    torch (default), ONNX Runtime fp32 ("onnx") or dynamic int8 ONNX
+    ("onnx-int8"). Models load lazily on first use, or at startup
+    when LOAD_ENCODERS_ON_STARTUP is set (see `preload`).
+    """
+
+    _models: dict[tuple[str, str, str], object] = {}
+    _info: dict[tuple[str, str, str], dict] = {}
+    _key_locks: dict[tuple[str, str, str], threading.Lock] = {}
+    _registry_lock = threading.Lock()
+
+    @classmethod
+    def _lock_for(cls, key: tuple[str, str, str]) -> threading.Lock:
+        with cls._registry_lock:
+            if key not in cls._key_locks:
+                cls._key_locks[key] = threading.Lock()
+            return cls._key_locks[key]
+
+    @classmethod
+    def get(
+        cls,
+        model_name: str,
+        kind: str = "sentence_transformer",
+        device: str | None = None,
+        backend: str = "torch",
+    ):
+        """Return the shared instance of `model_name`, loading it if needed."""
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown inference backend: {backend}")
+
+        key = (kind, model_name, backend)
+        model = cls._models.get(key)
+        if model is not None:
+            return model
+
+        with cls._lock_for(key):
+            model = cls._models.get(key)
+            if model is not None:
+                return model
+
+            if kind not in _LOADERS:
+                raise ValueError(f"Unknown model kind: {kind}")
+
+            logger.info("Loading %s model %s (%s)...", kind, model_name, backend)
+            start = time.perf_counter()
+            try:
+                model = _LOADERS[kind](model_name, device, backend)
+            except Exception as e:
+                logger.error("Failed to load %s model %s: %s", kind, model_name, e)
+                raise
+            load_seconds = time.perf_counter() - start
+
+            cls._info[key] = {
+                "kind": kind,
+                "model_name": model_name,
+                "backend": backend,
+                "device": str(getattr(model, "device", device or "cpu")),
+                "memory_bytes": _model_bytes(model, backend),
+                "load_seconds": round(load_seconds, 3),
+                "warmup_seconds": None,
+                "loaded_at": datetime.now(timezone.utc).isoformat(),
+            }
+            cls._models[key] = model
+
+        memory_bytes = cls._info[key]["memory_bytes"]
+        logger.info(
+            "Loaded %s model %s (%s) in %.2fs (%s)",
+            kind,
+            model_name,
+            backend,
+            load_seconds,
+            f"{memory_bytes / (1024 * 1024):.1f} MB" if memory_bytes is not None else "size unknown",
+        )
+
+        if settings.ENCODER_WARMUP_ON_LOAD:
+            cls.warm_up(model_name, kind=kind, backend=backend)
+
+        return model
+
+    @classmethod
+    def warm_up(
+        cls,
+        model_name: str,
+        kind: str = "sentence_transformer",
+        texts: list[str] | None = None,
+        backend: str = "torch",
+    ) -> float | None:
+        """Run one small batch through a loaded model. Returns seconds taken."""
+        key = (kind, model_name, backend)
+        model = cls._models.get(key)
+        warmup = _WARMUPS.get(kind)
+        if model is None or warmup is None:
+            return None
+
+        start = time.perf_counter()
+        try:
+            warmup(model, texts or WARMUP_TEXTS)
+        except Exception as e:
+            logger.warning("Warm-up failed for %s model %s: %s", kind, model_name, e)
+            return None
+        seconds = round(time.perf_counter() - start, 3)
+        cls._info[key]["warmup_seconds"] = seconds
+        return seconds
+
+    @classmethod
+    def preload(cls, model_names: list[str] | None = None) -> None:
+        """Eagerly load sentence-transformer encoders (used at startup)."""
+        if model_names is None:
+            model_names = [
+                name.strip()
+                for name in settings.STARTUP_ENCODERS.split(",")
+                if name.strip()
+            ]
+        for name in model_names:
+            backend = backend_for(name)
+            try:
+                cls.get(name, backend=backend)
+            except Exception as e:
+                logger.error("Encoder %s failed to preload: %s", name, e)
+
+    @classmethod
+    def is_loaded(
+        cls,
+        model_name: str,
+        kind: str = "sentence_transformer",
+        backend: str = "torch",
+    ) -> bool:
+        return (kind, model_name, backend) in cls._models
+
+    @classmethod
+    def stats(cls) -> list[dict]:
+        return [dict(info) for info in cls._info.values()]
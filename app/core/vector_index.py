@@ -0,0 +1,281 @@
+# app/core/vector_index.py
+
+"""
+pgvector ANN index lifecycle for the embedding columns.
+
+The Alembic migrations create the indexes with fixed options;
+scripts/vector_index.py reports their health and rebuilds them through
+`create_index_sql` (e.g. to switch between HNSW and IVFFlat, or to retune
+IVFFlat `lists` once the table has grown). Query-time recall is tuned per transaction with
+`apply_search_settings` (hnsw.ef_search / ivfflat.probes).
+
+Besides the full-precision index, a target can carry compact indexes on an
+expression over the same column: `halfvec` (float16, half the size) or
+`binary` (one bit per dimension, binary_quantize + Hamming distance).
+Search then orders by the compact distance (`distance_sql`) and rescores
+the candidates exactly against the stored vector. Compact representations
+need pgvector >= 0.7.0.
+"""
+
+import math
+from dataclasses import dataclass
+
+from sqlalchemy import text
+
+METHODS = ("hnsw", "ivfflat")
+REPRESENTATIONS = ("full", "halfvec", "binary")
+COMPACT_MIN_PGVECTOR = (0, 7, 0)
+
+
+@dataclass(frozen=True)
+class VectorIndexTarget:
+    table: str
+    column: str
+    index_name: str
+    dims: int = 768
+    # Indexes created by the old raw SQL files, dropped on (re)build
+    legacy_names: tuple[str, ...] = ()
+    # Representations besides "full" that may be indexed (see index_expression)
+    compact: tuple[str, ...] = ()
+
+    def index_name_for(self, representation: str = "full") -> str:
+        return self.index_name if representation == "full" else f"{self.index_name}_{representation}"
+
+
+TARGETS = {
+    "resource_chunks": VectorIndexTarget(
+        table="resource_chunks",
+        column="embedding",
+        index_name="ix_resource_chunks_embedding_ann",
+        legacy_names=("idx_resource_chunks_embedding",),
+        compact=("halfvec", "binary"),
+    ),
+    "resource_files": VectorIndexTarget(
+        table="resource_files",
+        column="document_embedding",
+        index_name="ix_resource_files_document_embedding_ann",
+        legacy_names=("idx_resource_files_doc_embedding",),
+    ),
+}
+
+
+def ivfflat_lists(rows: int) -> int:
+    """pgvector guidance: rows / 1000 up to 1M rows, sqrt(rows) above."""
+    if rows <= 1_000_000:
+        return max(10, rows // 1000)
+    return int(math.sqrt(rows))
+
+
+def _check_representation(target: VectorIndexTarget, representation: str) -> None:
+    if representation != "full" and representation not in target.compact:
+        raise ValueError(
+            f"Representation {representation!r} is not available for {target.table}.{target.column} "
+            f"(expected one of {('full', *target.compact)})"
+        )
+
+
+def index_expression(target: VectorIndexTarget, representation: str = "full") -> tuple[str, str]:
+    """(indexed expression, operator class) for a representation of `target`."""
+    _check_representation(target, representation)
+    if representation == "halfvec":
+        return f"({target.column}::halfvec({target.dims}))", "halfvec_cosine_ops"
+    if representation == "binary":
+        return f"(binary_quantize({target.column})::bit({target.dims}))", "bit_hamming_ops"
+    return target.column, "vector_cosine_ops"
+
+
+def distance_sql(target: VectorIndexTarget, representation: str = "full", query: str = ":query_embedding") -> str:
+    """
+    ORDER BY expression for the query vector bound as `query`, written to
+    match `index_expression` so the planner can use that index.
+    """
+    _check_representation(target, representation)
+    if representation == "halfvec":
+        return f"{target.column}::halfvec({target.dims}) <=> ({query})::halfvec({target.dims})"
+    if representation == "binary":
+        return f"binary_quantize({target.column})::bit({target.dims}) <~> binary_quantize(({query})::vector)"
+    return f"{target.column} <=> ({query})::vector"
+
+
+def pgvector_version(conn) -> tuple[int, ...] | None:
+    version = conn.execute(text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")).scalar()
+    if not version:
+        return None
+    return tuple(int(part) for part in version.split(".") if part.isdigit())
+
+
+def supports_compact(conn) -> bool:
+    version = pgvector_version(conn)
+    return version is not None and version >= COMPACT_MIN_PGVECTOR
+
+
+def create_index_sql(
+    target: VectorIndexTarget,
+    method: str,
+    rows: int = 0,
+    m: int = 16,
+    ef_construction: int = 64,
+    concurrently: bool = False,
+    index_name: str | None = None,
+    representation: str = "full",
+) -> str:
+    """CREATE INDEX statement for `target` using cosine (Hamming for binary) distance."""
+    if method not in METHODS:
+        raise ValueError(f"Unknown vector index method: {method!r} (expected one of {METHODS})")
+    expression, opclass = index_expression(target, representation)
+
+    if method == "hnsw":
+        options = f"m = {int(m)}, ef_construction = {int(ef_construction)}"
+    else:
+        options = f"lists = {ivfflat_lists(rows)}"
+
+    return (
+        f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS "
+        f"{index_name or target.index_name_for(representation)} "
+        f"ON {target.table} USING {method} ({expression} {opclass}) WITH ({options})"
+    )
+
+
+def drop_index_sql(target: VectorIndexTarget, concurrently: bool = False, representation: str = "full") -> list[str]:
+    prefix = "DROP INDEX CONCURRENTLY IF EXISTS" if concurrently else "DROP INDEX IF EXISTS"
+    if representation != "full":
+        return [f"{prefix} {target.index_name_for(representation)}"]
+    return [f"{prefix} {name}" for name in (target.index_name, *target.legacy_names)]
+
+
+def count_vectors(conn, target: VectorIndexTarget) -> int:
+    return conn.execute(
+        text(f"SELECT count(*) FROM {target.table} WHERE {target.column} IS NOT NULL")
+    ).scalar() or 0
+
+
+def apply_search_settings(conn, ef_search: int | None = None, probes: int | None = None) -> None:
+    """
+    Transaction-local recall knobs for the next ANN query. Both are plain
+    custom settings, so setting the one whose index type is not in use is
+    harmless.
+    """
+    if ef_search:
+        conn.execute(text("SELECT set_config('hnsw.ef_search', :value, true)"), {"value": str(int(ef_search))})
+    if probes:
+        conn.execute(text("SELECT set_config('ivfflat.probes', :value, true)"), {"value": str(int(probes))})
+
+
+def list_ann_indexes(conn, target: VectorIndexTarget) -> list[dict]:
+    rows = conn.execute(
+        text(
+            """
+            SELECT
+                ic.relname AS index_name,
+                am.amname AS method,
+                ic.reloptions AS options,
+                pg_relation_size(ic.oid) AS size_bytes,
+                ix.indisvalid AS valid,
+                COALESCE(st.idx_scan, 0) AS scans,
+                pg_get_indexdef(ix.indexrelid) AS definition
+            FROM pg_index ix
+            JOIN pg_class ic ON ic.oid = ix.indexrelid
+            JOIN pg_class tc ON tc.oid = ix.indrelid
+            JOIN pg_am am ON am.oid = ic.relam
+            LEFT JOIN pg_stat_user_indexes st ON st.indexrelid = ix.indexrelid
+            WHERE tc.relname = :table
+              AND am.amname IN ('hnsw', 'ivfflat')
+            ORDER BY ic.relname
+            """
+        ),
+        {"table": target.table},
+    ).mappings()
+    indexes = []
+    for row in rows:
+        index = dict(row)
+        index["representation"] = representation_of(index.pop("definition") or "")
+        indexes.append(index)
+    return indexes
+
+
+def representation_of(definition: str) -> str:
+    """Which representation an index definition (pg_get_indexdef) covers."""
+    if "binary_quantize" in definition:
+        return "binary"
+    if "halfvec" in definition:
+        return "halfvec"
+    return "full"
+
+
+def _option(options, name: str) -> int | None:
+    for option in options or ():
+        key, _, value = option.partition("=")
+        if key == name and value.isdigit():
+            return int(value)
+    return None
+
+
+def assess(
+    target: VectorIndexTarget,
+    indexes: list[dict],
+    rows: int,
+    preferred_method: str,
+    representation: str = "full",
+) -> dict:
+    """
+    Health of one target from `list_ann_indexes` output and its vector count.
+    `representation` is the one searched first (see distance_sql); its index
+    is the one required. `status` is "ok", "warn" or "missing"; `issues`
+    explains anything else.
+    """
+    issues = []
+    for ix in indexes:
+        if not ix["valid"]:
+            issues.append(f"{ix['index_name']} is INVALID (failed concurrent build); rebuild it")
+
+    for kind in REPRESENTATIONS:
+        same = [ix for ix in indexes if ix["valid"] and ix.get("representation", "full") == kind]
+        if len(same) > 1:
+            issues.append(
+                f"multiple {kind} ANN indexes on the column: "
+                + ", ".join(ix["index_name"] for ix in same)
+            )
+
+    valid = [ix for ix in indexes if ix["valid"] and ix.get("representation", "full") == representation]
+
+    recommended_lists = ivfflat_lists(rows)
+    for ix in valid:
+        if ix["method"] != preferred_method:
+            issues.append(f"{ix['index_name']} uses {ix['method']}, configured method is {preferred_method}")
+        if ix["method"] == "ivfflat":
+            lists = _option(ix["options"], "lists")
+            if lists and not (recommended_lists / 2 <= lists <= recommended_lists * 2):
+                issues.append(
+                    f"{ix['index_name']} has lists={lists}, {rows} vectors suggest {recommended_lists}; rebuild to retune"
+                )
+
+    if not valid:
+        status = "missing"
+        issues.append(f"no valid {representation} ANN index; vector search falls back to a sequential scan")
+    else:
+        status = "warn" if issues else "ok"
+
+    return {
+        "table": target.table,
+        "column": target.column,
+        "representation": representation,
+        "status": status,
+        "vectors": rows,
+        "recommended_ivfflat_lists": recommended_lists,
+        "indexes": indexes,
+        "issues": issues,
+    }
+
+
+def health_report(conn, preferred_method: str, representation: str = "full") -> list[dict]:
+    """`representation` applies to targets that support it; others are checked as "full"."""
+    return [
+        assess(
+            target,
+            list_ann_indexes(conn, target),
+            count_vectors(conn, target),
+            preferred_method,
+            representation if representation in target.compact else "full",
+        )
+        for target in TARGETS.values()
+    ]
@@ -12,6 +12,8 @@ from app.routers import (
     websockets,
 )
 from app.core.whisper_loader import WhisperLoader
+from app.core.model_registry import ModelRegistry
+from app.services.api_usage_log_service import ApiUsageLogService
 from app.api.v1.router import api_router
 from app.core.config import settings
 from app.core.database import Base, engine
@@ -67,6 +69,18 @@ def on_startup():
     else:
         logger.info("Skipping Whisper startup load; model will load on first use.")
 
+    if settings.LOAD_ENCODERS_ON_STARTUP:
+        logger.info("Loading local encoders at startup...")
+        ModelRegistry.preload()
+    else:
+        logger.info("Skipping encoder startup load; models will load on first use.")
+
+
+@app.on_event("shutdown")
+def on_shutdown():
+    ApiUsageLogService.shutdown()
+    logger.info("Flushed pending API usage logs.")
+
 def custom_openapi():
     """Add Bearer auth security scheme to OpenAPI and apply to protected endpoints."""
     if app.openapi_schema:
@@ -0,0 +1,101 @@
+# app/repositories/embedding_cache_repository.py
+
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.shared.models.embedding_cache import EmbeddingCacheEntry
+
+
+class EmbeddingCacheRepository:
+    """Data access for EmbeddingCacheEntry."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_many(
+        self,
+        cache_keys: List[str],
+        created_after: Optional[datetime] = None,
+    ) -> Dict[str, List[float]]:
+        """Return cache_key -> embedding for the keys that are present and fresh."""
+        if not cache_keys:
+            return {}
+        query = self.db.query(
+            EmbeddingCacheEntry.cache_key,
+            EmbeddingCacheEntry.embedding,
+        ).filter(EmbeddingCacheEntry.cache_key.in_(cache_keys))
+        if created_after is not None:
+            query = query.filter(EmbeddingCacheEntry.created_at >= created_after)
+        return {key: list(embedding) for key, embedding in query.all()}
+
+    def touch(self, cache_keys: List[str]) -> None:
+        """Record a hit for each key (for LRU trimming)."""
+        if not cache_keys:
+            return
+        (
+            self.db.query(EmbeddingCacheEntry)
+            .filter(EmbeddingCacheEntry.cache_key.in_(cache_keys))
+            .update(
+                {
+                    EmbeddingCacheEntry.hit_count: EmbeddingCacheEntry.hit_count + 1,
+                    EmbeddingCacheEntry.last_accessed_at: datetime.now(timezone.utc),
+                },
+                synchronize_session=False,
+            )
+        )
+
+    def upsert_many(self, entries: Iterable[dict]) -> int:
+        """Insert or refresh entries. Each entry needs cache_key, model_name,
+        output_dimensionality, embedding and text_chars."""
+        rows = list(entries)
+        if not rows:
+            return 0
+        now = datetime.now(timezone.utc)
+        for row in rows:
+            row.setdefault("hit_count", 0)
+            row["created_at"] = now
+            row["last_accessed_at"] = now
+
+        stmt = insert(EmbeddingCacheEntry).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[EmbeddingCacheEntry.cache_key],
+            set_={
+                "embedding": stmt.excluded.embedding,
+                "created_at": stmt.excluded.created_at,
+                "last_accessed_at": stmt.excluded.last_accessed_at,
+            },
+        )
+        self.db.execute(stmt)
+        return len(rows)
+
+    def delete_created_before(self, cutoff: datetime) -> int:
+        return (
+            self.db.query(EmbeddingCacheEntry)
+            .filter(EmbeddingCacheEntry.created_at < cutoff)
+            .delete(synchronize_session=False)
+        )
+
+    def trim_to_size(self, max_entries: int) -> int:
+        """Delete least-recently-used entries beyond max_entries."""
+        total = self.count()
+        overflow = total - max_entries
+        if overflow <= 0:
+            return 0
+        stale_keys = (
+            self.db.query(EmbeddingCacheEntry.cache_key)
+            .order_by(EmbeddingCacheEntry.last_accessed_at.asc())
+            .limit(overflow)
+            .subquery()
+        )
+        return (
+            self.db.query(EmbeddingCacheEntry)
+            .filter(EmbeddingCacheEntry.cache_key.in_(stale_keys.select()))
+            .delete(synchronize_session=False)
+        )
+
+    def count(self) -> int:
+        return self.db.query(func.count(EmbeddingCacheEntry.cache_key)).scalar() or 0
@@ -0,0 +1,61 @@
+# app/repositories/lexical_index_repository.py
+
+from typing import Iterable, List
+from uuid import UUID
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.shared.models.lexical_index import ResourceLexicalPosting, ResourceLexicalStats
+
+
+class LexicalIndexRepository:
+    """Data access for the per-resource lexical (BM25) index."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def replace_for_resource(self, resource_id: UUID, stats: dict, postings: Iterable[dict]) -> int:
+        """Drop the resource's existing index and write the new one (caller commits)."""
+        self.delete_for_resource(resource_id)
+        self.db.add(ResourceLexicalStats(resource_id=resource_id, **stats))
+        rows = [{"resource_id": resource_id, **posting} for posting in postings]
+        if rows:
+            self.db.execute(insert(ResourceLexicalPosting), rows)
+        return len(rows)
+
+    def delete_for_resource(self, resource_id: UUID) -> None:
+        self.db.query(ResourceLexicalPosting).filter(
+            ResourceLexicalPosting.resource_id == resource_id
+        ).delete(synchronize_session=False)
+        self.db.query(ResourceLexicalStats).filter(
+            ResourceLexicalStats.resource_id == resource_id
+        ).delete(synchronize_session=False)
+
+    def get_stats(self, resource_ids: List[UUID]) -> List[ResourceLexicalStats]:
+        if not resource_ids:
+            return []
+        return (
+            self.db.query(ResourceLexicalStats)
+            .filter(ResourceLexicalStats.resource_id.in_(resource_ids))
+            .all()
+        )
+
+    def get_postings(self, resource_ids: List[UUID], terms: List[str]):
+        """Rows of (resource_id, term, chunk_id, term_freq, chunk_length) for the query terms."""
+        if not resource_ids or not terms:
+            return []
+        return (
+            self.db.query(
+                ResourceLexicalPosting.resource_id,
+                ResourceLexicalPosting.term,
+                ResourceLexicalPosting.chunk_id,
+                ResourceLexicalPosting.term_freq,
+                ResourceLexicalPosting.chunk_length,
+            )
+            .filter(
+                ResourceLexicalPosting.resource_id.in_(resource_ids),
+                ResourceLexicalPosting.term.in_(terms),
+            )
+            .all()
+        )
@@ -0,0 +1,96 @@
+# app/repositories/llm_response_cache_repository.py
+
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.shared.models.llm_response_cache import LlmResponseCacheEntry
+
+
+class LlmResponseCacheRepository:
+    """Data access for LlmResponseCacheEntry."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_fresh(self, cache_key: str, now: datetime) -> Optional[LlmResponseCacheEntry]:
+        return (
+            self.db.query(LlmResponseCacheEntry)
+            .filter(
+                LlmResponseCacheEntry.cache_key == cache_key,
+                LlmResponseCacheEntry.expires_at > now,
+            )
+            .first()
+        )
+
+    def touch(self, cache_key: str) -> None:
+        (
+            self.db.query(LlmResponseCacheEntry)
+            .filter(LlmResponseCacheEntry.cache_key == cache_key)
+            .update(
+                {
+                    LlmResponseCacheEntry.hit_count: LlmResponseCacheEntry.hit_count + 1,
+                    LlmResponseCacheEntry.last_accessed_at: datetime.now(timezone.utc),
+                },
+                synchronize_session=False,
+            )
+        )
+
+    def upsert(self, entry: dict) -> None:
+        """Insert or replace one entry (needs every column except hit_count/timestamps)."""
+        now = datetime.now(timezone.utc)
+        row = dict(entry, hit_count=0, created_at=now, last_accessed_at=now)
+
+        stmt = insert(LlmResponseCacheEntry).values(row)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[LlmResponseCacheEntry.cache_key],
+            set_={
+                "service_name": stmt.excluded.service_name,
+                "model_name": stmt.excluded.model_name,
+                "response_text": stmt.excluded.response_text,
+                "prompt_tokens": stmt.excluded.prompt_tokens,
+                "completion_tokens": stmt.excluded.completion_tokens,
+                "total_tokens": stmt.excluded.total_tokens,
+                "created_at": stmt.excluded.created_at,
+                "expires_at": stmt.excluded.expires_at,
+                "last_accessed_at": stmt.excluded.last_accessed_at,
+            },
+        )
+        self.db.execute(stmt)
+
+    def delete_expired(self, now: datetime) -> int:
+        return (
+            self.db.query(LlmResponseCacheEntry)
+            .filter(LlmResponseCacheEntry.expires_at <= now)
+            .delete(synchronize_session=False)
+        )
+
+    def delete_for_service(self, service_name: str) -> int:
+        return (
+            self.db.query(LlmResponseCacheEntry)
+            .filter(LlmResponseCacheEntry.service_name == service_name)
+            .delete(synchronize_session=False)
+        )
+
+    def trim_to_size(self, max_entries: int) -> int:
+        """Delete least-recently-used entries beyond max_entries."""
+        overflow = self.count() - max_entries
+        if overflow <= 0:
+            return 0
+        stale_keys = (
+            self.db.query(LlmResponseCacheEntry.cache_key)
+            .order_by(LlmResponseCacheEntry.last_accessed_at.asc())
+            .limit(overflow)
+            .subquery()
+        )
+        return (
+            self.db.query(LlmResponseCacheEntry)
+            .filter(LlmResponseCacheEntry.cache_key.in_(stale_keys.select()))
+            .delete(synchronize_session=False)
+        )
+
+    def count(self) -> int:
+        return self.db.query(func.count(LlmResponseCacheEntry.cache_key)).scalar() or 0
@@ -27,6 +27,7 @@ class MessageSafetyRepository:
             computed_severity=report_data.get("computed_severity"),
             computed_confidence_score=report_data.get("computed_confidence_score"),
             computed_reliability=report_data.get("computed_reliability"),
+            analysis_status=report_data.get("analysis_status", "ready"),
         )
 
         # logger.info(f"computed_confidence_score: {report_data.get('computed_confidence_score')}")
@@ -41,4 +42,14 @@ class MessageSafetyRepository:
             .filter(MessageSafetyReport.message_id == message_id)
             .order_by(MessageSafetyReport.created_at.desc())
             .first()
-        )
\ No newline at end of file
+        )
+
+    def update_analysis(self, message_id: UUID, values: Dict) -> Optional[MessageSafetyReport]:
+        """Update the latest report for a message with background analysis results."""
+        row = self.get_safety_report(message_id)
+        if row is None:
+            return None
+        for key, value in values.items():
+            setattr(row, key, value)
+        self.db.commit()
+        return row
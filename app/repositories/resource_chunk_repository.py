@@ -3,8 +3,10 @@
 from typing import List, Optional
 from uuid import UUID
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy import func, text
 
+from app.core import vector_index
+from app.core.config import settings
 from app.shared.models.resource_chunks import ResourceChunk
 
 
@@ -56,33 +58,250 @@ class ResourceChunkRepository:
             .all()
         )
 
-    def vector_search(self, resource_ids: List[UUID], query_embedding: List[float], top_k: int = 10) -> List[dict]:
-        """Perform ANN search using pgvector distance ordering and return similarity."""
+    def count_embedded_chunks(self, resource_ids: List[UUID]) -> int:
+        if not resource_ids:
+            return 0
+        return (
+            self.db.query(func.count(ResourceChunk.id))
+            .filter(ResourceChunk.resource_id.in_(resource_ids), ResourceChunk.embedding.isnot(None))
+            .scalar()
+        ) or 0
+
+    def get_chunk_embeddings(self, resource_ids: List[UUID]) -> List:
+        """
+        id, resource_id, chunk_index, content, embedding_model and embedding
+        of every embedded chunk, grouped by resource.
+        """
         if not resource_ids:
             return []
+        return (
+            self.db.query(
+                ResourceChunk.id,
+                ResourceChunk.resource_id,
+                ResourceChunk.chunk_index,
+                ResourceChunk.content,
+                ResourceChunk.embedding_model,
+                ResourceChunk.embedding,
+            )
+            .filter(ResourceChunk.resource_id.in_(resource_ids), ResourceChunk.embedding.isnot(None))
+            .order_by(ResourceChunk.resource_id, ResourceChunk.chunk_index.asc().nulls_last())
+            .all()
+        )
 
-        placeholders = ", ".join([f":id{i}" for i in range(len(resource_ids))])
-        sql = text(
-            f"""
-            SELECT 
-                id, 
-                resource_id, 
-                chunk_index, 
-                content, 
-                embedding_model,
-                1 / (1 + (embedding <=> (:query_embedding)::vector)) AS similarity
-            FROM resource_chunks
-            WHERE resource_id IN ({placeholders})
-            ORDER BY embedding <=> (:query_embedding)::vector
-            LIMIT :top_k
-            """
+    def vector_search(
+        self,
+        resource_ids: List[UUID],
+        query_embedding: List[float],
+        top_k: int = 10,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        representation: Optional[str] = None,
+    ) -> List[dict]:
+        """
+        Perform ANN search using pgvector distance ordering and return similarity.
+
+        `ef_search` (HNSW) and `probes` (IVFFlat) trade latency for recall for
+        this query only; they default to VECTOR_HNSW_EF_SEARCH and
+        VECTOR_IVFFLAT_PROBES.
+
+        With a compact `representation` ("halfvec" or "binary", default
+        VECTOR_SEARCH_REPRESENTATION) the first stage orders by the compact
+        index and keeps top_k * VECTOR_RESCORE_FACTOR candidates, which are
+        then rescored exactly against the full-precision embedding.
+        """
+        if not resource_ids:
+            return []
+
+        target = vector_index.TARGETS["resource_chunks"]
+        representation = representation or settings.VECTOR_SEARCH_REPRESENTATION
+        candidates = top_k
+        if representation != "full":
+            candidates = top_k * max(1, settings.VECTOR_RESCORE_FACTOR.get(representation, 1))
+
+        ef_search = settings.VECTOR_HNSW_EF_SEARCH if ef_search is None else ef_search
+        probes = settings.VECTOR_IVFFLAT_PROBES if probes is None else probes
+        vector_index.apply_search_settings(
+            self.db,
+            ef_search=max(ef_search, candidates) if ef_search else None,
+            probes=probes,
         )
 
+        placeholders = ", ".join([f":id{i}" for i in range(len(resource_ids))])
+        if representation == "full":
+            sql = text(
+                f"""
+                SELECT 
+                    id, 
+                    resource_id, 
+                    chunk_index, 
+                    content, 
+                    embedding_model,
+                    1 / (1 + (embedding <=> (:query_embedding)::vector)) AS similarity
+                FROM resource_chunks
+                WHERE resource_id IN ({placeholders})
+                ORDER BY embedding <=> (:query_embedding)::vector
+                LIMIT :top_k
+                """
+            )
+        else:
+            sql = text(
+                f"""
+                WITH candidates AS (
+                    SELECT id, resource_id, chunk_index, content, embedding_model, embedding
+                    FROM resource_chunks
+                    WHERE resource_id IN ({placeholders})
+                    ORDER BY {vector_index.distance_sql(target, representation)}
+                    LIMIT :candidates
+                )
+                SELECT
+                    id,
+                    resource_id,
+                    chunk_index,
+                    content,
+                    embedding_model,
+                    1 / (1 + (embedding <=> (:query_embedding)::vector)) AS similarity
+                FROM candidates
+                ORDER BY embedding <=> (:query_embedding)::vector
+                LIMIT :top_k
+                """
+            )
+
         params = {f"id{i}": str(rid) for i, rid in enumerate(resource_ids)}
         params["query_embedding"] = query_embedding
         params["top_k"] = top_k
+        if representation != "full":
+            params["candidates"] = candidates
 
         result = self.db.execute(sql, params).mappings()
         return list(result)
 
 
+
+    def lexical_search(self, resource_ids: List[UUID], query: str, top_k: int = 50) -> List[dict]:
+        """
+        Full-text search over the generated `search_tsv` column (GIN indexed)
+        via search_resource_chunks(); rows carry chunk_id, resource_id,
+        content and rank.
+        """
+        if not resource_ids or not query:
+            return []
+
+        sql = text(
+            """
+            SELECT chunk_id, resource_id, content, rank
+            FROM search_resource_chunks(CAST(:resource_ids AS uuid[]), :query, :top_k)
+            """
+        )
+        params = {
+            "resource_ids": [str(rid) for rid in resource_ids],
+            "query": query,
+            "top_k": top_k,
+        }
+        return list(self.db.execute(sql, params).mappings())
+
+    def fused_search(
+        self,
+        resource_ids: List[UUID],
+        query: str,
+        query_embedding: List[float],
+        top_doc_k: int = 8,
+        dense_k: int = 50,
+        lexical_k: int = 50,
+        final_k: int = 8,
+        rrf_k: int = 60,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+    ) -> List[dict]:
+        """
+        Hybrid retrieval in one statement: document pre-filter on
+        resource_files.document_embedding, dense top-`dense_k` and lexical
+        top-`lexical_k` (search_resource_chunks) over the candidate documents,
+        fused with reciprocal rank 1/(rrf_k + rank).
+
+        As in the multi-step path, documents without a document embedding are
+        only searched when none of the resources has one. Rows have the
+        vector_search columns plus dense_rank, lexical_rank and rrf_score.
+        """
+        if not resource_ids or not query_embedding:
+            return []
+
+        ef_search = settings.VECTOR_HNSW_EF_SEARCH if ef_search is None else ef_search
+        probes = settings.VECTOR_IVFFLAT_PROBES if probes is None else probes
+        vector_index.apply_search_settings(
+            self.db,
+            ef_search=max(ef_search, dense_k) if ef_search else None,
+            probes=probes,
+        )
+
+        sql = text(
+            """
+            WITH scope AS (
+                SELECT id, document_embedding
+                FROM resource_files
+                WHERE id = ANY(CAST(:resource_ids AS uuid[]))
+            ),
+            top_docs AS (
+                SELECT id
+                FROM scope
+                WHERE document_embedding IS NOT NULL
+                ORDER BY document_embedding <=> (:query_embedding)::vector
+                LIMIT :top_doc_k
+            ),
+            candidate_docs AS (
+                SELECT id FROM top_docs
+                UNION ALL
+                SELECT id FROM scope
+                WHERE document_embedding IS NULL
+                  AND NOT EXISTS (SELECT 1 FROM top_docs)
+            ),
+            dense AS (
+                SELECT id, row_number() OVER (ORDER BY distance) AS rank
+                FROM (
+                    SELECT c.id, c.embedding <=> (:query_embedding)::vector AS distance
+                    FROM resource_chunks c
+                    WHERE c.resource_id IN (SELECT id FROM candidate_docs)
+                      AND c.embedding IS NOT NULL
+                    ORDER BY c.embedding <=> (:query_embedding)::vector
+                    LIMIT :dense_k
+                ) d
+            ),
+            lexical AS (
+                SELECT chunk_id AS id, row_number() OVER (ORDER BY rank DESC) AS rank
+                FROM search_resource_chunks(ARRAY(SELECT id FROM candidate_docs), :query, :lexical_k)
+            ),
+            fused AS (
+                SELECT
+                    COALESCE(d.id, l.id) AS id,
+                    d.rank AS dense_rank,
+                    l.rank AS lexical_rank,
+                    COALESCE(1.0 / (:rrf_k + d.rank), 0) + COALESCE(1.0 / (:rrf_k + l.rank), 0) AS rrf_score
+                FROM dense d
+                FULL OUTER JOIN lexical l ON l.id = d.id
+            )
+            SELECT
+                c.id,
+                c.resource_id,
+                c.chunk_index,
+                c.content,
+                c.embedding_model,
+                1 / (1 + (c.embedding <=> (:query_embedding)::vector)) AS similarity,
+                f.dense_rank,
+                f.lexical_rank,
+                f.rrf_score
+            FROM fused f
+            JOIN resource_chunks c ON c.id = f.id
+            ORDER BY f.rrf_score DESC, f.dense_rank NULLS LAST
+            LIMIT :final_k
+            """
+        )
+        params = {
+            "resource_ids": [str(rid) for rid in resource_ids],
+            "query": query or "",
+            "query_embedding": query_embedding,
+            "top_doc_k": top_doc_k,
+            "dense_k": dense_k,
+            "lexical_k": lexical_k,
+            "final_k": final_k,
+            "rrf_k": rrf_k,
+        }
+        return [dict(row) for row in self.db.execute(sql, params).mappings()]
@@ -0,0 +1,62 @@
+# app/repositories/resource_section_repository.py
+
+from typing import Iterable, List
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.shared.models.resource_sections import ResourceSection
+
+
+class ResourceSectionRepository:
+    """Data access for per-resource section centroids."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def replace_for_resource(self, resource_id: UUID, sections: Iterable[dict]) -> int:
+        """Drop the resource's sections and write the new ones (caller commits)."""
+        self.delete_for_resource(resource_id)
+        rows = [ResourceSection(resource_id=resource_id, **section) for section in sections]
+        self.db.add_all(rows)
+        return len(rows)
+
+    def delete_for_resource(self, resource_id: UUID) -> None:
+        self.db.query(ResourceSection).filter(
+            ResourceSection.resource_id == resource_id
+        ).delete(synchronize_session=False)
+
+    def vector_search_sections(
+        self,
+        resource_ids: List[UUID],
+        query_embedding: List[float],
+        top_k: int = 20,
+    ) -> List[dict]:
+        """
+        Best matching sections across `resource_ids`, with the same
+        similarity_score scale as ResourceRepository.vector_search_documents.
+        """
+        if not resource_ids or not query_embedding:
+            return []
+
+        sql = text(
+            """
+            SELECT
+                resource_id,
+                section_index,
+                start_chunk,
+                end_chunk,
+                1 - (embedding <=> (:query_embedding)::vector) AS similarity_score
+            FROM resource_sections
+            WHERE resource_id = ANY(CAST(:resource_ids AS uuid[]))
+            ORDER BY embedding <=> (:query_embedding)::vector
+            LIMIT :top_k
+            """
+        )
+        params = {
+            "resource_ids": [str(rid) for rid in resource_ids],
+            "query_embedding": query_embedding,
+            "top_k": top_k,
+        }
+        return [dict(r) for r in self.db.execute(sql, params).mappings()]
@@ -9,6 +9,16 @@ from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.core.security import require_admin_user
 from app.shared.models.api_usage_log import ApiUsageLog
+from app.services.embedding_cache_service import EmbeddingCacheService
+from app.services.llm_response_cache_service import LlmResponseCacheService
+from app.services.api_usage_log_service import ApiUsageLogService
+from app.shared.ai.embeddings import _embedding_cache as sentence_embedding_cache, xlmr_encoder
+from app.core.model_registry import ModelRegistry
+from app.shared.ai.reranker_service import reranker_pool
+from app.core.gemini_client import GeminiClient
+from app.services.retrieval_pipeline import pipeline_stats
+from app.services.vector_working_set import vector_working_set
+from app.services.post_generation_service import post_generation
 
 
 router = APIRouter(
@@ -144,6 +154,10 @@ def get_api_usage_summary(
             case((ApiUsageLog.status == "retry", 1), else_=0)
         ).label("retry_requests"),
 
+        func.sum(
+            case((ApiUsageLog.status == "cache_hit", 1), else_=0)
+        ).label("cache_hit_requests"),
+
         func.coalesce(func.sum(ApiUsageLog.prompt_tokens), 0).label("prompt_tokens"),
         func.coalesce(func.sum(ApiUsageLog.completion_tokens), 0).label("completion_tokens"),
         func.coalesce(func.sum(ApiUsageLog.total_tokens), 0).label("total_tokens"),
@@ -159,6 +173,7 @@ def get_api_usage_summary(
     successful_requests = result.successful_requests or 0
     failed_requests = result.failed_requests or 0
     retry_requests = result.retry_requests or 0
+    cache_hit_requests = result.cache_hit_requests or 0
 
     success_rate = 0
     failure_rate = 0
@@ -172,6 +187,7 @@ def get_api_usage_summary(
         "successful_requests": successful_requests,
         "failed_requests": failed_requests,
         "retry_requests": retry_requests,
+        "cache_hit_requests": cache_hit_requests,
         "success_rate": success_rate,
         "failure_rate": failure_rate,
         "prompt_tokens": result.prompt_tokens or 0,
@@ -420,4 +436,134 @@ def get_api_usage_trend(
             "avg_duration_ms": round(float(row.avg_duration_ms or 0), 2),
         }
         for row in rows
-    ]
\ No newline at end of file
+    ]
+
+
+# -------------------------------------------------------------------
+# 7. Caches
+# -------------------------------------------------------------------
+
+@router.get("/embedding-cache")
+def get_embedding_cache_stats():
+    return EmbeddingCacheService.stats()
+
+
+@router.post("/embedding-cache/evict")
+def evict_embedding_cache():
+    return EmbeddingCacheService.evict()
+
+
+@router.get("/sentence-embedding-cache")
+def get_sentence_embedding_cache_stats():
+    """In-process XLM-R sentence embedding cache used by grading."""
+    return sentence_embedding_cache.stats()
+
+
+@router.get("/llm-response-cache")
+def get_llm_response_cache_stats():
+    """Opt-in Gemini response cache hit rate and per-service TTL policy."""
+    return LlmResponseCacheService.stats()
+
+
+@router.post("/llm-response-cache/evict")
+def evict_llm_response_cache(service_name: Optional[str] = Query(None)):
+    """Drop expired entries, or every entry for `service_name`."""
+    return LlmResponseCacheService.evict(service_name=service_name)
+
+
+# -------------------------------------------------------------------
+# 8. Local models
+# -------------------------------------------------------------------
+
+@router.get("/local-models")
+def get_local_model_stats():
+    """Loaded local encoders with memory footprint and load/warm-up time."""
+    return ModelRegistry.stats()
+
+
+@router.get("/xlmr-encoder")
+def get_xlmr_encoder_stats():
+    """Queue depth, batch size and latency histograms of the XLM-R micro-batcher."""
+    return xlmr_encoder.stats()
+
+
+@router.get("/reranker")
+def get_reranker_stats():
+    """Cross-encoder backend, batch size and score cache hit rate."""
+    return reranker_pool.stats()
+
+
+# -------------------------------------------------------------------
+# 9. Gemini concurrency, key utilisation, circuit breakers and hedging
+# -------------------------------------------------------------------
+
+@router.get("/gemini-concurrency")
+def get_gemini_concurrency():
+    """Current adaptive concurrency limit, in-flight and queued Gemini calls."""
+    return GeminiClient.concurrency_stats()
+
+
+@router.get("/gemini-keys")
+def get_gemini_key_utilization():
+    """Per API key RPM/TPM usage against the local token-bucket limits."""
+    return GeminiClient.key_stats()
+
+
+@router.get("/gemini-breakers")
+def get_gemini_circuit_breakers():
+    """Circuit breaker state per (model, key slot) and recent state transitions."""
+    return GeminiClient.breaker_stats()
+
+
+@router.post("/gemini-breakers/reset")
+def reset_gemini_circuit_breakers(model_name: Optional[str] = Query(None)):
+    """Close all breakers, or only those for `model_name`."""
+    return {"reset": GeminiClient.reset_breakers(model_name)}
+
+
+@router.get("/gemini-hedging")
+def get_gemini_hedging_stats():
+    """Hedge delay per service, hedge rate, hedge win rate and tokens spent on losing legs."""
+    return GeminiClient.hedge_stats()
+
+
+# -------------------------------------------------------------------
+# 10. Usage log writer
+# -------------------------------------------------------------------
+
+@router.get("/log-writer")
+def get_usage_log_writer_stats():
+    """Background usage-log writer queue depth, written/dropped counts."""
+    return ApiUsageLogService.writer_stats()
+
+
+@router.post("/log-writer/flush")
+def flush_usage_log_writer():
+    """Write all queued usage logs now."""
+    return {"written": ApiUsageLogService.flush()}
+
+
+# -------------------------------------------------------------------
+# 11. Retrieval pipelines
+# -------------------------------------------------------------------
+
+@router.get("/retrieval-pipelines")
+def get_retrieval_pipeline_stats():
+    """Per pipeline (chat, voice, text_qa) and stage: runs, wall time and candidate counts."""
+    return pipeline_stats()
+
+
+@router.get("/vector-working-set")
+def get_vector_working_set_stats():
+    """In-memory per-session chunk matrices: sessions, bytes, hits, loads and evictions."""
+    return vector_working_set.stats()
+
+
+# -------------------------------------------------------------------
+# 12. Post-generation analysis
+# -------------------------------------------------------------------
+
+@router.get("/post-generation")
+def get_post_generation_stats():
+    """Background evidence/XAI jobs for chat answers: queued, running, completed, failed and mean time."""
+    return post_generation.stats()
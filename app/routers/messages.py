@@ -1,7 +1,10 @@
 # app/routers/messages.py
 
+import json
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from uuid import UUID
 import uuid
@@ -31,7 +34,9 @@ from app.services.chat_session_service import ChatSessionService
 from app.services.resource_service import ResourceService
 from app.services.rag_service import RAGService
 from app.services.usage_service import UsageService
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.deadline import DeadlineExceeded, request_deadline
 from app.core.security import get_current_user
 from app.shared.models.user import User
 from app.shared.models.message import Message
@@ -582,7 +587,25 @@ async def process_message_attachments(
             detail="Failed to process message attachments"
         )
 
-@router.post("/{message_id}/generate", response_model=MessageResponse)
+def _resolve_generation_resources(db: Session, message: Message) -> List[UUID]:
+    """Resources attached to the message, falling back to the session's resources."""
+    attachment_service = MessageAttachmentService(db)
+    attachments = attachment_service.get_message_resources(message.id)
+    resource_ids = [att.resource_id for att in attachments]
+
+    if not resource_ids:
+        session_resource_service = SessionResourceService(db)
+        session_resources = session_resource_service.get_session_resources(message.session_id)
+        resource_ids = [res.resource_id for res in session_resources]
+
+    return resource_ids
+
+
+@router.post(
+    "/{message_id}/generate",
+    response_model=MessageResponse,
+    dependencies=[Depends(request_deadline(settings.CHAT_REQUEST_DEADLINE_S))],
+)
 def generate_ai_response(
     message_id: UUID,
     payload: GenerateResponseRequest = None,
@@ -606,19 +629,12 @@ def generate_ai_response(
         HTTPException 403: User doesn't own the session
         HTTPException 404: Message not found
         HTTPException 500: Generation or database error
+        HTTPException 504: CHAT_REQUEST_DEADLINE_S ran out
     """
     try:
         message_service = MessageService(db)
         message = message_service.get_message_with_ownership_check(message_id, current_user.id)
-
-        attachment_service = MessageAttachmentService(db)
-        attachments = attachment_service.get_message_resources(message_id)
-        resource_ids = [att.resource_id for att in attachments]
-
-        if not resource_ids:
-            session_resource_service = SessionResourceService(db)
-            session_resources = session_resource_service.get_session_resources(message.session_id)
-            resource_ids = [res.resource_id for res in session_resources]
+        resource_ids = _resolve_generation_resources(db, message)
 
         assistant_message = message_service.generate_ai_response(
             message_id=message_id,
@@ -635,6 +651,7 @@ def generate_ai_response(
                     "overall_severity": summary.get("overall_severity"),
                     "confidence_score": summary.get("confidence_score"),
                     "reliability": summary.get("reliability"),
+                    "analysis_status": summary.get("analysis_status"),
                 }
         except Exception as e:
             logger.debug(f"No safety summary for generated message {assistant_message.id}: {e}")
@@ -642,6 +659,12 @@ def generate_ai_response(
         logger.info(f"AI response generated for message {message_id} by user {current_user.id}")
         return assistant_message
         
+    except DeadlineExceeded as e:
+        logger.warning(f"Deadline exceeded generating response for message {message_id} ({e.stage})")
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Response generation took too long. Please try again."
+        )
     except ValueError as e:
         logger.warning(f"Validation error generating response for message {message_id}: {e}")
         raise HTTPException(
@@ -662,6 +685,74 @@ def generate_ai_response(
         )
 
 
+@router.post(
+    "/{message_id}/generate/stream",
+    dependencies=[Depends(request_deadline(settings.CHAT_REQUEST_DEADLINE_S))],
+)
+def stream_ai_response(
+    message_id: UUID,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Generate assistant response using RAG and stream it as SSE.
+
+    Emits `{"type": "token", "text": ...}` events while the answer is
+    generated, then one `{"type": "done", ...}` event carrying the same
+    payload as the non-streaming endpoint (assistant_message_id, sources,
+    retrieval_metadata incl. ttft_ms). Failures after the stream has
+    started are reported as a `{"type": "error"}` event (with
+    `"reason": "timeout"` when the request deadline ran out).
+
+    Raises:
+        HTTPException 400: Invalid parameters or message type
+        HTTPException 403: User doesn't own the session
+        HTTPException 404: Message not found
+    """
+    try:
+        message_service = MessageService(db)
+        message = message_service.get_message_with_ownership_check(message_id, current_user.id)
+        resource_ids = _resolve_generation_resources(db, message)
+
+        events = message_service.stream_ai_response(
+            message_id=message_id,
+            user_id=current_user.id,
+            resource_ids=resource_ids,
+        )
+    except DeadlineExceeded as e:
+        logger.warning(f"Deadline exceeded preparing stream for message {message_id} ({e.stage})")
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Response generation took too long. Please try again."
+        )
+    except ValueError as e:
+        logger.warning(f"Validation error streaming response for message {message_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except PermissionError as e:
+        logger.warning(f"User {current_user.id} attempted unauthorized response streaming for message {message_id}")
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=str(e)
+        )
+
+    def sse_generator():
+        try:
+            for event in events:
+                yield f"data: {json.dumps(jsonable_encoder(event))}\n\n"
+            logger.info(f"AI response streamed for message {message_id} by user {current_user.id}")
+        except DeadlineExceeded as e:
+            logger.warning(f"Deadline exceeded streaming response for message {message_id} ({e.stage})")
+            yield f"data: {json.dumps({'type': 'error', 'reason': 'timeout', 'detail': 'Response generation took too long'})}\n\n"
+        except Exception as e:
+            logger.error(f"Error streaming response for message {message_id}: {e}", exc_info=True)
+            yield f"data: {json.dumps({'type': 'error', 'detail': 'Failed to generate AI response'})}\n\n"
+
+    return StreamingResponse(sse_generator(), media_type="text/event-stream")
+
+
 @router.get("/sessions/{session_id}", response_model=List[MessageResponse])
 def get_message_history(
     session_id: UUID,
@@ -708,6 +799,7 @@ def get_message_history(
                             "overall_severity": summary.get("overall_severity"),
                             "confidence_score": summary.get("confidence_score"),
                             "reliability": summary.get("reliability"),
+                            "analysis_status": summary.get("analysis_status"),
                         }
                 except Exception as e:
                     logger.debug(f"No safety summary for message {message.id}: {e}")
@@ -962,23 +1054,32 @@ def get_message_safety_report(
 @router.get("/{message_id}/xai", response_model= XAIExplanationResponse)
 def get_message_xai_explanation(
     message_id: UUID,
+    response: Response,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    """Fetch only the XAI explanation attached to a safety report."""
+    """
+    Fetch only the XAI explanation attached to a safety report.
+
+    Returns 202 with analysis_status "pending" while it is still being
+    computed in the background.
+    """
     try:
         message_service = MessageService(db)
         message_service.get_message_with_ownership_check(message_id, current_user.id)
 
         safety_service = MessageSafetyService(db)
         report = safety_service.get_safety_report_with_xai(message_id)
+        if report and report.analysis_status == "pending":
+            response.status_code = status.HTTP_202_ACCEPTED
+            return {"xai_explanation": None, "analysis_status": report.analysis_status}
         if not report or report.xai_explanation is None:
             logger.warning(f"XAI explanation not found for message {message_id} by user {current_user.id}")
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="XAI explanation not available for this message"
             )
-        return {"xai_explanation": report.xai_explanation}
+        return {"xai_explanation": report.xai_explanation, "analysis_status": report.analysis_status}
     except ValueError as e:
         logger.warning(f"Message {message_id} not found for XAI request by user {current_user.id}")
         raise HTTPException(
@@ -1,5 +1,7 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
+from fastapi.encoders import jsonable_encoder
 from typing import Dict, List, Any, Optional
+import asyncio
 import json
 import logging
 from uuid import UUID
@@ -15,9 +17,12 @@ class ConnectionManager:
     def __init__(self):
         # Store active connections: user_id -> List[WebSocket]
         self.active_connections: Dict[str, List[WebSocket]] = {}
+        # Event loop serving the sockets, so worker threads can `notify`
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
 
     async def connect(self, websocket: WebSocket, user_id: str):
         await websocket.accept()
+        self.loop = asyncio.get_running_loop()
         if user_id not in self.active_connections:
             self.active_connections[user_id] = []
         self.active_connections[user_id].append(websocket)
@@ -46,6 +51,14 @@ class ConnectionManager:
             for connection in to_remove:
                 self.disconnect(connection, user_id)
 
+    def notify(self, message: Any, user_id: str) -> None:
+        """Send from a worker thread; dropped when the user has no open socket."""
+        if self.loop is None or self.loop.is_closed() or user_id not in self.active_connections:
+            return
+        asyncio.run_coroutine_threadsafe(
+            self.send_personal_message(jsonable_encoder(message), user_id), self.loop
+        )
+
 manager = ConnectionManager()
 router = APIRouter()
 
@@ -67,6 +80,68 @@ async def get_current_user_ws(
         logger.error(f"WebSocket auth error: {e}")
         return None
 
+def _parse_client_message(raw: str) -> Dict[str, Any]:
+    try:
+        request = json.loads(raw)
+    except (TypeError, ValueError):
+        return {}
+    return request if isinstance(request, dict) else {}
+
+
+async def stream_generation(websocket: WebSocket, user_id: str, request: Dict[str, Any]):
+    """
+    Stream a RAG answer for `{"action": "generate", "message_id": ...}`.
+
+    Sends the same token/done/error events as the SSE endpoint, each tagged
+    with the message_id. The blocking RAG work runs in the threadpool with
+    its own DB session, bounded by CHAT_REQUEST_DEADLINE_S. Runs as a task
+    of its own so the socket keeps reading frames while it streams.
+    """
+    from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+    from app.core.config import settings
+    from app.core.database import SessionLocal
+    from app.core.deadline import DeadlineExceeded, deadline_scope
+    from app.routers.messages import _resolve_generation_resources
+    from app.services.message_service import MessageService
+
+    message_id = request.get("message_id")
+    db = SessionLocal()
+
+    def prepare():
+        message_service = MessageService(db)
+        message = message_service.get_message_with_ownership_check(UUID(str(message_id)), UUID(user_id))
+        return message_service.stream_ai_response(
+            message_id=message.id,
+            user_id=UUID(user_id),
+            resource_ids=_resolve_generation_resources(db, message),
+        )
+
+    try:
+        with deadline_scope(settings.CHAT_REQUEST_DEADLINE_S):
+            events = await run_in_threadpool(prepare)
+            async for event in iterate_in_threadpool(events):
+                await websocket.send_json(jsonable_encoder({**event, "message_id": message_id}))
+    except WebSocketDisconnect:
+        # The receive loop sees the disconnect and cleans up
+        return
+    except DeadlineExceeded:
+        await websocket.send_json({
+            "type": "error",
+            "message_id": message_id,
+            "reason": "timeout",
+            "detail": "Response generation took too long",
+        })
+    except (ValueError, PermissionError) as e:
+        await websocket.send_json({"type": "error", "message_id": message_id, "detail": str(e)})
+    except Exception as e:
+        logger.error(f"WebSocket generation failed for message {message_id}: {e}", exc_info=True)
+        await websocket.send_json(
+            {"type": "error", "message_id": message_id, "detail": "Failed to generate AI response"}
+        )
+    finally:
+        db.close()
+
+
 @router.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket, token: str):
     # Authenticate
@@ -87,13 +162,22 @@ async def websocket_endpoint(websocket: WebSocket, token: str):
         
         # Connection accepted
         await manager.connect(websocket, user_id)
+        generations: set[asyncio.Task] = set()
         
         try:
             while True:
-                # Keep connection alive
-                await websocket.receive_text() 
+                # Keep connection alive; JSON frames may carry client actions
+                raw = await websocket.receive_text()
+                request = _parse_client_message(raw)
+                if request.get("action") == "generate":
+                    task = asyncio.create_task(stream_generation(websocket, user_id, request))
+                    generations.add(task)
+                    task.add_done_callback(generations.discard)
         except WebSocketDisconnect:
             manager.disconnect(websocket, user_id)
+        finally:
+            for task in generations:
+                task.cancel()
             
     except Exception as e:
         logger.error(f"WebSocket handler error: {e}")
@@ -61,6 +61,7 @@ class MessageSafetySummary(BaseModel):
     overall_severity: Optional[str] = None
     confidence_score: Optional[float] = None
     reliability: Optional[str] = None
+    analysis_status: Optional[str] = None
 
 
 class MessageResponse(BaseModel):
@@ -188,12 +189,14 @@ class MessageSafetyReportResponse(BaseModel):
     flagged_sentences: Optional[List[Any]] = None
     reasoning: Optional[str] = None
     xai_explanation: Optional[Any] = None
+    analysis_status: Optional[str] = None
     created_at: datetime
 
 
 class XAIExplanationResponse(BaseModel):
     """Return only the stored explanation for a message."""
     xai_explanation: Optional[Any] = None
+    analysis_status: Optional[str] = None
 
     class Config:
         from_attributes = True
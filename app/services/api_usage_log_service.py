@@ -1,15 +1,158 @@
 # app/services/api_usage_log_service.py
 
+import atexit
 import logging
+import queue
+import threading
+import time
 from datetime import datetime, timezone
 
+from sqlalchemy import insert
+
 from app.shared.models.api_usage_log import ApiUsageLog
 
+from app.core.config import settings
 from app.core.database import SessionLocal
 logger = logging.getLogger(__name__)
 
 
+class UsageLogWriter:
+    """
+    Background bulk writer for api_usage_logs.
+
+    `submit` puts a row on a bounded queue and returns immediately. A daemon
+    flusher thread drains the queue and inserts rows in one statement per
+    batch, whenever `batch_size` rows are waiting or `flush_interval_s` has
+    passed. When the queue is full the row is written synchronously if
+    `sync_fallback` is set, otherwise it is dropped and counted.
+    """
+
+    def __init__(
+        self,
+        write_batch,
+        max_queue_size: int = 10_000,
+        batch_size: int = 200,
+        flush_interval_s: float = 1.0,
+        sync_fallback: bool = True,
+    ):
+        self.write_batch = write_batch
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.sync_fallback = sync_fallback
+
+        self._queue: "queue.Queue[dict]" = queue.Queue(maxsize=max_queue_size)
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+        self._stopping = threading.Event()
+        # Serialises drains so flush() and the flusher thread never split a batch
+        self._drain_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self._enqueued = 0
+        self._written = 0
+        self._dropped = 0
+        self._sync_fallbacks = 0
+        self._failed_batches = 0
+        self._batches = 0
+
+    def submit(self, row: dict) -> None:
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(row)
+            with self._stats_lock:
+                self._enqueued += 1
+            return
+        except queue.Full:
+            pass
+
+        if self.sync_fallback:
+            with self._stats_lock:
+                self._sync_fallbacks += 1
+            self._write([row])
+        else:
+            with self._stats_lock:
+                self._dropped += 1
+
+    def flush(self) -> int:
+        """Write everything currently queued. Returns the number of rows written."""
+        written = 0
+        while True:
+            with self._drain_lock:
+                batch = self._take(self.batch_size)
+                if not batch:
+                    return written
+                written += self._write(batch)
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+        self.flush()
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_queue_size": self._queue.maxsize,
+                "enqueued": self._enqueued,
+                "written": self._written,
+                "batches": self._batches,
+                "failed_batches": self._failed_batches,
+                "dropped": self._dropped,
+                "sync_fallbacks": self._sync_fallbacks,
+            }
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name="usage-log-writer", daemon=True
+                )
+                self._thread.start()
+                atexit.register(self.shutdown)
+
+    def _take(self, limit: int) -> list[dict]:
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, rows: list[dict]) -> int:
+        try:
+            self.write_batch(rows)
+        except Exception:
+            logger.exception("Failed to save %s API usage log(s)", len(rows))
+            with self._stats_lock:
+                self._failed_batches += 1
+                self._dropped += len(rows)
+            return 0
+        with self._stats_lock:
+            self._batches += 1
+            self._written += len(rows)
+        return len(rows)
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            deadline = time.monotonic() + self.flush_interval_s
+            # Wake early once a full batch is waiting
+            while self._queue.qsize() < self.batch_size and not self._stopping.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._stopping.wait(min(remaining, 0.05))
+            self.flush()
+
+
 class ApiUsageLogService:
+    _writer: UsageLogWriter | None = None
+    _writer_lock = threading.Lock()
+
     @staticmethod
     def create_log(
         request_id: str,
@@ -33,32 +176,47 @@ class ApiUsageLogService:
         duration_ms: float | None = None,
         metadata_json: dict | None = None,
     ):
+        """
+        Record one provider call. With USAGE_LOG_ASYNC (default) the row is
+        queued for the background bulk writer and None is returned;
+        otherwise it is inserted immediately and the saved log is returned.
+        """
+        row = dict(
+            request_id=request_id,
+            provider=provider,
+            service_name=service_name,
+            model_name=model_name,
+            user_id=user_id,
+            session_id=session_id,
+            message_id=message_id,
+            prompt_chars=prompt_chars,
+            response_chars=response_chars,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=total_tokens,
+            attempt_number=attempt_number,
+            max_retries=max_retries,
+            is_retry=is_retry,
+            status=status,
+            error_type=error_type,
+            error_message=error_message,
+            duration_ms=duration_ms,
+            metadata_json=metadata_json,
+            created_at=datetime.now(timezone.utc),
+        )
+
+        if settings.USAGE_LOG_ASYNC:
+            ApiUsageLogService.get_writer().submit(row)
+            return None
+
+        return ApiUsageLogService._save_one(row)
+
+    @staticmethod
+    def _save_one(row: dict):
         db = SessionLocal()
 
         try:
-            log = ApiUsageLog(
-                request_id=request_id,
-                provider=provider,
-                service_name=service_name,
-                model_name=model_name,
-                user_id=user_id,
-                session_id=session_id,
-                message_id=message_id,
-                prompt_chars=prompt_chars,
-                response_chars=response_chars,
-                prompt_tokens=prompt_tokens,
-                completion_tokens=completion_tokens,
-                total_tokens=total_tokens,
-                attempt_number=attempt_number,
-                max_retries=max_retries,
-                is_retry=is_retry,
-                status=status,
-                error_type=error_type,
-                error_message=error_message,
-                duration_ms=duration_ms,
-                metadata_json=metadata_json,
-                created_at=datetime.now(timezone.utc),
-            )
+            log = ApiUsageLog(**row)
 
             db.add(log)
             db.commit()
@@ -72,4 +230,47 @@ class ApiUsageLogService:
             return None
 
         finally:
-            db.close()
\ No newline at end of file
+            db.close()
+
+    @staticmethod
+    def save_many(rows: list[dict]) -> None:
+        """Insert a batch of log rows in one statement (raises on failure)."""
+        db = SessionLocal()
+
+        try:
+            db.execute(insert(ApiUsageLog), rows)
+            db.commit()
+
+        except Exception:
+            db.rollback()
+            raise
+
+        finally:
+            db.close()
+
+    @classmethod
+    def get_writer(cls) -> UsageLogWriter:
+        if cls._writer is None:
+            with cls._writer_lock:
+                if cls._writer is None:
+                    cls._writer = UsageLogWriter(
+                        ApiUsageLogService.save_many,
+                        max_queue_size=settings.USAGE_LOG_QUEUE_SIZE,
+                        batch_size=settings.USAGE_LOG_BATCH_SIZE,
+                        flush_interval_s=settings.USAGE_LOG_FLUSH_INTERVAL_S,
+                        sync_fallback=settings.USAGE_LOG_SYNC_FALLBACK,
+                    )
+        return cls._writer
+
+    @classmethod
+    def flush(cls) -> int:
+        return cls._writer.flush() if cls._writer else 0
+
+    @classmethod
+    def shutdown(cls) -> None:
+        if cls._writer is not None:
+            cls._writer.shutdown()
+
+    @classmethod
+    def writer_stats(cls) -> dict:
+        return cls.get_writer().stats()
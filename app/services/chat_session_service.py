@@ -8,6 +8,7 @@ from app.repositories.chat_session_repository import ChatSessionRepository
 from app.repositories.evaluation.evaluation_session_repository import EvaluationSessionRepository
 from app.repositories.message_attachment_repository import MessageAttachmentRepository
 from app.services.resource_service import ResourceService
+from app.services.vector_working_set import vector_working_set
 from app.shared.models.message_relations import MessageAttachment
 from app.shared.models.session_resources import SessionResource
 from app.shared.models.evaluation_session import EvaluationResource
@@ -184,6 +185,7 @@ class ChatSessionService:
             # Always delete the chat session itself
             self.db.delete(session)
             self.db.commit()
+            vector_working_set.invalidate_session(session_id)
 
         except Exception:
             self.db.rollback()
@@ -201,6 +203,7 @@ class ChatSessionService:
         
         # 1. Attach to this specific session
         self.repository.attach_resource(session_id, resource_id, role)
+        vector_working_set.invalidate_session(session_id)
         
         # 2. Update Global Context (so future chats use this new resource by default)
         # Only if this is an EVALUATION session
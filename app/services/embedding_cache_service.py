@@ -0,0 +1,181 @@
+# app/services/embedding_cache_service.py
+
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.repositories.embedding_cache_repository import EmbeddingCacheRepository
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCacheService:
+    """
+    Persistent, content-addressed cache for Gemini embeddings.
+
+    Entries are keyed by sha256(model, output_dimensionality, text) so the
+    same text embedded with a different model or size never collides.
+    Cache failures are logged and treated as misses; they never break
+    embedding generation.
+    """
+
+    _stats_lock = threading.Lock()
+    _hits = 0
+    _misses = 0
+    _writes = 0
+    _errors = 0
+    _evicted = 0
+    _writes_since_eviction = 0
+
+    @staticmethod
+    def make_key(text: str, model_name: str, output_dimensionality: int) -> str:
+        payload = f"{model_name}\x1f{output_dimensionality}\x1f{text.strip()}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def get_many(
+        cls,
+        texts: list[str],
+        model_name: str,
+        output_dimensionality: int,
+    ) -> dict[str, list[float]]:
+        """Return text -> cached embedding for every text with a fresh entry."""
+        if not settings.EMBED_CACHE_ENABLED or not texts:
+            return {}
+
+        keys_by_text = {
+            text: cls.make_key(text, model_name, output_dimensionality)
+            for text in texts
+        }
+        created_after = datetime.now(timezone.utc) - timedelta(days=settings.EMBED_CACHE_TTL_DAYS)
+
+        db = SessionLocal()
+        try:
+            repo = EmbeddingCacheRepository(db)
+            found = repo.get_many(list(set(keys_by_text.values())), created_after=created_after)
+            if found:
+                repo.touch(list(found.keys()))
+                db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("Embedding cache lookup failed")
+            with cls._stats_lock:
+                cls._errors += 1
+                cls._misses += len(keys_by_text)
+            return {}
+        finally:
+            db.close()
+
+        result = {
+            text: found[key]
+            for text, key in keys_by_text.items()
+            if key in found
+        }
+        with cls._stats_lock:
+            cls._hits += len(result)
+            cls._misses += len(keys_by_text) - len(result)
+        return result
+
+    @classmethod
+    def put_many(
+        cls,
+        embeddings_by_text: dict[str, list[float]],
+        model_name: str,
+        output_dimensionality: int,
+    ) -> None:
+        if not settings.EMBED_CACHE_ENABLED:
+            return
+
+        entries = {}
+        for text, embedding in embeddings_by_text.items():
+            if not embedding or len(embedding) != output_dimensionality:
+                continue
+            key = cls.make_key(text, model_name, output_dimensionality)
+            entries[key] = {
+                "cache_key": key,
+                "model_name": model_name,
+                "output_dimensionality": output_dimensionality,
+                "embedding": list(embedding),
+                "text_chars": len(text),
+            }
+        if not entries:
+            return
+
+        db = SessionLocal()
+        try:
+            EmbeddingCacheRepository(db).upsert_many(entries.values())
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("Embedding cache write failed")
+            with cls._stats_lock:
+                cls._errors += 1
+            return
+        finally:
+            db.close()
+
+        with cls._stats_lock:
+            cls._writes += len(entries)
+            cls._writes_since_eviction += len(entries)
+            should_evict = cls._writes_since_eviction >= settings.EMBED_CACHE_EVICT_EVERY_WRITES
+            if should_evict:
+                cls._writes_since_eviction = 0
+
+        if should_evict:
+            cls.evict()
+
+    @classmethod
+    def evict(cls) -> dict:
+        """Drop entries older than the TTL, then trim to the size budget (LRU)."""
+        cutoff = datetime.now(timezone.utc) - timedelta(days=settings.EMBED_CACHE_TTL_DAYS)
+
+        db = SessionLocal()
+        try:
+            repo = EmbeddingCacheRepository(db)
+            expired = repo.delete_created_before(cutoff)
+            trimmed = repo.trim_to_size(settings.EMBED_CACHE_MAX_ENTRIES)
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("Embedding cache eviction failed")
+            with cls._stats_lock:
+                cls._errors += 1
+            return {"expired": 0, "trimmed": 0}
+        finally:
+            db.close()
+
+        with cls._stats_lock:
+            cls._evicted += expired + trimmed
+
+        if expired or trimmed:
+            logger.info("Embedding cache evicted %s expired and %s LRU entries", expired, trimmed)
+        return {"expired": expired, "trimmed": trimmed}
+
+    @classmethod
+    def stats(cls) -> dict:
+        with cls._stats_lock:
+            lookups = cls._hits + cls._misses
+            return {
+                "enabled": settings.EMBED_CACHE_ENABLED,
+                "hits": cls._hits,
+                "misses": cls._misses,
+                "hit_rate": round(cls._hits / lookups, 4) if lookups else 0.0,
+                "writes": cls._writes,
+                "evicted": cls._evicted,
+                "errors": cls._errors,
+                "ttl_days": settings.EMBED_CACHE_TTL_DAYS,
+                "max_entries": settings.EMBED_CACHE_MAX_ENTRIES,
+            }
+
+    @classmethod
+    def reset_stats(cls) -> None:
+        with cls._stats_lock:
+            cls._hits = 0
+            cls._misses = 0
+            cls._writes = 0
+            cls._errors = 0
+            cls._evicted = 0
+            cls._writes_since_eviction = 0
@@ -2,21 +2,12 @@
 import numpy as np
 from functools import lru_cache
 
-class EmbeddingService:
-    _model = None
+from app.core.model_registry import ModelRegistry, MINILM_MODEL_NAME
 
+class EmbeddingService:
     @classmethod
     def get_model(cls):
-        if cls._model is None:
-            # Add timeout and retry configuration
-            import torch
-            from sentence_transformers import SentenceTransformer
-
-            cls._model = SentenceTransformer(
-                "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
-                device='cpu'  # Explicitly set device
-            )
-        return cls._model
+        return ModelRegistry.get(MINILM_MODEL_NAME, device="cpu")
 
     @classmethod
     def embed(cls, text: str) -> np.ndarray:
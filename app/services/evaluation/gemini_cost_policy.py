@@ -1,5 +1,6 @@
 import logging
 from dataclasses import dataclass
+from typing import Callable
 
 from app.core.config import settings
 from app.core.gemini_client import GeminiClient
@@ -41,6 +42,9 @@ class EvaluationGeminiClient:
         budget: GeminiDutyBudget,
         json_mode: bool = False,
         reason: str | None = None,
+        use_cache: bool = False,
+        bypass_cache: bool = False,
+        cache_validator: Callable[[str], bool] | None = None,
     ) -> str:
         if not prompt or not prompt.strip():
             return ""
@@ -67,6 +71,10 @@ class EvaluationGeminiClient:
                 max_retries=max_retries,
                 json_mode=json_mode,
                 model_name=budget.model_name,
+                service_name=budget.duty_name,
+                use_cache=use_cache,
+                bypass_cache=bypass_cache,
+                cache_validator=cache_validator,
             )
             text = result.get("text", "") if isinstance(result, dict) else ""
             if not text.strip():
@@ -28,7 +28,7 @@ from app.shared.models.session_resources import SessionResource
 from app.shared.models.evaluation_session import EvaluationSession, PaperConfig
 from app.shared.models.resource_file import ResourceFile
 from app.shared.models.rubrics import Rubric, RubricCriterion
-from app.shared.ai.embeddings import get_xlmr_model, ml_semaphore, ensure_sentences_cached, _embedding_cache
+from app.shared.ai.embeddings import encode_sentence, ensure_sentences_cached, _embedding_cache
 from app.shared.ai.gemini_client import gemini_generate_evaluation
 from app.core.config import settings
 from app.core.gemini_client import GeminiClient
@@ -880,20 +880,18 @@ class GradingService:
 
         sentences = [s.strip() for s in re.split(r'[.!?\n]', reference_text) if len(s.strip()) > 10]
         if not sentences:
-            with ml_semaphore:
-                emb1 = student_emb if student_emb is not None else _embedding_cache.get(student_text)
-                if emb1 is None: emb1 = get_xlmr_model().encode(student_text, convert_to_tensor=True)
+            emb1 = student_emb if student_emb is not None else _embedding_cache.get(student_text)
+            if emb1 is None: emb1 = encode_sentence(student_text)
 
-                emb2 = reference_emb if reference_emb is not None else _embedding_cache.get(reference_text)
-                if emb2 is None: emb2 = get_xlmr_model().encode(reference_text, convert_to_tensor=True)
+            emb2 = reference_emb if reference_emb is not None else _embedding_cache.get(reference_text)
+            if emb2 is None: emb2 = encode_sentence(reference_text)
 
             raw_sim = _cosine_util().cos_sim(emb1, emb2).item()
             return self._sinhala_sigmoid_boost(raw_sim, max_marks)
 
         s_emb = student_emb if student_emb is not None else _embedding_cache.get(student_text)
         if s_emb is None:
-            with ml_semaphore:
-                s_emb = get_xlmr_model().encode(student_text, convert_to_tensor=True)
+            s_emb = encode_sentence(student_text)
 
         missing = [s for s in sentences if s not in _embedding_cache]
         if missing:
@@ -1090,6 +1088,18 @@ class GradingService:
 
         return cleaned[:1500]
 
+    @staticmethod
+    def _strip_json_fence(text: str) -> str:
+        return re.sub(r'^```json\s*|\s*```$', '', (text or "").strip(), flags=re.MULTILINE)
+
+    @classmethod
+    def _parses_reference_json(cls, text: str) -> bool:
+        """Cache validator: only reference responses that parse are cached."""
+        try:
+            return isinstance(json.loads(cls._strip_json_fence(text)), (dict, list))
+        except ValueError:
+            return False
+
     def _normalize_reference_key(self, value: str) -> str:
         cleaned = re.sub(r"\s+", "", str(value or ""))
         return cleaned.replace("[", "(").replace("]", ")")
@@ -1463,13 +1473,13 @@ Questions:
                     budget=EvaluationGeminiClient.REFERENCE_SCHEMA,
                     json_mode=True,
                     reason=f"chunk_{chunk_index}_of_{total_chunks}",
+                    use_cache=True,
+                    cache_validator=self._parses_reference_json,
                 )
                 if not response_json:
                     return {}
 
-                clean_json = re.sub(
-                    r'^```json\s*|\s*```$', '', response_json.strip(), flags=re.MULTILINE
-                )
+                clean_json = self._strip_json_fence(response_json)
                 logger.info(f"[GEMINI_EXTRACTION] Raw Response for chunk: {clean_json}")
                 data = json.loads(clean_json)
 
@@ -1678,8 +1688,7 @@ Return ONLY a valid JSON object mirroring the keys provided.
 
         s_emb = student_emb if student_emb is not None else _embedding_cache.get(student_text)
         if s_emb is None:
-            with ml_semaphore:
-                s_emb = get_xlmr_model().encode(student_text, convert_to_tensor=True)
+            s_emb = encode_sentence(student_text)
 
         missing_sentences = [s for s in sentences if s not in _embedding_cache]
         if missing_sentences:
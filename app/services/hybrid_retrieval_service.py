@@ -1,13 +1,23 @@
 # app/services/hybrid_retrieval_service.py
 
 import logging
-from typing import List, Dict
+from typing import List, Dict, Optional
 from uuid import UUID
-from rank_bm25 import BM25Okapi
-import re
 
+from app.core.config import settings
+from app.services.lexical_index_service import LexicalIndexService
 from app.services.resource_chunk_service import ResourceChunkService
 from app.services.resource_service import ResourceService
+from app.services.retrieval_pipeline import (
+    Candidate,
+    ContextPackingStage,
+    DenseStage,
+    FusionStage,
+    RetrievalPipeline,
+    ScopeStage,
+    SearchStage,
+)
+from app.services.vector_working_set import vector_working_set
 
 logger = logging.getLogger(__name__)
 
@@ -17,22 +27,32 @@ class HybridRetrievalService:
     1. Document embeddings
     2. BM25 lexical filtering
     3. Chunk embeddings (dense semantic search)
+
+    Expressed as the "chat" retrieval pipeline (see retrieval_pipeline.py),
+    or "chat_fused" when RETRIEVAL_MODE = "fused".
     """
 
     def __init__(self, db):
         self.db = db
         self.chunk_service = ResourceChunkService(db)
         self.resource_service = ResourceService(db)
+        self.lexical_index = LexicalIndexService(db)
+
+    def pipeline(self, bm25_k: int = 30, final_k: int = 8, top_doc_k: int = 8) -> RetrievalPipeline:
+        if settings.RETRIEVAL_MODE == "fused":
+            return self.fused_pipeline(final_k, top_doc_k)
 
-    def _tokenize_sinhala(self, text: str) -> List[str]:
-        """Simple Sinhala-friendly tokenizer: keeps words, removes punctuation."""
-        return re.findall(r"[අ-෴]+", text)
+        return RetrievalPipeline("chat", [
+            ScopeStage(lambda ctx: self._document_scope(ctx, top_doc_k, bm25_k)),
+            DenseStage(self._dense_search, top_k=final_k),
+            FusionStage("dense"),
+            ContextPackingStage(max_chunks=final_k),
+        ])
 
-    def _bm25_text(self, chunk) -> list[str]:
-        text = chunk.content or ""
-        if chunk.pseudo_questions:
-            text = text + "\n" + chunk.pseudo_questions
-        return self._tokenize_sinhala(text)
+    def fused_pipeline(self, final_k: int = 8, top_doc_k: int = 8) -> RetrievalPipeline:
+        return RetrievalPipeline("chat_fused", [
+            SearchStage("fused", lambda ctx, k: self._fused_search(ctx, k, top_doc_k), top_k=final_k),
+        ])
 
     def retrieve(
         self,
@@ -42,18 +62,57 @@ class HybridRetrievalService:
         bm25_k: int = 30,      # top documents for BM25 fallback
         final_k: int = 8,      # top chunks after dense re-rank
         top_doc_k: int = 8,   # top documents from document embeddings
+        session_id: Optional[UUID] = None,
     ) -> List[Dict]:
         """
         Step 1: Filter top documents using document embeddings
         Step 2: Fallback to BM25 if no document embeddings exist
-        Step 3: Retrieve chunks from top documents
-        Step 4: Dense search on chunk embeddings
+        Step 3: Dense search on chunk embeddings of the top documents
+
+        With RETRIEVAL_MODE = "fused" all of this runs as one SQL statement
+        (see retrieve_fused).
+
+        Given a `session_id`, step 3 runs against the session's in-memory
+        vector working set (see vector_working_set.py) instead of pgvector.
+
+        Raises DeadlineExceeded if the request budget runs out between stages.
         """
+        ctx = self.pipeline(bm25_k, final_k, top_doc_k).run(
+            query, resource_ids, query_embedding, session_id=session_id, session_resource_ids=resource_ids
+        )
+        return [{**c.data, "rank": i + 1} for i, c in enumerate(ctx.candidates)]
+
+    def retrieve_fused(
+        self,
+        resource_ids: List[UUID],
+        query: str,
+        query_embedding: List[float],
+        final_k: int = 8,
+        top_doc_k: int = 8,
+    ) -> List[Dict]:
+        """
+        Document pre-filter, dense top-k, lexical top-k and reciprocal rank
+        fusion in a single database round trip. Returns the same rows as
+        `retrieve`, plus dense_rank / lexical_rank / rrf_score.
+        """
+        ctx = self.fused_pipeline(final_k, top_doc_k).run(query, resource_ids, query_embedding)
+        return [{**c.data, "rank": i + 1} for i, c in enumerate(ctx.candidates)]
+
+    @staticmethod
+    def _candidate(hit: Dict, score_key: str = "similarity") -> Candidate:
+        return Candidate(
+            chunk_id=hit["id"],
+            resource_id=hit.get("resource_id"),
+            text=hit.get("content") or "",
+            scores={"dense": hit.get(score_key) or 0.0},
+            data=dict(hit),
+        )
 
+    def _document_scope(self, ctx, top_doc_k: int, bm25_k: int) -> List[UUID]:
         # -----------------------------
         # 1. Load all resources/documents
         # -----------------------------
-        resources = self.resource_service.list_resources_by_ids(resource_ids)
+        resources = self.resource_service.list_resources_by_ids(ctx.resource_ids)
         if not resources:
             return []
 
@@ -74,77 +133,87 @@ class HybridRetrievalService:
 
             top_docs = self.resource_service.search_documents(
                 resource_ids=resource_ids_with_emb,
-                query_embedding=query_embedding,
+                query_embedding=ctx.query_embedding,
                 top_k=top_doc_k
             )
 
+            if settings.DOCUMENT_SECTION_CENTROIDS:
+                top_docs = self._rank_by_best_section(top_docs, resource_ids_with_emb, ctx, top_doc_k)
+
             top_resource_ids.extend(
                 [doc["resource_id"] for doc in top_docs]
             )
 
         # -----------------------------
-        # 3. BM25 fallback using chunk content
+        # 3. Lexical fallback (full-text column, or the BM25 postings index)
         # -----------------------------
         if not top_resource_ids and resources_without_emb:
             resource_ids_wo_emb = [r.id for r in resources_without_emb]
-            chunks = self.chunk_service.get_chunks_by_resource(resource_ids_wo_emb)
-
-            if chunks:
-                corpus = [self._bm25_text(ch) for ch in chunks]
-                bm25 = BM25Okapi(corpus)
-
-                query_tokens = self._tokenize_sinhala(query)
-                scores = bm25.get_scores(query_tokens)
-
-                ranked_chunks = sorted(
-                    zip(chunks, scores),
-                    key=lambda x: x[1],
-                    reverse=True
-                )[:bm25_k]
+            hits = self.lexical_index.search(resource_ids_wo_emb, ctx.query, top_k=bm25_k)
 
-                top_resource_ids.extend(
-                    list({ch.resource_id for ch, _ in ranked_chunks})
-                )
+            if hits:
+                top_resource_ids.extend(dict.fromkeys(hit["resource_id"] for hit in hits))
+            else:
+                # No query term matched: keep every candidate for dense ranking
+                top_resource_ids.extend(resource_ids_wo_emb)
 
-                # Debug log (safe)
-                logger.info(
-                    "BM25 TEXT SAMPLE:\n%s",
-                    " ".join(self._bm25_text(chunks[0]))
-                )
-
-        if not top_resource_ids:
-            return []
+            logger.info("Lexical search matched %d chunks across %d resources",
+                        len(hits), len(top_resource_ids))
 
         logger.info("Top resource IDs after hybrid retrieval: %s", top_resource_ids)
+        return top_resource_ids
 
-        # -----------------------------
-        # 4. Retrieve all chunks from top documents
-        # -----------------------------
-        top_chunks = self.chunk_service.get_chunks_by_resource(top_resource_ids)
-        if not top_chunks:
+    def _rank_by_best_section(self, top_docs: List[Dict], resource_ids: List[UUID], ctx, top_doc_k: int) -> List[Dict]:
+        """
+        Two-stage document filter: a document scores the better of its pooled
+        embedding and its best section centroid, so a long document with one
+        relevant section is not diluted away.
+        """
+        sections = self.resource_service.search_sections(
+            resource_ids=resource_ids,
+            query_embedding=ctx.query_embedding,
+            top_k=top_doc_k * 4,
+        )
+        best: Dict = {}
+        for hit in [*top_docs, *sections]:
+            score = hit.get("similarity_score") or 0.0
+            if hit["resource_id"] not in best or score > best[hit["resource_id"]]:
+                best[hit["resource_id"]] = score
+        ranked = sorted(best, key=best.get, reverse=True)[:top_doc_k]
+        return [{"resource_id": rid, "similarity_score": best[rid]} for rid in ranked]
+
+    def _dense_search(self, ctx, top_k: int) -> List[Candidate]:
+        if not ctx.resource_ids:
             return []
-        
-        logger.info("Retrieved %d chunks from top resources", len(top_chunks))
- 
+
         # -----------------------------
-        # 5. Dense re-ranking on chunk embeddings
+        # 4. Dense re-ranking on chunk embeddings
         # -----------------------------
-        dense_hits = self.chunk_service.vector_search(
-            resource_ids=top_resource_ids,
-            query_embedding=query_embedding,
-            top_k=final_k,
+        dense_hits = vector_working_set.search(
+            self.db,
+            ctx.extras.get("session_id"),
+            ctx.resource_ids,
+            ctx.query_embedding,
+            top_k=top_k,
+            session_resource_ids=ctx.extras.get("session_resource_ids"),
         )
+        if dense_hits is None:
+            dense_hits = self.chunk_service.vector_search(
+                resource_ids=ctx.resource_ids,
+                query_embedding=ctx.query_embedding,
+                top_k=top_k,
+            )
 
         logger.info("Dense search returned %d hits", len(dense_hits))
 
         # -----------------------------
-        # 6. Fallback if vector search returns nothing
+        # 5. Fallback if vector search returns nothing
         # -----------------------------
         if not dense_hits:
-            top_chunks = self.chunk_service.get_chunks_by_resource(top_resource_ids)
+            top_chunks = self.chunk_service.get_chunks_by_resource(ctx.resource_ids)
 
-            for i, ch in enumerate(top_chunks[:final_k]):
-                sim = self.chunk_service.cosine_similarity(query_embedding, ch.embedding) if ch.embedding else None
+            for ch in top_chunks[:top_k]:
+                sim = self.chunk_service.cosine_similarity(ctx.query_embedding, ch.embedding) if ch.embedding else None
                 dense_hits.append({
                     "id": ch.id,
                     "resource_id": ch.resource_id,
@@ -152,10 +221,20 @@ class HybridRetrievalService:
                     "content": ch.content,
                     "embedding_model": ch.embedding_model,
                     "similarity": sim,
-                    "rank": i+1,
                 })
-        else:
-            # attach rank for logging
-            dense_hits = [{**h, "rank": i + 1} for i, h in enumerate(dense_hits)]
 
-        return dense_hits
+        return [self._candidate(hit) for hit in dense_hits]
+
+    def _fused_search(self, ctx, top_k: int, top_doc_k: int) -> List[Candidate]:
+        hits = self.chunk_service.fused_search(
+            resource_ids=ctx.resource_ids,
+            query=ctx.query,
+            query_embedding=ctx.query_embedding,
+            top_doc_k=top_doc_k,
+            dense_k=settings.RETRIEVAL_FUSED_CANDIDATES,
+            lexical_k=settings.RETRIEVAL_FUSED_CANDIDATES,
+            final_k=top_k,
+            rrf_k=settings.RETRIEVAL_RRF_K,
+        )
+        logger.info("Fused retrieval returned %d hits", len(hits))
+        return [self._candidate(hit, score_key="rrf_score") for hit in hits]
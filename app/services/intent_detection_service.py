@@ -1,7 +1,14 @@
 # app/services/intent_detection_service.py
-from typing import Literal
+import threading
+from typing import Dict, List, Literal, Optional, Tuple
+
 import numpy as np
-from app.components.document_processing.services.embedding_service import generate_text_embedding
+
+from app.components.document_processing.services.embedding_service import (
+    generate_text_embedding,
+    generate_text_embeddings,
+)
+from app.core.config import settings
 
 IntentType = Literal[
     "greeting",
@@ -15,6 +22,13 @@ IntentType = Literal[
 class IntentDetectionService:
     """
     Option 3: Hybrid Rule + Semantic Gate
+
+    The semantic gate runs only when no keyword rule matches. With
+    INTENT_CLASSIFIER "gemini" it compares the query's Gemini embedding
+    (reused from retrieval when the caller passes it) with the anchor
+    embeddings, which are embedded once per process and persisted through
+    the embedding cache. With "local" it picks the nearest labelled example
+    under the MiniLM encoder and makes no network calls.
     """
 
     GREETING_RULES = ["hello", "hi", "hey", "හායි", "හලෝ", "ආයුබෝවන්", "ගුඩ් මෝනින්", "good morning", "good afternoon", "good evening"]
@@ -31,8 +45,53 @@ class IntentDetectionService:
         "explanation": "මෙය විස්තර කර පැහැදිලි කරන්න",
     }
 
+    # Labelled examples for the local classifier, in addition to the anchors
+    LOCAL_EXAMPLES = {
+        "greeting": [
+            "hello",
+            "hi there",
+            "good morning",
+            "ආයුබෝවන්",
+            "කොහොමද ඔයාට",
+            "සුබ උදෑසනක්",
+            "ස්තූතියි",
+        ],
+        "summary": [
+            "summarize this lesson",
+            "give me the main points",
+            "මෙම පාඩමේ ප්‍රධාන කරුණු මොනවාද",
+            "මේ පරිච්ඡේදයේ හරය ලියන්න",
+            "ප්‍රධාන කරුණු ලැයිස්තුවක් දෙන්න",
+        ],
+        "qa_generate": [
+            "make a quiz from this chapter",
+            "create practice questions",
+            "මෙම පාඩමට අභ්‍යාස ලියන්න",
+            "විභාගයට පුහුණු වීමට ප්‍රශ්න පත්‍රයක් සකසන්න",
+            "බහුවරණ ගැටලු දහයක් දෙන්න",
+        ],
+        "qa_answer": [
+            "who built the Ruwanweliseya",
+            "when did the Anuradhapura kingdom begin",
+            "රුවන්වැලිසෑය ඉදි කළේ කවුද",
+            "ප්‍රභාසංශ්ලේෂණය සිදු වන්නේ කොහේද",
+            "ශ්‍රී ලංකාවේ අගනුවර කුමක්ද",
+        ],
+        "explanation": [
+            "explain how photosynthesis works",
+            "why does this happen",
+            "ප්‍රභාසංශ්ලේෂණය සිදු වන ආකාරය පැහැදිලි කරන්න",
+            "මෙය සිදු වන්නේ ඇයි",
+            "මෙම ක්‍රියාවලිය පියවරෙන් පියවර තේරුම් කරන්න",
+        ],
+    }
+
+    _lock = threading.Lock()
+    _anchor_matrix: Optional[Tuple[List[str], np.ndarray]] = None
+    _local_matrix: Optional[Tuple[List[str], np.ndarray]] = None
+
     @classmethod
-    def detect_intent(cls, query: str) -> IntentType:
+    def detect_intent(cls, query: str, query_embedding: Optional[List[float]] = None) -> IntentType:
         q = query.lower().strip()
 
         # -------- Step 1: Rule-based --------
@@ -47,27 +106,86 @@ class IntentDetectionService:
 
         if any(w in q for w in cls.QA_ANSWER_RULES) or q.endswith("?"):
             return "qa_answer"
-        
+
 
         # -------- Step 2: Semantic gate --------
-        query_vec = generate_text_embedding(query)
-        if not query_vec:
+        if settings.INTENT_CLASSIFIER == "local":
+            return cls.classify_local(query)
+        return cls.classify_gemini(query, query_embedding)
+
+    @classmethod
+    def classify_gemini(cls, query: str, query_embedding: Optional[List[float]] = None) -> IntentType:
+        query_vec = query_embedding if query_embedding is not None and len(query_embedding) else generate_text_embedding(query)
+        if query_vec is None or not len(query_vec):
+            return "qa_answer"
+
+        anchors = cls._anchors()
+        if anchors is None:
+            return "qa_answer"
+        return cls._best_intent(*anchors, query_vec, settings.INTENT_GEMINI_THRESHOLD)
+
+    @classmethod
+    def classify_local(cls, query: str) -> IntentType:
+        from app.services.embedding_service import EmbeddingService
+
+        labels, matrix = cls._local_examples()
+        return cls._best_intent(labels, matrix, EmbeddingService.embed(query), settings.INTENT_LOCAL_THRESHOLD)
+
+    @staticmethod
+    def _best_intent(labels: List[str], matrix: np.ndarray, query_vec, threshold: float) -> IntentType:
+        """Cosine against every row of the (row-normalised) matrix at once."""
+        q = np.asarray(query_vec, dtype=np.float32)
+        norm = np.linalg.norm(q)
+        if not norm:
             return "qa_answer"
 
-        best_intent = "qa_answer"
-        best_score = 0.0
+        scores = matrix @ (q / norm)
+        best = int(np.argmax(scores))
+        return labels[best] if scores[best] >= threshold else "qa_answer"
 
-        for intent, anchor in cls.SEMANTIC_ANCHORS.items():
-            anchor_vec = generate_text_embedding(anchor)
-            score = cls._cosine_similarity(query_vec, anchor_vec)
+    @classmethod
+    def _anchors(cls) -> Optional[Tuple[List[str], np.ndarray]]:
+        if cls._anchor_matrix is not None:
+            return cls._anchor_matrix
+        with cls._lock:
+            if cls._anchor_matrix is None:
+                labels = list(cls.SEMANTIC_ANCHORS)
+                vectors = generate_text_embeddings(
+                    [cls.SEMANTIC_ANCHORS[label] for label in labels],
+                    service_name="intent_anchor_embedding",
+                )
+                # Not kept in memory unless every anchor embedded; retried on the next query
+                if len(vectors) != len(labels) or any(not len(v) for v in vectors):
+                    return None
+                cls._anchor_matrix = (labels, cls._normalized(vectors))
+        return cls._anchor_matrix
 
-            if score > best_score:
-                best_score = score
-                best_intent = intent
+    @classmethod
+    def _local_examples(cls) -> Tuple[List[str], np.ndarray]:
+        if cls._local_matrix is not None:
+            return cls._local_matrix
+        with cls._lock:
+            if cls._local_matrix is None:
+                from app.services.embedding_service import EmbeddingService
+
+                examples: Dict[str, List[str]] = {
+                    label: [anchor, *cls.LOCAL_EXAMPLES.get(label, [])]
+                    for label, anchor in cls.SEMANTIC_ANCHORS.items()
+                }
+                labels = [label for label, texts in examples.items() for _ in texts]
+                texts = [text for texts in examples.values() for text in texts]
+                cls._local_matrix = (labels, cls._normalized(EmbeddingService.embed_batch(texts)))
+        return cls._local_matrix
 
-        return best_intent if best_score >= 0.65 else "qa_answer"
+    @classmethod
+    def reset(cls) -> None:
+        """Forget the in-memory anchor and example matrices."""
+        with cls._lock:
+            cls._anchor_matrix = None
+            cls._local_matrix = None
 
     @staticmethod
-    def _cosine_similarity(v1, v2):
-        v1, v2 = np.array(v1), np.array(v2)
-        return float(np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2)))
+    def _normalized(vectors) -> np.ndarray:
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
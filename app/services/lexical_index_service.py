@@ -0,0 +1,216 @@
+# app/services/lexical_index_service.py
+
+import logging
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List
+from uuid import UUID
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.repositories.lexical_index_repository import LexicalIndexRepository
+from app.repositories.resource_chunk_repository import ResourceChunkRepository
+
+logger = logging.getLogger(__name__)
+
+# Bump when tokenization changes so stale indexes can be rebuilt
+TOKENIZER_VERSION = 1
+MAX_TERM_LENGTH = 200
+# undefined_function / undefined_column: the full-text migration is not applied
+FULLTEXT_MISSING_SQLSTATES = {"42883", "42703"}
+
+
+class LexicalIndexService:
+    """
+    Persistent BM25 inverted index per resource.
+
+    Built once when a resource's chunks are saved: one posting per (term,
+    chunk) with its term frequency and the chunk's token length, plus chunk
+    count and total length per resource. At query time the postings for the
+    query terms are fetched for the session's resources and merged, so
+    scoring never loads chunk contents. On PostgreSQL, `search` uses the
+    indexed full-text column instead, so postings are not built at ingestion
+    there; `bm25_search` backfills them if it ever has to fall back.
+    """
+
+    K1 = 1.5
+    B = 0.75
+
+    # Set once the search_resource_chunks() migration is found missing
+    _fulltext_missing = False
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.repository = LexicalIndexRepository(db)
+
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        """Sinhala word tokens (same rule HybridRetrievalService used for BM25)."""
+        return [t[:MAX_TERM_LENGTH] for t in re.findall(r"[අ-෴]+", text or "")]
+
+    @classmethod
+    def chunk_text(cls, chunk) -> str:
+        text = chunk.content or ""
+        if getattr(chunk, "pseudo_questions", None):
+            text = text + "\n" + chunk.pseudo_questions
+        return text
+
+    def index_chunks(self, resource_id: UUID, chunks: Iterable) -> int:
+        """
+        (Re)build the index for one resource from its chunks (objects with
+        id, content and pseudo_questions). Does not commit.
+        """
+        postings = []
+        chunk_count = 0
+        total_length = 0
+        terms = set()
+
+        for chunk in chunks:
+            tokens = self.tokenize(self.chunk_text(chunk))
+            chunk_count += 1
+            total_length += len(tokens)
+            for term, freq in Counter(tokens).items():
+                terms.add(term)
+                postings.append({
+                    "term": term,
+                    "chunk_id": chunk.id,
+                    "term_freq": freq,
+                    "chunk_length": len(tokens),
+                })
+
+        self.repository.replace_for_resource(
+            resource_id,
+            {
+                "chunk_count": chunk_count,
+                "total_length": total_length,
+                "term_count": len(terms),
+                "tokenizer_version": TOKENIZER_VERSION,
+            },
+            postings,
+        )
+        logger.info(
+            "Lexical index for resource %s: %d chunks, %d terms, %d postings",
+            resource_id, chunk_count, len(terms), len(postings),
+        )
+        return len(postings)
+
+    def uses_postings(self) -> bool:
+        """False when `search` is served by the PostgreSQL full-text column."""
+        return not self._fulltext_available()
+
+    def ensure_indexed(self, resource_ids: List[UUID]) -> List[UUID]:
+        """Build missing or outdated indexes (resources ingested before the index existed)."""
+        current = {
+            stats.resource_id
+            for stats in self.repository.get_stats(resource_ids)
+            if stats.tokenizer_version == TOKENIZER_VERSION
+        }
+        missing = [rid for rid in resource_ids if rid not in current]
+        if not missing:
+            return []
+
+        chunks_by_resource = defaultdict(list)
+        for chunk in ResourceChunkRepository(self.db).get_chunks_by_resource(missing):
+            chunks_by_resource[chunk.resource_id].append(chunk)
+
+        try:
+            for resource_id in missing:
+                self.index_chunks(resource_id, chunks_by_resource.get(resource_id, []))
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            logger.exception("Failed to backfill lexical index for %s", missing)
+            raise
+        return missing
+
+    def search(self, resource_ids: List[UUID], query: str, top_k: int = 30) -> List[Dict]:
+        """
+        Lexical search over `resource_ids`, returning
+        [{"chunk_id", "resource_id", "score"}] sorted by score.
+
+        On PostgreSQL this uses the GIN-indexed `resource_chunks.search_tsv`
+        column; other backends, or databases without that migration, use the
+        BM25 postings index.
+        """
+        if not resource_ids or not query:
+            return []
+
+        if self._fulltext_available():
+            hits = self._fulltext_search(resource_ids, query, top_k)
+            if hits is not None:
+                return hits
+
+        return self.bm25_search(resource_ids, query, top_k)
+
+    @classmethod
+    def fulltext_missing(cls) -> bool:
+        """True once search_resource_chunks() was found missing in this process."""
+        return cls._fulltext_missing
+
+    @classmethod
+    def record_fulltext_error(cls, error: SQLAlchemyError, fallback: str) -> None:
+        """
+        Log a failed full-text query. Only a missing function or column
+        (the migration is not applied) disables the full-text path for good;
+        anything else falls back for the current query only.
+        """
+        if getattr(error.orig, "pgcode", None) in FULLTEXT_MISSING_SQLSTATES:
+            cls._fulltext_missing = True
+            logger.warning("Full-text chunk search unavailable, using %s: %s", fallback, error)
+        else:
+            logger.warning("Full-text chunk search failed, using %s for this query: %s", fallback, error)
+
+    def _fulltext_available(self) -> bool:
+        return (
+            not LexicalIndexService._fulltext_missing
+            and self.db.get_bind().dialect.name == "postgresql"
+        )
+
+    def _fulltext_search(self, resource_ids: List[UUID], query: str, top_k: int):
+        try:
+            with self.db.begin_nested():
+                rows = ResourceChunkRepository(self.db).lexical_search(resource_ids, query, top_k)
+        except SQLAlchemyError as e:
+            self.record_fulltext_error(e, "BM25 postings")
+            return None
+        return [
+            {"chunk_id": row["chunk_id"], "resource_id": row["resource_id"], "score": float(row["rank"] or 0.0)}
+            for row in rows
+        ]
+
+    def bm25_search(self, resource_ids: List[UUID], query: str, top_k: int = 30) -> List[Dict]:
+        """
+        BM25 over the merged postings indexes of `resource_ids`. IDF uses the
+        non-negative Lucene form log(1 + (N - df + 0.5) / (df + 0.5)).
+        """
+        query_terms = Counter(self.tokenize(query))
+        if not resource_ids or not query_terms:
+            return []
+
+        self.ensure_indexed(resource_ids)
+
+        stats = self.repository.get_stats(resource_ids)
+        total_chunks = sum(s.chunk_count for s in stats)
+        if not total_chunks:
+            return []
+        avg_length = (sum(s.total_length for s in stats) / total_chunks) or 1.0
+
+        postings = self.repository.get_postings(resource_ids, list(query_terms))
+        doc_freq = Counter(p.term for p in postings)
+
+        scores: Dict[UUID, float] = defaultdict(float)
+        resource_of: Dict[UUID, UUID] = {}
+        for p in postings:
+            df = doc_freq[p.term]
+            idf = math.log(1 + (total_chunks - df + 0.5) / (df + 0.5))
+            norm = p.term_freq + self.K1 * (1 - self.B + self.B * p.chunk_length / avg_length)
+            scores[p.chunk_id] += query_terms[p.term] * idf * p.term_freq * (self.K1 + 1) / norm
+            resource_of[p.chunk_id] = p.resource_id
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        return [
+            {"chunk_id": chunk_id, "resource_id": resource_of[chunk_id], "score": score}
+            for chunk_id, score in ranked
+        ]
@@ -0,0 +1,209 @@
+# app/services/llm_response_cache_service.py
+
+import hashlib
+import json
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.repositories.llm_response_cache_repository import LlmResponseCacheRepository
+
+logger = logging.getLogger(__name__)
+
+
+class LlmResponseCacheService:
+    """
+    Persistent cache for deterministic Gemini calls.
+
+    Entries are keyed by sha256(model, json_mode, safety settings, prompt)
+    and expire after the TTL configured for the caller's service_name
+    (GEMINI_RESPONSE_CACHE_TTL_HOURS, falling back to the default TTL).
+    A TTL of 0 disables caching for that service. Cache failures are
+    logged and treated as misses.
+    """
+
+    _stats_lock = threading.Lock()
+    _hits = 0
+    _misses = 0
+    _writes = 0
+    _errors = 0
+    _writes_since_eviction = 0
+
+    @staticmethod
+    def _serialize_safety_settings(safety_settings: list | None) -> str:
+        if not safety_settings:
+            return "[]"
+        items = []
+        for setting in safety_settings:
+            if hasattr(setting, "model_dump"):
+                items.append(setting.model_dump(mode="json", exclude_none=True))
+            else:
+                items.append(repr(setting))
+        return json.dumps(items, sort_keys=True, default=str)
+
+    @classmethod
+    def make_key(
+        cls,
+        prompt: str,
+        model_name: str,
+        json_mode: bool = False,
+        safety_settings: list | None = None,
+    ) -> str:
+        payload = "\x1f".join([
+            model_name,
+            "json" if json_mode else "text",
+            cls._serialize_safety_settings(safety_settings),
+            prompt or "",
+        ])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def ttl_for(service_name: str) -> timedelta:
+        hours = settings.GEMINI_RESPONSE_CACHE_TTL_HOURS.get(
+            service_name, settings.GEMINI_RESPONSE_CACHE_DEFAULT_TTL_HOURS
+        )
+        return timedelta(hours=hours)
+
+    @classmethod
+    def enabled_for(cls, service_name: str) -> bool:
+        return settings.GEMINI_RESPONSE_CACHE_ENABLED and cls.ttl_for(service_name) > timedelta(0)
+
+    @classmethod
+    def get(cls, cache_key: str) -> dict | None:
+        """Return the cached result dict (text + token counts) or None."""
+        db = SessionLocal()
+        try:
+            repo = LlmResponseCacheRepository(db)
+            entry = repo.get_fresh(cache_key, datetime.now(timezone.utc))
+            result = None
+            if entry is not None:
+                result = {
+                    "text": entry.response_text,
+                    "prompt_tokens": entry.prompt_tokens or 0,
+                    "completion_tokens": entry.completion_tokens or 0,
+                    "total_tokens": entry.total_tokens or 0,
+                    "model_name": entry.model_name,
+                }
+                repo.touch(cache_key)
+                db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("LLM response cache lookup failed")
+            with cls._stats_lock:
+                cls._errors += 1
+                cls._misses += 1
+            return None
+        finally:
+            db.close()
+
+        with cls._stats_lock:
+            if result is None:
+                cls._misses += 1
+            else:
+                cls._hits += 1
+        return result
+
+    @classmethod
+    def put(
+        cls,
+        cache_key: str,
+        service_name: str,
+        model_name: str,
+        json_mode: bool,
+        prompt: str,
+        result: dict,
+    ) -> None:
+        text = result.get("text") or ""
+        if not text.strip():
+            return
+
+        db = SessionLocal()
+        try:
+            LlmResponseCacheRepository(db).upsert({
+                "cache_key": cache_key,
+                "service_name": service_name,
+                "model_name": model_name,
+                "json_mode": json_mode,
+                "response_text": text,
+                "prompt_chars": len(prompt or ""),
+                "prompt_tokens": result.get("prompt_tokens", 0),
+                "completion_tokens": result.get("completion_tokens", 0),
+                "total_tokens": result.get("total_tokens", 0),
+                "expires_at": datetime.now(timezone.utc) + cls.ttl_for(service_name),
+            })
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("LLM response cache write failed")
+            with cls._stats_lock:
+                cls._errors += 1
+            return
+        finally:
+            db.close()
+
+        with cls._stats_lock:
+            cls._writes += 1
+            cls._writes_since_eviction += 1
+            should_evict = cls._writes_since_eviction >= settings.GEMINI_RESPONSE_CACHE_EVICT_EVERY_WRITES
+            if should_evict:
+                cls._writes_since_eviction = 0
+
+        if should_evict:
+            cls.evict()
+
+    @classmethod
+    def evict(cls, service_name: str | None = None) -> dict:
+        """
+        Drop expired entries and trim to GEMINI_RESPONSE_CACHE_MAX_ENTRIES (LRU).
+        With `service_name`, drop every entry for that service instead.
+        """
+        db = SessionLocal()
+        try:
+            repo = LlmResponseCacheRepository(db)
+            if service_name:
+                removed = {"service": repo.delete_for_service(service_name)}
+            else:
+                removed = {
+                    "expired": repo.delete_expired(datetime.now(timezone.utc)),
+                    "trimmed": repo.trim_to_size(settings.GEMINI_RESPONSE_CACHE_MAX_ENTRIES),
+                }
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("LLM response cache eviction failed")
+            with cls._stats_lock:
+                cls._errors += 1
+            return {}
+        finally:
+            db.close()
+
+        if any(removed.values()):
+            logger.info("LLM response cache eviction: %s", removed)
+        return removed
+
+    @classmethod
+    def stats(cls) -> dict:
+        with cls._stats_lock:
+            lookups = cls._hits + cls._misses
+            return {
+                "enabled": settings.GEMINI_RESPONSE_CACHE_ENABLED,
+                "hits": cls._hits,
+                "misses": cls._misses,
+                "hit_rate": round(cls._hits / lookups, 4) if lookups else 0.0,
+                "writes": cls._writes,
+                "errors": cls._errors,
+                "default_ttl_hours": settings.GEMINI_RESPONSE_CACHE_DEFAULT_TTL_HOURS,
+                "ttl_hours": dict(settings.GEMINI_RESPONSE_CACHE_TTL_HOURS),
+                "max_entries": settings.GEMINI_RESPONSE_CACHE_MAX_ENTRIES,
+            }
+
+    @classmethod
+    def reset_stats(cls) -> None:
+        with cls._stats_lock:
+            cls._hits = 0
+            cls._misses = 0
+            cls._writes = 0
+            cls._errors = 0
+            cls._writes_since_eviction = 0
@@ -16,6 +16,9 @@ class MessageSafetyService:
     def create_safety_report(self, message_id: UUID, report_data: Dict):
         return self.repository.create_safety_report(message_id, report_data)
 
+    def update_analysis(self, message_id: UUID, values: Dict):
+        return self.repository.update_analysis(message_id, values)
+
     def get_safety_report(self, message_id: UUID):
         return self.repository.get_safety_report(message_id)
 
@@ -1,7 +1,7 @@
 # app/services/message_service.py
 from datetime import datetime, timezone
 import logging
-from typing import Optional, List, Dict
+from typing import Iterator, Optional, List, Dict
 from uuid import UUID
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
@@ -270,13 +270,13 @@ class MessageService:
                 resource_id=resource_id,
             )
             
-    def generate_ai_response(
+    def _prepare_rag_request(
         self,
         message_id: UUID,
         user_id: UUID,
         resource_ids: Optional[List[UUID]] = None,
-    ):
-        """Generate AI response for a user message using RAG."""
+    ) -> dict:
+        """Validate the user message and build the RAGService call arguments."""
         message = self.get_message_with_ownership_check(message_id, user_id)
         
         # RAG parameters
@@ -300,11 +300,8 @@ class MessageService:
         from app.components.document_processing.services.embedding_service import generate_text_embedding
         query_embedding: list[float] = generate_text_embedding(user_query)
         logging.info("Generated query embedding for message %s: %s", message_id, query_embedding[:5])
-        # Generate response using RAG
-        from app.services.rag_service import RAGService
-        rag_service = RAGService(self.db)
-        
-        result = rag_service.generate_response(
+
+        return dict(
             session_id=message.session_id,
             user_message_id=message_id,
             user_query=user_query,
@@ -316,6 +313,21 @@ class MessageService:
             user_id=user_id,
         )
 
+    def generate_ai_response(
+        self,
+        message_id: UUID,
+        user_id: UUID,
+        resource_ids: Optional[List[UUID]] = None,
+    ):
+        """Generate AI response for a user message using RAG."""
+        rag_kwargs = self._prepare_rag_request(message_id, user_id, resource_ids)
+
+        # Generate response using RAG
+        from app.services.rag_service import RAGService
+        rag_service = RAGService(self.db)
+        
+        result = rag_service.generate_response(**rag_kwargs)
+
         logger.info("RAG response generated for message %s", message_id)
         
         # Get the created assistant message
@@ -324,3 +336,18 @@ class MessageService:
         ).first()
         
         return assistant_message
+
+    def stream_ai_response(
+        self,
+        message_id: UUID,
+        user_id: UUID,
+        resource_ids: Optional[List[UUID]] = None,
+    ) -> Iterator[dict]:
+        """
+        Validate eagerly, then return the RAG token stream for the message.
+        Validation errors are raised here, before any event is produced.
+        """
+        rag_kwargs = self._prepare_rag_request(message_id, user_id, resource_ids)
+
+        from app.services.rag_service import RAGService
+        return RAGService(self.db).stream_response(**rag_kwargs)
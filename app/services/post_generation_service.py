@@ -0,0 +1,189 @@
+# app/services/post_generation_service.py
+
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.message_safety_service import MessageSafetyService
+from app.services.safety_summary_service import SafetySummaryService
+from app.services.xai_service import XAIService
+from app.utils.sinhala_safety_engine import (
+    attach_evidence,
+    concept_map_check,
+    detect_misconceptions,
+)
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_PENDING = "pending"
+ANALYSIS_READY = "ready"
+ANALYSIS_FAILED = "failed"
+
+
+def run_safety_checks(generated: str, context: str) -> Dict:
+    """Concept coverage and flagged sentences: what the answer needs at render time."""
+    result = concept_map_check(generated, context)
+    return {
+        "missing": result["missing_concepts"],
+        "extra": result["extra_concepts"],
+        "flagged": detect_misconceptions(generated, context),
+    }
+
+
+def analyse_answer(job: Dict) -> Dict:
+    """
+    Evidence for flagged sentences, the cached summary values and the XAI
+    explanation. Returns the safety report fields to update.
+    """
+    flagged = attach_evidence([dict(item) for item in job["flagged"]], job["context"])
+    computed_values = SafetySummaryService.compute_from_flagged(flagged, is_unanswerable=False)
+
+    xai_explanation = XAIService.generate_explanation(
+        user_query=job["user_query"],
+        generated_answer=job["generated"],
+        retrieved_chunks=job["hits"],
+        safety_report={
+            "flagged": flagged,
+            "missing_concepts": list(job["missing"]),
+            "extra_concepts": list(job["extra"]),
+            "confidence_score": computed_values.get("computed_confidence_score", 1.0),
+        },
+        retrieval_metadata=job["retrieval_metadata"],
+    )
+    return {
+        "flagged_sentences": flagged if flagged else None,
+        **computed_values,
+        "xai_explanation": xai_explanation,
+    }
+
+
+class PostGenerationAnalyzer:
+    """
+    Keeps explainability off the chat answer's latency.
+
+    `start_checks` runs the cheap render-time checks on a small pool so they
+    overlap with saving the assistant message. `dispatch` hands evidence,
+    summary values and XAI (`analyse_answer`) to a background pool that uses
+    its own DB session, updates the message's safety report from "pending"
+    to "ready" (or "failed") and pushes an "analysis" event to the user's
+    websockets. Clients that miss the event read `analysis_status` from the
+    report endpoints.
+    """
+
+    def __init__(self, max_workers: int = 2, check_workers: int = 4, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="post-generation")
+        self._check_executor = ThreadPoolExecutor(max_workers=check_workers, thread_name_prefix="safety-checks")
+
+        self._stats_lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._inline = 0
+        self._total_ms = 0.0
+
+    def start_checks(self, generated: str, context: str) -> Future:
+        return self._check_executor.submit(run_safety_checks, generated, context)
+
+    def dispatch(self, job: Dict, db=None) -> Optional[Dict]:
+        """
+        Analyse a saved answer. In the background (returns None) when
+        POST_GENERATION_BACKGROUND is set, otherwise inline on `db`,
+        returning the report fields.
+        """
+        if settings.POST_GENERATION_BACKGROUND:
+            with self._stats_lock:
+                self._queued += 1
+            try:
+                self._executor.submit(self._run_background, job)
+                return None
+            except RuntimeError:
+                # Interpreter shutting down: finish inline
+                with self._stats_lock:
+                    self._queued -= 1
+
+        with self._stats_lock:
+            self._inline += 1
+        return self.run(job, db)
+
+    def run(self, job: Dict, db) -> Dict:
+        """Analyse, persist and notify. Marks the report failed and re-raises on error."""
+        started = time.perf_counter()
+        safety_service = MessageSafetyService(db)
+        try:
+            analysis = analyse_answer(job)
+            safety_service.update_analysis(job["message_id"], {**analysis, "analysis_status": ANALYSIS_READY})
+        except Exception:
+            db.rollback()
+            with self._stats_lock:
+                self._failed += 1
+            safety_service.update_analysis(job["message_id"], {"analysis_status": ANALYSIS_FAILED})
+            self._notify(job, {"analysis_status": ANALYSIS_FAILED})
+            raise
+
+        with self._stats_lock:
+            self._completed += 1
+            self._total_ms += (time.perf_counter() - started) * 1000
+        self._notify(job, {"analysis_status": ANALYSIS_READY, **analysis})
+        return analysis
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "background": settings.POST_GENERATION_BACKGROUND,
+                "queued": self._queued,
+                "running": self._running,
+                "completed": self._completed,
+                "failed": self._failed,
+                "inline": self._inline,
+                "mean_ms": round(self._total_ms / self._completed, 2) if self._completed else None,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+        self._check_executor.shutdown(wait=wait)
+
+    def _run_background(self, job: Dict) -> None:
+        with self._stats_lock:
+            self._queued -= 1
+            self._running += 1
+        db = self.session_factory()
+        try:
+            self.run(job, db)
+        except Exception:
+            logger.exception("Post-generation analysis failed for message %s", job["message_id"])
+        finally:
+            db.close()
+            with self._stats_lock:
+                self._running -= 1
+
+    @staticmethod
+    def _notify(job: Dict, analysis: Dict) -> None:
+        if not job.get("user_id"):
+            return
+        from app.routers.websockets import manager
+
+        event = {
+            "type": "analysis",
+            "message_id": job["message_id"],
+            "analysis_status": analysis["analysis_status"],
+        }
+        if analysis["analysis_status"] == ANALYSIS_READY:
+            event["safety_summary"] = {
+                "overall_severity": analysis.get("computed_severity"),
+                "confidence_score": analysis.get("computed_confidence_score"),
+                "reliability": analysis.get("computed_reliability"),
+            }
+            event["xai_explanation"] = analysis.get("xai_explanation")
+        manager.notify(event, str(job["user_id"]))
+
+
+post_generation = PostGenerationAnalyzer(
+    max_workers=settings.POST_GENERATION_WORKERS,
+    check_workers=settings.POST_GENERATION_CHECK_WORKERS,
+)
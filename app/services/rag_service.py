@@ -1,6 +1,7 @@
 # app/services/rag_service.py
 import logging
-from typing import List, Dict, Optional
+import time
+from typing import Dict, Iterator, List, Optional
 from uuid import UUID
 from sqlalchemy.orm import Session
 import re 
@@ -11,12 +12,11 @@ from app.services.message_context_service import MessageContextService
 from app.services.message_service import MessageService
 from app.utils.sinhala_prompt_builder import build_qa_prompt, build_direct_answer_prompt
 from app.utils.sinhala_summary_prompt_builder import build_summary_prompt
-from app.utils.sinhala_safety_engine import concept_map_check, detect_misconceptions, attach_evidence
 from app.services.message_safety_service import MessageSafetyService
+from app.services.post_generation_service import ANALYSIS_PENDING, ANALYSIS_READY, post_generation
 from app.core.gemini_client import GeminiClient
 from app.services.intent_detection_service import IntentDetectionService
 from app.services.answerability_service import AnswerabilityService
-from app.services.xai_service import XAIService
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +27,9 @@ class RAGService:
     # Threshold for considering retrieved content relevant
     RELEVANCE_THRESHOLD = 0.20  # Lowered to reduce false negatives; LLM will handle the final gate.
 
+    # Prefix the prompts ask Gemini to emit when the context cannot answer
+    REFUSAL_MARKER = "[NOT_ANSWERABLE]"
+
 
     def __init__(self, db: Session):
         self.db = db
@@ -54,11 +57,128 @@ class RAGService:
         user_id: Optional[str] = None,
     ) -> Dict:
         """Hybrid retrieval → grounded generation → safety checks → logging"""
+        plan = self._plan_generation(
+            session_id, user_message_id, user_query, resource_ids,
+            query_embedding, bm25_k, final_k, grade_level,
+        )
+        if "result" in plan:
+            return plan["result"]
+
+        # -----------------------------
+        # 9. Generate response with Gemini
+        # -----------------------------
+        generated_result = GeminiClient.generate_content(
+            prompt=plan["prompt"],
+            user_id=user_id,
+            session_id=session_id,
+            message_id=user_message_id,
+            service_name="message_generation",
+        )
+
+        return self._finalize_generation(
+            session_id, user_message_id, user_query, plan, generated_result, bm25_k, final_k,
+            user_id=user_id,
+        )
+
+    def stream_response(
+        self,
+        session_id: UUID,
+        user_message_id: UUID,
+        user_query: str,
+        resource_ids: List[UUID],
+        query_embedding: Optional[List[float]] = None,
+        bm25_k: int = 20,
+        final_k: int = 8,
+        grade_level: Optional[str] = None,
+        user_id: Optional[str] = None,
+    ) -> Iterator[Dict]:
+        """
+        Streaming variant of `generate_response`.
+
+        Yields {"type": "token", "text": ...} events as Gemini produces the
+        answer, then one {"type": "done", ...} event carrying the same payload
+        `generate_response` returns, after the assistant message and safety
+        report have been saved.
+        """
+        started = time.perf_counter()
+        plan = self._plan_generation(
+            session_id, user_message_id, user_query, resource_ids,
+            query_embedding, bm25_k, final_k, grade_level,
+        )
+        if "result" in plan:
+            result = plan["result"]
+            yield {"type": "token", "text": result["content"]}
+            yield {"type": "done", **result}
+            return
+
+        stream = GeminiClient.stream_content(
+            plan["prompt"],
+            user_id=user_id,
+            session_id=session_id,
+            message_id=user_message_id,
+            service_name="message_generation",
+        )
+
+        # Hold back the first few characters until we know the answer is
+        # not the [NOT_ANSWERABLE] refusal marker.
+        pending = ""
+        holding = True
+        refused = False
+        ttft_ms = None
+        for piece in stream:
+            if not holding:
+                if not refused:
+                    yield {"type": "token", "text": piece}
+                continue
+
+            pending += piece
+            head = pending.lstrip()
+            if len(head) < len(self.REFUSAL_MARKER) and self.REFUSAL_MARKER.startswith(head):
+                continue
+
+            holding = False
+            refused = head.startswith(self.REFUSAL_MARKER)
+            if not refused:
+                ttft_ms = round((time.perf_counter() - started) * 1000, 2)
+                yield {"type": "token", "text": pending}
+
+        if holding and pending.strip():
+            # Very short answer that never got past the marker check
+            yield {"type": "token", "text": pending}
+
+        logger.info("Streamed RAG answer | ttft_ms=%s | gemini_ttft_ms=%s", ttft_ms, stream.ttft_ms)
+
+        result = self._finalize_generation(
+            session_id, user_message_id, user_query, plan, stream.result, bm25_k, final_k,
+            user_id=user_id,
+        )
+        result["retrieval_metadata"] = {**(result.get("retrieval_metadata") or {}), "ttft_ms": ttft_ms}
+        yield {"type": "done", **result}
+
+    def _plan_generation(
+        self,
+        session_id: UUID,
+        user_message_id: UUID,
+        user_query: str,
+        resource_ids: List[UUID],
+        query_embedding: Optional[List[float]],
+        bm25_k: int,
+        final_k: int,
+        grade_level: Optional[str],
+    ) -> Dict:
+        """
+        Intent → hybrid retrieval → answerability → prompt.
+
+        Returns {"result": ...} when the turn is already answered without
+        Gemini (greeting or refusal, message saved), otherwise the state
+        needed to generate and then `_finalize_generation`.
+        """
 
         # -----------------------------
         # 0. Detect intent first
         # -----------------------------
-        intent = IntentDetectionService.detect_intent(user_query)
+        # Reuses the retrieval query embedding, so the semantic gate costs no extra call
+        intent = IntentDetectionService.detect_intent(user_query, query_embedding=query_embedding)
         logger.info(f"Detected intent: {intent}")
 
         # -----------------------------
@@ -77,17 +197,19 @@ class RAGService:
             logger.info("Greeting detected early — skipping RAG pipeline")
 
             return {
-                "assistant_message_id": assistant_msg.id,
-                "content": greeting_text,
-                "sources": [],
-                "retrieval_metadata": {"intent": "greeting", "used_chunks": 0},
-                "safety": {
-                    "is_valid": True,
-                    "missing_concepts": [],
-                    "extra_concepts": [],
-                    "flagged": [],
-                },
-                "xai_explanation": None  # No XAI for greetings
+                "result": {
+                    "assistant_message_id": assistant_msg.id,
+                    "content": greeting_text,
+                    "sources": [],
+                    "retrieval_metadata": {"intent": "greeting", "used_chunks": 0},
+                    "safety": {
+                        "is_valid": True,
+                        "missing_concepts": [],
+                        "extra_concepts": [],
+                        "flagged": [],
+                    },
+                    "xai_explanation": None  # No XAI for greetings
+                }
             }
 
         if not query_embedding:
@@ -103,6 +225,7 @@ class RAGService:
             query_embedding=query_embedding,
             bm25_k=bm25_k,
             final_k=final_k,
+            session_id=session_id,
         )
 
         # -----------------------------
@@ -119,12 +242,14 @@ class RAGService:
             )
             
             return {
-                "assistant_message_id": assistant_msg.id,
-                "content": refusal_text,
-                "sources": [],
-                "retrieval_metadata": {"bm25_k": bm25_k, "final_k": final_k, "used_chunks": 0},
-                "safety": None,  # No safety for unanswerable
-                "xai_explanation": None  # No XAI for unanswerable
+                "result": {
+                    "assistant_message_id": assistant_msg.id,
+                    "content": refusal_text,
+                    "sources": [],
+                    "retrieval_metadata": {"bm25_k": bm25_k, "final_k": final_k, "used_chunks": 0},
+                    "safety": None,  # No safety for unanswerable
+                    "xai_explanation": None  # No XAI for unanswerable
+                }
             }
 
         logger.info("Hybrid retrieval returned %d hits", len(hits))
@@ -188,12 +313,14 @@ class RAGService:
             )
             
             return {
-                "assistant_message_id": assistant_msg.id,
-                "content": refusal_text,
-                "sources": hits,  # Still return sources for transparency
-                "retrieval_metadata": {"bm25_k": bm25_k, "final_k": final_k, "used_chunks": len(hits)},
-                "safety": None,  # No safety for unanswerable
-                "xai_explanation": None  # No XAI for unanswerable
+                "result": {
+                    "assistant_message_id": assistant_msg.id,
+                    "content": refusal_text,
+                    "sources": hits,  # Still return sources for transparency
+                    "retrieval_metadata": {"bm25_k": bm25_k, "final_k": final_k, "used_chunks": len(hits)},
+                    "safety": None,  # No safety for unanswerable
+                    "xai_explanation": None  # No XAI for unanswerable
+                }
             }
 
         # -----------------------------
@@ -262,16 +389,36 @@ class RAGService:
             )
             message_grade_level = None
 
-        # -----------------------------
-        # 9. Generate response with Gemini
-        # -----------------------------
-        generated_result = GeminiClient.generate_content(
-            prompt=prompt, 
-            user_id=user_id,
-            session_id=session_id,
-            message_id=user_message_id,
-            service_name="message_generation",
-        )
+        return {
+            "prompt": prompt,
+            "intent": intent,
+            "hits": hits,
+            "context": context,
+            "grade_level": message_grade_level,
+        }
+
+    def _finalize_generation(
+        self,
+        session_id: UUID,
+        user_message_id: UUID,
+        user_query: str,
+        plan: Dict,
+        generated_result: Dict,
+        bm25_k: int,
+        final_k: int,
+        user_id: Optional[str] = None,
+    ) -> Dict:
+        """
+        LLM refusal check → safety checks → save message and safety report.
+
+        Evidence, the summary values and the XAI explanation are left to
+        `post_generation` (background by default), so the returned payload
+        carries `analysis_status` "pending" and no `xai_explanation`.
+        """
+        hits = plan["hits"]
+        context = plan["context"]
+        message_grade_level = plan["grade_level"]
+
         generated = generated_result["text"]
         prompt_tokens = generated_result["prompt_tokens"]
         completion_tokens = generated_result["completion_tokens"]
@@ -282,8 +429,7 @@ class RAGService:
         # -----------------------------
         # 9.5. Check for LLM-detected unanswerability
         # -----------------------------
-        REFUSAL_MARKER = "[NOT_ANSWERABLE]"
-        is_llm_refusal = generated.strip().startswith(REFUSAL_MARKER)
+        is_llm_refusal = generated.strip().startswith(self.REFUSAL_MARKER)
 
         if is_llm_refusal:
             logger.info("Gemini detected question is unanswerable (marker found)")
@@ -322,15 +468,32 @@ class RAGService:
         # -----------------------------
         # 10. Safety & misconception checks (only for answerable questions)
         # -----------------------------
-        result = concept_map_check(generated, context)
-        missing = result["missing_concepts"]
-        extra = result["extra_concepts"]
-        is_valid = len(missing) == 0 and len(extra) == 0
+        # Cheap concept checks run while the assistant message is saved
+        checks = post_generation.start_checks(generated, context)
+
+        logger.info("Saving assistant message...")
+
+        # -----------------------------
+        # 11. Save assistant message
+        # -----------------------------
+        assistant_msg = self.message_service.create_assistant_message(
+            session_id=session_id,
+            content=generated,
+            model_info={
+                "model_name": "gemini-3-flash-preview", 
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": total_tokens
+            },
+            grade_level=message_grade_level,
+            parent_msg_id=user_message_id
+        )
 
-        flagged = detect_misconceptions(generated, context)
-        logger.info("Detected %d flagged misconceptions", len(flagged))
-        flagged = attach_evidence(flagged, context)
-        logger.info("Attached evidence to flagged misconceptions")
+        checks = checks.result()
+        missing = checks["missing"]
+        extra = checks["extra"]
+        flagged = checks["flagged"]
+        is_valid = len(missing) == 0 and len(extra) == 0
 
         # ---- High-level summary ----
         logger.info(
@@ -351,56 +514,18 @@ class RAGService:
         # ---- Detailed misconception logs ----
         for i, f in enumerate(flagged, start=1):
             logger.info(
-                "FLAGGED #%d | severity=%s | ratio=%.2f\nSENTENCE: %s\nEVIDENCE: %s",
+                "FLAGGED #%d | severity=%s | ratio=%.2f\nSENTENCE: %s",
                 i,
                 f.get("severity"),
                 f.get("unseen_ratio"),
                 f.get("sentence"),
-                f.get("evidence"),
             )
 
-        logger.info("Saving assistant message...")
-
-        # -----------------------------
-        # 11. Save assistant message
-        # -----------------------------
-        assistant_msg = self.message_service.create_assistant_message(
-            session_id=session_id,
-            content=generated,
-            model_info={
-                "model_name": "gemini-3-flash-preview", 
-                "prompt_tokens": prompt_tokens,
-                "completion_tokens": completion_tokens,
-                "total_tokens": total_tokens
-            },
-            grade_level=message_grade_level,
-            parent_msg_id=user_message_id
-        )
-
         # -----------------------------
-        # 12. Compute summary and save safety report
+        # 12. Save safety report; evidence, summary and XAI follow
         # -----------------------------
-        from app.services.safety_summary_service import SafetySummaryService
-        
-        computed_values = SafetySummaryService.compute_from_flagged(flagged, is_unanswerable=False)
-
-        # Build retrieval metadata for XAI generation
         retrieval_metadata = {"bm25_k": bm25_k, "final_k": final_k, "used_chunks": len(hits)}
 
-        # Generate XAI explanation (only for answerable questions)
-        xai_explanation = XAIService.generate_explanation(
-            user_query=user_query,
-            generated_answer=generated,
-            retrieved_chunks=hits,
-            safety_report={
-                "flagged": flagged,
-                "missing_concepts": list(missing),
-                "extra_concepts": list(extra),
-                "confidence_score": computed_values.get("computed_confidence_score", 1.0),
-            },
-            retrieval_metadata=retrieval_metadata,
-        )
-
         self.safety_service.create_safety_report(
             assistant_msg.id,
             {
@@ -408,15 +533,30 @@ class RAGService:
                 "extra_concepts": list(extra)[:50] if extra else None,
                 "flagged_sentences": flagged if flagged else None,
                 "reasoning": "Hybrid RAG with Sinhala QA/Summary",
-                **computed_values,
-                "xai_explanation": xai_explanation,
+                "analysis_status": ANALYSIS_PENDING,
             },
         )
 
+        analysis = post_generation.dispatch(
+            {
+                "message_id": assistant_msg.id,
+                "user_id": user_id,
+                "user_query": user_query,
+                "generated": generated,
+                "context": context,
+                "hits": hits,
+                "flagged": flagged,
+                "missing": missing,
+                "extra": extra,
+                "retrieval_metadata": retrieval_metadata,
+            },
+            db=self.db,
+        )
+
         logger.info("Assistant message and safety report saved.")
 
         # -----------------------------
-        # 13. Return full response with all metadata
+        # 13. Return response; explainability arrives with analysis_status "ready"
         # -----------------------------
         return {
             "assistant_message_id": assistant_msg.id,
@@ -427,7 +567,8 @@ class RAGService:
                 "is_valid": is_valid,
                 "missing_concepts": list(missing)[:10],
                 "extra_concepts": list(extra)[:10],
-                "flagged": flagged,
+                "flagged": (analysis["flagged_sentences"] or []) if analysis else flagged,
             },
-            "xai_explanation": xai_explanation
+            "analysis_status": ANALYSIS_READY if analysis else ANALYSIS_PENDING,
+            "xai_explanation": analysis["xai_explanation"] if analysis else None,
         }
\ No newline at end of file
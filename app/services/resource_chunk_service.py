@@ -1,6 +1,6 @@
 # app/services/resource_chunk_service.py
 
-from typing import List, Dict
+from typing import List, Dict, Optional
 from uuid import UUID
 from sqlalchemy.orm import Session
 from numpy import dot
@@ -26,8 +26,25 @@ class ResourceChunkService:
         """Get all chunks for a single resource."""
         return self.get_chunks_by_resource([resource_id])
 
-    def vector_search(self, resource_ids: List[UUID], query_embedding: List[float], top_k: int = 10):
-        return self.repository.vector_search(resource_ids, query_embedding, top_k)
+    def vector_search(
+        self,
+        resource_ids: List[UUID],
+        query_embedding: List[float],
+        top_k: int = 10,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        representation: Optional[str] = None,
+    ):
+        return self.repository.vector_search(
+            resource_ids, query_embedding, top_k,
+            ef_search=ef_search, probes=probes, representation=representation,
+        )
+
+    def fused_search(self, resource_ids: List[UUID], query: str, query_embedding: List[float], **kwargs):
+        return self.repository.fused_search(resource_ids, query, query_embedding, **kwargs)
+
+    def lexical_search(self, resource_ids: List[UUID], query: str, top_k: int = 50):
+        return self.repository.lexical_search(resource_ids, query, top_k)
     
     def cosine_similarity(self, vec1, vec2):
         return dot(vec1, vec2) / (norm(vec1) * norm(vec2))
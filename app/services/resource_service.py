@@ -7,9 +7,11 @@ from uuid import UUID
 from sqlalchemy.orm import Session
 
 from app.repositories.resource_repository import ResourceRepository
+from app.repositories.resource_section_repository import ResourceSectionRepository
 from app.shared.models.resource_file import ResourceFile
 from app.shared.models.resource_chunks import ResourceChunk
 from app.shared.models.message_relations import MessageContextChunk
+from app.services.vector_working_set import vector_working_set
 
 # Configure upload directory
 UPLOAD_DIR = Path("uploads")
@@ -22,6 +24,7 @@ class ResourceService:
     def __init__(self, db: Session):
         self.db = db
         self.repository = ResourceRepository(db)
+        self.section_repository = ResourceSectionRepository(db)
 
     def validate_file_upload(self, filename: Optional[str], content_type: Optional[str], content: bytes):
         """Validate file upload requirements."""
@@ -247,6 +250,7 @@ class ResourceService:
             self.db.commit()
         else:
             self.db.flush()
+        vector_working_set.invalidate_resource(resource_id)
     
     def process_resource(
         self, 
@@ -290,6 +294,23 @@ class ResourceService:
             top_k=top_k
         )
 
+    def search_sections(
+        self,
+        resource_ids: List[UUID],
+        query_embedding: List[float],
+        top_k: int = 20,
+    ):
+        """Best matching section centroids (resource_id, section range, similarity_score)."""
+        return self.section_repository.vector_search_sections(
+            resource_ids=resource_ids,
+            query_embedding=query_embedding,
+            top_k=top_k,
+        )
+
+    def replace_sections(self, resource_id: UUID, sections: List[Dict[str, Any]]) -> int:
+        """Store the resource's section centroids, replacing old ones (caller commits)."""
+        return self.section_repository.replace_for_resource(resource_id, sections)
+
     def list_resources_by_ids(self, resource_ids: List[UUID]) -> List:
         """List resources by their IDs."""
         return self.repository.list_resources_by_ids(resource_ids)
@@ -0,0 +1,333 @@
+# app/services/retrieval_pipeline.py
+
+"""
+Composable retrieval pipeline shared by chat, voice and text QA.
+
+A pipeline is an ordered list of stages run over one RetrievalContext:
+
+    scope -> lexical / dense -> fusion -> rerank -> packing
+
+Each stage is a small object with `name`, `input_count(ctx)` and `run(ctx)`
+(returning how many candidates it produced), so a stage can be tested on its
+own with an in-memory context. The pipeline records candidates in/out and
+wall time per stage on the context (`ctx.trace`) and in process-wide
+per-stage stats (`pipeline_stats()`, exposed on the admin API).
+
+The concrete configurations live next to their call paths:
+HybridRetrievalService.pipeline (chat), voice_pipeline in
+voice_qa/services/hybrid_retrieval.py and RetrievalService.pipeline in
+text_qa_summary/services/retrieval_service.py.
+"""
+
+import logging
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Optional, Sequence
+
+from app.core import deadline
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Candidate:
+    chunk_id: Any
+    resource_id: Any = None
+    text: str = ""
+    # Per-source scores and 1-based ranks, e.g. {"lexical": 3.2, "dense": 0.81}
+    scores: dict = field(default_factory=dict)
+    ranks: dict = field(default_factory=dict)
+    # Source row (dict or ORM object) handed back to the caller
+    data: Any = None
+
+
+@dataclass
+class RetrievalContext:
+    query: str
+    resource_ids: list
+    query_embedding: Optional[list] = None
+    lexical: list = field(default_factory=list)
+    dense: list = field(default_factory=list)
+    candidates: list = field(default_factory=list)
+    context: str = ""
+    trace: list = field(default_factory=list)
+    # Stage-specific state shared within one run (loaded corpus, parsed intent, ...)
+    extras: dict = field(default_factory=dict)
+
+
+class Stage:
+    name = "stage"
+
+    def input_count(self, ctx: RetrievalContext) -> int:
+        return len(ctx.candidates)
+
+    def run(self, ctx: RetrievalContext) -> int:
+        raise NotImplementedError
+
+
+class ScopeStage(Stage):
+    """Narrows `ctx.resource_ids` with `resolve(ctx)` (e.g. document pre-filtering)."""
+
+    name = "scope"
+
+    def __init__(self, resolve: Callable[[RetrievalContext], Iterable]):
+        self.resolve = resolve
+
+    def input_count(self, ctx):
+        return len(ctx.resource_ids)
+
+    def run(self, ctx):
+        ctx.resource_ids = list(self.resolve(ctx))
+        return len(ctx.resource_ids)
+
+
+class SearchStage(Stage):
+    """
+    Runs `search(ctx, top_k) -> Iterable[Candidate]` and stores the results,
+    best first, in `ctx.<into>` with their rank under `name`.
+    """
+
+    def __init__(self, name: str, search: Callable, top_k: Optional[int] = None, into: str = "candidates"):
+        self.name = name
+        self.search = search
+        self.top_k = top_k
+        self.into = into
+
+    def input_count(self, ctx):
+        return len(ctx.resource_ids)
+
+    def run(self, ctx):
+        results = list(self.search(ctx, self.top_k))
+        if self.top_k is not None:
+            results = results[: self.top_k]
+        for rank, candidate in enumerate(results, start=1):
+            candidate.ranks[self.name] = rank
+        setattr(ctx, self.into, results)
+        return len(results)
+
+
+class LexicalStage(SearchStage):
+    def __init__(self, search: Callable, top_k: Optional[int] = None):
+        super().__init__("lexical", search, top_k, into="lexical")
+
+
+class DenseStage(SearchStage):
+    def __init__(self, search: Callable, top_k: Optional[int] = None):
+        super().__init__("dense", search, top_k, into="dense")
+
+
+class FusionStage(Stage):
+    """
+    Merges `ctx.lexical` and `ctx.dense` into `ctx.candidates`:
+
+    - "concat": lexical then dense order, de-duplicated
+    - "rrf": reciprocal rank fusion, sum of 1 / (rrf_k + rank)
+    - "weighted": sum of weights[source] * score, times every boost(ctx, candidate)
+    - "dense": dense results only (lexical used elsewhere, e.g. for scoping)
+
+    Candidates found by both sources are merged into one, keeping all scores.
+    `pool_size` caps the output.
+    """
+
+    name = "fusion"
+    STRATEGIES = ("concat", "rrf", "weighted", "dense")
+
+    def __init__(
+        self,
+        strategy: str = "rrf",
+        pool_size: Optional[int] = None,
+        rrf_k: int = 60,
+        weights: Optional[dict] = None,
+        boosts: Sequence[Callable] = (),
+    ):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown fusion strategy: {strategy!r}")
+        self.strategy = strategy
+        self.pool_size = pool_size
+        self.rrf_k = rrf_k
+        self.weights = weights or {}
+        self.boosts = boosts
+
+    def input_count(self, ctx):
+        return len(ctx.lexical) + len(ctx.dense)
+
+    @staticmethod
+    def _merge(*sources: list) -> list:
+        merged: dict = {}
+        for source in sources:
+            for candidate in source:
+                existing = merged.get(candidate.chunk_id)
+                if existing is None:
+                    merged[candidate.chunk_id] = candidate
+                else:
+                    existing.scores.update(candidate.scores)
+                    existing.ranks.update(candidate.ranks)
+        return list(merged.values())
+
+    def run(self, ctx):
+        if self.strategy == "dense":
+            fused = list(ctx.dense)
+        elif self.strategy == "concat":
+            fused = self._merge(ctx.lexical, ctx.dense)
+        elif self.strategy == "rrf":
+            fused = self._merge(ctx.lexical, ctx.dense)
+            for candidate in fused:
+                candidate.scores["fusion"] = sum(1.0 / (self.rrf_k + rank) for rank in candidate.ranks.values())
+            fused.sort(key=lambda c: c.scores["fusion"], reverse=True)
+        else:
+            fused = self._merge(ctx.lexical, ctx.dense)
+            for candidate in fused:
+                score = sum(weight * candidate.scores.get(source, 0.0) for source, weight in self.weights.items())
+                for boost in self.boosts:
+                    score *= boost(ctx, candidate)
+                candidate.scores["fusion"] = score
+            fused.sort(key=lambda c: c.scores["fusion"], reverse=True)
+
+        if self.pool_size is not None:
+            fused = fused[: self.pool_size]
+        ctx.candidates = fused
+        return len(fused)
+
+
+class RerankStage(Stage):
+    """
+    Re-orders `ctx.candidates` by `score(query, candidates) -> scores` and
+    keeps `top_k`. If scoring fails the current order is kept.
+    """
+
+    name = "rerank"
+
+    def __init__(self, score: Callable[[str, list], Sequence[float]], top_k: int):
+        self.score = score
+        self.top_k = top_k
+
+    def run(self, ctx):
+        candidates = ctx.candidates
+        if candidates:
+            try:
+                scores = self.score(ctx.query, candidates)
+            except Exception as e:
+                logger.warning("Rerank failed, keeping fused order: %s", e)
+            else:
+                for candidate, score in zip(candidates, scores):
+                    candidate.scores["rerank"] = float(score)
+                candidates = sorted(candidates, key=lambda c: c.scores["rerank"], reverse=True)
+        ctx.candidates = candidates[: self.top_k]
+        return len(ctx.candidates)
+
+
+class ContextPackingStage(Stage):
+    """
+    Keeps candidates in order until `max_chunks` or the `max_chars` budget is
+    reached (stopping at the first chunk that does not fit) and joins their
+    text into `ctx.context`.
+    """
+
+    name = "packing"
+
+    def __init__(self, max_chunks: Optional[int] = None, max_chars: Optional[int] = None, separator: str = "\n\n"):
+        self.max_chunks = max_chunks
+        self.max_chars = max_chars
+        self.separator = separator
+
+    def run(self, ctx):
+        packed = []
+        total = 0
+        for candidate in ctx.candidates:
+            if self.max_chunks is not None and len(packed) >= self.max_chunks:
+                break
+            length = len(candidate.text or "")
+            if self.max_chars is not None and total + length > self.max_chars:
+                break
+            packed.append(candidate)
+            total += length
+        ctx.candidates = packed
+        ctx.context = self.separator.join(c.text or "" for c in packed)
+        return len(packed)
+
+
+class PipelineStats:
+    """Process-wide per (pipeline, stage) run count, wall time and output size."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: dict = defaultdict(lambda: {
+            "runs": 0,
+            "total_ms": 0.0,
+            "max_ms": 0.0,
+            "total_candidates": 0,
+        })
+
+    def record(self, pipeline: str, stage: str, elapsed_ms: float, candidates: int) -> None:
+        with self._lock:
+            counters = self._stages[(pipeline, stage)]
+            counters["runs"] += 1
+            counters["total_ms"] += elapsed_ms
+            counters["max_ms"] = max(counters["max_ms"], elapsed_ms)
+            counters["total_candidates"] += candidates
+
+    def stats(self) -> dict:
+        with self._lock:
+            result: dict = defaultdict(dict)
+            for (pipeline, stage), counters in self._stages.items():
+                runs = counters["runs"]
+                result[pipeline][stage] = {
+                    "runs": runs,
+                    "avg_ms": round(counters["total_ms"] / runs, 2),
+                    "max_ms": round(counters["max_ms"], 2),
+                    "avg_candidates": round(counters["total_candidates"] / runs, 2),
+                }
+            return dict(result)
+
+
+_stats = PipelineStats()
+
+
+def pipeline_stats() -> dict:
+    return _stats.stats()
+
+
+class RetrievalPipeline:
+    def __init__(self, name: str, stages: Sequence[Stage]):
+        self.name = name
+        self.stages = list(stages)
+
+    def run(
+        self,
+        query: str,
+        resource_ids: Iterable,
+        query_embedding: Optional[list] = None,
+        **extras,
+    ) -> RetrievalContext:
+        """
+        Runs every stage in order. Raises DeadlineExceeded (stage "retrieval")
+        if the request budget runs out before a stage starts.
+        """
+        ctx = RetrievalContext(
+            query=query,
+            resource_ids=list(resource_ids),
+            query_embedding=query_embedding,
+            extras=extras,
+        )
+        for stage in self.stages:
+            deadline.check("retrieval")
+            received = stage.input_count(ctx)
+            started = time.perf_counter()
+            produced = stage.run(ctx)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            ctx.trace.append({
+                "stage": stage.name,
+                "in": received,
+                "out": produced,
+                "ms": round(elapsed_ms, 2),
+            })
+            _stats.record(self.name, stage.name, elapsed_ms, produced)
+
+        logger.info(
+            "Retrieval pipeline %s: %s",
+            self.name,
+            " | ".join(f"{t['stage']} {t['in']}->{t['out']} {t['ms']}ms" for t in ctx.trace),
+        )
+        return ctx
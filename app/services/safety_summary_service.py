@@ -18,6 +18,19 @@ class SafetySummaryService:
         if not report:
             return None
 
+        # Evidence and summary values are still being computed in the background
+        if getattr(report, "analysis_status", None) == "pending":
+            return {
+                "overall_severity": None,
+                "confidence_score": None,
+                "reliability": None,
+                "message": None,
+                "has_details": False,
+                "flags": {"flagged_sentences": len(report.flagged_sentences or [])},
+                "xai_explanation": None,
+                "analysis_status": "pending",
+            }
+
         # If summary was pre-computed and cached, return it immediately (fast path)
         # We check for presence of cached values, allowing None for unanswerable questions
         if hasattr(report, 'computed_severity') and hasattr(report, 'computed_confidence_score'):
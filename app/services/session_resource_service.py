@@ -5,16 +5,23 @@ from uuid import UUID
 from sqlalchemy.orm import Session
 
 from app.repositories.session_resource_repository import SessionResourceRepository
+from app.services.vector_working_set import vector_working_set
 
 
 class SessionResourceService:
-    """Business logic for session-resource linking."""
+    """
+    Business logic for session-resource linking.
+
+    Changing a session's resources drops its in-memory vector working set.
+    """
 
     def __init__(self, db: Session):
         self.repository = SessionResourceRepository(db)
 
     def attach_resource_to_session(self, session_id: UUID, resource_id: UUID, label: str = None):
-        return self.repository.attach_resource_to_session(session_id, resource_id, label=label)
+        link = self.repository.attach_resource_to_session(session_id, resource_id, label=label)
+        vector_working_set.invalidate_session(session_id)
+        return link
 
     def get_session_resources(self, session_id: UUID) -> List:
         return self.repository.get_session_resources(session_id)
@@ -26,16 +33,24 @@ class SessionResourceService:
         return self.repository.get_session_resource_by_label(session_id, label)
 
     def upsert_session_resource(self, session_id: UUID, resource_id: UUID, label: str):
-        return self.repository.upsert_session_resource(session_id, resource_id, label)
+        link = self.repository.upsert_session_resource(session_id, resource_id, label)
+        vector_working_set.invalidate_session(session_id)
+        return link
 
     def detach_all_resources(self, session_id: UUID) -> int:
-        return self.repository.delete_resources_for_session(session_id)
+        removed = self.repository.delete_resources_for_session(session_id)
+        vector_working_set.invalidate_session(session_id)
+        return removed
 
     def detach_resource(self, session_id: UUID, resource_id: UUID, label: str = None) -> bool:
         """Remove a single resource link from a session. Returns True if found and removed."""
-        return self.repository.detach_resource_from_session(session_id, resource_id, label)
+        removed = self.repository.detach_resource_from_session(session_id, resource_id, label)
+        vector_working_set.invalidate_session(session_id)
+        return removed
 
     def detach_resources_by_label(self, session_id: UUID, label: str) -> bool:
         """Remove all resource links with a specific label from a session. Returns True if found and removed."""
-        return self.repository.detach_resources_by_label(session_id, label)
+        removed = self.repository.detach_resources_by_label(session_id, label)
+        vector_working_set.invalidate_session(session_id)
+        return removed
 
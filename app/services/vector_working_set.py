@@ -0,0 +1,277 @@
+# app/services/vector_working_set.py
+
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Hashable, Iterable, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.repositories.resource_chunk_repository import ResourceChunkRepository
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DIM = 768  # resource_chunks.embedding
+
+
+@dataclass
+class WorkingSet:
+    """One session's embedded chunks as a row-normalised float32 matrix."""
+
+    matrix: np.ndarray
+    rows: list  # vector_search-shaped dicts, without similarity
+    ranges: dict  # resource_id (str) -> (start, end) row slice
+    nbytes: int
+    loaded_at: float
+
+    @property
+    def resource_ids(self) -> frozenset:
+        return frozenset(self.ranges)
+
+
+def _build(chunks: list, resource_ids: Iterable[str]) -> WorkingSet:
+    # Rows arrive grouped by resource, so each resource is one contiguous slice
+    ranges = {}
+    rows = []
+    vectors = []
+    for i, chunk in enumerate(chunks):
+        rid = str(chunk.resource_id)
+        ranges[rid] = (ranges[rid][0] if rid in ranges else i, i + 1)
+        rows.append({
+            "id": chunk.id,
+            "resource_id": chunk.resource_id,
+            "chunk_index": chunk.chunk_index,
+            "content": chunk.content,
+            "embedding_model": chunk.embedding_model,
+        })
+        vectors.append(chunk.embedding)
+
+    for rid in resource_ids:
+        ranges.setdefault(rid, (0, 0))
+
+    matrix = np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1)
+    if len(matrix):
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+    matrix = np.ascontiguousarray(matrix)
+
+    nbytes = matrix.nbytes + sum(sys.getsizeof(r["content"] or "") for r in rows)
+    return WorkingSet(matrix, rows, ranges, nbytes, time.monotonic())
+
+
+class VectorWorkingSetCache:
+    """
+    Process-wide in-memory dense search for chat sessions.
+
+    The first question in a session loads the chunk embeddings of its
+    resources into one float32 matrix; follow-up questions are answered
+    with a single matrix-vector product instead of a pgvector query. The
+    search is exact and returns the same rows and similarity
+    (1 / (1 + cosine distance)) as ResourceChunkRepository.vector_search.
+
+    Entries are bounded by a global byte budget with LRU eviction across
+    sessions. They are dropped when the session's resources change
+    (`invalidate_session`) or a resource is reprocessed or deleted
+    (`invalidate_resource`); VECTOR_WORKING_SET_TTL_SECONDS bounds
+    staleness for changes made by other worker processes.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, WorkingSet]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # Bumped on every invalidation; a load that raced one is not cached
+        self._epoch = 0
+        self._hits = 0
+        self._loads = 0
+        self._bypassed = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    # ----------------------------------------------------------------
+    # Internal helpers (call with _lock held)
+    # ----------------------------------------------------------------
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.nbytes
+
+    def _store(self, key: str, entry: WorkingSet) -> bool:
+        """Cache `entry`, evicting LRU sessions; False if it alone exceeds the budget."""
+        self._drop(key)
+        if entry.nbytes > self.max_bytes:
+            return False
+        self._entries[key] = entry
+        self._bytes += entry.nbytes
+        while self._bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+            self._evictions += 1
+        return True
+
+    def _lookup(self, key: str, wanted: frozenset) -> Optional[WorkingSet]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry.loaded_at > self.ttl_seconds or not wanted <= entry.resource_ids:
+            return None
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return entry
+
+    # ----------------------------------------------------------------
+    # Public API
+    # ----------------------------------------------------------------
+
+    def get(
+        self,
+        db,
+        session_id: Hashable,
+        resource_ids: Iterable,
+        session_resource_ids: Optional[Iterable] = None,
+    ) -> Optional[WorkingSet]:
+        """
+        The session's working set covering `resource_ids`, loading it (or
+        growing it to newly attached resources) on a miss. A miss loads all
+        of `session_resource_ids` (the session's resources before document
+        scoping) when they fit, so later questions scoped to other resources
+        are hits. Returns None when the chunks would not fit in the memory
+        budget.
+        """
+        key = str(session_id)
+        wanted = frozenset(str(rid) for rid in resource_ids)
+
+        with self._lock:
+            entry = self._lookup(key, wanted)
+            if entry is not None:
+                return entry
+            previous = self._entries.get(key)
+            epoch = self._epoch
+
+        needed = wanted | previous.resource_ids if previous is not None else wanted
+        scopes = [needed]
+        if session_resource_ids is not None:
+            full = needed | frozenset(str(rid) for rid in session_resource_ids)
+            if full != needed:
+                scopes.insert(0, full)
+
+        # The whole session when it fits, else just what this query needs
+        repository = ResourceChunkRepository(db)
+        for scope in scopes:
+            estimate = repository.count_embedded_chunks(list(scope)) * 4 * EMBEDDING_DIM
+            if estimate <= self.max_bytes:
+                break
+        else:
+            with self._lock:
+                self._bypassed += 1
+            logger.info("Session %s working set (~%d bytes) exceeds budget, using pgvector", key, estimate)
+            return None
+
+        entry = _build(repository.get_chunk_embeddings(list(scope)), scope)
+        with self._lock:
+            self._loads += 1
+            if epoch == self._epoch and not self._store(key, entry):
+                self._bypassed += 1
+                entry = None
+        if entry is None:
+            logger.info("Session %s working set exceeds budget once loaded, using pgvector", key)
+            return None
+        logger.info("Loaded working set for session %s: %d chunks, %d bytes",
+                    key, len(entry.rows), entry.nbytes)
+        return entry
+
+    def search(
+        self,
+        db,
+        session_id: Hashable,
+        resource_ids: List,
+        query_embedding: List[float],
+        top_k: int = 10,
+        session_resource_ids: Optional[List] = None,
+    ) -> Optional[List[dict]]:
+        """
+        Exact dense top-k over the session's chunks in `resource_ids`
+        (loading `session_resource_ids` on a miss, see `get`).
+        Returns None when the working set is disabled or over budget, so the
+        caller falls back to pgvector.
+        """
+        if not settings.VECTOR_WORKING_SET_ENABLED or session_id is None:
+            return None
+        if not resource_ids or not query_embedding:
+            return []
+
+        entry = self.get(db, session_id, resource_ids, session_resource_ids)
+        if entry is None:
+            return None
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        slices = [entry.ranges[rid] for rid in dict.fromkeys(str(rid) for rid in resource_ids)]
+        total = sum(end - start for start, end in slices)
+        if not total or top_k <= 0:
+            return []
+        if total == len(entry.rows):
+            positions = np.arange(total)
+            scores = entry.matrix @ query
+        else:
+            positions = np.concatenate([np.arange(start, end) for start, end in slices])
+            scores = entry.matrix[positions] @ query
+
+        k = min(top_k, total)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        # cosine distance = 1 - cosine similarity, scored like vector_search
+        return [{**entry.rows[positions[i]], "similarity": float(1 / (2 - scores[i]))} for i in top]
+
+    def invalidate_session(self, session_id: Hashable) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._invalidations += 1
+            self._drop(str(session_id))
+
+    def invalidate_resource(self, resource_id: Hashable) -> None:
+        rid = str(resource_id)
+        with self._lock:
+            self._epoch += 1
+            self._invalidations += 1
+            for key in [k for k, entry in self._entries.items() if rid in entry.ranges]:
+                self._drop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": settings.VECTOR_WORKING_SET_ENABLED,
+                "sessions": len(self._entries),
+                "chunks": sum(len(entry.rows) for entry in self._entries.values()),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "loads": self._loads,
+                "bypassed": self._bypassed,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+            }
+
+
+vector_working_set = VectorWorkingSetCache(
+    max_bytes=settings.VECTOR_WORKING_SET_MAX_MB * 1024 * 1024,
+    ttl_seconds=settings.VECTOR_WORKING_SET_TTL_SECONDS,
+)
@@ -1,38 +1,63 @@
 # app/shared/ai/embeddings.py
 
-import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Optional
+from app.core import deadline
 from app.core.gemini_client import GeminiClient
 from app.core.config import settings
+from app.core.model_registry import ModelRegistry, XLMR_MODEL_NAME
+from app.shared.ai.tensor_cache import TensorLRUCache
+from app.shared.ai.encoder_service import BatchingEncoder
 from google.genai import types
 import huggingface_hub
 
 if settings.HF_TOKEN:
     huggingface_hub.login(token=settings.HF_TOKEN, add_to_git_credential=False)
 
-# Global semaphore to prevent CPU thrashing during heavy XLM-R math
-# (One encoding task at a time per backend process)
-ml_semaphore = threading.Semaphore(1)
+# Global thread-safe, byte-bounded LRU cache for sentence embeddings.
+# Misses on `_embedding_cache[text]` are re-encoded via _encode_sentences.
+_embedding_cache = TensorLRUCache(
+    max_bytes=settings.XLMR_CACHE_MAX_MB * 1024 * 1024,
+    store_fp16=settings.XLMR_CACHE_FP16,
+    loader=lambda sentences: _encode_sentences(sentences),
+)
 
-# Global thread-safe cache for sentence embeddings
-_embedding_cache = {}
-_cache_lock = threading.Lock()
 
-
-_xlmr = None
-_xlmr_lock = threading.Lock()
+_xlmr_backend = settings.XLMR_BACKEND
 
 
 def get_xlmr_model():
-    global _xlmr
-    if _xlmr is None:
-        with _xlmr_lock:
-            if _xlmr is None:
-                from sentence_transformers import SentenceTransformer
-
-                _xlmr = SentenceTransformer(
-                    "sentence-transformers/paraphrase-xlm-r-multilingual-v1"
-                )
-    return _xlmr
+    """
+    Shared XLM-R grading encoder on the configured XLMR_BACKEND.
+    Falls back to torch for the rest of the process if that backend
+    cannot be loaded (e.g. onnxruntime not installed).
+    """
+    global _xlmr_backend
+    if _xlmr_backend != "torch":
+        try:
+            return ModelRegistry.get(XLMR_MODEL_NAME, backend=_xlmr_backend)
+        except Exception as e:
+            print(f"[ERROR] XLM-R {_xlmr_backend} backend unavailable, using torch: {e}")
+            _xlmr_backend = "torch"
+    return ModelRegistry.get(XLMR_MODEL_NAME)
+
+
+# Shared micro-batching front end for XLM-R. Concurrent callers (grading
+# threads, semantic_similarity, ensure_sentences_cached) are coalesced into
+# one encode call by a single dispatcher thread, which also keeps the CPU
+# from thrashing on parallel encodes.
+xlmr_encoder = BatchingEncoder(
+    get_xlmr_model,
+    max_batch_size=settings.XLMR_ENCODER_MAX_BATCH,
+    max_wait_ms=settings.XLMR_ENCODER_MAX_WAIT_MS,
+    name="xlmr",
+)
+
+
+def encode_sentence(text: str):
+    """Encode one sentence with XLM-R (batched with concurrent callers)."""
+    return xlmr_encoder.encode_one(text)
 
 EMBED_MODEL = "gemini-embedding-001"
 EMBED_DIM = 768
@@ -56,6 +81,14 @@ def generate_embedding(
     import time
     import random
     from app.services.api_usage_log_service import ApiUsageLogService
+    from app.services.embedding_cache_service import EmbeddingCacheService
+
+    cached = EmbeddingCacheService.get_many([text], EMBED_MODEL, EMBED_DIM).get(text)
+    if cached:
+        return cached
+
+    deadline.check("embedding")
+    timeout_ms = deadline.timeout_ms()
 
     request_start_time = time.time()
     request_id = f"embedding-{int(request_start_time * 1000)}-{random.randint(1000, 9999)}"
@@ -69,7 +102,8 @@ def generate_embedding(
             model=EMBED_MODEL,
             contents=text,
             config=types.EmbedContentConfig(
-                output_dimensionality=EMBED_DIM
+                output_dimensionality=EMBED_DIM,
+                http_options=types.HttpOptions(timeout=timeout_ms) if timeout_ms else None,
             )
         )
 
@@ -106,6 +140,9 @@ def generate_embedding(
             },
         )
 
+        if embedding_values:
+            EmbeddingCacheService.put_many({text: embedding_values}, EMBED_MODEL, EMBED_DIM)
+
         return embedding_values
 
     except Exception as e:
@@ -141,6 +178,267 @@ def generate_embedding(
         print(f"[ERROR] Gemini Embedding failed: {e}")
         return []
 
+def _embed_batch(
+    texts: list[str],
+    batch_index: int,
+    total_batches: int,
+    user_id=None,
+    session_id=None,
+    message_id=None,
+    resource_id=None,
+    service_name: str = "embedding_generation",
+    metadata_json: dict | None = None,
+) -> list[list[float]]:
+    """
+    Embed one batch of texts in a single embed_content call, retried up to
+    EMBED_BATCH_MAX_RETRIES times with exponential backoff. If every attempt
+    fails, the texts are embedded one at a time with `generate_embedding`,
+    so only texts that also fail on their own get [].
+    """
+    import time
+    import random
+
+    attempts = 1 + max(0, settings.EMBED_BATCH_MAX_RETRIES)
+    for attempt in range(1, attempts + 1):
+        deadline.check("embedding")
+        embeddings = _embed_batch_attempt(
+            texts, batch_index, total_batches, attempt, attempts,
+            user_id=user_id,
+            session_id=session_id,
+            message_id=message_id,
+            resource_id=resource_id,
+            service_name=service_name,
+            metadata_json=metadata_json,
+        )
+        if embeddings is not None:
+            return embeddings
+
+        if attempt < attempts:
+            delay = settings.EMBED_BATCH_RETRY_BASE_S * (2 ** (attempt - 1)) * random.uniform(0.8, 1.2)
+            if not deadline.allows(delay):
+                break
+            time.sleep(delay)
+
+    print(f"[WARN] Embedding batch {batch_index + 1}/{total_batches} failed; embedding its {len(texts)} texts one by one")
+    return [
+        generate_embedding(
+            text,
+            user_id=user_id,
+            session_id=session_id,
+            message_id=message_id,
+            resource_id=resource_id,
+            service_name=service_name,
+            metadata_json={**(metadata_json or {}), "batch_fallback": True},
+        )
+        for text in texts
+    ]
+
+
+def _embed_batch_attempt(
+    texts: list[str],
+    batch_index: int,
+    total_batches: int,
+    attempt: int,
+    attempts: int,
+    user_id=None,
+    session_id=None,
+    message_id=None,
+    resource_id=None,
+    service_name: str = "embedding_generation",
+    metadata_json: dict | None = None,
+) -> list[list[float]] | None:
+    """
+    One embed_content call for the batch, logged as one ApiUsageLog row.
+    Returns None if the call fails.
+    """
+    import time
+    import random
+    from app.services.api_usage_log_service import ApiUsageLogService
+
+    timeout_ms = deadline.timeout_ms()
+    request_start_time = time.time()
+    request_id = f"embedding-batch-{int(request_start_time * 1000)}-{random.randint(1000, 9999)}"
+    prompt_chars = sum(len(t) for t in texts)
+    batch_metadata = {
+        **(metadata_json or {}),
+        "resource_id": str(resource_id) if resource_id else None,
+        "batch_index": batch_index,
+        "total_batches": total_batches,
+        "batch_size": len(texts),
+        "output_dimensionality": EMBED_DIM,
+    }
+
+    try:
+        client = GeminiClient.get_client()
+        if not client:
+            return [[] for _ in texts]
+
+        result = client.models.embed_content(
+            model=EMBED_MODEL,
+            contents=texts,
+            config=types.EmbedContentConfig(
+                output_dimensionality=EMBED_DIM,
+                http_options=types.HttpOptions(timeout=timeout_ms) if timeout_ms else None,
+            )
+        )
+
+        embeddings = [list(e.values) for e in (result.embeddings or [])]
+        if len(embeddings) != len(texts):
+            raise ValueError(
+                f"Expected {len(texts)} embeddings from batch, got {len(embeddings)}"
+            )
+
+        duration_ms = round((time.time() - request_start_time) * 1000, 2)
+
+        ApiUsageLogService.create_log(
+            request_id=request_id,
+            provider="gemini",
+            service_name=service_name,
+            model_name=EMBED_MODEL,
+            status="success",
+            user_id=user_id,
+            session_id=session_id,
+            message_id=message_id,
+            prompt_chars=prompt_chars,
+            response_chars=0,
+            prompt_tokens=0,
+            completion_tokens=0,
+            total_tokens=0,
+            attempt_number=attempt,
+            max_retries=attempts - 1,
+            is_retry=attempt > 1,
+            duration_ms=duration_ms,
+            metadata_json={
+                **batch_metadata,
+                "embedding_dimensions": len(embeddings[0]) if embeddings else 0,
+            },
+        )
+
+        return embeddings
+
+    except Exception as e:
+        duration_ms = round((time.time() - request_start_time) * 1000, 2)
+
+        ApiUsageLogService.create_log(
+            request_id=request_id,
+            provider="gemini",
+            service_name=service_name,
+            model_name=EMBED_MODEL,
+            status="failed",
+            user_id=user_id,
+            session_id=session_id,
+            message_id=message_id,
+            prompt_chars=prompt_chars,
+            response_chars=0,
+            prompt_tokens=0,
+            completion_tokens=0,
+            total_tokens=0,
+            attempt_number=attempt,
+            max_retries=attempts - 1,
+            is_retry=attempt > 1,
+            error_type=type(e).__name__,
+            error_message=str(e)[:1000],
+            duration_ms=duration_ms,
+            metadata_json=batch_metadata,
+        )
+
+        print(
+            f"[ERROR] Gemini batch embedding failed (batch {batch_index + 1}/{total_batches}, "
+            f"attempt {attempt}/{attempts}): {e}"
+        )
+        return None
+
+
+def generate_embeddings_batch(
+    texts: list[str],
+    user_id=None,
+    session_id=None,
+    message_id=None,
+    resource_id=None,
+    service_name: str = "embedding_generation",
+    metadata_json: dict | None = None,
+    batch_size: Optional[int] = None,
+    max_concurrency: Optional[int] = None,
+    on_batch_complete: Optional[Callable[[int, int], None]] = None,
+) -> list[list[float]]:
+    """
+    Generate 768-dim embeddings for many texts using batched Gemini calls.
+
+    Cached embeddings are served first; only the misses are grouped into
+    batches of `batch_size` per embed_content call, with up to
+    `max_concurrency` batches in parallel. A batch that keeps failing is
+    embedded text by text. The result is aligned with `texts`; blank texts
+    and texts that could not be embedded get [].
+
+    `on_batch_complete(done_texts, total_texts)` is called from the calling
+    thread as each batch finishes.
+    """
+    if not texts:
+        return []
+
+    from app.services.embedding_cache_service import EmbeddingCacheService
+
+    batch_size = max(1, batch_size or settings.EMBED_BATCH_SIZE)
+    max_concurrency = max(1, max_concurrency or settings.EMBED_MAX_CONCURRENCY)
+
+    results: list[list[float]] = [[] for _ in texts]
+    pending = [i for i, t in enumerate(texts) if t and t.strip()]
+    if not pending:
+        return results
+
+    total_texts = len(pending)
+    cached = EmbeddingCacheService.get_many([texts[i] for i in pending], EMBED_MODEL, EMBED_DIM)
+    for i in pending:
+        if texts[i] in cached:
+            results[i] = cached[texts[i]]
+    pending = [i for i in pending if not results[i]]
+    done_texts = total_texts - len(pending)
+
+    if done_texts and on_batch_complete:
+        on_batch_complete(done_texts, total_texts)
+    if not pending:
+        return results
+
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    total_batches = len(batches)
+
+    with ThreadPoolExecutor(max_workers=min(max_concurrency, total_batches)) as executor:
+        # Each batch runs in a copy of the caller's context so the request
+        # deadline still bounds it
+        futures = {
+            executor.submit(
+                contextvars.copy_context().run,
+                _embed_batch,
+                [texts[i] for i in indices],
+                batch_index,
+                total_batches,
+                user_id=user_id,
+                session_id=session_id,
+                message_id=message_id,
+                resource_id=resource_id,
+                service_name=service_name,
+                metadata_json=metadata_json,
+            ): indices
+            for batch_index, indices in enumerate(batches)
+        }
+
+        for future in as_completed(futures):
+            indices = futures[future]
+            for i, vec in zip(indices, future.result()):
+                results[i] = vec
+
+            EmbeddingCacheService.put_many(
+                {texts[i]: results[i] for i in indices if results[i]},
+                EMBED_MODEL,
+                EMBED_DIM,
+            )
+
+            done_texts += len(indices)
+            if on_batch_complete:
+                on_batch_complete(done_texts, total_texts)
+
+    return results
+
 def semantic_similarity(a: str, b: str) -> float:
     """
     Compute cosine similarity using local XLM-R
@@ -152,28 +450,29 @@ def semantic_similarity(a: str, b: str) -> float:
     try:
         from sentence_transformers import util
 
-        # Check cache first
-        with _cache_lock:
-            a_vec = _embedding_cache.get(a)
-            b_vec = _embedding_cache.get(b)
-
-        # Encode if missing (batching is preferred, but this is a fallback)
-        if a_vec is None or b_vec is None:
-            with ml_semaphore:
-                if a_vec is None:
-                    a_vec = get_xlmr_model().encode(a, convert_to_tensor=True)
-                    with _cache_lock: _embedding_cache[a] = a_vec
-                if b_vec is None:
-                    b_vec = get_xlmr_model().encode(b, convert_to_tensor=True)
-                    with _cache_lock: _embedding_cache[b] = b_vec
-
-        sim = float(util.cos_sim(a_vec, b_vec))
+        # Check cache first, encode whatever is missing in one pass
+        cached = _embedding_cache.get_many([a, b])
+        missing = [s for s in (a, b) if s not in cached]
+        if missing:
+            cached.update(_encode_sentences(missing))
+            _embedding_cache.put_many({s: cached[s] for s in missing})
+
+        sim = float(util.cos_sim(cached[a], cached[b]))
         return min(sim * 1.2, 1.0)
     except Exception as e:
         print(f"[ERROR] Semantic similarity failed: {e}")
         return 0.5
 
 
+def _encode_sentences(sentences: list[str]) -> dict:
+    """Encode sentences with XLM-R and return text -> tensor (not cached)."""
+    unique = list(dict.fromkeys(s for s in sentences if s and s.strip()))
+    if not unique:
+        return {}
+
+    return dict(zip(unique, xlmr_encoder.encode(unique)))
+
+
 def ensure_sentences_cached(sentences: list[str]):
     """
     Batch-encode multiple sentences into the global cache in one pass.
@@ -183,25 +482,13 @@ def ensure_sentences_cached(sentences: list[str]):
         return
 
     # Deduplicate and filter already cached
-    to_encode = []
-    with _cache_lock:
-        for s in set(sentences):
-            if s and s.strip() and s not in _embedding_cache:
-                to_encode.append(s)
+    to_encode = [
+        s for s in set(sentences)
+        if s and s.strip() and s not in _embedding_cache
+    ]
 
     if not to_encode:
         return
 
-    # Batch encode with semaphore
     print(f"[INFO] Batch encoding {len(to_encode)} new sentences...")
-    with ml_semaphore:
-        new_embs = get_xlmr_model().encode(
-            to_encode, 
-            batch_size=32, 
-            convert_to_tensor=True,
-            show_progress_bar=True
-        )
-        
-        with _cache_lock:
-            for i, s in enumerate(to_encode):
-                _embedding_cache[s] = new_embs[i]
+    _embedding_cache.put_many(_encode_sentences(to_encode))
@@ -0,0 +1,186 @@
+# app/shared/ai/encoder_service.py
+
+import bisect
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+LATENCY_MS_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class _Histogram:
+    """Fixed-bucket histogram (upper bounds, last bucket is +Inf)."""
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += 1
+        self.sum += value
+
+    def snapshot(self) -> dict:
+        labels = [f"<={b}" for b in self.bounds] + [f">{self.bounds[-1]}"]
+        return {
+            "count": self.total,
+            "mean": round(self.sum / self.total, 2) if self.total else 0.0,
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+@dataclass
+class _EncodeRequest:
+    texts: list[str]
+    future: Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class BatchingEncoder:
+    """
+    In-process micro-batching front end for a sentence encoder.
+
+    Callers `submit` texts and get a Future back. A single dispatcher thread
+    drains the queue, waiting up to `max_wait_ms` after the first request to
+    collect up to `max_batch_size` texts, and runs one `encode` call for the
+    whole group. Only the dispatcher touches the model, so no semaphore is
+    needed around encoding.
+    """
+
+    def __init__(
+        self,
+        model_getter: Callable[[], object],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        encode_batch_size: int = 32,
+        name: str = "encoder",
+    ):
+        self.model_getter = model_getter
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.encode_batch_size = encode_batch_size
+        self.name = name
+
+        self._queue: "queue.Queue[_EncodeRequest]" = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self._batch_sizes = _Histogram(BATCH_SIZE_BUCKETS)
+        self._latency_ms = _Histogram(LATENCY_MS_BUCKETS)
+        self._max_queue_depth = 0
+        self._requests = 0
+        self._failures = 0
+
+    # ----------------------------------------------------------------
+    # Public API
+    # ----------------------------------------------------------------
+
+    def submit(self, texts: list[str]) -> Future:
+        """Queue texts for encoding. The Future resolves to a list of
+        embeddings (one tensor per input text, same order)."""
+        future: Future = Future()
+        if not texts:
+            future.set_result([])
+            return future
+
+        self._ensure_started()
+        self._queue.put(_EncodeRequest(texts=list(texts), future=future))
+
+        depth = self._queue.qsize()
+        with self._stats_lock:
+            self._requests += 1
+            self._max_queue_depth = max(self._max_queue_depth, depth)
+        return future
+
+    def encode(self, texts: list[str], timeout: float | None = None) -> list:
+        return self.submit(texts).result(timeout=timeout)
+
+    def encode_one(self, text: str, timeout: float | None = None):
+        return self.encode([text], timeout=timeout)[0]
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "name": self.name,
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self._max_queue_depth,
+                "requests": self._requests,
+                "failed_batches": self._failures,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_ms,
+                "batch_size": self._batch_sizes.snapshot(),
+                "latency_ms": self._latency_ms.snapshot(),
+            }
+
+    # ----------------------------------------------------------------
+    # Dispatcher
+    # ----------------------------------------------------------------
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name=f"{self.name}-dispatcher",
+                    daemon=True,
+                )
+                self._thread.start()
+
+    def _collect_batch(self) -> list[_EncodeRequest]:
+        first = self._queue.get()
+        batch = [first]
+        size = len(first.texts)
+        deadline = time.perf_counter() + self.max_wait_ms / 1000.0
+
+        while size < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                req = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(req)
+            size += len(req.texts)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect_batch()
+            unique = list(dict.fromkeys(t for req in batch for t in req.texts))
+
+            try:
+                embs = self.model_getter().encode(
+                    unique,
+                    batch_size=self.encode_batch_size,
+                    convert_to_tensor=True,
+                    show_progress_bar=False,
+                )
+                index = {text: i for i, text in enumerate(unique)}
+                for req in batch:
+                    req.future.set_result([embs[index[t]] for t in req.texts])
+            except Exception as e:
+                logger.error("%s batch of %s texts failed: %s", self.name, len(unique), e)
+                with self._stats_lock:
+                    self._failures += 1
+                for req in batch:
+                    if not req.future.done():
+                        req.future.set_exception(e)
+
+            done_at = time.perf_counter()
+            with self._stats_lock:
+                self._batch_sizes.observe(len(unique))
+                for req in batch:
+                    self._latency_ms.observe((done_at - req.enqueued_at) * 1000)
@@ -1,9 +1,12 @@
 # app/shared/ai/gemini_client.py
 
+from typing import Callable
+
 from google import genai
 from google.genai import types
 
 from app.core.config import settings
+from app.core.deadline import DeadlineExceeded, deadline_scope
 from app.core.gemini_client import GeminiClient
 from app.services.evaluation.gemini_cost_policy import EvaluationGeminiClient, GeminiDutyBudget
 
@@ -13,6 +16,7 @@ import time
 logger = logging.getLogger(__name__)
 
 MODEL_NAME = "gemini-2.5-flash"
+LIGHTWEIGHT_MODEL_NAME = "gemini-2.5-flash-lite"
 
 # Shared safety settings
 SAFETY_SETTINGS = [
@@ -41,49 +45,118 @@ def gemini_generate(
     json_mode: bool = False,
     model_name: str = None,
     max_retries: int = 3,
+    service_name: str = "message_generation",
+    use_cache: bool = False,
+    bypass_cache: bool = False,
+    cache_validator: Callable[[str], bool] | None = None,
+    deadline_s: float | None = None,
 ) -> str:
+    """
+    Generate text, returning "" on failure. `deadline_s` bounds the total
+    time spent on retries and fallbacks (tightening any request deadline
+    already in effect); running out raises DeadlineExceeded.
+    """
     if not prompt or not prompt.strip():
         return ""
 
     selected_model = model_name or MODEL_NAME
 
     try:
-        result = GeminiClient.generate_content(
-            prompt,
-            max_retries=max_retries,
-            safety_settings=SAFETY_SETTINGS,
-            json_mode=json_mode,
-            model_name=selected_model,
-        )
+        with deadline_scope(deadline_s):
+            result = GeminiClient.generate_content(
+                prompt,
+                max_retries=max_retries,
+                safety_settings=SAFETY_SETTINGS,
+                json_mode=json_mode,
+                model_name=selected_model,
+                service_name=service_name,
+                use_cache=use_cache,
+                bypass_cache=bypass_cache,
+                cache_validator=cache_validator,
+            )
         print(
             f"DEBUG: gemini_generate called (fixed version). JSON Mode: {json_mode}, Model: {selected_model}"
         )
         return (result.get("text") if isinstance(result, dict) else "") or ""
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         print(f"Error during Gemini generation (model: {selected_model}): {e}")
         return ""
 
 
+async def agemini_generate(
+    prompt: str,
+    *,
+    json_mode: bool = False,
+    model_name: str = None,
+    max_retries: int = 3,
+    service_name: str = "message_generation",
+    use_cache: bool = False,
+    bypass_cache: bool = False,
+    cache_validator: Callable[[str], bool] | None = None,
+    deadline_s: float | None = None,
+) -> str:
+    """Async `gemini_generate` for use inside async routers."""
+    if not prompt or not prompt.strip():
+        return ""
+
+    selected_model = model_name or MODEL_NAME
+
+    try:
+        with deadline_scope(deadline_s):
+            result = await GeminiClient.agenerate_content(
+                prompt,
+                max_retries=max_retries,
+                safety_settings=SAFETY_SETTINGS,
+                json_mode=json_mode,
+                model_name=selected_model,
+                service_name=service_name,
+                use_cache=use_cache,
+                bypass_cache=bypass_cache,
+                cache_validator=cache_validator,
+            )
+        return (result.get("text") if isinstance(result, dict) else "") or ""
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        print(f"Error during async Gemini generation (model: {selected_model}): {e}")
+        return ""
+
+
 def gemini_generate_evaluation(
     prompt: str,
     *,
     budget: GeminiDutyBudget,
     json_mode: bool = False,
     reason: str | None = None,
+    use_cache: bool = False,
+    bypass_cache: bool = False,
+    cache_validator: Callable[[str], bool] | None = None,
 ) -> str:
     return EvaluationGeminiClient.generate_once(
         prompt,
         budget=budget,
         json_mode=json_mode,
         reason=reason,
+        use_cache=use_cache,
+        bypass_cache=bypass_cache,
+        cache_validator=cache_validator,
     )
 
 
-def gemini_generate_lightweight(content: str, prompt_template: str = None) -> str:
+def gemini_generate_lightweight(
+    content: str,
+    prompt_template: str = None,
+    *,
+    service_name: str = "session_title",
+    use_cache: bool = False,
+) -> str:
     """
     Use lightweight Gemini model for fast, simple tasks with minimal rate impact.
     Perfect for title generation, quick classifications, etc.
     Handles concurrent request rate limiting automatically.
+    With `use_cache`, repeated inputs are answered from the response cache.
     """
     if not content or not content.strip():
         return ""
@@ -108,6 +181,14 @@ Title:"""
 
     prompt = prompt_template.format(content=content)
 
+    cache_key = None
+    if use_cache:
+        cache_key, cached = GeminiClient.cached_response(
+            prompt, LIGHTWEIGHT_MODEL_NAME, service_name=service_name
+        )
+        if cached is not None:
+            return cached["text"].strip()
+
     max_retries = 3
 
     for attempt in range(max_retries):
@@ -116,7 +197,7 @@ Title:"""
             client = genai.Client(api_key=api_key)
 
             response = client.models.generate_content(
-                model="gemini-2.5-flash-lite",
+                model=LIGHTWEIGHT_MODEL_NAME,
                 contents=prompt,
                 config=types.GenerateContentConfig(
                     response_mime_type="text/plain",
@@ -133,7 +214,12 @@ Title:"""
                 ),
             )
 
-            return (response.text or "").strip()
+            text = (response.text or "").strip()
+            if cache_key and text:
+                GeminiClient.store_response(
+                    cache_key, prompt, LIGHTWEIGHT_MODEL_NAME, False, service_name, {"text": text}
+                )
+            return text
 
         except Exception as e:
             error_msg = str(e).lower()
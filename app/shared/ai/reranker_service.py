@@ -0,0 +1,123 @@
+# app/shared/ai/reranker_service.py
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Sequence
+
+from app.core.config import settings
+from app.core.model_registry import ModelRegistry
+
+logger = logging.getLogger(__name__)
+
+
+class RerankerPool:
+    """
+    Process-wide cross-encoder reranking.
+
+    Models come from ModelRegistry (kind "cross_encoder"), so each is loaded
+    once per worker on RERANKER_BACKEND; if that backend cannot be loaded
+    the model falls back to torch for the rest of the process. Pairs are
+    scored in batches of `batch_size`, and scores are kept in an LRU keyed
+    by (model, query, chunk_id), so a repeated question only scores chunks
+    it has not seen yet.
+    """
+
+    def __init__(self, backend: str, batch_size: int, cache_size: int):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self._backends: dict[str, str] = {}
+        self._cache: "OrderedDict[tuple, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._batches = 0
+        self._predict_seconds = 0.0
+
+    def _model(self, model_name: str):
+        backend = self._backends.get(model_name, self.backend)
+        if backend != "torch":
+            try:
+                return ModelRegistry.get(model_name, kind="cross_encoder", backend=backend)
+            except Exception as e:
+                logger.error("Reranker %s backend unavailable for %s, using torch: %s", backend, model_name, e)
+                self._backends[model_name] = "torch"
+        return ModelRegistry.get(model_name, kind="cross_encoder")
+
+    def score(
+        self,
+        query: str,
+        passages: Sequence[tuple[Hashable, str]],
+        model_name: str | None = None,
+    ) -> list[float]:
+        """
+        Relevance of each (chunk_id, text) passage to `query`. A chunk_id of
+        None falls back to the text as cache key.
+        """
+        model_name = model_name or settings.RERANKER_MODEL
+        keys = [
+            (model_name, query, chunk_id if chunk_id is not None else text)
+            for chunk_id, text in passages
+        ]
+
+        scores: list[float | None] = [None] * len(passages)
+        with self._lock:
+            for i, key in enumerate(keys):
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    scores[i] = self._cache[key]
+            missing = [i for i, score in enumerate(scores) if score is None]
+            self._hits += len(passages) - len(missing)
+            self._misses += len(missing)
+
+        if missing:
+            model = self._model(model_name)
+            started = time.perf_counter()
+            predicted = model.predict(
+                [(query, passages[i][1]) for i in missing],
+                batch_size=self.batch_size,
+                show_progress_bar=False,
+            )
+            elapsed = time.perf_counter() - started
+
+            with self._lock:
+                self._batches += -(-len(missing) // self.batch_size)
+                self._predict_seconds += elapsed
+                for i, value in zip(missing, predicted):
+                    scores[i] = float(value)
+                    self._cache[keys[i]] = scores[i]
+                    self._cache.move_to_end(keys[i])
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        return scores
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "backend": self.backend,
+                "fallback_backends": dict(self._backends),
+                "batch_size": self.batch_size,
+                "max_length": settings.RERANKER_MAX_LENGTH,
+                "cache_entries": len(self._cache),
+                "cache_size": self.cache_size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "batches": self._batches,
+                "predict_seconds": round(self._predict_seconds, 3),
+            }
+
+
+reranker_pool = RerankerPool(
+    backend=settings.RERANKER_BACKEND,
+    batch_size=settings.RERANKER_BATCH_SIZE,
+    cache_size=settings.RERANKER_CACHE_SIZE,
+)
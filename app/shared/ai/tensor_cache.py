@@ -0,0 +1,161 @@
+# app/shared/ai/tensor_cache.py
+
+import sys
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional
+
+
+def _tensor_nbytes(value) -> int:
+    try:
+        return value.element_size() * value.nelement()
+    except AttributeError:
+        return sys.getsizeof(value)
+
+
+class TensorLRUCache:
+    """
+    Thread-safe LRU cache for local sentence embeddings (torch tensors)
+    bounded by a byte budget instead of an entry count.
+
+    Keeps the dict-style API the grading code already uses
+    (`get`, `in`, `[]`), plus batched `get_many` / `put_many`.
+    With `store_fp16=True` tensors are stored as float16 and returned as
+    float32, halving memory at a small precision cost.
+
+    `loader`, if given, is called as `loader([key])` -> {key: tensor} when
+    `cache[key]` misses, so an entry evicted between a membership check and
+    the lookup is re-encoded instead of raising KeyError.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        store_fp16: bool = False,
+        loader: Optional[Callable[[list[str]], dict]] = None,
+    ):
+        self.max_bytes = max_bytes
+        self.store_fp16 = store_fp16
+        self.loader = loader
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    # ----------------------------------------------------------------
+    # Internal helpers (call with _lock held)
+    # ----------------------------------------------------------------
+
+    def _pack(self, value):
+        if hasattr(value, "detach"):
+            value = value.detach()
+            if self.store_fp16:
+                value = value.half()
+        return value
+
+    def _unpack(self, value):
+        if self.store_fp16 and hasattr(value, "float"):
+            return value.float()
+        return value
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self._misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return self._unpack(entry[0])
+
+    def _store(self, key, value) -> None:
+        packed = self._pack(value)
+        size = _tensor_nbytes(packed) + sys.getsizeof(key)
+
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1]
+
+        if size > self.max_bytes:
+            return
+
+        self._entries[key] = (packed, size)
+        self._bytes += size
+
+        while self._bytes > self.max_bytes and self._entries:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self._evictions += 1
+
+    # ----------------------------------------------------------------
+    # Public API
+    # ----------------------------------------------------------------
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._lookup(key)
+        return default if value is None else value
+
+    def get_many(self, keys: Iterable[str]) -> dict:
+        """Return key -> tensor for every key present in the cache."""
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in found:
+                    continue
+                value = self._lookup(key)
+                if value is not None:
+                    found[key] = value
+        return found
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._store(key, value)
+
+    def put_many(self, items) -> None:
+        pairs = items.items() if isinstance(items, dict) else items
+        with self._lock:
+            for key, value in pairs:
+                self._store(key, value)
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is not None:
+            return value
+        if self.loader is not None:
+            loaded = self.loader([key]) or {}
+            if key in loaded:
+                self.put(key, loaded[key])
+                return loaded[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value) -> None:
+        self.put(key, value)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "store_fp16": self.store_fp16,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+            }
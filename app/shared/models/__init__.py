@@ -15,6 +15,7 @@ from app.shared.models.evaluation_session import (
 from app.shared.models.answer_evaluation import AnswerDocument, EvaluationResult, QuestionScore
 from app.shared.models.rubrics import Rubric, RubricCriterion
 from app.shared.models.resource_chunks import ResourceChunk
+from app.shared.models.resource_sections import ResourceSection
 from app.shared.models.message_relations import MessageContextChunk, MessageAttachment, MessageSafetyReport
 from app.shared.models.session_resources import SessionResource
 from app.shared.models.password_reset_token import PasswordResetToken
@@ -23,6 +24,9 @@ from app.shared.models.user_evaluation_context import UserEvaluationContext
 from app.shared.models.processing_log import ProcessingLog
 from app.shared.models.api_usage_log import ApiUsageLog
 from app.shared.models.pricing_plan import PricingPlanModel
+from app.shared.models.embedding_cache import EmbeddingCacheEntry
+from app.shared.models.llm_response_cache import LlmResponseCacheEntry
+from app.shared.models.lexical_index import ResourceLexicalStats, ResourceLexicalPosting
 
 __all__ = [
     "User",
@@ -43,6 +47,7 @@ __all__ = [
     "Rubric",
     "RubricCriterion",
     "ResourceChunk",
+    "ResourceSection",
     "MessageContextChunk",
     "MessageAttachment",
     "MessageSafetyReport",
@@ -53,4 +58,8 @@ __all__ = [
     "ProcessingLog",
     "ApiUsageLog",
     "PricingPlanModel",
+    "EmbeddingCacheEntry",
+    "LlmResponseCacheEntry",
+    "ResourceLexicalStats",
+    "ResourceLexicalPosting",
 ]
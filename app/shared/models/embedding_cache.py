@@ -0,0 +1,33 @@
+# app/shared/models/embedding_cache.py
+
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, String, Integer, DateTime
+from pgvector.sqlalchemy import Vector
+
+from app.core.database import Base
+
+
+class EmbeddingCacheEntry(Base):
+    __tablename__ = "embedding_cache"
+
+    # sha256 of (model, output_dimensionality, text)
+    cache_key = Column(String(64), primary_key=True)
+    model_name = Column(String(100), nullable=False)
+    output_dimensionality = Column(Integer, nullable=False)
+    embedding = Column(Vector(768), nullable=False)
+    text_chars = Column(Integer, default=0)
+    hit_count = Column(Integer, default=0, nullable=False)
+
+    created_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+        index=True,
+    )
+    last_accessed_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+        index=True,
+    )
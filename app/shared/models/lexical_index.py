@@ -0,0 +1,57 @@
+# app/shared/models/lexical_index.py
+
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.core.database import Base
+
+
+class ResourceLexicalStats(Base):
+    """Per-resource corpus statistics for BM25 (chunk count and total length)."""
+
+    __tablename__ = "resource_lexical_stats"
+
+    resource_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("resource_files.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    chunk_count = Column(Integer, nullable=False, default=0)
+    total_length = Column(Integer, nullable=False, default=0)
+    term_count = Column(Integer, nullable=False, default=0)
+    tokenizer_version = Column(Integer, nullable=False, default=1)
+    built_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+
+class ResourceLexicalPosting(Base):
+    """
+    One (term, chunk) posting. Document frequency per term is the number of
+    postings, so IDF is derived from the postings fetched at query time.
+    """
+
+    __tablename__ = "resource_lexical_postings"
+
+    resource_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("resource_files.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    term = Column(String(200), primary_key=True)
+    chunk_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("resource_chunks.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    term_freq = Column(Integer, nullable=False)
+    # Token length of the chunk, denormalised so scoring needs no join
+    chunk_length = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_resource_lexical_postings_term", "term"),
+    )
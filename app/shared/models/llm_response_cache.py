@@ -0,0 +1,37 @@
+# app/shared/models/llm_response_cache.py
+
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, String, Integer, DateTime, Boolean, Text
+
+from app.core.database import Base
+
+
+class LlmResponseCacheEntry(Base):
+    __tablename__ = "llm_response_cache"
+
+    # sha256 of (model, json_mode, safety settings, prompt)
+    cache_key = Column(String(64), primary_key=True)
+    service_name = Column(String(100), nullable=False, index=True)
+    model_name = Column(String(100), nullable=False)
+    json_mode = Column(Boolean, default=False, nullable=False)
+
+    response_text = Column(Text, nullable=False)
+    prompt_chars = Column(Integer, default=0)
+    prompt_tokens = Column(Integer, default=0)
+    completion_tokens = Column(Integer, default=0)
+    total_tokens = Column(Integer, default=0)
+    hit_count = Column(Integer, default=0, nullable=False)
+
+    created_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    last_accessed_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+        index=True,
+    )
@@ -64,6 +64,10 @@ class MessageSafetyReport(Base):
     computed_confidence_score = Column(Numeric, nullable=True)  # 0.0 - 1.0
     computed_reliability = Column(String, nullable=True)  # "fully_supported", "partially_supported", "likely_unsupported"
 
+    # Evidence, computed_* and xai_explanation are filled in after the answer
+    # is returned: "pending", "ready" or "failed"
+    analysis_status = Column(String, nullable=False, default="ready", server_default="ready")
+
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     message = relationship(
@@ -0,0 +1,31 @@
+# app/shared/models/resource_sections.py
+
+import uuid
+from sqlalchemy import Column, ForeignKey, Integer, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from pgvector.sqlalchemy import Vector
+
+from app.core.database import Base
+
+
+class ResourceSection(Base):
+    """
+    Centroid of a run of consecutive chunks (chunk_index start_chunk up to,
+    not including, end_chunk), used to rank documents by their best section.
+    """
+
+    __tablename__ = "resource_sections"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    resource_id = Column(UUID(as_uuid=True), ForeignKey("resource_files.id", ondelete="CASCADE"), nullable=False, index=True)
+    section_index = Column(Integer, nullable=False)
+    start_chunk = Column(Integer, nullable=True)
+    end_chunk = Column(Integer, nullable=True)
+    start_char = Column(Integer, nullable=True)
+    end_char = Column(Integer, nullable=True)
+    chunk_count = Column(Integer, nullable=False, default=0)
+    embedding = Column(Vector(768), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("resource_id", "section_index", name="uq_resource_sections_resource_section"),
+    )
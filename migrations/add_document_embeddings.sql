@@ -10,6 +10,7 @@ ALTER TABLE resource_files
 ADD COLUMN embedding_model varchar;
 
 -- Create index for fast document-level vector search
+-- (superseded by Alembic revision b5c6d7e8f9a0, see scripts/vector_index.py)
 CREATE INDEX IF NOT EXISTS idx_resource_files_doc_embedding 
 ON resource_files USING ivfflat (document_embedding vector_cosine_ops)
 WITH (lists = 100);
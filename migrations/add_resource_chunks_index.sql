@@ -1,3 +1,5 @@
+-- Superseded by Alembic revision b5c6d7e8f9a0 (app/core/vector_index.py);
+-- check and rebuild with scripts/vector_index.py
 CREATE INDEX IF NOT EXISTS idx_resource_chunks_embedding
 ON resource_chunks
 USING ivfflat (embedding vector_cosine_ops)
@@ -0,0 +1,92 @@
+"""Add generated full-text search column to resource_chunks
+
+Revision ID: a4b5c6d7e8f9
+Revises: f3a4b5c6d7e8
+Create Date: 2026-10-17 00:00:00.000000
+
+Adds a STORED generated tsvector over content + pseudo_questions with a GIN
+index, so lexical retrieval no longer re-tokenizes every chunk per query,
+and search_resource_chunks(), the ranking function used by both the voice
+and chat lexical retrieval paths.
+
+PostgreSQL ships no Sinhala dictionary, so `sinhala_simple` copies the
+`simple` configuration (lower-casing, no stemming or stop words). Zero-width
+joiner / non-joiner characters used inside Sinhala conjuncts are stripped
+before parsing so that a word is not split into fragments at each conjunct.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a4b5c6d7e8f9"
+down_revision: Union[str, None] = "f3a4b5c6d7e8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("SET search_path TO public")
+
+    op.execute("""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'sinhala_simple') THEN
+                CREATE TEXT SEARCH CONFIGURATION public.sinhala_simple (COPY = pg_catalog.simple);
+            END IF;
+        END
+        $$
+    """)
+
+    op.execute("""
+        ALTER TABLE resource_chunks
+        ADD COLUMN IF NOT EXISTS search_tsv tsvector
+        GENERATED ALWAYS AS (
+            to_tsvector(
+                'public.sinhala_simple'::regconfig,
+                regexp_replace(
+                    coalesce(content, '') || ' ' || coalesce(pseudo_questions, ''),
+                    '[\\u200C\\u200D]', '', 'g'
+                )
+            )
+        ) STORED
+    """)
+
+    op.execute("CREATE INDEX IF NOT EXISTS ix_resource_chunks_search_tsv ON resource_chunks USING GIN (search_tsv)")
+
+    # Terms are OR-ed: questions rarely contain every word of a chunk, and
+    # ts_rank_cd already rewards chunks that cover more of the query.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION search_resource_chunks(
+            p_resource_ids uuid[],
+            p_query text,
+            p_limit integer DEFAULT 50
+        )
+        RETURNS TABLE (chunk_id uuid, resource_id uuid, content text, rank real)
+        LANGUAGE sql STABLE
+        AS $fn$
+            SELECT c.id, c.resource_id, c.content, ts_rank_cd(c.search_tsv, q.query) AS rank
+            FROM resource_chunks c,
+                 LATERAL (
+                     SELECT replace(
+                         plainto_tsquery(
+                             'public.sinhala_simple'::regconfig,
+                             regexp_replace(p_query, '[\\u200C\\u200D]', '', 'g')
+                         )::text,
+                         '&', '|'
+                     )::tsquery AS query
+                 ) q
+            WHERE c.resource_id = ANY(p_resource_ids)
+              AND c.search_tsv @@ q.query
+            ORDER BY rank DESC
+            LIMIT p_limit
+        $fn$
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP FUNCTION IF EXISTS search_resource_chunks(uuid[], text, integer)")
+    op.drop_index("ix_resource_chunks_search_tsv", table_name="resource_chunks")
+    op.execute("ALTER TABLE resource_chunks DROP COLUMN IF EXISTS search_tsv")
+    op.execute("DROP TEXT SEARCH CONFIGURATION IF EXISTS public.sinhala_simple")
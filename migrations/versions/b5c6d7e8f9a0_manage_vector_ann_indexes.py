@@ -0,0 +1,55 @@
+"""Manage pgvector ANN indexes on chunk and document embeddings
+
+Revision ID: b5c6d7e8f9a0
+Revises: a4b5c6d7e8f9
+Create Date: 2026-10-17 00:00:00.000000
+
+Replaces the ivfflat indexes from migrations/add_resource_chunks_index.sql
+and migrations/add_document_embeddings.sql (lists fixed at 100) with HNSW
+indexes (m = 16, ef_construction = 64), which need no retuning as the tables
+grow. scripts/vector_index.py checks their health and rebuilds them with the
+configured VECTOR_INDEX_METHOD / VECTOR_HNSW_* settings.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b5c6d7e8f9a0"
+down_revision: Union[str, None] = "a4b5c6d7e8f9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("SET search_path TO public")
+
+    op.execute("DROP INDEX IF EXISTS idx_resource_chunks_embedding")
+    op.execute("DROP INDEX IF EXISTS ix_resource_chunks_embedding_ann")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_resource_chunks_embedding_ann "
+        "ON resource_chunks USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)"
+    )
+    op.execute("ANALYZE resource_chunks")
+
+    op.execute("DROP INDEX IF EXISTS idx_resource_files_doc_embedding")
+    op.execute("DROP INDEX IF EXISTS ix_resource_files_document_embedding_ann")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_resource_files_document_embedding_ann "
+        "ON resource_files USING hnsw (document_embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)"
+    )
+    op.execute("ANALYZE resource_files")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_resource_chunks_embedding_ann")
+    op.execute("DROP INDEX IF EXISTS ix_resource_files_document_embedding_ann")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_resource_chunks_embedding "
+        "ON resource_chunks USING ivfflat (embedding vector_cosine_ops) WITH (lists = 100)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_resource_files_doc_embedding "
+        "ON resource_files USING ivfflat (document_embedding vector_cosine_ops) WITH (lists = 100)"
+    )
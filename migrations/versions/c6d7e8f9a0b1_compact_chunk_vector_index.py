@@ -0,0 +1,68 @@
+"""Compact (halfvec) ANN index on chunk embeddings
+
+Revision ID: c6d7e8f9a0b1
+Revises: b5c6d7e8f9a0
+Create Date: 2026-10-17 00:00:00.000000
+
+Adds an expression index over resource_chunks.embedding::halfvec(768), half
+the size of the full-precision index, used when VECTOR_SEARCH_REPRESENTATION
+is "halfvec" (candidates are rescored against the full vector). No column is
+added, so new chunks are covered without any backfill.
+
+The index (HNSW, m = 16, ef_construction = 64) is built here only on
+pgvector >= 0.7.0 and when the table has at most INLINE_MAX_ROWS chunks;
+otherwise run `python scripts/vector_index.py backfill --representation
+halfvec`, which builds it CONCURRENTLY without blocking ingestion.
+"""
+import logging
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c6d7e8f9a0b1"
+down_revision: Union[str, None] = "b5c6d7e8f9a0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+# Larger tables are indexed by the concurrent backfill instead
+INLINE_MAX_ROWS = 200_000
+
+
+def _pgvector_supports_halfvec(conn) -> bool:
+    version = conn.execute(sa.text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")).scalar()
+    if not version:
+        return False
+    return tuple(int(part) for part in version.split(".") if part.isdigit()) >= (0, 7, 0)
+
+
+def upgrade() -> None:
+    op.execute("SET search_path TO public")
+
+    conn = op.get_bind()
+    if not _pgvector_supports_halfvec(conn):
+        logger.warning("pgvector < 0.7.0: skipping the halfvec index (upgrade the extension, then run the backfill)")
+        return
+
+    rows = conn.execute(sa.text("SELECT count(*) FROM resource_chunks WHERE embedding IS NOT NULL")).scalar() or 0
+    if rows > INLINE_MAX_ROWS:
+        logger.warning(
+            "%d chunk vectors: run `python scripts/vector_index.py backfill --representation halfvec`", rows
+        )
+        return
+
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_resource_chunks_embedding_ann_halfvec "
+        "ON resource_chunks USING hnsw ((embedding::halfvec(768)) halfvec_cosine_ops) "
+        "WITH (m = 16, ef_construction = 64)"
+    )
+    op.execute("ANALYZE resource_chunks")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_resource_chunks_embedding_ann_halfvec")
+    op.execute("DROP INDEX IF EXISTS ix_resource_chunks_embedding_ann_binary")
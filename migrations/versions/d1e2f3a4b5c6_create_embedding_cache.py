@@ -0,0 +1,42 @@
+"""Create embedding_cache table
+
+Revision ID: d1e2f3a4b5c6
+Revises: 9c1d2e3f4a5b
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d1e2f3a4b5c6"
+down_revision: Union[str, None] = "9c1d2e3f4a5b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("SET search_path TO public")
+
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS embedding_cache (
+            cache_key             VARCHAR(64) PRIMARY KEY,
+            model_name            VARCHAR(100) NOT NULL,
+            output_dimensionality INTEGER NOT NULL,
+            embedding             vector(768) NOT NULL,
+            text_chars            INTEGER DEFAULT 0,
+            hit_count             INTEGER NOT NULL DEFAULT 0,
+            created_at            TIMESTAMPTZ NOT NULL DEFAULT now(),
+            last_accessed_at      TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+
+    op.execute("CREATE INDEX IF NOT EXISTS ix_embedding_cache_created_at       ON embedding_cache(created_at)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_embedding_cache_last_accessed_at ON embedding_cache(last_accessed_at)")
+
+
+def downgrade() -> None:
+    op.drop_index("ix_embedding_cache_last_accessed_at", table_name="embedding_cache")
+    op.drop_index("ix_embedding_cache_created_at", table_name="embedding_cache")
+    op.drop_table("embedding_cache")
@@ -0,0 +1,48 @@
+"""Create resource_sections (section centroids of chunk embeddings)
+
+Revision ID: d7e8f9a0b1c2
+Revises: c6d7e8f9a0b1
+Create Date: 2026-10-17 00:00:00.000000
+
+Document embeddings are now pooled from chunk embeddings at ingestion; this
+table holds the optional per-section centroids used to rank documents by
+their best matching section. Existing resources are filled in by
+scripts/backfill_document_embeddings.py.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d7e8f9a0b1c2"
+down_revision: Union[str, None] = "c6d7e8f9a0b1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("SET search_path TO public")
+
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS resource_sections (
+            id             UUID PRIMARY KEY,
+            resource_id    UUID NOT NULL REFERENCES resource_files(id) ON DELETE CASCADE,
+            section_index  INTEGER NOT NULL,
+            start_chunk    INTEGER,
+            end_chunk      INTEGER,
+            start_char     INTEGER,
+            end_char       INTEGER,
+            chunk_count    INTEGER NOT NULL DEFAULT 0,
+            embedding      vector(768) NOT NULL,
+            CONSTRAINT uq_resource_sections_resource_section UNIQUE (resource_id, section_index)
+        )
+    """)
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_resource_sections_resource_id "
+        "ON resource_sections (resource_id)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS resource_sections")
@@ -0,0 +1,49 @@
+"""Create llm_response_cache table
+
+Revision ID: e2f3a4b5c6d7
+Revises: d1e2f3a4b5c6
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e2f3a4b5c6d7"
+down_revision: Union[str, None] = "d1e2f3a4b5c6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("SET search_path TO public")
+
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS llm_response_cache (
+            cache_key          VARCHAR(64) PRIMARY KEY,
+            service_name       VARCHAR(100) NOT NULL,
+            model_name         VARCHAR(100) NOT NULL,
+            json_mode          BOOLEAN NOT NULL DEFAULT FALSE,
+            response_text      TEXT NOT NULL,
+            prompt_chars       INTEGER DEFAULT 0,
+            prompt_tokens      INTEGER DEFAULT 0,
+            completion_tokens  INTEGER DEFAULT 0,
+            total_tokens       INTEGER DEFAULT 0,
+            hit_count          INTEGER NOT NULL DEFAULT 0,
+            created_at         TIMESTAMPTZ NOT NULL DEFAULT now(),
+            expires_at         TIMESTAMPTZ NOT NULL,
+            last_accessed_at   TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+
+    op.execute("CREATE INDEX IF NOT EXISTS ix_llm_response_cache_service_name     ON llm_response_cache(service_name)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_llm_response_cache_expires_at       ON llm_response_cache(expires_at)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_llm_response_cache_last_accessed_at ON llm_response_cache(last_accessed_at)")
+
+
+def downgrade() -> None:
+    op.drop_index("ix_llm_response_cache_last_accessed_at", table_name="llm_response_cache")
+    op.drop_index("ix_llm_response_cache_expires_at", table_name="llm_response_cache")
+    op.drop_index("ix_llm_response_cache_service_name", table_name="llm_response_cache")
+    op.drop_table("llm_response_cache")
@@ -0,0 +1,33 @@
+"""Add analysis_status to message_safety_reports
+
+Revision ID: e8f9a0b1c2d3
+Revises: d7e8f9a0b1c2
+Create Date: 2026-10-17 00:00:00.000000
+
+Chat answers now save their safety report as "pending" and fill in evidence,
+the computed_* summary values and xai_explanation in the background.
+Existing reports were written complete, so they default to "ready".
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e8f9a0b1c2d3"
+down_revision: Union[str, None] = "d7e8f9a0b1c2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("SET search_path TO public")
+
+    op.execute("""
+        ALTER TABLE message_safety_reports
+        ADD COLUMN IF NOT EXISTS analysis_status VARCHAR NOT NULL DEFAULT 'ready'
+    """)
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE message_safety_reports DROP COLUMN IF EXISTS analysis_status")
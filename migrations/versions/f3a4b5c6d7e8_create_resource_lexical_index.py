@@ -0,0 +1,50 @@
+"""Create resource lexical (BM25) index tables
+
+Revision ID: f3a4b5c6d7e8
+Revises: e2f3a4b5c6d7
+Create Date: 2026-10-17 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f3a4b5c6d7e8"
+down_revision: Union[str, None] = "e2f3a4b5c6d7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("SET search_path TO public")
+
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS resource_lexical_stats (
+            resource_id        UUID PRIMARY KEY REFERENCES resource_files(id) ON DELETE CASCADE,
+            chunk_count        INTEGER NOT NULL DEFAULT 0,
+            total_length       INTEGER NOT NULL DEFAULT 0,
+            term_count         INTEGER NOT NULL DEFAULT 0,
+            tokenizer_version  INTEGER NOT NULL DEFAULT 1,
+            built_at           TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS resource_lexical_postings (
+            resource_id   UUID NOT NULL REFERENCES resource_files(id) ON DELETE CASCADE,
+            term          VARCHAR(200) NOT NULL,
+            chunk_id      UUID NOT NULL REFERENCES resource_chunks(id) ON DELETE CASCADE,
+            term_freq     INTEGER NOT NULL,
+            chunk_length  INTEGER NOT NULL,
+            PRIMARY KEY (resource_id, term, chunk_id)
+        )
+    """)
+
+    op.execute("CREATE INDEX IF NOT EXISTS ix_resource_lexical_postings_term ON resource_lexical_postings(term)")
+
+
+def downgrade() -> None:
+    op.drop_index("ix_resource_lexical_postings_term", table_name="resource_lexical_postings")
+    op.drop_table("resource_lexical_postings")
+    op.drop_table("resource_lexical_stats")
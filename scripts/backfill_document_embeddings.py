@@ -0,0 +1,108 @@
+# scripts/backfill_document_embeddings.py
+"""
+Recompute resource_files.document_embedding (and section centroids) from the
+stored chunk embeddings, the way ingestion now does. Older document
+embeddings came from one API call over the full extracted text, which the
+API truncated, so they only reflected the first pages.
+
+No API calls are made; resources without embedded chunks are skipped.
+
+Usage:
+    python scripts/backfill_document_embeddings.py
+    python scripts/backfill_document_embeddings.py --only-missing
+    python scripts/backfill_document_embeddings.py --no-sections --batch 50
+"""
+import argparse
+import os
+import sys
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.components.document_processing.services.embedding_service import (
+    pool_chunk_embeddings,
+    section_centroids,
+)
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.resource_service import ResourceService
+from app.shared.ai.embeddings import EMBED_MODEL
+from app.shared.models.resource_chunks import ResourceChunk
+from app.shared.models.resource_file import ResourceFile
+
+
+def _chunk_dicts(db, resource_id) -> list[dict]:
+    rows = (
+        db.query(
+            ResourceChunk.chunk_index,
+            ResourceChunk.content,
+            ResourceChunk.start_char,
+            ResourceChunk.end_char,
+            ResourceChunk.embedding,
+        )
+        .filter(ResourceChunk.resource_id == resource_id, ResourceChunk.embedding.isnot(None))
+        .order_by(ResourceChunk.chunk_index.asc().nulls_last())
+        .all()
+    )
+    return [
+        {
+            "chunk_id": row.chunk_index,
+            "text": row.content,
+            "start_char": row.start_char,
+            "end_char": row.end_char,
+            "embedding": row.embedding,
+        }
+        for row in rows
+    ]
+
+
+def run(args) -> None:
+    db = SessionLocal()
+    try:
+        query = db.query(ResourceFile.id).filter(
+            db.query(ResourceChunk.id).filter(ResourceChunk.resource_id == ResourceFile.id).exists()
+        )
+        if args.only_missing:
+            query = query.filter(ResourceFile.document_embedding.is_(None))
+        resource_ids = [row.id for row in query.all()]
+        print(f"{len(resource_ids)} resources to backfill")
+
+        service = ResourceService(db)
+        updated = 0
+        for i, resource_id in enumerate(resource_ids, 1):
+            chunks = _chunk_dicts(db, resource_id)
+            embedding = pool_chunk_embeddings(chunks)
+            if not embedding:
+                continue
+
+            db.query(ResourceFile).filter(ResourceFile.id == resource_id).update(
+                {"document_embedding": embedding, "embedding_model": EMBED_MODEL},
+                synchronize_session=False,
+            )
+            if args.sections:
+                service.replace_sections(resource_id, section_centroids(chunks, args.section_chunks))
+            updated += 1
+
+            if i % args.batch == 0:
+                db.commit()
+                print(f"  {i}/{len(resource_ids)}")
+        db.commit()
+        print(f"Updated {updated} document embeddings")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only-missing", action="store_true", help="skip resources that have a document embedding")
+    parser.add_argument("--no-sections", dest="sections", action="store_false", help="do not write section centroids")
+    parser.add_argument("--section-chunks", type=int, default=settings.DOCUMENT_SECTION_CHUNKS)
+    parser.add_argument("--batch", type=int, default=100, help="resources per commit")
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# scripts/benchmark_compact_vectors.py
+"""
+Recall and latency of compact first-stage chunk search (halfvec or binary,
+rescored against the full vector) compared with full-precision search, on
+the existing resource_chunks table. Nothing is written.
+
+Queries are stored chunk embeddings plus a little Gaussian noise, scoped
+like a chat session to the chunk's own resource and --scope - 1 random
+others. Ground truth is an exact scan with index scans disabled. Build the
+compact indexes first (Alembic migration or scripts/vector_index.py
+backfill); without them the compact modes run as sequential scans.
+
+Usage:
+    python scripts/benchmark_compact_vectors.py
+    python scripts/benchmark_compact_vectors.py --queries 200 --top-k 8 --scope 20
+    python scripts/benchmark_compact_vectors.py --representations halfvec binary
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+import numpy as np
+from sqlalchemy import text
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core import vector_index
+from app.core.database import SessionLocal
+from app.repositories.resource_chunk_repository import ResourceChunkRepository
+from app.shared.models.resource_chunks import ResourceChunk
+
+TARGET = vector_index.TARGETS["resource_chunks"]
+
+
+def _percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def sample_queries(db, count: int, scope: int, noise: float, seed: int) -> list[tuple[list, list]]:
+    rnd = random.Random(seed)
+    rng = np.random.default_rng(seed)
+    resource_ids = [row.resource_id for row in db.query(ResourceChunk.resource_id).distinct()]
+    rows = (
+        db.query(ResourceChunk.resource_id, ResourceChunk.embedding)
+        .filter(ResourceChunk.embedding.isnot(None))
+        .order_by(text("random()"))
+        .limit(count)
+        .all()
+    )
+
+    queries = []
+    for row in rows:
+        others = [rid for rid in resource_ids if rid != row.resource_id]
+        scoped = [row.resource_id, *rnd.sample(others, min(scope - 1, len(others)))]
+        vec = np.asarray(row.embedding, dtype=np.float32)
+        vec = vec + rng.normal(0, noise * np.abs(vec).mean(), vec.shape).astype(np.float32)
+        queries.append((scoped, vec.tolist()))
+    return queries
+
+
+def exact_ids(db, repository, scoped, query, top_k) -> list:
+    db.execute(text("SET LOCAL enable_indexscan = off"))
+    try:
+        return [hit["id"] for hit in repository.vector_search(scoped, query, top_k, representation="full")]
+    finally:
+        db.rollback()
+
+
+def run(args) -> None:
+    db = SessionLocal()
+    try:
+        if any(r != "full" for r in args.representations) and not vector_index.supports_compact(db):
+            print(f"pgvector {vector_index.pgvector_version(db)} lacks halfvec/binary_quantize (need 0.7.0+)")
+            return
+
+        repository = ResourceChunkRepository(db)
+        queries = sample_queries(db, args.queries, args.scope, args.noise, args.seed)
+        if not queries:
+            print("No chunk embeddings to sample")
+            return
+        truth = [exact_ids(db, repository, scoped, query, args.top_k) for scoped, query in queries]
+
+        sizes = {}
+        for ix in vector_index.list_ann_indexes(db, TARGET):
+            sizes[ix["representation"]] = sizes.get(ix["representation"], 0) + ix["size_bytes"]
+        db.rollback()
+
+        print(f"{len(queries)} queries, top_k={args.top_k}, scope={args.scope} resources")
+        print(f"{'representation':<15} {'recall':>7} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8} {'index MB':>9}")
+        for representation in args.representations:
+            scoped, query = queries[0]
+            repository.vector_search(scoped, query, args.top_k, representation=representation)  # warm-up
+            db.rollback()
+
+            latencies = []
+            recalls = []
+            for (scoped, query), expected in zip(queries, truth):
+                started = time.perf_counter()
+                hits = repository.vector_search(scoped, query, args.top_k, representation=representation)
+                latencies.append((time.perf_counter() - started) * 1000)
+                db.rollback()
+                if expected:
+                    recalls.append(len({h["id"] for h in hits} & set(expected)) / len(expected))
+
+            print(
+                f"{representation:<15} {statistics.mean(recalls) if recalls else 0:>7.3f} "
+                f"{_percentile(latencies, 0.5):>8.1f} {_percentile(latencies, 0.95):>8.1f} "
+                f"{statistics.mean(latencies):>8.1f} {sizes.get(representation, 0) / (1024 * 1024):>9.1f}"
+            )
+    finally:
+        db.rollback()
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=8)
+    parser.add_argument("--scope", type=int, default=20, help="resources per query, like a chat session")
+    parser.add_argument("--noise", type=float, default=0.1, help="relative Gaussian noise added to query vectors")
+    parser.add_argument("--representations", nargs="+", choices=vector_index.REPRESENTATIONS,
+                        default=list(vector_index.REPRESENTATIONS))
+    parser.add_argument("--seed", type=int, default=7)
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# scripts/benchmark_hybrid_retrieval.py
+"""
+Compare chat hybrid retrieval latency: the multi-step path (separate
+resource, document, lexical, chunk and vector queries) against the fused
+single-statement path (RETRIEVAL_MODE = "fused").
+
+A synthetic corpus (random unit embeddings, Sinhala text from a small
+vocabulary) is inserted inside a transaction that is rolled back at the end,
+so the database is left untouched. Requires PostgreSQL with pgvector and the
+Alembic migrations applied (search_tsv / search_resource_chunks).
+
+Usage:
+    python scripts/benchmark_hybrid_retrieval.py
+    python scripts/benchmark_hybrid_retrieval.py --documents 200 --chunks 50 --queries 100
+    python scripts/benchmark_hybrid_retrieval.py --no-document-embeddings
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+
+import numpy as np
+from sqlalchemy import event, text
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.services.hybrid_retrieval_service import HybridRetrievalService
+
+DIM = 768
+VOCABULARY = [
+    "සෛලය", "ශාකය", "ජලය", "ආලෝකය", "බලශක්තිය", "පෝෂණය", "ශ්වසනය", "රුධිරය",
+    "හදවත", "මොළය", "පරිසරය", "වායුගෝලය", "පස", "ඛනිජ", "ජීවියා", "පරිණාමය",
+    "රජු", "නගරය", "යුද්ධය", "වෙළඳාම", "ගණිතය", "සමීකරණය", "ජ්‍යාමිතිය", "භාෂාව",
+]
+
+
+def _unit(rng: np.random.Generator) -> np.ndarray:
+    vec = rng.standard_normal(DIM).astype(np.float32)
+    return vec / np.linalg.norm(vec)
+
+
+def _literal(vec: np.ndarray) -> str:
+    return "[" + ",".join(f"{x:.6f}" for x in vec) + "]"
+
+
+def _sentence(rnd: random.Random, words: int) -> str:
+    return " ".join(rnd.choice(VOCABULARY) for _ in range(words))
+
+
+def seed_corpus(db, documents: int, chunks: int, document_embeddings: bool, seed: int) -> list[uuid.UUID]:
+    rng = np.random.default_rng(seed)
+    rnd = random.Random(seed)
+    user_id = uuid.uuid4()
+    db.execute(
+        text("INSERT INTO users (id, email, password_hash, is_active, tier, role) "
+             "VALUES (:id, :email, 'x', true, 'basic', 'user')"),
+        {"id": str(user_id), "email": f"bench-{user_id}@example.invalid"},
+    )
+
+    resource_ids = []
+    chunk_rows = []
+    for _ in range(documents):
+        resource_id = uuid.uuid4()
+        resource_ids.append(resource_id)
+        vectors = [_unit(rng) for _ in range(chunks)]
+        doc_vec = np.mean(vectors, axis=0)
+        db.execute(
+            text("INSERT INTO resource_files (id, user_id, original_filename, document_embedding) "
+                 "VALUES (:id, :user_id, :name, CAST(:emb AS vector))"),
+            {
+                "id": str(resource_id),
+                "user_id": str(user_id),
+                "name": f"bench-{resource_id}.pdf",
+                "emb": _literal(doc_vec / np.linalg.norm(doc_vec)) if document_embeddings else None,
+            },
+        )
+        for index, vec in enumerate(vectors):
+            chunk_rows.append({
+                "id": str(uuid.uuid4()),
+                "resource_id": str(resource_id),
+                "chunk_index": index,
+                "content": _sentence(rnd, 80),
+                "emb": _literal(vec),
+            })
+
+    db.execute(
+        text("INSERT INTO resource_chunks (id, resource_id, chunk_index, content, embedding) "
+             "VALUES (:id, :resource_id, :chunk_index, :content, CAST(:emb AS vector))"),
+        chunk_rows,
+    )
+    db.execute(text("ANALYZE resource_files"))
+    db.execute(text("ANALYZE resource_chunks"))
+    return resource_ids
+
+
+def _percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run(args) -> None:
+    # `retrieve` is the multi-step baseline; fused runs via retrieve_fused
+    settings.RETRIEVAL_MODE = "multi_step"
+    statements = {"count": 0}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements["count"] += 1
+
+    db = SessionLocal()
+    try:
+        print(f"Seeding {args.documents} documents x {args.chunks} chunks...")
+        resource_ids = seed_corpus(
+            db, args.documents, args.chunks, not args.no_document_embeddings, args.seed
+        )
+        service = HybridRetrievalService(db)
+        rng = np.random.default_rng(args.seed + 1)
+        rnd = random.Random(args.seed + 1)
+        queries = [(_sentence(rnd, 6), _unit(rng).tolist()) for _ in range(args.queries)]
+        scope = resource_ids[: args.session_resources]
+
+        modes = {
+            "multi_step": lambda q, emb: service.retrieve(scope, q, emb, final_k=args.final_k),
+            "fused": lambda q, emb: service.retrieve_fused(scope, q, emb, final_k=args.final_k),
+        }
+        print(f"{'mode':<12} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8} {'stmts/query':>12} {'hits':>6}")
+        for name, retrieve in modes.items():
+            retrieve(*queries[0])  # warm-up
+            latencies = []
+            statements["count"] = 0
+            hits = 0
+            for q, emb in queries:
+                started = time.perf_counter()
+                hits += len(retrieve(q, emb))
+                latencies.append((time.perf_counter() - started) * 1000)
+            print(
+                f"{name:<12} {_percentile(latencies, 0.5):>8.1f} {_percentile(latencies, 0.95):>8.1f} "
+                f"{statistics.mean(latencies):>8.1f} {statements['count'] / len(queries):>12.1f} "
+                f"{hits / len(queries):>6.1f}"
+            )
+    finally:
+        db.rollback()
+        db.close()
+        event.remove(engine, "before_cursor_execute", _count)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=100)
+    parser.add_argument("--chunks", type=int, default=40, help="chunks per document")
+    parser.add_argument("--session-resources", type=int, default=20, help="resources attached to the session")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--final-k", type=int, default=8)
+    parser.add_argument("--no-document-embeddings", action="store_true",
+                        help="exercise the lexical document fallback")
+    parser.add_argument("--seed", type=int, default=7)
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# scripts/benchmark_intent.py
+"""
+Accuracy and latency of intent detection with the Gemini semantic gate and
+the local (MiniLM nearest-example) gate, on the labelled fixture queries.
+
+Each query goes through the full `IntentDetectionService.detect_intent`
+(keyword rules first); "gate" counts only the queries the rules left to the
+semantic gate. "embed calls" counts calls into the Gemini embedding
+helpers (cache hits included), i.e. an upper bound on network calls.
+
+By default the Gemini path is given the query embedding up front, as the
+chat pipeline does after computing it for retrieval; --no-reuse makes it
+embed the query itself. Anchor embeddings and the local example matrix are
+built before timing starts.
+
+Usage:
+    python scripts/benchmark_intent.py
+    python scripts/benchmark_intent.py --classifiers local --thresholds 0.5 0.55 0.6 0.65
+    python scripts/benchmark_intent.py --no-reuse --repeats 3
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from collections import Counter
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.services import intent_detection_service as intent_module
+from app.services.intent_detection_service import IntentDetectionService
+
+DEFAULT_FIXTURE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "tests", "fixtures", "intent_queries.json",
+)
+
+THRESHOLD_SETTING = {"gemini": "INTENT_GEMINI_THRESHOLD", "local": "INTENT_LOCAL_THRESHOLD"}
+
+
+def _load(path: str) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _count_embed_calls() -> Counter:
+    calls = Counter()
+    for name in ("generate_text_embedding", "generate_text_embeddings"):
+        original = getattr(intent_module, name)
+
+        def counted(*args, _original=original, _name=name, **kwargs):
+            calls[_name] += 1
+            return _original(*args, **kwargs)
+
+        setattr(intent_module, name, counted)
+    return calls
+
+
+def _reaches_gate(query: str) -> bool:
+    q = query.lower().strip()
+    rules = (
+        IntentDetectionService.SUMMARY_RULES
+        + IntentDetectionService.QA_GENERATE_RULES
+        + IntentDetectionService.EXPLANATION_RULES
+        + IntentDetectionService.QA_ANSWER_RULES
+    )
+    return not (any(w in q for w in rules) or q.endswith("?"))
+
+
+def run(args) -> None:
+    from app.components.document_processing.services.embedding_service import generate_text_embedding
+
+    items = _load(args.fixture)
+    gate = [_reaches_gate(item["query"]) for item in items]
+    print(f"{len(items)} queries, {sum(gate)} reach the semantic gate")
+
+    query_embeddings = {}
+    if "gemini" in args.classifiers and not args.no_reuse:
+        query_embeddings = {item["query"]: generate_text_embedding(item["query"]) for item in items}
+
+    calls = _count_embed_calls()
+    print(f"{'classifier':<10} {'threshold':>9} {'accuracy':>9} {'gate acc':>9} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8} {'embed calls':>12}")
+    for classifier in args.classifiers:
+        settings.INTENT_CLASSIFIER = classifier
+        IntentDetectionService.reset()
+        if classifier == "gemini":
+            IntentDetectionService._anchors()
+        else:
+            IntentDetectionService._local_examples()
+
+        setting = THRESHOLD_SETTING[classifier]
+        for threshold in args.thresholds or [getattr(settings, setting)]:
+            setattr(settings, setting, threshold)
+            calls.clear()
+            latencies = []
+            correct = []
+            for _ in range(args.repeats):
+                for item in items:
+                    started = time.perf_counter()
+                    predicted = IntentDetectionService.detect_intent(
+                        item["query"], query_embedding=query_embeddings.get(item["query"])
+                    )
+                    latencies.append((time.perf_counter() - started) * 1000)
+                    correct.append(predicted == item["intent"])
+
+            gate_correct = [ok for ok, g in zip(correct, gate * args.repeats) if g]
+            print(
+                f"{classifier:<10} {threshold:>9.2f} {statistics.mean(correct):>9.3f} "
+                f"{statistics.mean(gate_correct) if gate_correct else 0:>9.3f} "
+                f"{_percentile(latencies, 0.5):>8.2f} {_percentile(latencies, 0.95):>8.2f} "
+                f"{statistics.mean(latencies):>8.2f} {sum(calls.values()) / args.repeats:>12.1f}"
+            )
+
+            if args.verbose:
+                for item, ok in zip(items, correct[: len(items)]):
+                    if not ok:
+                        print(f"    miss: {item['intent']:<12} {item['query']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixture", default=DEFAULT_FIXTURE)
+    parser.add_argument("--classifiers", nargs="+", choices=["gemini", "local"], default=["gemini", "local"])
+    parser.add_argument("--thresholds", nargs="+", type=float, help="gate thresholds to sweep (default: configured)")
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--no-reuse", action="store_true", help="let the Gemini gate embed each query itself")
+    parser.add_argument("-v", "--verbose", action="store_true", help="list misclassified queries")
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# scripts/benchmark_xlmr_backends.py
+"""
+Compare XLM-R grading encoder backends (torch / onnx / onnx-int8).
+
+For each backend this reports encode throughput (sentences/sec) on the
+fixture answers and the drift against the torch baseline, both in raw
+cosine similarity and in the `_sinhala_sigmoid_boost` score the grader
+actually uses (its thresholds are calibrated on torch fp32).
+
+Usage:
+    python scripts/benchmark_xlmr_backends.py
+    python scripts/benchmark_xlmr_backends.py --backends torch,onnx-int8 --repeats 10
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.model_registry import ModelRegistry, XLMR_MODEL_NAME, BACKENDS
+
+DEFAULT_FIXTURE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "tests", "fixtures", "grading_answers.json",
+)
+
+
+def _load_pairs(path: str) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _boost(sim: float, max_marks: int) -> float:
+    from app.services.evaluation.grading_service import GradingService
+
+    # _sinhala_sigmoid_boost only reads its arguments; skip the DB-bound __init__
+    return GradingService._sinhala_sigmoid_boost(GradingService.__new__(GradingService), sim, max_marks)
+
+
+def benchmark_backend(backend: str, pairs: list[dict], repeats: int) -> dict:
+    from sentence_transformers import util
+
+    load_start = time.perf_counter()
+    model = ModelRegistry.get(XLMR_MODEL_NAME, backend=backend)
+    load_seconds = time.perf_counter() - load_start
+
+    texts = [p["student"] for p in pairs] + [p["reference"] for p in pairs]
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        embs = model.encode(texts, batch_size=32, convert_to_tensor=True, show_progress_bar=False)
+    elapsed = time.perf_counter() - start
+
+    n = len(pairs)
+    sims = [float(util.cos_sim(embs[i], embs[n + i])) for i in range(n)]
+
+    return {
+        "backend": backend,
+        "load_seconds": round(load_seconds, 2),
+        "sentences_per_sec": round(len(texts) * repeats / elapsed, 1),
+        "similarities": sims,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--fixture", default=DEFAULT_FIXTURE)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    pairs = _load_pairs(args.fixture)
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    # Drift is measured against torch, so it always runs first
+    backends = ["torch", *[b for b in backends if b != "torch"]]
+
+    results = [benchmark_backend(b, pairs, args.repeats) for b in backends]
+    baseline = results[0]["similarities"]
+
+    for result in results:
+        sims = result.pop("similarities")
+        result["max_cosine_drift"] = round(max(abs(s - b) for s, b in zip(sims, baseline)), 5)
+        result["max_score_drift"] = round(
+            max(
+                abs(_boost(s, p["max_marks"]) - _boost(b, p["max_marks"]))
+                for s, b, p in zip(sims, baseline, pairs)
+            ),
+            5,
+        )
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"XLM-R backends on {len(pairs)} fixture pairs x {args.repeats} repeats")
+    print(f"{'backend':<12}{'load s':>8}{'sent/s':>10}{'max cos drift':>16}{'max score drift':>18}")
+    for r in results:
+        print(
+            f"{r['backend']:<12}{r['load_seconds']:>8}{r['sentences_per_sec']:>10}"
+            f"{r['max_cosine_drift']:>16}{r['max_score_drift']:>18}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+# scripts/vector_index.py
+"""
+Health report and rebuild for the pgvector ANN indexes (see
+app/core/vector_index.py; the indexes themselves are created by Alembic).
+
+`status` lists each embedding column's ANN indexes with method, options,
+size, scan count and validity, and flags missing/invalid/duplicate indexes,
+a method different from VECTOR_INDEX_METHOD, and IVFFlat `lists` that no
+longer fit the row count. It exits with status 1 when anything needs
+attention, so it can run from cron or CI.
+
+`rebuild` builds a replacement index CONCURRENTLY under a temporary name,
+then drops the old ones and renames it, so search never runs without an
+index.
+
+`backfill` builds a compact (halfvec or binary) index over the existing
+chunk embeddings the same way; it is the path for tables too large for the
+migration to index inline. With --drop-full it then drops the
+full-precision index, which is only safe once VECTOR_SEARCH_REPRESENTATION
+points at the compact one.
+
+Usage:
+    python scripts/vector_index.py status
+    python scripts/vector_index.py status --json
+    python scripts/vector_index.py rebuild --target resource_chunks --method ivfflat
+    python scripts/vector_index.py backfill --representation halfvec
+    python scripts/vector_index.py backfill --representation binary --drop-full
+"""
+import argparse
+import json
+import os
+import sys
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core import vector_index
+from app.core.config import settings
+from app.core.database import engine
+
+
+def _format_size(size_bytes: int) -> str:
+    return f"{size_bytes / (1024 * 1024):.1f} MB"
+
+
+def status(as_json: bool) -> int:
+    with engine.connect() as conn:
+        report = vector_index.health_report(
+            conn, settings.VECTOR_INDEX_METHOD, settings.VECTOR_SEARCH_REPRESENTATION
+        )
+
+    if as_json:
+        print(json.dumps(report, indent=2, default=str))
+    else:
+        for entry in report:
+            print(f"{entry['table']}.{entry['column']}: {entry['status'].upper()} "
+                  f"({entry['vectors']} vectors, searching {entry['representation']})")
+            for ix in entry["indexes"]:
+                print(f"  {ix['index_name']}: {ix['representation']} {ix['method']} {ix['options'] or ''} "
+                      f"{_format_size(ix['size_bytes'])}, scans={ix['scans']}, valid={ix['valid']}")
+            for issue in entry["issues"]:
+                print(f"  ! {issue}")
+
+    return 0 if all(entry["status"] == "ok" for entry in report) else 1
+
+
+def rebuild(target_name: str, method: str) -> int:
+    target = vector_index.TARGETS[target_name]
+    temp_name = f"{target.index_name}_new"
+
+    # CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        rows = vector_index.count_vectors(conn, target)
+        conn.exec_driver_sql(f"DROP INDEX CONCURRENTLY IF EXISTS {temp_name}")
+        print(f"Building {method} index on {target.table}.{target.column} ({rows} vectors)...")
+        conn.exec_driver_sql(
+            vector_index.create_index_sql(
+                target,
+                method,
+                rows=rows,
+                m=settings.VECTOR_HNSW_M,
+                ef_construction=settings.VECTOR_HNSW_EF_CONSTRUCTION,
+                concurrently=True,
+                index_name=temp_name,
+            )
+        )
+        for statement in vector_index.drop_index_sql(target, concurrently=True):
+            conn.exec_driver_sql(statement)
+        conn.exec_driver_sql(f"ALTER INDEX {temp_name} RENAME TO {target.index_name}")
+        conn.exec_driver_sql(f"ANALYZE {target.table}")
+
+    print(f"Rebuilt {target.index_name}")
+    return 0
+
+
+def backfill(representation: str, method: str, drop_full: bool) -> int:
+    target = vector_index.TARGETS["resource_chunks"]
+    index_name = target.index_name_for(representation)
+    temp_name = f"{index_name}_new"
+
+    if drop_full and settings.VECTOR_SEARCH_REPRESENTATION != representation:
+        print(f"Refusing --drop-full: VECTOR_SEARCH_REPRESENTATION is "
+              f"{settings.VECTOR_SEARCH_REPRESENTATION!r}, not {representation!r}")
+        return 1
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if not vector_index.supports_compact(conn):
+            print(f"pgvector {vector_index.pgvector_version(conn)} has no halfvec/binary_quantize; "
+                  "upgrade to 0.7.0 or later (ALTER EXTENSION vector UPDATE)")
+            return 1
+
+        rows = vector_index.count_vectors(conn, target)
+        conn.exec_driver_sql(f"DROP INDEX CONCURRENTLY IF EXISTS {temp_name}")
+        print(f"Building {representation} {method} index on {target.table}.{target.column} ({rows} vectors)...")
+        conn.exec_driver_sql(
+            vector_index.create_index_sql(
+                target,
+                method,
+                rows=rows,
+                m=settings.VECTOR_HNSW_M,
+                ef_construction=settings.VECTOR_HNSW_EF_CONSTRUCTION,
+                concurrently=True,
+                index_name=temp_name,
+                representation=representation,
+            )
+        )
+        for statement in vector_index.drop_index_sql(target, concurrently=True, representation=representation):
+            conn.exec_driver_sql(statement)
+        conn.exec_driver_sql(f"ALTER INDEX {temp_name} RENAME TO {index_name}")
+        if drop_full:
+            for statement in vector_index.drop_index_sql(target, concurrently=True):
+                conn.exec_driver_sql(statement)
+        conn.exec_driver_sql(f"ANALYZE {target.table}")
+
+        for ix in vector_index.list_ann_indexes(conn, target):
+            print(f"  {ix['index_name']}: {ix['representation']} {_format_size(ix['size_bytes'])}")
+
+    print(f"Built {index_name}")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    status_parser = commands.add_parser("status", help="report ANN index health")
+    status_parser.add_argument("--json", action="store_true", help="machine-readable output")
+
+    rebuild_parser = commands.add_parser("rebuild", help="rebuild an ANN index without downtime")
+    rebuild_parser.add_argument("--target", choices=sorted(vector_index.TARGETS), required=True)
+    rebuild_parser.add_argument("--method", choices=vector_index.METHODS, default=settings.VECTOR_INDEX_METHOD)
+
+    backfill_parser = commands.add_parser("backfill", help="build a compact chunk index over existing rows")
+    backfill_parser.add_argument(
+        "--representation",
+        choices=vector_index.TARGETS["resource_chunks"].compact,
+        default="halfvec",
+    )
+    backfill_parser.add_argument("--method", choices=vector_index.METHODS, default=settings.VECTOR_INDEX_METHOD)
+    backfill_parser.add_argument("--drop-full", action="store_true",
+                                 help="drop the full-precision index afterwards")
+
+    args = parser.parse_args()
+    if args.command == "status":
+        return status(args.json)
+    if args.command == "backfill":
+        return backfill(args.representation, args.method, args.drop_full)
+    return rebuild(args.target, args.method)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+import threading
+import time
+
+from app.services import api_usage_log_service
+from app.services.api_usage_log_service import ApiUsageLogService, UsageLogWriter
+
+
+class RecordingSink:
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+        self.lock = threading.Lock()
+
+    def __call__(self, rows):
+        if self.fail:
+            raise RuntimeError("db down")
+        with self.lock:
+            self.batches.append(list(rows))
+
+    @property
+    def rows(self):
+        return [row for batch in self.batches for row in batch]
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_writer_flushes_full_batches_without_waiting_for_interval():
+    sink = RecordingSink()
+    writer = UsageLogWriter(sink, batch_size=5, flush_interval_s=60)
+
+    for i in range(10):
+        writer.submit({"n": i})
+
+    assert _wait_for(lambda: len(sink.rows) == 10)
+    assert all(len(batch) <= 5 for batch in sink.batches)
+    assert [row["n"] for row in sink.rows] == list(range(10))
+    writer.shutdown()
+
+
+def test_writer_flushes_partial_batch_after_interval():
+    sink = RecordingSink()
+    writer = UsageLogWriter(sink, batch_size=100, flush_interval_s=0.05)
+
+    writer.submit({"n": 1})
+
+    assert _wait_for(lambda: len(sink.rows) == 1)
+    assert writer.stats()["written"] == 1
+    writer.shutdown()
+
+
+def test_shutdown_flushes_pending_rows():
+    sink = RecordingSink()
+    writer = UsageLogWriter(sink, batch_size=100, flush_interval_s=60)
+    for i in range(3):
+        writer.submit({"n": i})
+
+    writer.shutdown()
+
+    assert len(sink.rows) == 3
+
+
+def test_full_queue_falls_back_to_synchronous_write():
+    sink = RecordingSink()
+    writer = UsageLogWriter(sink, max_queue_size=1, batch_size=100, flush_interval_s=60)
+    writer._ensure_started = lambda: None  # keep the flusher from draining
+
+    writer.submit({"n": 1})
+    writer.submit({"n": 2})
+
+    assert sink.rows == [{"n": 2}]
+    assert writer.stats()["sync_fallbacks"] == 1
+    assert writer.flush() == 1
+    assert writer.stats()["written"] == 2
+
+
+def test_full_queue_drops_when_fallback_disabled():
+    sink = RecordingSink()
+    writer = UsageLogWriter(sink, max_queue_size=1, flush_interval_s=60, sync_fallback=False)
+    writer._ensure_started = lambda: None
+
+    writer.submit({"n": 1})
+    writer.submit({"n": 2})
+
+    assert writer.stats()["dropped"] == 1
+    assert sink.rows == []
+
+
+def test_failed_batches_are_counted_as_dropped():
+    writer = UsageLogWriter(RecordingSink(fail=True), flush_interval_s=60)
+    writer._ensure_started = lambda: None
+    writer.submit({"n": 1})
+    writer.submit({"n": 2})
+
+    assert writer.flush() == 0
+    assert writer.stats()["failed_batches"] == 1
+    assert writer.stats()["dropped"] == 2
+
+
+def test_create_log_enqueues_instead_of_writing(monkeypatch):
+    sink = RecordingSink()
+    writer = UsageLogWriter(sink, flush_interval_s=60)
+    monkeypatch.setattr(api_usage_log_service.settings, "USAGE_LOG_ASYNC", True)
+    monkeypatch.setattr(ApiUsageLogService, "_writer", writer)
+    monkeypatch.setattr(
+        ApiUsageLogService, "_save_one", staticmethod(lambda row: (_ for _ in ()).throw(AssertionError))
+    )
+
+    result = ApiUsageLogService.create_log(
+        request_id="r1", provider="gemini", service_name="rag", status="success", total_tokens=7
+    )
+
+    assert result is None
+    ApiUsageLogService.shutdown()
+    assert sink.rows[0]["request_id"] == "r1"
+    assert sink.rows[0]["total_tokens"] == 7
+    assert sink.rows[0]["created_at"] is not None
@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.components.document_processing.services.embedding_service import (
+    pool_chunk_embeddings,
+    section_centroids,
+)
+from app.services.hybrid_retrieval_service import HybridRetrievalService
+
+
+def _chunk(chunk_id, text, embedding):
+    return {"chunk_id": chunk_id, "text": text, "embedding": embedding,
+            "start_char": chunk_id * 10, "end_char": chunk_id * 10 + 10}
+
+
+def test_pooled_embedding_is_length_weighted_and_normalised():
+    chunks = [
+        _chunk(0, "x" * 30, [2.0, 0.0]),  # normalised before weighting
+        _chunk(1, "x" * 10, [0.0, 5.0]),
+        _chunk(2, "ignored", []),
+    ]
+
+    pooled = pool_chunk_embeddings(chunks)
+
+    expected = np.array([30.0, 10.0]) / np.linalg.norm([30.0, 10.0])
+    assert pooled == pytest.approx(expected.tolist())
+    assert pool_chunk_embeddings([_chunk(0, "x", None)]) == []
+
+
+def test_section_centroids_cover_consecutive_chunk_runs():
+    chunks = [_chunk(i, "x", [1.0, float(i)]) for i in (4, 0, 3, 1, 2)]
+
+    sections = section_centroids(chunks, section_chunks=2)
+
+    assert [(s["start_chunk"], s["end_chunk"], s["chunk_count"]) for s in sections] == [(0, 2, 2), (2, 4, 2), (4, 5, 1)]
+    assert (sections[1]["start_char"], sections[1]["end_char"]) == (20, 40)
+    assert sections[2]["embedding"] == pytest.approx((np.array([1.0, 4.0]) / np.linalg.norm([1.0, 4.0])).tolist())
+
+
+def test_document_filter_ranks_by_best_section():
+    service = HybridRetrievalService.__new__(HybridRetrievalService)
+    service.resource_service = SimpleNamespace(
+        search_sections=lambda resource_ids, query_embedding, top_k: [
+            {"resource_id": "long", "section_index": 7, "similarity_score": 0.9},
+            {"resource_id": "short", "section_index": 0, "similarity_score": 0.5},
+        ]
+    )
+    top_docs = [
+        {"resource_id": "short", "similarity_score": 0.6},
+        {"resource_id": "other", "similarity_score": 0.4},
+        {"resource_id": "long", "similarity_score": 0.3},
+    ]
+    ctx = SimpleNamespace(query_embedding=[0.1])
+
+    ranked = service._rank_by_best_section(top_docs, ["short", "other", "long"], ctx, top_doc_k=2)
+
+    assert ranked == [
+        {"resource_id": "long", "similarity_score": 0.9},
+        {"resource_id": "short", "similarity_score": 0.6},
+    ]
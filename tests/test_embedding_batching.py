@@ -0,0 +1,127 @@
+import threading
+from types import SimpleNamespace
+
+from app.components.document_processing.services import embedding_service
+from app.services.api_usage_log_service import ApiUsageLogService
+from app.shared.ai import embeddings
+
+
+class FakeModels:
+    def __init__(self, fail_on=None):
+        self.calls = []
+        self.fail_on = fail_on
+        self._lock = threading.Lock()
+
+    def embed_content(self, model, contents, config):
+        # A single text (generate_embedding) is sent as a plain string
+        texts = [contents] if isinstance(contents, str) else list(contents)
+        with self._lock:
+            self.calls.append(contents if isinstance(contents, str) else texts)
+        if self.fail_on and self.fail_on in texts:
+            raise RuntimeError("503 overloaded")
+        return SimpleNamespace(
+            embeddings=[SimpleNamespace(values=[float(len(t))] * 3) for t in texts]
+        )
+
+
+def _patch_gemini(monkeypatch, fake_models):
+    logs = []
+    monkeypatch.setattr(embeddings.settings, "EMBED_CACHE_ENABLED", False)
+    monkeypatch.setattr(
+        embeddings.GeminiClient,
+        "get_client",
+        classmethod(lambda cls: SimpleNamespace(models=fake_models)),
+    )
+    monkeypatch.setattr(
+        ApiUsageLogService,
+        "create_log",
+        staticmethod(lambda **kwargs: logs.append(kwargs)),
+    )
+    return logs
+
+
+def test_generate_embeddings_batch_groups_texts_and_logs_once_per_batch(monkeypatch):
+    fake_models = FakeModels()
+    logs = _patch_gemini(monkeypatch, fake_models)
+    texts = [f"chunk {i}" for i in range(7)]
+
+    vectors = embeddings.generate_embeddings_batch(
+        texts, service_name="chunk_embedding", batch_size=3, max_concurrency=2
+    )
+
+    assert sorted(len(c) for c in fake_models.calls) == [1, 3, 3]
+    assert vectors == [[float(len(t))] * 3 for t in texts]
+    assert len(logs) == 3
+    assert all(log["status"] == "success" for log in logs)
+    assert sorted(log["metadata_json"]["batch_size"] for log in logs) == [1, 3, 3]
+
+
+def test_generate_embeddings_batch_skips_blank_texts_and_isolates_failed_batches(monkeypatch):
+    fake_models = FakeModels(fail_on="bad")
+    logs = _patch_gemini(monkeypatch, fake_models)
+    monkeypatch.setattr(embeddings.settings, "EMBED_BATCH_MAX_RETRIES", 1)
+    monkeypatch.setattr(embeddings.settings, "EMBED_BATCH_RETRY_BASE_S", 0)
+
+    vectors = embeddings.generate_embeddings_batch(
+        ["bad", "  ", "worse", "fine"], batch_size=2, max_concurrency=1
+    )
+
+    # The failing batch is retried once, then embedded text by text
+    assert vectors == [[], [], [5.0] * 3, [4.0] * 3]
+    assert fake_models.calls == [["bad", "worse"], ["bad", "worse"], "bad", "worse", ["fine"]]
+    assert [log["status"] for log in logs] == ["failed", "failed", "failed", "success", "success"]
+    assert [log["attempt_number"] for log in logs[:2]] == [1, 2]
+
+
+def test_embed_batch_retry_recovers_whole_batch(monkeypatch):
+    fake_models = FakeModels()
+    logs = _patch_gemini(monkeypatch, fake_models)
+    monkeypatch.setattr(embeddings.settings, "EMBED_BATCH_RETRY_BASE_S", 0)
+    outcomes = iter([RuntimeError("503 overloaded")])
+    embed = fake_models.embed_content
+
+    def flaky(model, contents, config):
+        error = next(outcomes, None)
+        if error:
+            fake_models.calls.append(list(contents))
+            raise error
+        return embed(model, contents, config)
+
+    monkeypatch.setattr(fake_models, "embed_content", flaky)
+
+    vectors = embeddings.generate_embeddings_batch(["a", "bb"], batch_size=2)
+
+    assert vectors == [[1.0] * 3, [2.0] * 3]
+    assert fake_models.calls == [["a", "bb"], ["a", "bb"]]
+    assert [(log["status"], log["is_retry"]) for log in logs] == [("failed", False), ("success", True)]
+
+
+def test_embed_chunks_uses_batched_embeddings_and_reports_progress(monkeypatch):
+    monkeypatch.setattr(
+        embedding_service,
+        "chunk_text",
+        lambda text, max_tokens, overlap_tokens: [
+            {"chunk_id": i, "text": f"part {i}", "start_char": i, "end_char": i + 1}
+            for i in range(3)
+        ],
+    )
+    calls = []
+
+    def fake_batch(texts, **kwargs):
+        calls.append(texts)
+        kwargs["on_batch_complete"](len(texts), len(texts))
+        return [[0.1] * 3 for _ in texts]
+
+    monkeypatch.setattr(embedding_service, "generate_embeddings_batch", fake_batch)
+    progress = []
+
+    results = embedding_service.embed_chunks(
+        "some text",
+        doc_id="doc",
+        progress_callback=lambda stage, pct, details: progress.append((stage, pct)),
+    )
+
+    assert calls == [["part 0", "part 1", "part 2"]]
+    assert [r["global_id"] for r in results] == ["doc_0", "doc_1", "doc_2"]
+    assert all(r["embedding"] == [0.1] * 3 for r in results)
+    assert progress == [("Embedding Chunk", 95.0)]
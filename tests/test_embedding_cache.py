@@ -0,0 +1,106 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import embedding_cache_service
+from app.services.api_usage_log_service import ApiUsageLogService
+from app.services.embedding_cache_service import EmbeddingCacheService
+from app.shared.ai import embeddings
+
+
+class FakeRepo:
+    store = {}
+
+    def __init__(self, db):
+        pass
+
+    def get_many(self, cache_keys, created_after=None):
+        return {k: self.store[k] for k in cache_keys if k in self.store}
+
+    def touch(self, cache_keys):
+        pass
+
+    def upsert_many(self, entries):
+        for entry in entries:
+            self.store[entry["cache_key"]] = entry["embedding"]
+
+
+@pytest.fixture
+def fake_cache(monkeypatch):
+    FakeRepo.store = {}
+    monkeypatch.setattr(embedding_cache_service, "EmbeddingCacheRepository", FakeRepo)
+    monkeypatch.setattr(embedding_cache_service, "SessionLocal", lambda: SimpleNamespace(
+        commit=lambda: None, rollback=lambda: None, close=lambda: None,
+    ))
+    monkeypatch.setattr(embedding_cache_service.settings, "EMBED_CACHE_ENABLED", True)
+    EmbeddingCacheService.reset_stats()
+    yield FakeRepo.store
+    EmbeddingCacheService.reset_stats()
+
+
+def test_make_key_depends_on_model_dimension_and_text():
+    key = EmbeddingCacheService.make_key("පාඩම", "gemini-embedding-001", 768)
+
+    assert key == EmbeddingCacheService.make_key("  පාඩම ", "gemini-embedding-001", 768)
+    assert key != EmbeddingCacheService.make_key("පාඩම", "gemini-embedding-001", 512)
+    assert key != EmbeddingCacheService.make_key("පාඩම", "other-model", 768)
+    assert key != EmbeddingCacheService.make_key("පාඩම 2", "gemini-embedding-001", 768)
+
+
+def test_get_many_counts_hits_and_misses(fake_cache):
+    EmbeddingCacheService.put_many({"a": [0.5] * 4}, "m", 4)
+
+    found = EmbeddingCacheService.get_many(["a", "b"], "m", 4)
+
+    assert found == {"a": [0.5] * 4}
+    stats = EmbeddingCacheService.stats()
+    assert (stats["hits"], stats["misses"], stats["writes"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_put_many_skips_wrong_dimension(fake_cache):
+    EmbeddingCacheService.put_many({"a": [0.5] * 3, "b": []}, "m", 4)
+
+    assert fake_cache == {}
+
+
+def test_generate_embedding_serves_cache_before_calling_gemini(fake_cache, monkeypatch):
+    EmbeddingCacheService.put_many(
+        {"cached text": [0.25] * embeddings.EMBED_DIM},
+        embeddings.EMBED_MODEL,
+        embeddings.EMBED_DIM,
+    )
+    monkeypatch.setattr(
+        embeddings.GeminiClient,
+        "get_client",
+        classmethod(lambda cls: pytest.fail("Gemini should not be called on a cache hit")),
+    )
+
+    assert embeddings.generate_embedding("cached text") == [0.25] * embeddings.EMBED_DIM
+
+
+def test_generate_embeddings_batch_only_sends_cache_misses(fake_cache, monkeypatch):
+    dim = embeddings.EMBED_DIM
+    EmbeddingCacheService.put_many({"seen": [0.25] * dim}, embeddings.EMBED_MODEL, dim)
+    sent = []
+
+    def fake_embed_content(model, contents, config):
+        sent.append(list(contents))
+        return SimpleNamespace(embeddings=[SimpleNamespace(values=[0.75] * dim) for _ in contents])
+
+    monkeypatch.setattr(
+        embeddings.GeminiClient,
+        "get_client",
+        classmethod(lambda cls: SimpleNamespace(models=SimpleNamespace(embed_content=fake_embed_content))),
+    )
+    monkeypatch.setattr(
+        ApiUsageLogService,
+        "create_log",
+        staticmethod(lambda **kwargs: None),
+    )
+
+    vectors = embeddings.generate_embeddings_batch(["seen", "new"])
+
+    assert sent == [["new"]]
+    assert vectors == [[0.25] * dim, [0.75] * dim]
+    assert EmbeddingCacheService.make_key("new", embeddings.EMBED_MODEL, dim) in fake_cache
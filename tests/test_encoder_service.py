@@ -0,0 +1,84 @@
+import threading
+import time
+
+import pytest
+import torch
+
+from app.shared.ai.encoder_service import BatchingEncoder
+
+
+class FakeModel:
+    def __init__(self, delay=0.0, fail=False):
+        self.calls = []
+        self.delay = delay
+        self.fail = fail
+
+    def encode(self, texts, **kwargs):
+        self.calls.append(list(texts))
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("encode failed")
+        return torch.stack([torch.full((3,), float(len(t))) for t in texts])
+
+
+def test_concurrent_submissions_are_coalesced_into_one_encode_call():
+    model = FakeModel()
+    encoder = BatchingEncoder(lambda: model, max_batch_size=64, max_wait_ms=200)
+    barrier = threading.Barrier(5)
+    results = {}
+
+    def worker(i):
+        barrier.wait()
+        results[i] = encoder.encode_one("x" * (i + 1))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(model.calls) == 1
+    assert sorted(model.calls[0], key=len) == ["x" * (i + 1) for i in range(5)]
+    for i in range(5):
+        assert torch.equal(results[i], torch.full((3,), float(i + 1)))
+
+    stats = encoder.stats()
+    assert stats["requests"] == 5
+    assert stats["batch_size"]["count"] == 1
+    assert stats["latency_ms"]["count"] == 5
+
+
+def test_duplicate_texts_are_encoded_once_and_order_is_preserved():
+    model = FakeModel()
+    encoder = BatchingEncoder(lambda: model, max_wait_ms=1)
+
+    embs = encoder.encode(["bb", "a", "bb"])
+
+    assert model.calls == [["bb", "a"]]
+    assert [float(e[0]) for e in embs] == [2.0, 1.0, 2.0]
+
+
+def test_batch_stops_growing_at_max_batch_size():
+    model = FakeModel(delay=0.05)
+    encoder = BatchingEncoder(lambda: model, max_batch_size=2, max_wait_ms=100)
+
+    futures = [encoder.submit([f"t{i}"]) for i in range(4)]
+    for f in futures:
+        f.result(timeout=5)
+
+    assert all(len(call) <= 2 for call in model.calls)
+    assert sum(len(call) for call in model.calls) == 4
+
+
+def test_encode_errors_propagate_to_every_waiting_caller():
+    encoder = BatchingEncoder(lambda: FakeModel(fail=True), max_wait_ms=1)
+
+    with pytest.raises(RuntimeError):
+        encoder.encode(["a"], timeout=5)
+    assert encoder.stats()["failed_batches"] == 1
+
+
+def test_empty_submission_resolves_immediately():
+    encoder = BatchingEncoder(lambda: pytest.fail("model should not load"))
+
+    assert encoder.encode([]) == []
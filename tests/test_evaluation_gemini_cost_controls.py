@@ -10,6 +10,7 @@ def _load_grading_service_class():
     fake_embeddings = types.ModuleType("app.shared.ai.embeddings")
     fake_embeddings.xlmr = MagicMock()
     fake_embeddings.ml_semaphore = None
+    fake_embeddings.encode_sentence = MagicMock()
     fake_embeddings.ensure_sentences_cached = lambda *args, **kwargs: None
     fake_embeddings._embedding_cache = {}
     sys.modules["app.shared.ai.embeddings"] = fake_embeddings
@@ -22,7 +23,7 @@ def _load_grading_service_class():
 def test_single_pass_answer_mapping_uses_one_gemini_call(monkeypatch):
     calls = []
 
-    def fake_gemini_generate_evaluation(prompt, *, budget, json_mode=False, reason=None):
+    def fake_gemini_generate_evaluation(prompt, *, budget, json_mode=False, reason=None, use_cache=False, bypass_cache=False, cache_validator=None):
         calls.append(
             {
                 "budget": budget.duty_name,
@@ -57,7 +58,7 @@ def test_single_pass_answer_mapping_uses_one_gemini_call(monkeypatch):
 
 
 def test_single_pass_answer_mapping_keeps_unverified_structured_output(monkeypatch):
-    def fake_gemini_generate_evaluation(prompt, *, budget, json_mode=False, reason=None):
+    def fake_gemini_generate_evaluation(prompt, *, budget, json_mode=False, reason=None, use_cache=False, bypass_cache=False, cache_validator=None):
         return (
             '{"mappings": ['
             '{"question_id": "q-2", "label": "2", "answer": "ජේම්ස් හර්ග්‍රීව්ස්.", '
@@ -85,7 +86,7 @@ def test_single_pass_answer_mapping_keeps_unverified_structured_output(monkeypat
 
 
 def test_single_pass_answer_mapping_recovers_stale_id_by_unique_label(monkeypatch):
-    def fake_gemini_generate_evaluation(prompt, *, budget, json_mode=False, reason=None):
+    def fake_gemini_generate_evaluation(prompt, *, budget, json_mode=False, reason=None, use_cache=False, bypass_cache=False, cache_validator=None):
         return (
             '{"mappings": ['
             '{"question_id": "stale-id", "label": "2", "answer": "ජේම්ස් හර්ග්‍රීව්ස්.", '
@@ -186,7 +187,7 @@ def test_local_ocr_marker_fallback_recovers_missing_short_and_sub_answers():
 def test_question_parsing_uses_configured_model(monkeypatch):
     calls = []
 
-    def fake_gemini_generate(prompt, *, json_mode=False, model_name=None, max_retries=3):
+    def fake_gemini_generate(prompt, *, json_mode=False, model_name=None, max_retries=3, service_name=None, use_cache=False, bypass_cache=False, cache_validator=None):
         calls.append(
             {
                 "json_mode": json_mode,
@@ -217,7 +218,7 @@ def test_question_parsing_uses_configured_model(monkeypatch):
 def test_reference_extraction_respects_request_budget(monkeypatch):
     calls = []
 
-    def fake_gemini_generate_evaluation(prompt, *, budget, json_mode=False, reason=None):
+    def fake_gemini_generate_evaluation(prompt, *, budget, json_mode=False, reason=None, use_cache=False, bypass_cache=False, cache_validator=None):
         calls.append(
             {
                 "budget": budget.duty_name,
@@ -267,7 +268,7 @@ def test_reference_extraction_respects_request_budget(monkeypatch):
 def test_reference_extraction_prompt_uses_per_question_evidence(monkeypatch):
     prompts = []
 
-    def fake_gemini_generate_evaluation(prompt, *, budget, json_mode=False, reason=None):
+    def fake_gemini_generate_evaluation(prompt, *, budget, json_mode=False, reason=None, use_cache=False, bypass_cache=False, cache_validator=None):
         prompts.append(prompt)
         return '{"ref_1": "Reference 1"}'
 
@@ -304,7 +305,7 @@ def test_reference_extraction_prompt_uses_per_question_evidence(monkeypatch):
 
 
 def test_reference_extraction_drops_not_covered_and_uses_context_fallback(monkeypatch):
-    def fake_gemini_generate_evaluation(prompt, *, budget, json_mode=False, reason=None):
+    def fake_gemini_generate_evaluation(prompt, *, budget, json_mode=False, reason=None, use_cache=False, bypass_cache=False, cache_validator=None):
         return '{"ref_1": "මෙම සාක්ෂිය තුළ මැකඩම් මාර්ග තැනීම පිළිබඳ තොරතුරු අඩංගු නොවේ."}'
 
     db = MagicMock()
@@ -336,7 +337,7 @@ def test_reference_extraction_drops_not_covered_and_uses_context_fallback(monkey
 
 
 def test_reference_extraction_drops_additional_sinhala_placeholder_variants(monkeypatch):
-    def fake_gemini_generate_evaluation(prompt, *, budget, json_mode=False, reason=None):
+    def fake_gemini_generate_evaluation(prompt, *, budget, json_mode=False, reason=None, use_cache=False, bypass_cache=False, cache_validator=None):
         return '{"ref_1": "මෙම සාධක වලින් එකක්වත් ලබා දී ඇති සාක්ෂිවල අඩංගු නොවේ."}'
 
     db = MagicMock()
@@ -368,7 +369,7 @@ def test_reference_extraction_drops_additional_sinhala_placeholder_variants(monk
 
 
 def test_reference_extraction_maps_display_number_keys_back_to_question_ids(monkeypatch):
-    def fake_gemini_generate_evaluation(prompt, *, budget, json_mode=False, reason=None):
+    def fake_gemini_generate_evaluation(prompt, *, budget, json_mode=False, reason=None, use_cache=False, bypass_cache=False, cache_validator=None):
         return '{"1(අ)": "Reference from display key"}'
 
     db = MagicMock()
@@ -395,7 +396,7 @@ def test_reference_extraction_maps_display_number_keys_back_to_question_ids(monk
 
 
 def test_reference_extraction_rejects_raw_page_fallback_context(monkeypatch):
-    def fake_gemini_generate_evaluation(prompt, *, budget, json_mode=False, reason=None):
+    def fake_gemini_generate_evaluation(prompt, *, budget, json_mode=False, reason=None, use_cache=False, bypass_cache=False, cache_validator=None):
         return "{}"
 
     db = MagicMock()
@@ -0,0 +1,39 @@
+from uuid import uuid4
+
+from app.services import hybrid_retrieval_service
+from app.services.hybrid_retrieval_service import HybridRetrievalService
+
+
+class _RecordingSession:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        self.statements.append((str(statement), params))
+        return self
+
+    def mappings(self):
+        return self.rows
+
+
+def test_fused_mode_runs_one_retrieval_statement(monkeypatch):
+    monkeypatch.setattr(hybrid_retrieval_service.settings, "RETRIEVAL_MODE", "fused")
+    monkeypatch.setattr(hybrid_retrieval_service.settings, "RETRIEVAL_RRF_K", 60)
+    monkeypatch.setattr(hybrid_retrieval_service.settings, "RETRIEVAL_FUSED_CANDIDATES", 40)
+    monkeypatch.setattr(hybrid_retrieval_service.settings, "VECTOR_HNSW_EF_SEARCH", 0)
+    monkeypatch.setattr(hybrid_retrieval_service.settings, "VECTOR_IVFFLAT_PROBES", 0)
+    chunk_a, chunk_b = uuid4(), uuid4()
+    session = _RecordingSession([
+        {"id": chunk_a, "rrf_score": 2 / 61, "dense_rank": 1, "lexical_rank": 1},
+        {"id": chunk_b, "rrf_score": 1 / 62, "dense_rank": None, "lexical_rank": 2},
+    ])
+
+    hits = HybridRetrievalService(session).retrieve([uuid4()], "සෛලය", [0.1] * 3, final_k=5)
+
+    assert [(h["id"], h["rank"]) for h in hits] == [(chunk_a, 1), (chunk_b, 2)]
+    assert len(session.statements) == 1
+    sql, params = session.statements[0]
+    assert "FULL OUTER JOIN lexical" in sql and "search_resource_chunks" in sql
+    assert params["dense_k"] == params["lexical_k"] == 40
+    assert params["rrf_k"] == 60 and params["final_k"] == 5
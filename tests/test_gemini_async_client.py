@@ -0,0 +1,185 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import gemini_client
+from app.core.adaptive_limiter import AdaptiveConcurrencyLimiter
+from app.core.gemini_client import GeminiClient
+from app.services.api_usage_log_service import ApiUsageLogService
+
+
+def _response(text):
+    return SimpleNamespace(
+        text=text,
+        usage_metadata=SimpleNamespace(
+            prompt_token_count=3, candidates_token_count=5, total_token_count=8
+        ),
+    )
+
+
+class FakeAsyncModels:
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.calls = []
+
+    async def generate_content(self, model, contents, config):
+        self.calls.append(model)
+        if self.errors:
+            raise self.errors.pop(0)
+        return _response(f"answer from {model}")
+
+
+@pytest.fixture
+def patched_gemini(monkeypatch):
+    logs = []
+    monkeypatch.setattr(
+        ApiUsageLogService, "create_log", staticmethod(lambda **kwargs: logs.append(kwargs))
+    )
+    monkeypatch.setattr(GeminiClient, "_get_wait_time", staticmethod(lambda reason, attempt: 0))
+    monkeypatch.setattr(
+        gemini_client, "_ai_limiter", AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=8)
+    )
+
+    def install(models):
+        client = SimpleNamespace(aio=SimpleNamespace(models=models))
+        monkeypatch.setattr(GeminiClient, "get_client", classmethod(lambda cls, slot=None: client))
+        return models
+
+    return install, logs
+
+
+def test_limiter_grows_additively_and_halves_on_overload():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, min_limit=1, max_limit=8, decrease_cooldown_s=0)
+
+    for _ in range(5):
+        limiter.on_success()
+    assert limiter.limit == 5
+
+    limiter.on_overload()
+    assert limiter.limit == 2
+
+    for _ in range(10):
+        limiter.on_overload()
+    assert limiter.limit == 1
+
+
+def test_limiter_overload_burst_only_decreases_once_within_cooldown():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=8, max_limit=8, decrease_cooldown_s=60)
+
+    for _ in range(5):
+        limiter.on_overload()
+
+    assert limiter.limit == 4
+    assert limiter.stats()["overloads"] == 5
+
+
+def test_limiter_bounds_concurrency_across_threads_and_coroutines():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=2)
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def enter():
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+
+    def leave():
+        with lock:
+            active.pop()
+
+    async def coroutine_user():
+        async with limiter.aslot():
+            enter()
+            await asyncio.sleep(0.01)
+            leave()
+
+    def thread_user():
+        with limiter.slot():
+            enter()
+            threading.Event().wait(0.01)
+            leave()
+
+    async def main():
+        threads = [threading.Thread(target=thread_user) for _ in range(4)]
+        for t in threads:
+            t.start()
+        await asyncio.gather(*(coroutine_user() for _ in range(6)))
+        for t in threads:
+            t.join()
+
+    asyncio.run(main())
+
+    assert max(peak) <= 2
+    assert len(peak) == 10
+    assert limiter.stats()["in_flight"] == 0
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1)
+
+    async def main():
+        await limiter.aacquire()
+        waiter = asyncio.create_task(limiter.aacquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        limiter.release()
+        await asyncio.wait_for(limiter.aacquire(), timeout=1)
+        limiter.release()
+
+    asyncio.run(main())
+    assert limiter.stats()["in_flight"] == 0
+    assert limiter.stats()["waiting"] == 0
+
+
+def test_agenerate_content_returns_text_tokens_and_logs_success(patched_gemini):
+    install, logs = patched_gemini
+    models = install(FakeAsyncModels())
+
+    result = asyncio.run(
+        GeminiClient.agenerate_content("hello", model_name="gemini-2.5-flash", service_name="rag")
+    )
+
+    assert result == {
+        "text": "answer from gemini-2.5-flash",
+        "prompt_tokens": 3,
+        "completion_tokens": 5,
+        "total_tokens": 8,
+    }
+    assert models.calls == ["gemini-2.5-flash"]
+    assert len(logs) == 1
+    assert logs[0]["status"] == "success"
+    assert logs[0]["service_name"] == "rag"
+    assert logs[0]["metadata_json"]["async"] is True
+
+
+def test_agenerate_content_fails_over_and_shrinks_limit_on_429(patched_gemini):
+    install, logs = patched_gemini
+    models = install(
+        FakeAsyncModels(
+            errors=[RuntimeError("429 RESOURCE_EXHAUSTED"), RuntimeError("429 RESOURCE_EXHAUSTED")]
+        )
+    )
+    gemini_client._ai_limiter._limit = 4.0
+
+    result = asyncio.run(GeminiClient.agenerate_content("hello", model_name="gemini-2.5-flash"))
+
+    assert models.calls == ["gemini-2.5-flash", "gemini-2.5-flash", "gemini-2.0-flash"]
+    assert result["text"] == "answer from gemini-2.0-flash"
+    assert [log["status"] for log in logs] == ["retry", "retry", "success"]
+    assert logs[0]["error_type"] == "rate_limited"
+    assert gemini_client._ai_limiter.limit == 2
+
+
+def test_agenerate_content_raises_non_retryable_errors(patched_gemini):
+    install, logs = patched_gemini
+    install(FakeAsyncModels(errors=[ValueError("bad request")]))
+
+    with pytest.raises(ValueError):
+        asyncio.run(GeminiClient.agenerate_content("hello", model_name="gemini-2.5-flash"))
+
+    assert [log["status"] for log in logs] == ["failed"]
@@ -0,0 +1,134 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import gemini_client
+from app.core.adaptive_limiter import AdaptiveConcurrencyLimiter
+from app.core.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitBreakerRegistry
+from app.core.gemini_client import GeminiClient
+from app.core.key_pool import KeyPool
+from app.services.api_usage_log_service import ApiUsageLogService
+
+
+def test_breaker_opens_once_failure_rate_reached():
+    breaker = CircuitBreaker(failure_rate_threshold=0.5, min_calls=4, window_s=60, open_duration_s=30)
+
+    breaker.record_success(now=0)
+    breaker.record_failure(now=1)
+    assert breaker.record_failure(now=2) is None  # only 3 calls so far
+    assert breaker.record_failure(now=3) == OPEN
+
+    assert breaker.allow(now=4) == (False, None)
+    assert breaker.stats(now=4)["times_opened"] == 1
+
+
+def test_failures_outside_window_do_not_count():
+    breaker = CircuitBreaker(failure_rate_threshold=0.5, min_calls=2, window_s=10)
+
+    breaker.record_failure(now=0)
+    breaker.record_success(now=20)
+
+    assert breaker.record_success(now=21) is None
+    assert breaker.state == CLOSED
+
+
+def test_half_open_probe_closes_or_reopens():
+    breaker = CircuitBreaker(min_calls=1, open_duration_s=30, half_open_max_calls=1)
+    breaker.record_failure(now=0)
+
+    assert breaker.allow(now=31) == (True, HALF_OPEN)
+    assert breaker.allow(now=31) == (False, None)  # one probe at a time
+    assert breaker.record_failure(now=32) == OPEN
+
+    assert breaker.allow(now=70) == (True, HALF_OPEN)
+    assert breaker.record_success(now=71) == CLOSED
+    assert breaker.available(now=71)
+
+
+def test_registry_records_transitions_per_model_and_key():
+    registry = CircuitBreakerRegistry(min_calls=1)
+
+    registry.record_failure("gemini-2.5-flash", 0)
+
+    assert not registry.available("gemini-2.5-flash", 0)
+    assert registry.available("gemini-2.5-flash", 1)
+    assert registry.available("gemini-2.0-flash", 0)
+    assert registry.transitions()[-1]["state"] == OPEN
+    assert registry.reset("gemini-2.5-flash") == 2  # slots 0 and 1
+    assert registry.available("gemini-2.5-flash", 0)
+
+
+@pytest.fixture
+def overloaded_primary(monkeypatch):
+    calls = []
+
+    def generate_content(model, contents, config):
+        calls.append(model)
+        if model == "gemini-2.5-flash":
+            raise RuntimeError("503 UNAVAILABLE: model is overloaded")
+        return SimpleNamespace(
+            text=f"answer from {model}",
+            usage_metadata=SimpleNamespace(
+                prompt_token_count=1, candidates_token_count=1, total_token_count=2
+            ),
+        )
+
+    client = SimpleNamespace(models=SimpleNamespace(generate_content=generate_content))
+    monkeypatch.setattr(gemini_client, "_clients", [client])
+    monkeypatch.setattr(gemini_client, "_key_pool", KeyPool(["...aaaa"], rpm_limit=1000, tpm_limit=1_000_000))
+    monkeypatch.setattr(gemini_client, "_breakers", CircuitBreakerRegistry(min_calls=2, open_duration_s=60))
+    monkeypatch.setattr(gemini_client, "_ai_limiter", AdaptiveConcurrencyLimiter(initial_limit=4))
+    monkeypatch.setattr(gemini_client, "_active_model_index", 0)
+    monkeypatch.setattr(GeminiClient, "_get_wait_time", staticmethod(lambda reason, attempt: 0))
+    monkeypatch.setattr(ApiUsageLogService, "create_log", staticmethod(lambda **kwargs: None))
+    return calls
+
+
+def test_open_breaker_skips_straight_to_fallback(overloaded_primary):
+    calls = overloaded_primary
+
+    first = GeminiClient.generate_content("hello", model_name="gemini-2.5-flash")
+    assert first["text"] == "answer from gemini-2.0-flash"
+    assert calls == ["gemini-2.5-flash", "gemini-2.5-flash", "gemini-2.0-flash"]
+
+    calls.clear()
+    second = GeminiClient.generate_content("hello", model_name="gemini-2.5-flash")
+
+    assert second["text"] == "answer from gemini-2.0-flash"
+    assert calls == ["gemini-2.0-flash"]
+    states = {(b["model"], b["key_slot"]): b["state"] for b in GeminiClient.breaker_stats()["breakers"]}
+    assert states[("gemini-2.5-flash", 0)] == OPEN
+    assert states[("gemini-2.0-flash", 0)] == CLOSED
+
+
+def test_breaker_refusal_at_reservation_moves_to_fallback(overloaded_primary, monkeypatch):
+    calls = overloaded_primary
+    # Another request took the half-open probe between the availability check and the reservation
+    monkeypatch.setattr(gemini_client._breakers, "allow", lambda name, slot: name != "gemini-2.5-flash")
+
+    result = GeminiClient.generate_content("hello", model_name="gemini-2.5-flash")
+
+    assert result["text"] == "answer from gemini-2.0-flash"
+    assert calls == ["gemini-2.0-flash"]
+    assert gemini_client._key_pool.stats()[0]["total_requests"] == 1
+
+
+def test_closed_stream_releases_half_open_probe(overloaded_primary, monkeypatch):
+    def generate_content_stream(model, contents, config):
+        for piece in ("a", "b"):
+            yield SimpleNamespace(text=piece, usage_metadata=None)
+
+    client = SimpleNamespace(models=SimpleNamespace(generate_content_stream=generate_content_stream))
+    monkeypatch.setattr(gemini_client, "_clients", [client])
+    breaker = gemini_client._breakers.get("gemini-2.5-flash", 0)
+    breaker.record_failure(now=0)
+    breaker.record_failure(now=0)
+    assert breaker.allow(now=61) == (True, HALF_OPEN)
+    breaker.record_ignored()
+
+    stream = iter(GeminiClient.stream_content("hello", model_name="gemini-2.5-flash"))
+    assert next(stream) == "a"
+    assert breaker._probes_in_flight == 1
+    stream.close()
+
+    assert breaker._probes_in_flight == 0
@@ -0,0 +1,125 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import gemini_client
+from app.core.adaptive_limiter import AdaptiveConcurrencyLimiter
+from app.core.circuit_breaker import CircuitBreakerRegistry
+from app.core.gemini_client import GeminiClient
+from app.core.hedging import HedgeStats, LatencyTracker
+from app.core.key_pool import KeyPool
+from app.services.api_usage_log_service import ApiUsageLogService
+
+
+def test_latency_percentile_needs_minimum_samples():
+    tracker = LatencyTracker(window=100)
+    for ms in range(1, 101):
+        tracker.record("rag", ms / 1000)
+
+    assert tracker.percentile("rag", 0.95) == pytest.approx(0.096)
+    assert tracker.percentile("rag", 0.5, min_samples=200) is None
+    assert tracker.percentile("other", 0.95) is None
+
+
+def test_hedge_rate_is_capped():
+    stats = HedgeStats()
+    for _ in range(10):
+        stats.record_request("rag")
+
+    allowed = [stats.allow("rag", max_rate=0.2) for _ in range(5)]
+
+    assert allowed == [True, True, False, False, False]
+    assert stats.stats()["rag"]["skipped_by_rate_cap"] == 3
+
+
+@pytest.fixture
+def two_keys(monkeypatch):
+    """Key slot 0 answers slowly, slot 1 answers immediately."""
+    logs = []
+    delays = {0: 0.5, 1: 0.0}
+
+    def make_client(slot):
+        def generate_content(model, contents, config):
+            time.sleep(delays[slot])
+            return SimpleNamespace(
+                text=f"answer from slot {slot}",
+                usage_metadata=SimpleNamespace(
+                    prompt_token_count=5, candidates_token_count=5, total_token_count=10
+                ),
+            )
+
+        return SimpleNamespace(models=SimpleNamespace(generate_content=generate_content))
+
+    monkeypatch.setattr(gemini_client, "_clients", [make_client(0), make_client(1)])
+    monkeypatch.setattr(
+        gemini_client, "_key_pool", KeyPool(["...aaaa", "...bbbb"], rpm_limit=1000, tpm_limit=1_000_000)
+    )
+    monkeypatch.setattr(gemini_client, "_ai_limiter", AdaptiveConcurrencyLimiter(initial_limit=4))
+    monkeypatch.setattr(gemini_client, "_breakers", CircuitBreakerRegistry())
+    monkeypatch.setattr(gemini_client, "_latency", LatencyTracker())
+    monkeypatch.setattr(gemini_client, "_hedge_stats", HedgeStats())
+    monkeypatch.setattr(
+        ApiUsageLogService, "create_log", staticmethod(lambda **kwargs: logs.append(kwargs))
+    )
+
+    settings = gemini_client.settings
+    monkeypatch.setattr(settings, "GEMINI_HEDGING_ENABLED", True)
+    monkeypatch.setattr(settings, "GEMINI_HEDGE_SERVICES", ["message_generation"])
+    monkeypatch.setattr(settings, "GEMINI_HEDGE_DEFAULT_DELAY_S", 0.05)
+    monkeypatch.setattr(settings, "GEMINI_HEDGE_MIN_DELAY_S", 0.01)
+    monkeypatch.setattr(settings, "GEMINI_HEDGE_MIN_SAMPLES", 1000)
+    monkeypatch.setattr(settings, "GEMINI_HEDGE_MAX_RATE", 1.0)
+    return delays, logs
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_slow_primary_is_hedged_on_another_key(two_keys):
+    _, logs = two_keys
+    started = time.monotonic()
+
+    result = GeminiClient.generate_content("hello", model_name="gemini-2.5-flash")
+
+    assert result["text"] == "answer from slot 1"
+    assert time.monotonic() - started < 0.4
+
+    # The losing primary still finishes in the background and is logged as wasted
+    assert _wait_for(lambda: len(logs) == 2)
+    by_role = {log["metadata_json"]["hedge_role"]: log["metadata_json"] for log in logs}
+    assert by_role["hedge"]["hedge_won"] is True
+    assert by_role["primary"]["hedge_won"] is False
+
+    counters = GeminiClient.hedge_stats()["counters"]["message_generation"]
+    assert counters["hedged"] == 1
+    assert counters["hedge_wins"] == 1
+    assert counters["wasted_tokens"] == 10
+
+
+def test_fast_primary_is_not_hedged(two_keys):
+    delays, logs = two_keys
+    delays[0] = 0.0
+
+    result = GeminiClient.generate_content("hello", model_name="gemini-2.5-flash")
+
+    assert result["text"] == "answer from slot 0"
+    assert len(logs) == 1
+    assert GeminiClient.hedge_stats()["counters"]["message_generation"]["hedged"] == 0
+
+
+def test_other_services_are_never_hedged(two_keys):
+    _, logs = two_keys
+
+    result = GeminiClient.generate_content(
+        "hello", model_name="gemini-2.5-flash", service_name="document_classification"
+    )
+
+    assert result["text"] == "answer from slot 0"
+    assert "hedge_role" not in logs[0]["metadata_json"]
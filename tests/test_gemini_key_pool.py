@@ -0,0 +1,95 @@
+from types import SimpleNamespace
+
+from app.core import gemini_client
+from app.core.adaptive_limiter import AdaptiveConcurrencyLimiter
+from app.core.gemini_client import GeminiClient
+from app.core.key_pool import KeyPool, TokenBucket
+from app.services.api_usage_log_service import ApiUsageLogService
+
+
+def test_token_bucket_refills_over_its_period():
+    bucket = TokenBucket(60, period_s=60)
+    bucket.consume(60, now=bucket.updated_at)
+
+    assert bucket.available(bucket.updated_at + 10) == 10
+    assert bucket.seconds_until(20, bucket.updated_at) == 10
+
+
+def test_acquire_spreads_requests_across_keys_by_headroom():
+    pool = KeyPool(["...aaaa", "...bbbb", "...cccc"], rpm_limit=10, tpm_limit=10_000)
+
+    slots = [pool.acquire(100)[0] for _ in range(6)]
+
+    assert sorted(slots) == [0, 0, 1, 1, 2, 2]
+
+
+def test_acquire_prefers_key_with_token_headroom():
+    pool = KeyPool(["...aaaa", "...bbbb"], rpm_limit=100, tpm_limit=1_000)
+    slot, _ = pool.acquire(10)
+    pool.record_usage(slot, 10, 900)
+
+    assert pool.acquire(10) == (1 - slot, 0.0)
+
+
+def test_throttled_key_is_skipped_until_cooldown():
+    pool = KeyPool(["...aaaa", "...bbbb"], rpm_limit=100, tpm_limit=100_000, throttle_cooldown_s=60)
+    pool.mark_throttled(0)
+
+    assert [pool.acquire(10)[0] for _ in range(3)] == [1, 1, 1]
+    assert pool.stats()[0]["throttled"] is True
+    assert pool.stats()[0]["throttle_events"] == 1
+
+
+def test_exhausted_pool_reports_wait_time():
+    pool = KeyPool(["...aaaa"], rpm_limit=60, tpm_limit=100_000)
+    for _ in range(60):
+        pool.acquire(1)
+
+    slot, wait = pool.acquire(1)
+
+    assert slot == 0
+    assert 0 < wait <= 1.0
+
+
+def test_stats_report_utilization_per_key():
+    pool = KeyPool(["...aaaa", "...bbbb"], rpm_limit=10, tpm_limit=1_000)
+    pool.acquire(500)
+
+    stats = {s["key"]: s for s in pool.stats()}
+
+    assert stats["...aaaa"]["utilization"] >= 0.5
+    assert stats["...aaaa"]["total_requests"] == 1
+    assert stats["...bbbb"]["utilization"] == 0
+
+
+def test_generate_content_dispatches_to_least_loaded_key(monkeypatch):
+    calls = []
+
+    def make_client(slot):
+        def generate_content(model, contents, config):
+            calls.append(slot)
+            return SimpleNamespace(
+                text="ok",
+                usage_metadata=SimpleNamespace(
+                    prompt_token_count=1, candidates_token_count=1, total_token_count=2
+                ),
+            )
+
+        return SimpleNamespace(models=SimpleNamespace(generate_content=generate_content))
+
+    monkeypatch.setattr(gemini_client, "_clients", [make_client(0), make_client(1)])
+    monkeypatch.setattr(
+        gemini_client, "_key_pool", KeyPool(["...aaaa", "...bbbb"], rpm_limit=100, tpm_limit=100_000)
+    )
+    monkeypatch.setattr(gemini_client, "_ai_limiter", AdaptiveConcurrencyLimiter(initial_limit=4))
+    logs = []
+    monkeypatch.setattr(
+        ApiUsageLogService, "create_log", staticmethod(lambda **kwargs: logs.append(kwargs))
+    )
+
+    for _ in range(4):
+        GeminiClient.generate_content("hello", model_name="gemini-2.5-flash")
+
+    assert sorted(calls) == [0, 0, 1, 1]
+    assert sorted(log["metadata_json"]["key_slot"] for log in logs) == [0, 0, 1, 1]
+    assert sum(s["total_tokens"] for s in GeminiClient.key_stats()) == 8
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from app.services import intent_detection_service as intent_module
+from app.services.embedding_service import EmbeddingService
+from app.services.intent_detection_service import IntentDetectionService
+
+LABELS = list(IntentDetectionService.SEMANTIC_ANCHORS)
+
+
+def _onehot(label, scale=1.0):
+    vec = np.zeros(len(LABELS), dtype=np.float32)
+    vec[LABELS.index(label)] = scale
+    return vec
+
+
+@pytest.fixture
+def gemini(monkeypatch):
+    calls = {"query": 0, "anchors": 0}
+
+    def embed_query(text):
+        calls["query"] += 1
+        return list(_onehot("summary"))
+
+    def embed_anchors(texts, service_name="text_embedding"):
+        calls["anchors"] += 1
+        anchors = {anchor: label for label, anchor in IntentDetectionService.SEMANTIC_ANCHORS.items()}
+        return [list(_onehot(anchors[text], scale=3.0)) for text in texts]
+
+    monkeypatch.setattr(intent_module, "generate_text_embedding", embed_query)
+    monkeypatch.setattr(intent_module, "generate_text_embeddings", embed_anchors)
+    monkeypatch.setattr(intent_module.settings, "INTENT_CLASSIFIER", "gemini")
+    IntentDetectionService.reset()
+    yield calls
+    IntentDetectionService.reset()
+
+
+def test_anchors_are_embedded_once_and_query_embedding_is_reused(gemini):
+    greeting = list(_onehot("greeting") * 0.5 + _onehot("qa_answer") * 0.1)
+
+    assert IntentDetectionService.detect_intent("hello", query_embedding=greeting) == "greeting"
+    assert IntentDetectionService.detect_intent("good evening", query_embedding=greeting) == "greeting"
+
+    assert gemini == {"query": 0, "anchors": 1}
+
+
+def test_query_is_embedded_when_not_given_and_low_scores_fall_back(gemini):
+    assert IntentDetectionService.detect_intent("hello") == "summary"
+    assert gemini["query"] == 1
+
+    flat = list(np.ones(len(LABELS), dtype=np.float32))  # cosine 1/sqrt(5) with every anchor
+    assert IntentDetectionService.detect_intent("hello", query_embedding=flat) == "qa_answer"
+
+
+def test_rules_skip_the_semantic_gate(gemini):
+    assert IntentDetectionService.detect_intent("මෙම පාඩම සාරාංශ කරන්න") == "summary"
+    assert IntentDetectionService.detect_intent("who built it?") == "qa_answer"
+    assert gemini == {"query": 0, "anchors": 0}
+
+
+def test_incomplete_anchor_embeddings_are_retried(gemini, monkeypatch):
+    monkeypatch.setattr(intent_module, "generate_text_embeddings", lambda texts, service_name=None: [[]] * len(texts))
+
+    assert IntentDetectionService.detect_intent("hello", query_embedding=list(_onehot("greeting"))) == "qa_answer"
+    assert IntentDetectionService._anchor_matrix is None
+
+
+def test_local_classifier_uses_nearest_example_without_gemini(monkeypatch):
+    monkeypatch.setattr(intent_module.settings, "INTENT_CLASSIFIER", "local")
+    monkeypatch.setattr(intent_module, "generate_text_embedding", lambda text: pytest.fail("network call"))
+    examples = {
+        text: label
+        for label, anchor in IntentDetectionService.SEMANTIC_ANCHORS.items()
+        for text in [anchor, *IntentDetectionService.LOCAL_EXAMPLES[label]]
+    }
+    monkeypatch.setattr(EmbeddingService, "embed_batch", classmethod(lambda cls, texts: np.stack([_onehot(examples[t]) for t in texts])))
+    monkeypatch.setattr(EmbeddingService, "embed", classmethod(lambda cls, text: _onehot("explanation", scale=2.0)))
+    IntentDetectionService.reset()
+    try:
+        assert IntentDetectionService.detect_intent("how does the water cycle work") == "explanation"
+    finally:
+        IntentDetectionService.reset()
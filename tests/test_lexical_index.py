@@ -0,0 +1,156 @@
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.repositories.resource_chunk_repository import ResourceChunkRepository
+from app.services.lexical_index_service import LexicalIndexService
+from app.shared.models import ResourceLexicalPosting, ResourceLexicalStats
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(
+        engine, tables=[ResourceLexicalStats.__table__, ResourceLexicalPosting.__table__]
+    )
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+class PgError(Exception):
+    def __init__(self, pgcode, message):
+        super().__init__(message)
+        self.pgcode = pgcode
+
+
+def _chunk(resource_id, content, pseudo_questions=None):
+    return SimpleNamespace(
+        id=uuid4(), resource_id=resource_id, content=content, pseudo_questions=pseudo_questions
+    )
+
+
+def test_search_ranks_chunks_across_resources(db):
+    service = LexicalIndexService(db)
+    biology, history = uuid4(), uuid4()
+    cell = _chunk(biology, "සෛලය ජීවයේ මූලික ඒකකයයි. සෛලය බෙදේ.")
+    plant = _chunk(biology, "ශාක ප්‍රභාසංශ්ලේෂණය කරයි.", pseudo_questions="සෛලය යනු කුමක්ද?")
+    king = _chunk(history, "රජු නගරය පාලනය කළේය.")
+
+    service.index_chunks(biology, [cell, plant])
+    service.index_chunks(history, [king])
+    db.commit()
+
+    hits = service.search([biology, history], "සෛලය")
+
+    assert [hit["chunk_id"] for hit in hits] == [cell.id, plant.id]
+    assert {hit["resource_id"] for hit in hits} == {biology}
+    assert hits[0]["score"] > hits[1]["score"] > 0
+    assert service.search([history], "සෛලය") == []
+
+
+def test_reindexing_replaces_postings(db):
+    service = LexicalIndexService(db)
+    resource_id = uuid4()
+    old = _chunk(resource_id, "පැරණි පාඩම")
+    new = _chunk(resource_id, "නව පාඩම")
+
+    service.index_chunks(resource_id, [old])
+    service.index_chunks(resource_id, [new])
+    db.commit()
+
+    assert [hit["chunk_id"] for hit in service.search([resource_id], "පාඩම")] == [new.id]
+    assert db.query(ResourceLexicalStats).one().chunk_count == 1
+
+
+def test_missing_index_is_backfilled_once(db, monkeypatch):
+    resource_id = uuid4()
+    chunk = _chunk(resource_id, "ගණිතය සහ විද්‍යාව")
+    loads = []
+
+    def get_chunks_by_resource(self, resource_ids):
+        loads.append(list(resource_ids))
+        return [chunk]
+
+    monkeypatch.setattr(ResourceChunkRepository, "get_chunks_by_resource", get_chunks_by_resource)
+    service = LexicalIndexService(db)
+
+    assert service.search([resource_id], "ගණිතය")[0]["chunk_id"] == chunk.id
+    assert service.search([resource_id], "ගණිතය")[0]["chunk_id"] == chunk.id
+    assert loads == [[resource_id]]
+
+
+def test_postgres_uses_fulltext_column_and_falls_back_when_missing(db, monkeypatch):
+    resource_id = uuid4()
+    chunk = _chunk(resource_id, "ගණිතය")
+    service = LexicalIndexService(db)
+    service.index_chunks(resource_id, [chunk])
+    db.commit()
+
+    fulltext_id = uuid4()
+    monkeypatch.setattr(LexicalIndexService, "_fulltext_missing", False)
+    monkeypatch.setattr(
+        LexicalIndexService, "_fulltext_available",
+        lambda self: not LexicalIndexService._fulltext_missing,
+    )
+    monkeypatch.setattr(
+        ResourceChunkRepository, "lexical_search",
+        lambda self, resource_ids, query, top_k: [
+            {"chunk_id": fulltext_id, "resource_id": resource_id, "content": "", "rank": 0.4}
+        ],
+    )
+
+    assert service.search([resource_id], "ගණිතය") == [
+        {"chunk_id": fulltext_id, "resource_id": resource_id, "score": 0.4}
+    ]
+
+    def timed_out(self, resource_ids, query, top_k):
+        raise OperationalError("SELECT", {}, PgError("57014", "canceling statement due to statement timeout"))
+
+    monkeypatch.setattr(ResourceChunkRepository, "lexical_search", timed_out)
+
+    assert service.search([resource_id], "ගණිතය")[0]["chunk_id"] == chunk.id
+    assert LexicalIndexService._fulltext_missing is False
+
+    def missing_function(self, resource_ids, query, top_k):
+        raise ProgrammingError("SELECT", {}, PgError("42883", "function search_resource_chunks does not exist"))
+
+    monkeypatch.setattr(ResourceChunkRepository, "lexical_search", missing_function)
+
+    assert service.search([resource_id], "ගණිතය")[0]["chunk_id"] == chunk.id
+    assert LexicalIndexService._fulltext_missing is True
+
+
+
+def test_voice_lexical_retrieval_falls_back_to_inline_tsvector(monkeypatch):
+    from app.components.voice_qa.services import hybrid_retrieval
+
+    statements = []
+
+    class FakeConnection:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def execute(self, sql, params):
+            statements.append(str(sql))
+            if "search_resource_chunks" in str(sql):
+                raise ProgrammingError("SELECT", params, PgError("42883", "function search_resource_chunks does not exist"))
+            return SimpleNamespace(fetchall=lambda: [SimpleNamespace(id="c1", content="ගණිතය", rank=0.3)])
+
+    monkeypatch.setattr(LexicalIndexService, "_fulltext_missing", False)
+    monkeypatch.setattr(hybrid_retrieval, "engine", SimpleNamespace(connect=FakeConnection))
+
+    first = hybrid_retrieval.lexical_retrieval("ගණිතය", ["r1"])
+    second = hybrid_retrieval.lexical_retrieval("ගණිතය", ["r1"])
+
+    assert first == second == [{"chunk_id": "c1", "text": "ගණිතය", "rank": 0.3}]
+    assert LexicalIndexService.fulltext_missing()
+    assert ["search_resource_chunks" in sql for sql in statements] == [True, False, False]
@@ -0,0 +1,195 @@
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import gemini_client
+from app.core.adaptive_limiter import AdaptiveConcurrencyLimiter
+from app.core.circuit_breaker import CircuitBreakerRegistry
+from app.core.gemini_client import GeminiClient
+from app.services import llm_response_cache_service
+from app.services.api_usage_log_service import ApiUsageLogService
+from app.services.llm_response_cache_service import LlmResponseCacheService
+
+
+class FakeRepo:
+    store = {}
+
+    def __init__(self, db):
+        pass
+
+    def get_fresh(self, cache_key, now):
+        entry = self.store.get(cache_key)
+        if entry is None or entry["expires_at"] <= now:
+            return None
+        return SimpleNamespace(
+            response_text=entry["response_text"],
+            prompt_tokens=entry["prompt_tokens"],
+            completion_tokens=entry["completion_tokens"],
+            total_tokens=entry["total_tokens"],
+            model_name=entry["model_name"],
+        )
+
+    def touch(self, cache_key):
+        pass
+
+    def upsert(self, entry):
+        self.store[entry["cache_key"]] = dict(entry)
+
+
+@pytest.fixture
+def fake_cache(monkeypatch):
+    FakeRepo.store = {}
+    monkeypatch.setattr(llm_response_cache_service, "LlmResponseCacheRepository", FakeRepo)
+    monkeypatch.setattr(llm_response_cache_service, "SessionLocal", lambda: SimpleNamespace(
+        commit=lambda: None, rollback=lambda: None, close=lambda: None,
+    ))
+    monkeypatch.setattr(llm_response_cache_service.settings, "GEMINI_RESPONSE_CACHE_ENABLED", True)
+    LlmResponseCacheService.reset_stats()
+    yield FakeRepo.store
+    LlmResponseCacheService.reset_stats()
+
+
+@pytest.fixture
+def fake_gemini(monkeypatch):
+    calls = []
+    logs = []
+
+    def generate_content(model, contents, config):
+        calls.append(contents)
+        return SimpleNamespace(
+            text=f"answer {len(calls)}",
+            usage_metadata=SimpleNamespace(
+                prompt_token_count=10, candidates_token_count=5, total_token_count=15
+            ),
+        )
+
+    client = SimpleNamespace(models=SimpleNamespace(generate_content=generate_content))
+    monkeypatch.setattr(GeminiClient, "get_client", classmethod(lambda cls, slot=None: client))
+    monkeypatch.setattr(gemini_client, "_ai_limiter", AdaptiveConcurrencyLimiter(initial_limit=4))
+    monkeypatch.setattr(
+        ApiUsageLogService, "create_log", staticmethod(lambda **kwargs: logs.append(kwargs))
+    )
+    return calls, logs
+
+
+def test_make_key_depends_on_model_json_mode_and_prompt():
+    key = LlmResponseCacheService.make_key("prompt", "gemini-2.5-flash")
+
+    assert key == LlmResponseCacheService.make_key("prompt", "gemini-2.5-flash")
+    assert key != LlmResponseCacheService.make_key("prompt", "gemini-2.0-flash")
+    assert key != LlmResponseCacheService.make_key("prompt", "gemini-2.5-flash", json_mode=True)
+    assert key != LlmResponseCacheService.make_key("prompt 2", "gemini-2.5-flash")
+    assert key != LlmResponseCacheService.make_key(
+        "prompt", "gemini-2.5-flash", safety_settings=["BLOCK_NONE"]
+    )
+
+
+def test_ttl_policy_is_per_service(monkeypatch):
+    monkeypatch.setattr(
+        llm_response_cache_service.settings,
+        "GEMINI_RESPONSE_CACHE_TTL_HOURS",
+        {"document_classification": 48, "message_generation": 0},
+    )
+    monkeypatch.setattr(llm_response_cache_service.settings, "GEMINI_RESPONSE_CACHE_DEFAULT_TTL_HOURS", 6)
+    monkeypatch.setattr(llm_response_cache_service.settings, "GEMINI_RESPONSE_CACHE_ENABLED", True)
+
+    assert LlmResponseCacheService.ttl_for("document_classification") == timedelta(hours=48)
+    assert LlmResponseCacheService.ttl_for("anything_else") == timedelta(hours=6)
+    assert not LlmResponseCacheService.enabled_for("message_generation")
+
+
+def test_generate_content_serves_repeat_calls_from_cache(fake_cache, fake_gemini):
+    calls, logs = fake_gemini
+
+    first = GeminiClient.generate_content(
+        "classify this", model_name="gemini-2.5-flash", service_name="document_classification", use_cache=True
+    )
+    second = GeminiClient.generate_content(
+        "classify this", model_name="gemini-2.5-flash", service_name="document_classification", use_cache=True
+    )
+
+    assert calls == ["classify this"]
+    assert second["text"] == first["text"] == "answer 1"
+    assert second["cache_hit"] is True
+    assert [log["status"] for log in logs] == ["success", "cache_hit"]
+    assert logs[1]["total_tokens"] == 0
+    assert logs[1]["metadata_json"]["saved_total_tokens"] == 15
+    assert LlmResponseCacheService.stats()["hits"] == 1
+
+
+def test_generate_content_without_opt_in_never_touches_cache(fake_cache, fake_gemini):
+    calls, _ = fake_gemini
+
+    GeminiClient.generate_content("hello", model_name="gemini-2.5-flash")
+    GeminiClient.generate_content("hello", model_name="gemini-2.5-flash")
+
+    assert len(calls) == 2
+    assert fake_cache == {}
+
+
+def test_bypass_cache_refreshes_entry(fake_cache, fake_gemini):
+    calls, logs = fake_gemini
+    kwargs = dict(model_name="gemini-2.5-flash", service_name="ocr_correction", use_cache=True)
+
+    GeminiClient.generate_content("fix ocr", **kwargs)
+    refreshed = GeminiClient.generate_content("fix ocr", bypass_cache=True, **kwargs)
+    cached = GeminiClient.generate_content("fix ocr", **kwargs)
+
+    assert len(calls) == 2
+    assert refreshed["text"] == "answer 2"
+    assert cached["text"] == "answer 2"
+    assert [log["status"] for log in logs] == ["success", "success", "cache_hit"]
+
+
+def test_expired_entries_are_misses(fake_cache, fake_gemini, monkeypatch):
+    calls, _ = fake_gemini
+    monkeypatch.setattr(
+        llm_response_cache_service.settings, "GEMINI_RESPONSE_CACHE_TTL_HOURS", {"exam_extraction": 1}
+    )
+    kwargs = dict(model_name="gemini-2.5-flash", service_name="exam_extraction", use_cache=True)
+
+    GeminiClient.generate_content("paper", **kwargs)
+    for entry in fake_cache.values():
+        entry["expires_at"] -= timedelta(hours=2)
+    GeminiClient.generate_content("paper", **kwargs)
+
+    assert len(calls) == 2
+
+
+def test_rejected_responses_are_returned_but_not_cached(fake_cache, fake_gemini):
+    calls, _ = fake_gemini
+    kwargs = dict(model_name="gemini-2.5-flash", service_name="document_classification", use_cache=True)
+
+    first = GeminiClient.generate_content("classify", cache_validator=lambda text: text == "textbook", **kwargs)
+    GeminiClient.generate_content("classify", **kwargs)
+
+    assert first["text"] == "answer 1"
+    assert len(calls) == 2
+    assert len(fake_cache) == 1
+
+
+def test_fallback_model_answer_is_not_cached_under_primary_key(fake_cache, fake_gemini, monkeypatch):
+    calls, _ = fake_gemini
+    monkeypatch.setattr(gemini_client, "MODEL_FALLBACKS", ["gemini-2.5-flash", "gemini-2.0-flash"])
+    monkeypatch.setattr(gemini_client.time, "sleep", lambda s: None)
+    monkeypatch.setattr(gemini_client, "_breakers", CircuitBreakerRegistry())
+    answered = []
+    fake_models = GeminiClient.get_client().models
+
+    def primary_down(model, contents, config):
+        if model == "gemini-2.5-flash":
+            raise RuntimeError("503 overloaded")
+        answered.append(model)
+        return fake_models.generate_content(model, contents, config)
+
+    client = SimpleNamespace(models=SimpleNamespace(generate_content=primary_down))
+    monkeypatch.setattr(GeminiClient, "get_client", classmethod(lambda cls, slot=None: client))
+
+    result = GeminiClient.generate_content(
+        "classify", model_name="gemini-2.5-flash", max_retries=0, service_name="document_classification", use_cache=True
+    )
+
+    assert result["text"] == "answer 1"
+    assert answered == ["gemini-2.0-flash"]
+    assert fake_cache == {}
@@ -0,0 +1,126 @@
+import sys
+import threading
+import time
+
+import pytest
+import torch
+
+from app.core import model_registry
+from app.core.model_registry import ModelRegistry
+from app.shared.ai import embeddings
+
+
+class FakeEncoder(torch.nn.Module):
+    def __init__(self, name, device):
+        super().__init__()
+        self.name = name
+        self.linear = torch.nn.Linear(4, 2)
+        self.encoded = []
+
+    def encode(self, texts, **kwargs):
+        self.encoded.append(list(texts))
+        return [[0.0, 0.0] for _ in texts]
+
+
+@pytest.fixture
+def fake_loader(monkeypatch):
+    loads = []
+
+    def loader(name, device, backend="torch"):
+        loads.append(name if backend == "torch" else f"{name}@{backend}")
+        time.sleep(0.01)
+        return FakeEncoder(name, device)
+
+    monkeypatch.setitem(model_registry._LOADERS, "sentence_transformer", loader)
+    monkeypatch.setattr(ModelRegistry, "_models", {})
+    monkeypatch.setattr(ModelRegistry, "_info", {})
+    monkeypatch.setattr(ModelRegistry, "_key_locks", {})
+    monkeypatch.setattr(model_registry.settings, "ENCODER_WARMUP_ON_LOAD", True)
+    return loads
+
+
+def test_same_model_name_is_loaded_once_across_threads(fake_loader):
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(ModelRegistry.get("minilm")))
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert fake_loader == ["minilm"]
+    assert all(m is results[0] for m in results)
+
+
+def test_stats_report_memory_load_and_warmup(fake_loader):
+    model = ModelRegistry.get("xlmr")
+
+    assert model.encoded == [model_registry.WARMUP_TEXTS]
+    [info] = ModelRegistry.stats()
+    assert info["model_name"] == "xlmr"
+    assert info["memory_bytes"] == (4 * 2 + 2) * 4
+    assert info["load_seconds"] >= 0
+    assert info["warmup_seconds"] is not None
+
+
+def test_preload_loads_configured_encoders(fake_loader, monkeypatch):
+    monkeypatch.setattr(model_registry.settings, "STARTUP_ENCODERS", "a, b,,a")
+
+    ModelRegistry.preload()
+
+    assert fake_loader == ["a", "b"]
+    assert ModelRegistry.is_loaded("a") and ModelRegistry.is_loaded("b")
+
+
+def test_unknown_kind_raises(fake_loader):
+    with pytest.raises(ValueError):
+        ModelRegistry.get("x", kind="nope")
+
+
+def test_backends_are_registered_separately(fake_loader):
+    torch_model = ModelRegistry.get("xlmr")
+    int8_model = ModelRegistry.get("xlmr", backend="onnx-int8")
+
+    assert torch_model is not int8_model
+    assert fake_loader == ["xlmr", "xlmr@onnx-int8"]
+    assert {info["backend"] for info in ModelRegistry.stats()} == {"torch", "onnx-int8"}
+
+    with pytest.raises(ValueError):
+        ModelRegistry.get("xlmr", backend="tensorrt")
+
+
+def test_onnx_models_report_file_size_or_none(fake_loader, tmp_path, monkeypatch):
+    (tmp_path / "model.onnx").write_bytes(b"x" * 100)
+    (tmp_path / "model.onnx_data").write_bytes(b"x" * 50)
+    (tmp_path / "tokenizer.json").write_bytes(b"x" * 7)
+
+    class FakeOrtSession:
+        model_path = tmp_path / "model.onnx"
+
+    def loader(name, device, backend="torch"):
+        encoder = FakeEncoder(name, device)
+        if name == "known":
+            encoder.model = FakeOrtSession()
+        return encoder
+
+    monkeypatch.setitem(model_registry._LOADERS, "sentence_transformer", loader)
+
+    ModelRegistry.get("known", backend="onnx")
+    ModelRegistry.get("unknown", backend="onnx-int8")
+
+    sizes = {info["model_name"]: info["memory_bytes"] for info in ModelRegistry.stats()}
+    assert sizes == {"known": 150, "unknown": None}
+
+
+def test_text_qa_embeddings_share_the_xlmr_backend_instance(fake_loader, monkeypatch):
+    from app.components.text_qa_summary.services.embedding_service import EmbeddingService
+
+    # Other tests swap a stub into sys.modules for this module
+    monkeypatch.setitem(sys.modules, "app.shared.ai.embeddings", embeddings)
+    monkeypatch.setattr(embeddings, "_xlmr_backend", "onnx")
+    monkeypatch.setattr(model_registry.settings, "MODEL_EMBEDDING_NAME", model_registry.XLMR_MODEL_NAME)
+
+    assert EmbeddingService.get_model() is embeddings.get_xlmr_model()
+    assert fake_loader == [f"{model_registry.XLMR_MODEL_NAME}@onnx"]
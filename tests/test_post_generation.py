@@ -0,0 +1,126 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.routers.websockets import ConnectionManager
+from app.services import post_generation_service
+from app.services.post_generation_service import PostGenerationAnalyzer
+
+
+class FakeSession:
+    def __init__(self):
+        self.rollbacks = 0
+        self.closed = False
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+JOB = {
+    "message_id": "m1",
+    "user_id": "u1",
+    "user_query": "q",
+    "generated": "answer",
+    "context": "context",
+    "hits": [],
+    "flagged": [{"sentence": "s", "unseen_ratio": 0.5}],
+    "missing": [],
+    "extra": [],
+    "retrieval_metadata": {},
+}
+
+ANALYSIS = {
+    "flagged_sentences": [{"sentence": "s", "evidence": "e"}],
+    "computed_severity": "low",
+    "computed_confidence_score": 0.9,
+    "computed_reliability": "fully_supported",
+    "xai_explanation": {"explanation_summary": "ok"},
+}
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    updates, events = [], []
+    monkeypatch.setattr(
+        post_generation_service.MessageSafetyService,
+        "update_analysis",
+        lambda self, message_id, values: updates.append((message_id, values)),
+    )
+    monkeypatch.setattr(
+        PostGenerationAnalyzer, "_notify", staticmethod(lambda job, analysis: events.append(analysis))
+    )
+    return SimpleNamespace(updates=updates, events=events)
+
+
+def test_background_dispatch_updates_report_with_own_session(recorded, monkeypatch):
+    monkeypatch.setattr(post_generation_service.settings, "POST_GENERATION_BACKGROUND", True)
+    monkeypatch.setattr(post_generation_service, "analyse_answer", lambda job: dict(ANALYSIS))
+    sessions = []
+    analyzer = PostGenerationAnalyzer(session_factory=lambda: sessions.append(FakeSession()) or sessions[-1])
+
+    assert analyzer.dispatch(dict(JOB), db=None) is None
+    analyzer.shutdown(wait=True)
+
+    assert recorded.updates == [("m1", {**ANALYSIS, "analysis_status": "ready"})]
+    assert recorded.events[0]["analysis_status"] == "ready"
+    assert sessions[0].closed
+    stats = analyzer.stats()
+    assert (stats["completed"], stats["queued"], stats["running"], stats["inline"]) == (1, 0, 0, 0)
+
+
+def test_inline_dispatch_returns_analysis(recorded, monkeypatch):
+    monkeypatch.setattr(post_generation_service.settings, "POST_GENERATION_BACKGROUND", False)
+    monkeypatch.setattr(post_generation_service, "analyse_answer", lambda job: dict(ANALYSIS))
+    analyzer = PostGenerationAnalyzer()
+
+    assert analyzer.dispatch(dict(JOB), db=FakeSession()) == ANALYSIS
+    assert analyzer.stats()["inline"] == 1
+    analyzer.shutdown()
+
+
+def test_failed_analysis_marks_report_failed(recorded, monkeypatch):
+    def boom(job):
+        raise RuntimeError("model unavailable")
+
+    monkeypatch.setattr(post_generation_service.settings, "POST_GENERATION_BACKGROUND", True)
+    monkeypatch.setattr(post_generation_service, "analyse_answer", boom)
+    session = FakeSession()
+    analyzer = PostGenerationAnalyzer(session_factory=lambda: session)
+
+    analyzer.dispatch(dict(JOB))
+    analyzer.shutdown(wait=True)
+
+    assert recorded.updates == [("m1", {"analysis_status": "failed"})]
+    assert recorded.events == [{"analysis_status": "failed"}]
+    assert session.rollbacks == 1 and session.closed
+    assert analyzer.stats()["failed"] == 1
+
+
+def test_render_checks_run_concept_and_misconception_checks():
+    checks = PostGenerationAnalyzer().start_checks("අ ආ", "අ ආ").result()
+
+    assert set(checks) == {"missing", "extra", "flagged"}
+
+
+def test_ready_event_carries_summary_and_explanation(monkeypatch):
+    sent = []
+    manager = ConnectionManager()
+    monkeypatch.setattr(manager, "notify", lambda message, user_id: sent.append((user_id, message)))
+    monkeypatch.setattr("app.routers.websockets.manager", manager)
+
+    PostGenerationAnalyzer._notify(JOB, {"analysis_status": "ready", **ANALYSIS})
+    PostGenerationAnalyzer._notify({**JOB, "user_id": None}, {"analysis_status": "ready", **ANALYSIS})
+
+    assert sent == [(
+        "u1",
+        {
+            "type": "analysis",
+            "message_id": "m1",
+            "analysis_status": "ready",
+            "safety_summary": {"overall_severity": "low", "confidence_score": 0.9, "reliability": "fully_supported"},
+            "xai_explanation": {"explanation_summary": "ok"},
+        },
+    )]
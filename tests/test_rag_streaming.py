@@ -0,0 +1,152 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import gemini_client
+from app.core.adaptive_limiter import AdaptiveConcurrencyLimiter
+from app.core.gemini_client import GeminiClient
+from app.services import rag_service
+from app.services.api_usage_log_service import ApiUsageLogService
+from app.services.rag_service import RAGService
+
+
+def _chunk(text, usage=None):
+    return SimpleNamespace(text=text, usage_metadata=usage)
+
+
+USAGE = SimpleNamespace(prompt_token_count=4, candidates_token_count=6, total_token_count=10)
+
+
+class FakeStreamingModels:
+    def __init__(self, scripts):
+        # One script per attempt: a list of chunks, optionally ending in an exception
+        self.scripts = list(scripts)
+        self.calls = []
+
+    def generate_content_stream(self, model, contents, config):
+        self.calls.append(model)
+        for item in self.scripts.pop(0):
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+
+@pytest.fixture
+def patched_stream(monkeypatch):
+    logs = []
+    monkeypatch.setattr(
+        ApiUsageLogService, "create_log", staticmethod(lambda **kwargs: logs.append(kwargs))
+    )
+    monkeypatch.setattr(GeminiClient, "_get_wait_time", staticmethod(lambda reason, attempt: 0))
+    monkeypatch.setattr(gemini_client, "_ai_limiter", AdaptiveConcurrencyLimiter(initial_limit=2))
+
+    def install(models):
+        client = SimpleNamespace(models=models)
+        monkeypatch.setattr(GeminiClient, "get_client", classmethod(lambda cls, slot=None: client))
+        return models
+
+    return install, logs
+
+
+def test_stream_content_yields_deltas_and_records_result(patched_stream):
+    install, logs = patched_stream
+    install(FakeStreamingModels([[_chunk("Hel"), _chunk("lo"), _chunk("", USAGE)]]))
+
+    stream = GeminiClient.stream_content("prompt", model_name="gemini-2.5-flash")
+
+    assert list(stream) == ["Hel", "lo"]
+    assert stream.result["text"] == "Hello"
+    assert stream.result["total_tokens"] == 10
+    assert stream.ttft_ms is not None
+    assert logs[-1]["status"] == "success"
+    assert logs[-1]["metadata_json"]["stream"] is True
+    assert gemini_client._ai_limiter.stats()["in_flight"] == 0
+
+
+def test_stream_content_retries_before_first_delta(patched_stream):
+    install, logs = patched_stream
+    models = install(FakeStreamingModels([
+        [RuntimeError("429 RESOURCE_EXHAUSTED")],
+        [_chunk("ok", USAGE)],
+    ]))
+
+    stream = GeminiClient.stream_content("prompt", model_name="gemini-2.5-flash")
+
+    assert list(stream) == ["ok"]
+    assert len(models.calls) == 2
+    assert [log["status"] for log in logs] == ["retry", "success"]
+
+
+def test_stream_content_does_not_retry_after_emitting(patched_stream):
+    install, _ = patched_stream
+    models = install(FakeStreamingModels([
+        [_chunk("partial"), RuntimeError("429 RESOURCE_EXHAUSTED")],
+        [_chunk("never")],
+    ]))
+
+    received = []
+    with pytest.raises(RuntimeError):
+        for piece in GeminiClient.stream_content("prompt", model_name="gemini-2.5-flash"):
+            received.append(piece)
+
+    assert received == ["partial"]
+    assert len(models.calls) == 1
+
+
+def _rag_with_stream(monkeypatch, pieces):
+    service = RAGService.__new__(RAGService)
+    finalized = {}
+
+    monkeypatch.setattr(
+        RAGService, "_plan_generation",
+        lambda self, *args: {"prompt": "p", "intent": "question", "hits": [], "context": "", "grade_level": None},
+    )
+
+    def finalize(self, session_id, user_message_id, user_query, plan, generated_result, bm25_k, final_k, user_id=None):
+        finalized["text"] = generated_result["text"]
+        return {"assistant_message_id": "m1", "content": generated_result["text"], "retrieval_metadata": {}}
+
+    monkeypatch.setattr(RAGService, "_finalize_generation", finalize)
+
+    class FakeStream:
+        ttft_ms = 1.0
+
+        def __init__(self):
+            self.result = None
+
+        def __iter__(self):
+            yield from pieces
+            self.result = {"text": "".join(pieces)}
+
+    monkeypatch.setattr(rag_service.GeminiClient, "stream_content", staticmethod(lambda prompt, **kwargs: FakeStream()))
+    return service, finalized
+
+
+def test_stream_response_emits_tokens_then_done(monkeypatch):
+    service, finalized = _rag_with_stream(monkeypatch, ["ප්‍රශ්නයට ", "පිළිතුර", "."])
+
+    events = list(service.stream_response("s1", "u1", "query", ["r1"]))
+
+    tokens = "".join(e["text"] for e in events if e["type"] == "token")
+    assert tokens == "ප්‍රශ්නයට පිළිතුර."
+    assert events[-1]["type"] == "done"
+    assert events[-1]["assistant_message_id"] == "m1"
+    assert events[-1]["retrieval_metadata"]["ttft_ms"] is not None
+    assert finalized["text"] == tokens
+
+
+def test_stream_response_never_leaks_refusal_marker(monkeypatch):
+    service, finalized = _rag_with_stream(monkeypatch, ["[NOT_", "ANSWER", "ABLE] no context"])
+
+    events = list(service.stream_response("s1", "u1", "query", ["r1"]))
+
+    assert [e["type"] for e in events] == ["done"]
+    assert finalized["text"].startswith("[NOT_ANSWERABLE]")
+
+
+def test_stream_response_releases_text_once_marker_is_ruled_out(monkeypatch):
+    service, _ = _rag_with_stream(monkeypatch, ["[1", "] first point"])
+
+    events = list(service.stream_response("s1", "u1", "query", ["r1"]))
+
+    assert [e["text"] for e in events if e["type"] == "token"] == ["[1", "] first point"]
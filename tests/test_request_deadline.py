@@ -0,0 +1,145 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import deadline, gemini_client
+from app.core.adaptive_limiter import AdaptiveConcurrencyLimiter
+from app.core.circuit_breaker import CircuitBreakerRegistry
+from app.core.deadline import DeadlineExceeded, deadline_scope
+from app.core.gemini_client import GeminiClient
+from app.services.api_usage_log_service import ApiUsageLogService
+from app.shared.ai.gemini_client import gemini_generate
+
+
+def test_nested_scopes_keep_the_tighter_deadline():
+    assert deadline.remaining() is None
+
+    with deadline_scope(10):
+        with deadline_scope(60):
+            assert deadline.remaining() <= 10
+        with deadline_scope(1):
+            assert deadline.remaining() <= 1
+        assert 1 < deadline.remaining() <= 10
+
+    assert deadline.remaining() is None
+
+
+def test_check_raises_typed_timeout():
+    with deadline_scope(0):
+        with pytest.raises(DeadlineExceeded) as exc:
+            deadline.check("retrieval")
+
+    assert exc.value.stage == "retrieval"
+    assert isinstance(exc.value, TimeoutError)
+
+
+def test_request_deadline_dependency_reaches_sync_endpoint():
+    app = FastAPI()
+
+    @app.get("/work", dependencies=[Depends(deadline.request_deadline(5))])
+    def work():
+        return {"remaining": deadline.remaining()}
+
+    body = TestClient(app).get("/work").json()
+
+    assert 0 < body["remaining"] <= 5
+
+
+def test_limiter_acquire_times_out_without_leaking_waiters():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1)
+    limiter.acquire()
+
+    with pytest.raises(TimeoutError):
+        limiter.acquire(timeout=0.01)
+
+    assert limiter.stats()["waiting"] == 0
+    limiter.release()
+    assert limiter.stats()["in_flight"] == 0
+
+
+def test_async_limiter_acquire_times_out():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1)
+    limiter.acquire()
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(limiter.aacquire(timeout=0.01))
+
+    assert limiter.stats()["waiting"] == 0
+
+
+@pytest.fixture
+def overloaded_gemini(monkeypatch):
+    configs = []
+
+    def generate_content(model, contents, config):
+        configs.append(config)
+        raise RuntimeError("503 UNAVAILABLE: model is overloaded")
+
+    client = SimpleNamespace(models=SimpleNamespace(generate_content=generate_content))
+    monkeypatch.setattr(GeminiClient, "get_client", classmethod(lambda cls, slot=None: client))
+    monkeypatch.setattr(gemini_client, "_ai_limiter", AdaptiveConcurrencyLimiter(initial_limit=4))
+    monkeypatch.setattr(gemini_client, "_breakers", CircuitBreakerRegistry(min_calls=100))
+    monkeypatch.setattr(gemini_client, "_active_model_index", 0)
+    monkeypatch.setattr(GeminiClient, "_get_wait_time", staticmethod(lambda reason, attempt: 5))
+    monkeypatch.setattr(gemini_client.settings, "GEMINI_MIN_ATTEMPT_S", 0.1)
+    monkeypatch.setattr(ApiUsageLogService, "create_log", staticmethod(lambda **kwargs: None))
+    return configs
+
+
+def test_retry_is_skipped_when_backoff_exceeds_budget(overloaded_gemini):
+    started = time.monotonic()
+
+    with deadline_scope(1.0):
+        with pytest.raises(DeadlineExceeded) as exc:
+            GeminiClient.generate_content("hello", model_name="gemini-2.5-flash", max_retries=15)
+
+    assert time.monotonic() - started < 1.0
+    assert len(overloaded_gemini) == 1
+    assert "503" in str(exc.value.__cause__)
+    assert overloaded_gemini[0].http_options.timeout <= 1000
+
+
+def test_gemini_generate_surfaces_deadline_instead_of_empty_text(overloaded_gemini):
+    with pytest.raises(DeadlineExceeded):
+        gemini_generate("hello", deadline_s=0.5)
+
+
+def test_calls_without_deadline_keep_default_config(overloaded_gemini, monkeypatch):
+    monkeypatch.setattr(GeminiClient, "_get_wait_time", staticmethod(lambda reason, attempt: 0))
+
+    with pytest.raises(RuntimeError):
+        GeminiClient.generate_content("hello", model_name="gemini-2.5-flash", max_retries=1)
+
+    assert all(config.http_options is None for config in overloaded_gemini)
+
+
+def test_budget_timeout_is_not_counted_against_the_model(monkeypatch):
+    calls = []
+
+    def generate_content(model, contents, config):
+        calls.append(model)
+        time.sleep(deadline.remaining())  # the budget-derived HTTP timeout fires
+        raise RuntimeError("Request timed out")
+
+    client = SimpleNamespace(models=SimpleNamespace(generate_content=generate_content))
+    breakers = CircuitBreakerRegistry(min_calls=1)
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4)
+    monkeypatch.setattr(GeminiClient, "get_client", classmethod(lambda cls, slot=None: client))
+    monkeypatch.setattr(gemini_client, "_ai_limiter", limiter)
+    monkeypatch.setattr(gemini_client, "_breakers", breakers)
+    monkeypatch.setattr(gemini_client, "_active_model_index", 0)
+    monkeypatch.setattr(gemini_client.settings, "GEMINI_MIN_ATTEMPT_S", 0.01)
+    monkeypatch.setattr(ApiUsageLogService, "create_log", staticmethod(lambda **kwargs: None))
+
+    with deadline_scope(0.2):
+        with pytest.raises(DeadlineExceeded) as exc:
+            GeminiClient.generate_content("hello", model_name="gemini-2.5-flash", max_retries=3)
+
+    assert calls == ["gemini-2.5-flash"]
+    assert "timed out" in str(exc.value.__cause__)
+    assert all(b["window_failures"] == 0 for b in breakers.stats())
+    assert limiter.stats()["overloads"] == 0
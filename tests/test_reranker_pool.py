@@ -0,0 +1,72 @@
+import pytest
+
+from app.shared.ai import reranker_service
+from app.shared.ai.reranker_service import RerankerPool
+
+
+class FakeCrossEncoder:
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=True):
+        self.calls.append((list(pairs), batch_size))
+        return [float(len(passage)) for _, passage in pairs]
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    model = FakeCrossEncoder()
+    requests = []
+
+    def get(name, kind="sentence_transformer", backend="torch"):
+        requests.append((name, kind, backend))
+        if backend == "broken":
+            raise RuntimeError("no onnx export")
+        return model
+
+    monkeypatch.setattr(reranker_service.ModelRegistry, "get", staticmethod(get))
+    return model, requests
+
+
+def test_scores_in_batches_and_caches_by_chunk_id(registry):
+    model, _ = registry
+    pool = RerankerPool(backend="torch", batch_size=2, cache_size=100)
+
+    first = pool.score("q", [(1, "a"), (2, "bbb"), (3, "cc")], model_name="m")
+    second = pool.score("q", [(3, "cc"), (4, "dddd"), (1, "a")], model_name="m")
+
+    assert first == [1.0, 3.0, 2.0]
+    assert second == [2.0, 4.0, 1.0]
+    assert [len(pairs) for pairs, _ in model.calls] == [3, 1]
+    assert model.calls[1] == ([("q", "dddd")], 2)
+    stats = pool.stats()
+    assert (stats["hits"], stats["misses"], stats["batches"]) == (2, 4, 3)
+
+
+def test_cache_is_keyed_by_query_and_evicts_least_recent(registry):
+    model, _ = registry
+    pool = RerankerPool(backend="torch", batch_size=8, cache_size=2)
+
+    pool.score("q1", [(1, "a"), (2, "b")], model_name="m")
+    pool.score("q1", [(1, "a")], model_name="m")
+    pool.score("q2", [(1, "a")], model_name="m")
+    assert len(model.calls) == 2
+
+    pool.score("q1", [(1, "a"), (2, "b")], model_name="m")
+    assert model.calls[-1][0] == [("q1", "b")]
+    assert pool.stats()["cache_entries"] == 2
+
+
+def test_unavailable_backend_falls_back_to_torch_once(registry):
+    _, requests = registry
+    pool = RerankerPool(backend="broken", batch_size=8, cache_size=10)
+
+    pool.score("q", [(1, "a")], model_name="m")
+    pool.score("q", [(2, "b")], model_name="m")
+
+    assert requests == [
+        ("m", "cross_encoder", "broken"),
+        ("m", "cross_encoder", "torch"),
+        ("m", "cross_encoder", "torch"),
+    ]
+    assert pool.stats()["fallback_backends"] == {"m": "torch"}
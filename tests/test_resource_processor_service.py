@@ -104,3 +104,21 @@ def test_sniff_pdf_language_normal_text_returns_detected_language(service, monke
     detect_language_from_text.assert_called_once_with(
         "This is a normal English text sample"
     )
+
+
+@pytest.mark.parametrize("dialect, indexed", [("postgresql", False), ("sqlite", True)])
+def test_save_chunks_builds_postings_only_without_fulltext(service, monkeypatch, dialect, indexed):
+    from app.services.lexical_index_service import LexicalIndexService
+
+    indexed_resources = []
+    service.db.get_bind.return_value.dialect.name = dialect
+    monkeypatch.setattr(LexicalIndexService, "_fulltext_missing", False)
+    monkeypatch.setattr(
+        LexicalIndexService, "index_chunks",
+        lambda self, resource_id, chunks: indexed_resources.append(resource_id),
+    )
+    monkeypatch.setattr(service, "_generate_pseudo_questions_for_chunk", lambda text: "")
+
+    service._save_chunks_to_db([{"chunk_id": 0, "text": "පාඩම", "embedding": [0.1] * 768}], "r1")
+
+    assert indexed_resources == (["r1"] if indexed else [])
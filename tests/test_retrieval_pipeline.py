@@ -0,0 +1,148 @@
+import pytest
+
+from app.core.deadline import DeadlineExceeded, deadline_scope
+from app.services import retrieval_pipeline
+from app.services.retrieval_pipeline import (
+    Candidate,
+    ContextPackingStage,
+    DenseStage,
+    FusionStage,
+    LexicalStage,
+    PipelineStats,
+    RerankStage,
+    RetrievalContext,
+    RetrievalPipeline,
+    ScopeStage,
+)
+
+CORPUS = {
+    "a": ("r1", "සෛලය ජීවයේ ඒකකයයි"),
+    "b": ("r1", "ශාක ආහාර නිපදවයි"),
+    "c": ("r2", "රජු නගරය පාලනය කළේය"),
+    "d": ("r2", "සෛල බෙදීම"),
+}
+
+
+def _candidates(ids, source, scores=None):
+    return [
+        Candidate(
+            chunk_id=cid,
+            resource_id=CORPUS[cid][0],
+            text=CORPUS[cid][1],
+            scores={source: (scores or {}).get(cid, 1.0)},
+        )
+        for cid in ids
+    ]
+
+
+def _ctx(lexical=(), dense=(), **kwargs):
+    ctx = RetrievalContext(query="සෛලය", resource_ids=["r1", "r2"], **kwargs)
+    ctx.lexical = _candidates(lexical, "lexical")
+    ctx.dense = _candidates(dense, "dense")
+    for source in ("lexical", "dense"):
+        for rank, candidate in enumerate(getattr(ctx, source), start=1):
+            candidate.ranks[source] = rank
+    return ctx
+
+
+def test_scope_stage_narrows_resources():
+    ctx = _ctx()
+    stage = ScopeStage(lambda ctx: [rid for rid in ctx.resource_ids if rid != "r2"])
+
+    assert stage.input_count(ctx) == 2
+    assert stage.run(ctx) == 1
+    assert ctx.resource_ids == ["r1"]
+
+
+def test_search_stage_truncates_and_ranks():
+    ctx = _ctx()
+    stage = LexicalStage(lambda ctx, k: _candidates(["d", "a", "c"], "lexical"), top_k=2)
+
+    assert stage.run(ctx) == 2
+    assert [(c.chunk_id, c.ranks["lexical"]) for c in ctx.lexical] == [("d", 1), ("a", 2)]
+
+
+def test_concat_fusion_keeps_lexical_first_and_dedupes():
+    ctx = _ctx(lexical=["c", "a"], dense=["a", "b", "d"])
+
+    assert FusionStage("concat", pool_size=3).run(ctx) == 3
+    assert [c.chunk_id for c in ctx.candidates] == ["c", "a", "b"]
+    assert set(ctx.candidates[1].scores) == {"lexical", "dense"}
+
+
+def test_rrf_fusion_rewards_agreement():
+    ctx = _ctx(lexical=["c", "a"], dense=["a", "b"])
+
+    FusionStage("rrf", rrf_k=60).run(ctx)
+
+    assert ctx.candidates[0].chunk_id == "a"
+    assert ctx.candidates[0].scores["fusion"] == pytest.approx(1 / 62 + 1 / 61)
+
+
+def test_weighted_fusion_applies_boosts():
+    ctx = _ctx()
+    ctx.lexical = _candidates(["a", "b"], "lexical", {"a": 1.0, "b": 2.0})
+    ctx.dense = _candidates(["a", "b"], "dense", {"a": 0.5, "b": 0.5})
+
+    FusionStage(
+        "weighted",
+        weights={"lexical": 0.6, "dense": 0.4},
+        boosts=[lambda ctx, c: 3.0 if c.chunk_id == "a" else 1.0],
+    ).run(ctx)
+
+    assert [c.chunk_id for c in ctx.candidates] == ["a", "b"]
+    assert ctx.candidates[0].scores["fusion"] == pytest.approx((0.6 + 0.2) * 3)
+
+
+def test_rerank_orders_by_score_and_survives_failures():
+    ctx = _ctx(dense=["a", "b", "c"])
+    FusionStage("dense").run(ctx)
+
+    RerankStage(lambda query, candidates: [len(c.text) for c in candidates], top_k=2).run(ctx)
+    assert [c.chunk_id for c in ctx.candidates] == ["c", "a"]
+
+    def broken(query, candidates):
+        raise RuntimeError("model unavailable")
+
+    RerankStage(broken, top_k=1).run(ctx)
+    assert [c.chunk_id for c in ctx.candidates] == ["c"]
+
+
+def test_context_packing_stops_at_budget():
+    ctx = _ctx(dense=["a", "b", "c"])
+    FusionStage("dense").run(ctx)
+    budget = len(CORPUS["a"][1]) + len(CORPUS["b"][1])
+
+    assert ContextPackingStage(max_chars=budget, separator="|").run(ctx) == 2
+    assert ctx.context == CORPUS["a"][1] + "|" + CORPUS["b"][1]
+
+
+def test_pipeline_traces_every_stage(monkeypatch):
+    monkeypatch.setattr(retrieval_pipeline, "_stats", PipelineStats())
+    pipeline = RetrievalPipeline("test", [
+        ScopeStage(lambda ctx: ["r1"]),
+        LexicalStage(lambda ctx, k: _candidates(["a"], "lexical")),
+        DenseStage(lambda ctx, k: _candidates(["a", "b"], "dense")),
+        FusionStage("rrf"),
+        ContextPackingStage(max_chunks=1),
+    ])
+
+    ctx = pipeline.run("සෛලය", ["r1", "r2"])
+
+    assert [(t["stage"], t["in"], t["out"]) for t in ctx.trace] == [
+        ("scope", 2, 1),
+        ("lexical", 1, 1),
+        ("dense", 1, 2),
+        ("fusion", 3, 2),
+        ("packing", 2, 1),
+    ]
+    assert ctx.candidates[0].chunk_id == "a"
+    assert retrieval_pipeline.pipeline_stats()["test"]["fusion"]["runs"] == 1
+
+
+def test_pipeline_respects_request_deadline():
+    pipeline = RetrievalPipeline("test", [ScopeStage(lambda ctx: ctx.resource_ids)])
+
+    with deadline_scope(0):
+        with pytest.raises(DeadlineExceeded):
+            pipeline.run("q", ["r1"])
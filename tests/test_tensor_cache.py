@@ -0,0 +1,93 @@
+import threading
+
+import torch
+
+from app.shared.ai.tensor_cache import TensorLRUCache
+
+
+def _vec(value, dim=4):
+    return torch.full((dim,), float(value))
+
+
+def _entry_bytes(key, dim=4, fp16=False):
+    import sys
+
+    return dim * (2 if fp16 else 4) + sys.getsizeof(key)
+
+
+def test_evicts_least_recently_used_entry_when_over_budget():
+    cache = TensorLRUCache(max_bytes=_entry_bytes("a") * 2)
+    cache["a"] = _vec(1)
+    cache["b"] = _vec(2)
+
+    assert cache.get("a") is not None  # "a" is now most recently used
+    cache["c"] = _vec(3)
+
+    assert "a" in cache and "c" in cache
+    assert "b" not in cache
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["bytes"] <= stats["max_bytes"]
+
+
+def test_fp16_storage_returns_float32_tensors():
+    cache = TensorLRUCache(max_bytes=10_000, store_fp16=True)
+    cache.put_many({"a": _vec(0.5), "b": _vec(0.25)})
+
+    found = cache.get_many(["a", "b", "missing"])
+
+    assert set(found) == {"a", "b"}
+    assert found["a"].dtype == torch.float32
+    assert torch.allclose(found["b"], _vec(0.25))
+    assert cache.stats()["bytes"] == _entry_bytes("a", fp16=True) + _entry_bytes("b", fp16=True)
+
+
+def test_hit_rate_and_missing_key_behaviour():
+    cache = TensorLRUCache(max_bytes=10_000)
+    cache["a"] = _vec(1)
+
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+
+    try:
+        cache["b"]
+    except KeyError:
+        pass
+    else:
+        raise AssertionError("expected KeyError without a loader")
+
+
+def test_getitem_reloads_evicted_entry_through_loader():
+    loaded = []
+
+    def loader(keys):
+        loaded.extend(keys)
+        return {k: _vec(9) for k in keys}
+
+    cache = TensorLRUCache(max_bytes=10_000, loader=loader)
+
+    assert torch.equal(cache["gone"], _vec(9))
+    assert loaded == ["gone"]
+    assert "gone" in cache
+
+
+def test_concurrent_puts_stay_within_budget():
+    cache = TensorLRUCache(max_bytes=_entry_bytes("k-0-00") * 10)
+
+    def worker(n):
+        for i in range(50):
+            cache[f"k-{n}-{i:02d}"] = _vec(i)
+            cache.get(f"k-{n}-{i:02d}")
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    stats = cache.stats()
+    assert stats["bytes"] <= stats["max_bytes"]
+    assert len(cache) <= 10
+    assert stats["evictions"] == 200 - len(cache)
@@ -0,0 +1,127 @@
+from uuid import uuid4
+
+import pytest
+
+from app.core import vector_index
+from app.repositories import resource_chunk_repository
+from app.repositories.resource_chunk_repository import ResourceChunkRepository
+
+CHUNKS = vector_index.TARGETS["resource_chunks"]
+
+
+def _index(method="hnsw", options=None, valid=True, name="ix_resource_chunks_embedding_ann", representation="full"):
+    return {
+        "index_name": name, "method": method, "options": options or [],
+        "size_bytes": 0, "valid": valid, "scans": 0, "representation": representation,
+    }
+
+
+def test_ivfflat_lists_follow_row_count():
+    assert vector_index.ivfflat_lists(0) == 10
+    assert vector_index.ivfflat_lists(250_000) == 250
+    assert vector_index.ivfflat_lists(4_000_000) == 2000
+
+
+def test_create_index_sql():
+    assert vector_index.create_index_sql(CHUNKS, "hnsw", m=24, ef_construction=128) == (
+        "CREATE INDEX IF NOT EXISTS ix_resource_chunks_embedding_ann ON resource_chunks "
+        "USING hnsw (embedding vector_cosine_ops) WITH (m = 24, ef_construction = 128)"
+    )
+    assert "WITH (lists = 50)" in vector_index.create_index_sql(
+        CHUNKS, "ivfflat", rows=50_000, concurrently=True
+    )
+    with pytest.raises(ValueError):
+        vector_index.create_index_sql(CHUNKS, "flat")
+
+
+def test_compact_index_and_distance_expressions_match():
+    assert vector_index.create_index_sql(CHUNKS, "hnsw", representation="halfvec") == (
+        "CREATE INDEX IF NOT EXISTS ix_resource_chunks_embedding_ann_halfvec ON resource_chunks "
+        "USING hnsw ((embedding::halfvec(768)) halfvec_cosine_ops) WITH (m = 16, ef_construction = 64)"
+    )
+    assert "(binary_quantize(embedding)::bit(768)) bit_hamming_ops" in vector_index.create_index_sql(
+        CHUNKS, "hnsw", representation="binary"
+    )
+    assert vector_index.distance_sql(CHUNKS, "binary") == (
+        "binary_quantize(embedding)::bit(768) <~> binary_quantize((:query_embedding)::vector)"
+    )
+    assert vector_index.drop_index_sql(CHUNKS, representation="halfvec") == [
+        "DROP INDEX IF EXISTS ix_resource_chunks_embedding_ann_halfvec"
+    ]
+    with pytest.raises(ValueError):
+        vector_index.create_index_sql(vector_index.TARGETS["resource_files"], "hnsw", representation="binary")
+
+
+def test_representation_of_index_definition():
+    assert vector_index.representation_of(
+        "CREATE INDEX x ON public.resource_chunks USING hnsw (((embedding)::halfvec(768)) halfvec_cosine_ops)"
+    ) == "halfvec"
+    assert vector_index.representation_of(
+        "CREATE INDEX x ON public.resource_chunks USING hnsw (((binary_quantize(embedding))::bit(768)) bit_hamming_ops)"
+    ) == "binary"
+    assert vector_index.representation_of("CREATE INDEX x USING hnsw (embedding vector_cosine_ops)") == "full"
+
+
+def test_assess_flags_stale_ivfflat_lists_and_missing_indexes():
+    healthy = vector_index.assess(CHUNKS, [_index()], rows=10_000, preferred_method="hnsw")
+    assert healthy["status"] == "ok" and healthy["issues"] == []
+
+    stale = vector_index.assess(
+        CHUNKS, [_index("ivfflat", ["lists=100"])], rows=2_000_000, preferred_method="ivfflat"
+    )
+    assert stale["status"] == "warn"
+    assert "suggest 1414" in stale["issues"][0]
+
+    broken = vector_index.assess(CHUNKS, [_index(valid=False)], rows=10, preferred_method="hnsw")
+    assert broken["status"] == "missing"
+    assert "INVALID" in broken["issues"][0]
+
+
+def test_assess_requires_the_searched_representation():
+    indexes = [_index(), _index(name="ix_resource_chunks_embedding_ann_halfvec", representation="halfvec")]
+
+    assert vector_index.assess(CHUNKS, indexes, rows=10, preferred_method="hnsw")["status"] == "ok"
+    assert vector_index.assess(
+        CHUNKS, indexes, rows=10, preferred_method="hnsw", representation="halfvec"
+    )["status"] == "ok"
+
+    missing = vector_index.assess(CHUNKS, [_index()], rows=10, preferred_method="hnsw", representation="binary")
+    assert missing["status"] == "missing"
+    assert "no valid binary ANN index" in missing["issues"][0]
+
+
+class _RecordingSession:
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        self.statements.append((str(statement), params))
+        return self
+
+    def mappings(self):
+        return []
+
+
+def test_vector_search_sets_recall_knobs_per_query():
+    session = _RecordingSession()
+
+    ResourceChunkRepository(session).vector_search([uuid4()], [0.1] * 3, top_k=200, ef_search=40, probes=5)
+
+    settings_calls = [params for sql, params in session.statements if "set_config" in sql]
+    assert settings_calls == [{"value": "200"}, {"value": "5"}]
+    assert "ORDER BY embedding <=>" in session.statements[-1][0]
+
+
+def test_compact_vector_search_rescores_oversampled_candidates(monkeypatch):
+    monkeypatch.setattr(resource_chunk_repository.settings, "VECTOR_RESCORE_FACTOR", {"halfvec": 3})
+    session = _RecordingSession()
+
+    ResourceChunkRepository(session).vector_search(
+        [uuid4()], [0.1] * 3, top_k=50, ef_search=100, representation="halfvec"
+    )
+
+    sql, params = session.statements[-1]
+    assert session.statements[0][1] == {"value": "150"}
+    assert "ORDER BY embedding::halfvec(768) <=> (:query_embedding)::halfvec(768)" in sql
+    assert "FROM candidates" in sql and "ORDER BY embedding <=> (:query_embedding)::vector" in sql
+    assert (params["candidates"], params["top_k"]) == (150, 50)
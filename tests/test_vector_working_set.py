@@ -0,0 +1,142 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.services import vector_working_set as working_set_module
+from app.services.vector_working_set import VectorWorkingSetCache
+
+DIM = working_set_module.EMBEDDING_DIM
+
+
+def _vector(*head):
+    vec = np.zeros(DIM, dtype=np.float32)
+    vec[: len(head)] = head
+    return vec
+
+
+CHUNKS = {
+    "r1": [("a", _vector(1, 0)), ("b", _vector(0, 1))],
+    "r2": [("c", _vector(1, 1)), ("d", _vector(-1, 0))],
+}
+
+
+@pytest.fixture
+def repository(monkeypatch):
+    loads = []
+
+    def get_chunk_embeddings(self, resource_ids):
+        loads.append(sorted(resource_ids))
+        return [
+            SimpleNamespace(
+                id=cid, resource_id=rid, chunk_index=i, content=cid, embedding_model="m", embedding=vec
+            )
+            for rid in sorted(resource_ids)
+            for i, (cid, vec) in enumerate(CHUNKS.get(rid, []))
+        ]
+
+    def count_embedded_chunks(self, resource_ids):
+        return sum(len(CHUNKS.get(rid, [])) for rid in resource_ids)
+
+    repo = working_set_module.ResourceChunkRepository
+    monkeypatch.setattr(repo, "get_chunk_embeddings", get_chunk_embeddings)
+    monkeypatch.setattr(repo, "count_embedded_chunks", count_embedded_chunks)
+    monkeypatch.setattr(working_set_module.settings, "VECTOR_WORKING_SET_ENABLED", True)
+    return loads
+
+
+def test_search_matches_vector_search_ranking_and_similarity(repository):
+    cache = VectorWorkingSetCache(max_bytes=10**7, ttl_seconds=60)
+
+    hits = cache.search(None, "s1", ["r1", "r2"], list(_vector(1, 0)), top_k=3)
+
+    assert [h["id"] for h in hits] == ["a", "c", "b"]
+    # 1 / (1 + cosine distance)
+    assert [h["similarity"] for h in hits] == pytest.approx([1.0, 1 / (2 - 2 ** -0.5), 0.5])
+    assert hits[0]["resource_id"] == "r1" and hits[0]["content"] == "a"
+
+
+def test_follow_up_questions_reuse_the_matrix_and_respect_scope(repository):
+    cache = VectorWorkingSetCache(max_bytes=10**7, ttl_seconds=60)
+    cache.search(None, "s1", ["r1", "r2"], list(_vector(1, 0)), top_k=2)
+
+    hits = cache.search(None, "s1", ["r2"], list(_vector(1, 0)), top_k=5)
+
+    assert [h["id"] for h in hits] == ["c", "d"]
+    assert repository == [["r1", "r2"]]
+    assert cache.stats()["hits"] == 1
+
+
+def test_new_resource_grows_the_working_set(repository):
+    cache = VectorWorkingSetCache(max_bytes=10**7, ttl_seconds=60)
+    cache.search(None, "s1", ["r1"], list(_vector(1, 0)))
+    cache.search(None, "s1", ["r2"], list(_vector(1, 0)))
+    cache.search(None, "s1", ["r1", "r2"], list(_vector(1, 0)))
+
+    assert repository == [["r1"], ["r1", "r2"]]
+
+
+def test_invalidation_by_session_and_resource(repository):
+    cache = VectorWorkingSetCache(max_bytes=10**7, ttl_seconds=60)
+    cache.search(None, "s1", ["r1"], list(_vector(1, 0)))
+    cache.search(None, "s2", ["r2"], list(_vector(1, 0)))
+
+    cache.invalidate_resource("r1")
+    assert cache.stats()["sessions"] == 1
+
+    cache.invalidate_session("s2")
+    assert cache.stats()["sessions"] == 0
+    assert cache.stats()["bytes"] == 0
+
+
+def test_memory_cap_evicts_least_recent_session_and_bypasses_oversized(repository):
+    one_session = 2 * DIM * 4 + 200
+    cache = VectorWorkingSetCache(max_bytes=one_session, ttl_seconds=60)
+
+    cache.search(None, "s1", ["r1"], list(_vector(1, 0)))
+    cache.search(None, "s2", ["r2"], list(_vector(1, 0)))
+    assert cache.stats()["sessions"] == 1
+    assert cache.stats()["evictions"] == 1
+
+    assert cache.search(None, "s3", ["r1", "r2"], list(_vector(1, 0))) is None
+    assert cache.stats()["bypassed"] == 1
+
+
+def test_disabled_or_sessionless_falls_back(repository, monkeypatch):
+    cache = VectorWorkingSetCache(max_bytes=10**7, ttl_seconds=60)
+    assert cache.search(None, None, ["r1"], list(_vector(1, 0))) is None
+
+    monkeypatch.setattr(working_set_module.settings, "VECTOR_WORKING_SET_ENABLED", False)
+    assert cache.search(None, "s1", ["r1"], list(_vector(1, 0))) is None
+    assert repository == []
+
+
+def test_miss_loads_the_whole_session_so_other_scopes_hit(repository):
+    cache = VectorWorkingSetCache(max_bytes=10**7, ttl_seconds=60)
+    session = ["r1", "r2"]
+
+    cache.search(None, "s1", ["r1"], list(_vector(1, 0)), session_resource_ids=session)
+    hits = cache.search(None, "s1", ["r2"], list(_vector(1, 0)), session_resource_ids=session)
+
+    assert [h["id"] for h in hits] == ["c", "d"]
+    assert repository == [["r1", "r2"]]
+    assert cache.stats()["hits"] == 1
+
+
+def test_whole_session_over_budget_loads_only_the_scope(repository):
+    one_resource = 2 * DIM * 4 + 200
+    cache = VectorWorkingSetCache(max_bytes=one_resource, ttl_seconds=60)
+
+    hits = cache.search(None, "s1", ["r1"], list(_vector(1, 0)), session_resource_ids=["r1", "r2"])
+
+    assert [h["id"] for h in hits] == ["a", "b"]
+    assert repository == [["r1"]]
+
+
+def test_entry_over_budget_after_estimate_is_bypassed(repository):
+    # Fits the embedding estimate, not the loaded contents
+    cache = VectorWorkingSetCache(max_bytes=2 * DIM * 4, ttl_seconds=60)
+
+    assert cache.search(None, "s1", ["r1"], list(_vector(1, 0))) is None
+    assert cache.stats()["bypassed"] == 1
+    assert cache.stats()["sessions"] == 0
@@ -0,0 +1,75 @@
+from uuid import uuid4
+
+import torch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.components.voice_qa.routers import voice_router
+from app.components.voice_qa.services.whisper_service import VoiceService
+from app.core.database import get_db
+
+
+class FakeTokenizer:
+    def __init__(self):
+        self.kwargs = None
+
+    def __call__(self, text, **kwargs):
+        self.kwargs = kwargs
+        length = min(len(text.split()), kwargs["max_length"])
+        return {"input_ids": torch.ones((1, length), dtype=torch.long)}
+
+
+class FakeTransformer:
+    def __call__(self, input_ids):
+        hidden = torch.arange(input_ids.shape[1], dtype=torch.float32).repeat(2, 1).T.unsqueeze(0)
+        return type("Out", (), {"last_hidden_state": hidden})()
+
+
+class FakeSentenceModel(list):
+    def __init__(self):
+        super().__init__([type("Module", (), {"auto_model": FakeTransformer()})()])
+        self.tokenizer = FakeTokenizer()
+
+
+def test_evaluation_embedding_mean_pools_up_to_512_tokens(monkeypatch):
+    model = FakeSentenceModel()
+    monkeypatch.setattr(VoiceService, "_load_embedding_model", staticmethod(lambda: model))
+
+    embedding = VoiceService._get_embedding(" ".join(["වචනය"] * 600))
+
+    assert model.tokenizer.kwargs["max_length"] == 512
+    assert model.tokenizer.kwargs["truncation"] is True
+    # Mean of token positions 0..511
+    assert embedding.shape == (1, 2)
+    assert embedding[0][0] == 255.5
+
+
+def test_transcribe_passes_retrieved_chunk_text_as_hints(monkeypatch, tmp_path):
+    resource_id = uuid4()
+    retrieved, hints = [], []
+
+    def fake_retrieve(*, query, resource_ids, top_k):
+        retrieved.append((query, resource_ids))
+        return [{"chunk_id": "c1", "text": "පළමු කොටස"}, {"chunk_id": "c2", "text": "දෙවන කොටස"}]
+
+    async def fake_standardize(raw_text, context_hints=""):
+        hints.append(context_hints)
+        return raw_text, raw_text
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(VoiceService, "transcribe_audio", staticmethod(lambda path: "කොටස"))
+    monkeypatch.setattr(VoiceService, "astandardize_southern_sinhala", staticmethod(fake_standardize))
+    monkeypatch.setattr(voice_router, "retrieve_top_k", fake_retrieve)
+    app = FastAPI()
+    app.include_router(voice_router.router)
+    app.dependency_overrides[get_db] = lambda: None
+
+    response = TestClient(app).post(
+        "/transcribe",
+        files={"audio": ("a.wav", b"RIFF", "audio/wav")},
+        data={"resource_ids": str(resource_id)},
+    )
+
+    assert response.status_code == 200
+    assert retrieved == [("කොටස", [resource_id])]
+    assert hints == ["පළමු කොටස\nදෙවන කොටස"]
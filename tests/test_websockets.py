@@ -0,0 +1,33 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers import websockets
+
+
+def test_generation_runs_while_socket_keeps_reading(monkeypatch):
+    started = []
+
+    async def fake_stream_generation(websocket, user_id, request):
+        started.append(request["message_id"])
+        if request["message_id"] == "first":
+            # Finishes only once the second frame has been read
+            for _ in range(200):
+                if "second" in started:
+                    break
+                await asyncio.sleep(0.01)
+        await websocket.send_json({"type": "done", "message_id": request["message_id"], "seen": list(started)})
+
+    monkeypatch.setattr(websockets, "decode_token", lambda token: {"sub": "u1"})
+    monkeypatch.setattr(websockets, "stream_generation", fake_stream_generation)
+    app = FastAPI()
+    app.include_router(websockets.router)
+
+    with TestClient(app).websocket_connect("/ws?token=t") as ws:
+        ws.send_json({"action": "generate", "message_id": "first"})
+        ws.send_json({"action": "generate", "message_id": "second"})
+        events = [ws.receive_json(), ws.receive_json()]
+
+    assert [e["message_id"] for e in events] == ["second", "first"]
+    assert events[1]["seen"] == ["first", "second"]